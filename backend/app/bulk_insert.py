@@ -0,0 +1,106 @@
+"""
+Inserção em lote de DataFrames nas tabelas do banco.
+
+Usado pelos importadores de CSV: em vez de criar um objeto ORM por linha,
+o DataFrame já validado é gravado de uma vez. No PostgreSQL (psycopg2) usa
+COPY FROM STDIN; nos demais bancos (SQLite em desenvolvimento) usa
+executemany em lotes. Roda dentro da transação da sessão, então os rollups
+e o commit do endpoint enxergam as linhas inseridas.
+"""
+
+import io
+import logging
+from typing import List
+
+import pandas as pd
+from sqlalchemy import insert
+from sqlalchemy.orm import Session
+
+logger = logging.getLogger(__name__)
+
+TAMANHO_LOTE = 5000
+
+
+def _completar_defaults(tabela, df: pd.DataFrame) -> pd.DataFrame:
+    """Preenche colunas ausentes que têm default escalar no modelo (ex: booking=0.0)."""
+    df = df.copy()
+    for coluna in tabela.columns:
+        if coluna.name in df.columns or coluna.primary_key:
+            continue
+        if coluna.default is not None and coluna.default.is_scalar:
+            df[coluna.name] = coluna.default.arg
+    return df
+
+
+def _linhas(df: pd.DataFrame) -> List[tuple]:
+    """Converte o DataFrame em tuplas de tipos Python (NaN/NaT viram None)."""
+    colunas = []
+    for nome in df.columns:
+        serie = df[nome]
+        if serie.isna().any():
+            serie = serie.astype(object).where(serie.notna(), None)
+        colunas.append(serie.tolist())
+    return list(zip(*colunas))
+
+
+_PLACEHOLDERS = {"qmark": "?", "format": "%s", "pyformat": "%s"}
+
+
+def _copy_postgres(db: Session, tabela, df: pd.DataFrame) -> bool:
+    """COPY FROM STDIN via psycopg2. Retorna False se o driver não suporta."""
+    dbapi_conn = db.connection().connection.dbapi_connection
+    cursor = dbapi_conn.cursor()
+    if not hasattr(cursor, "copy_expert"):
+        cursor.close()
+        return False
+
+    buffer = io.StringIO()
+    df.to_csv(buffer, index=False, header=False, na_rep="\\N")
+    buffer.seek(0)
+
+    colunas = ", ".join(f'"{c}"' for c in df.columns)
+    try:
+        cursor.copy_expert(
+            f"COPY {tabela.name} ({colunas}) FROM STDIN WITH (FORMAT csv, NULL '\\N')",
+            buffer
+        )
+    finally:
+        cursor.close()
+    return True
+
+
+def inserir_dataframe(db: Session, modelo, df: pd.DataFrame, tamanho_lote: int = TAMANHO_LOTE) -> int:
+    """
+    Insere as linhas do DataFrame na tabela do modelo.
+    As colunas do DataFrame devem ter os nomes das colunas da tabela.
+    Retorna o número de linhas inseridas.
+    """
+    if df.empty:
+        return 0
+
+    tabela = modelo.__table__
+    df = _completar_defaults(tabela, df)
+
+    if db.get_bind().dialect.name == "postgresql":
+        if _copy_postgres(db, tabela, df):
+            return len(df)
+        logger.info("Driver sem suporte a COPY, usando executemany")
+
+    placeholder = _PLACEHOLDERS.get(db.get_bind().dialect.paramstyle)
+    linhas = _linhas(df)
+
+    if placeholder:
+        # executemany direto no driver, sem o processamento de parâmetros por linha do ORM
+        sql = (
+            f"INSERT INTO {tabela.name} ({', '.join(df.columns)}) "
+            f"VALUES ({', '.join([placeholder] * len(df.columns))})"
+        )
+        for inicio in range(0, len(linhas), tamanho_lote):
+            db.connection().exec_driver_sql(sql, linhas[inicio:inicio + tamanho_lote])
+    else:
+        stmt = insert(tabela)
+        for inicio in range(0, len(linhas), tamanho_lote):
+            lote = linhas[inicio:inicio + tamanho_lote]
+            db.execute(stmt, [dict(zip(df.columns, linha)) for linha in lote])
+
+    return len(df)
@@ -0,0 +1,284 @@
+"""
+Cache de respostas dos endpoints de leitura (dashboards, detalhados, DFC/DRE).
+
+As respostas são guardadas por endpoint + parâmetros (mes, ano, funil...) e
+marcadas com tags de dependência no formato "tabela" e "tabela:ano-mes".
+Os endpoints de escrita chamam invalidar()/invalidar_registros() após o commit.
+
+A invalidação é feita por versão: cada tag tem um contador que entra na chave
+da resposta. Invalidar uma tag incrementa o contador, então as respostas antigas
+deixam de ser encontradas (e saem pelo LRU/TTL). Isso também evita gravar no
+cache uma resposta calculada antes de um commit concorrente.
+
+Backends (variável CACHE_BACKEND):
+- memoria (padrão): LRU + TTL no processo. Cada worker do uvicorn tem o seu.
+- redis: compartilhado entre workers, via REDIS_URL (requer o pacote redis).
+- off: desliga o cache.
+"""
+
+import hashlib
+import inspect
+import json
+import logging
+import os
+import threading
+import time
+from collections import OrderedDict
+from functools import wraps
+from typing import Any, Callable, Dict, Iterable, List, Optional, Sequence, Union
+
+from fastapi.encoders import jsonable_encoder
+from sqlalchemy.orm import Session
+from starlette.responses import Response
+
+logger = logging.getLogger(__name__)
+
+CACHE_BACKEND = os.getenv("CACHE_BACKEND", "memoria").lower()
+CACHE_TTL = int(os.getenv("CACHE_TTL", "300"))
+CACHE_MAX_ENTRADAS = int(os.getenv("CACHE_MAX_ENTRADAS", "512"))
+REDIS_URL = os.getenv("REDIS_URL", "redis://localhost:6379/0")
+
+# Tag presente em todas as entradas; invalidá-la limpa o cache inteiro
+TAG_GLOBAL = "*"
+
+
+# ==================== BACKENDS ====================
+
+class MemoriaBackend:
+    """LRU com TTL em memória, seguro para uso entre threads."""
+
+    def __init__(self, max_entradas: int = CACHE_MAX_ENTRADAS):
+        self.max_entradas = max_entradas
+        self._entradas: "OrderedDict[str, tuple]" = OrderedDict()
+        self._versoes: Dict[str, int] = {}
+        self._lock = threading.Lock()
+
+    def get(self, chave: str) -> Optional[Any]:
+        with self._lock:
+            entrada = self._entradas.get(chave)
+            if entrada is None:
+                return None
+            expira_em, valor = entrada
+            if expira_em < time.monotonic():
+                del self._entradas[chave]
+                return None
+            self._entradas.move_to_end(chave)
+            return valor
+
+    def set(self, chave: str, valor: Any, ttl: int):
+        with self._lock:
+            self._entradas[chave] = (time.monotonic() + ttl, valor)
+            self._entradas.move_to_end(chave)
+            while len(self._entradas) > self.max_entradas:
+                self._entradas.popitem(last=False)
+
+    def versoes(self, tags: Sequence[str]) -> List[int]:
+        with self._lock:
+            return [self._versoes.get(tag, 0) for tag in tags]
+
+    def incrementar(self, tags: Iterable[str]):
+        with self._lock:
+            for tag in tags:
+                self._versoes[tag] = self._versoes.get(tag, 0) + 1
+
+
+class RedisBackend:
+    """Backend compartilhado entre workers. Valores em JSON, versões via INCR."""
+
+    PREFIXO = "medgm:cache:"
+
+    def __init__(self, url: str = REDIS_URL):
+        import redis  # dependência opcional
+        self._redis = redis.Redis.from_url(url)
+
+    def get(self, chave: str) -> Optional[Any]:
+        bruto = self._redis.get(self.PREFIXO + chave)
+        return json.loads(bruto) if bruto is not None else None
+
+    def set(self, chave: str, valor: Any, ttl: int):
+        self._redis.set(self.PREFIXO + chave, json.dumps(valor), ex=ttl)
+
+    def versoes(self, tags: Sequence[str]) -> List[int]:
+        valores = self._redis.mget([self.PREFIXO + "tag:" + tag for tag in tags])
+        return [int(v) if v is not None else 0 for v in valores]
+
+    def incrementar(self, tags: Iterable[str]):
+        pipe = self._redis.pipeline()
+        for tag in tags:
+            pipe.incr(self.PREFIXO + "tag:" + tag)
+        pipe.execute()
+
+
+def _criar_backend():
+    if CACHE_BACKEND == "off":
+        return None
+    if CACHE_BACKEND == "redis":
+        try:
+            backend = RedisBackend()
+            logger.info(f"Cache de respostas usando Redis: {REDIS_URL}")
+            return backend
+        except Exception as e:
+            logger.warning(f"Redis indisponível ({str(e)}), usando cache em memória")
+    return MemoriaBackend()
+
+
+backend = _criar_backend()
+
+
+# ==================== TAGS E INVALIDAÇÃO ====================
+
+def tag(tabela: str, mes: Optional[int] = None, ano: Optional[int] = None) -> str:
+    """Tag de dependência: "tabela" ou "tabela:ano-mes"."""
+    if mes is None or ano is None:
+        return tabela
+    return f"{tabela}:{ano}-{int(mes):02d}"
+
+
+def periodos_ate(mes: int, ano: int, meses_anteriores: int = 0) -> List[tuple]:
+    """(mes, ano) do período informado e dos N meses anteriores."""
+    periodos = []
+    for i in range(meses_anteriores + 1):
+        m, a = mes - i, ano
+        while m <= 0:
+            m += 12
+            a -= 1
+        periodos.append((m, a))
+    return periodos
+
+
+def _executar(operacao, *args):
+    """Falhas do backend (ex: Redis fora do ar) nunca derrubam a requisição."""
+    if backend is None:
+        return None
+    try:
+        return operacao(*args)
+    except Exception as e:
+        logger.warning(f"Falha no cache de respostas: {str(e)}")
+        return None
+
+
+def _incrementar(tags):
+    backend.incrementar(tags)
+
+
+def invalidar(tabela: str, mes: Optional[int] = None, ano: Optional[int] = None):
+    """
+    Invalida as respostas que dependem da tabela no período (mes, ano).
+    Sem período, invalida tudo que depende da tabela.
+    """
+    _executar(_incrementar, [tag(tabela, mes, ano)])
+
+
+def invalidar_registros(*registros):
+    """Invalida tabela + período de cada registro (precisa ter mes e ano)."""
+    tags = {
+        tag(r.__tablename__, getattr(r, 'mes', None), getattr(r, 'ano', None))
+        for r in registros if r is not None
+    }
+    if tags:
+        _executar(_incrementar, tags)
+
+
+def limpar():
+    """Invalida todas as respostas em cache (ex: limpeza/restauração da base)."""
+    _executar(_incrementar, [TAG_GLOBAL])
+
+
+# ==================== DECORATOR ====================
+
+def _chave(namespace: str, params: Dict[str, Any], tags: List[str], versoes: List[int]) -> str:
+    assinatura = json.dumps(
+        {"p": params, "v": dict(zip(tags, versoes))},
+        sort_keys=True, default=str
+    )
+    return f"{namespace}:{hashlib.sha1(assinatura.encode()).hexdigest()}"
+
+
+def _buscar(namespace: str, tabelas: Sequence[str], params: Dict[str, Any],
+            meses_anteriores: Union[int, Callable[[int, int], int]] = 0):
+    """Retorna (chave, valor em cache). chave None: não usar o cache."""
+    if backend is None:
+        return None, None
+
+    mes, ano = params.get('mes'), params.get('ano')
+
+    tags = [TAG_GLOBAL] + list(tabelas)
+    if mes is not None and ano is not None:
+        janela = meses_anteriores(mes, ano) if callable(meses_anteriores) else meses_anteriores
+        tags += [
+            tag(tabela, m, a)
+            for tabela in tabelas
+            for m, a in periodos_ate(mes, ano, janela)
+        ]
+
+    versoes = _executar(backend.versoes, tags)
+    if versoes is None:
+        return None, None
+
+    chave = _chave(namespace, params, tags, versoes)
+    return chave, _executar(backend.get, chave)
+
+
+def _guardar(chave: Optional[str], resultado: Any, ttl: Optional[int] = None):
+    if chave is None or isinstance(resultado, Response):
+        return resultado
+    valor = jsonable_encoder(resultado)
+    _executar(backend.set, chave, valor, ttl or CACHE_TTL)
+    return valor
+
+
+def valor_em_cache(namespace: str, tabelas: Sequence[str], params: Dict[str, Any],
+                   calcular: Callable[[], Any], ttl: Optional[int] = None) -> Any:
+    """
+    Cacheia um valor usado por vários endpoints (ex: equipe do período), com as
+    mesmas tags e invalidação de cache_resposta. calcular() deve retornar
+    tipos JSON (dict, list, str, números), que é como o valor volta do Redis.
+    """
+    chave, encontrado = _buscar(namespace, tabelas, params)
+    if encontrado is not None:
+        return encontrado
+    return _guardar(chave, calcular(), ttl)
+
+
+def cache_resposta(namespace: str, tabelas: Sequence[str],
+                   meses_anteriores: Union[int, Callable[[int, int], int]] = 0,
+                   ttl: Optional[int] = None):
+    """
+    Cacheia a resposta de um endpoint com parâmetros mes e ano.
+    Funciona com endpoints síncronos (rodam no threadpool) e async.
+
+    tabelas: tabelas lidas pelo endpoint (nomes de __tablename__).
+    meses_anteriores: quantos meses antes de (mes, ano) o endpoint também lê
+    (comparação com mês anterior, tendências), para invalidar corretamente.
+    Pode ser uma função (mes, ano) -> int quando a janela depende do período.
+    """
+    def buscar(kwargs):
+        params = {
+            nome: valor for nome, valor in kwargs.items()
+            if not isinstance(valor, Session)
+        }
+        return _buscar(namespace, tabelas, params, meses_anteriores)
+
+    def guardar(chave, resultado):
+        return _guardar(chave, resultado, ttl)
+
+    def decorador(func):
+        if inspect.iscoroutinefunction(func):
+            @wraps(func)
+            async def wrapper_async(*args, **kwargs):
+                chave, encontrado = buscar(kwargs)
+                if encontrado is not None:
+                    return encontrado
+                return guardar(chave, await func(*args, **kwargs))
+
+            return wrapper_async
+
+        @wraps(func)
+        def wrapper(*args, **kwargs):
+            chave, encontrado = buscar(kwargs)
+            if encontrado is not None:
+                return encontrado
+            return guardar(chave, func(*args, **kwargs))
+
+        return wrapper
+    return decorador
@@ -0,0 +1,110 @@
+"""
+Classificação das movimentações financeiras nas linhas do DFC e do DRE.
+
+Cada regra é (bucket, condição SQL). As regras de um demonstrativo viram um
+único CASE WHEN, avaliado na ordem: a primeira regra que casa define o bucket,
+então cada movimentação entra em exatamente uma linha. O demonstrativo sai de
+um GROUP BY bucket, sem carregar as movimentações em memória.
+
+A ordem vai do mais específico para o mais genérico. Ex: "IRPJ" contém "PJ"
+(salários), mas cai antes em impostos.
+"""
+
+from typing import List, Tuple
+
+from sqlalchemy import and_, case, func, literal, or_
+from sqlalchemy.sql.elements import ColumnElement
+
+from app.models.models import Financeiro
+
+BUCKET_NAO_CLASSIFICADO = "nao_classificado"
+
+
+def contem(colunas: List[str], termos: List[str]) -> ColumnElement:
+    """Alguma das colunas contém algum dos termos (sem diferenciar maiúsculas)."""
+    return or_(*[
+        func.lower(func.coalesce(getattr(Financeiro, coluna), '')).like(f"%{termo.lower()}%")
+        for coluna in colunas
+        for termo in termos
+    ])
+
+
+def _sem_nulo(coluna: str) -> ColumnElement:
+    return func.coalesce(getattr(Financeiro, coluna), '')
+
+
+# ==================== DFC ====================
+
+CATEGORIAS_RECEITA = ['Venda', 'Recorrencia', 'Mensalidade', 'MRR', 'TCV', 'Assessoria', 'Consultoria']
+
+REGRAS_DFC_ENTRADA: List[Tuple[str, ColumnElement]] = [
+    # Recebimentos de clientes (vendas, recorrencia, mensalidades)
+    ("recebimento_clientes", contem(['categoria', 'produto'], CATEGORIAS_RECEITA)),
+]
+
+REGRAS_DFC_SAIDA: List[Tuple[str, ColumnElement]] = [
+    # Impostos pagos
+    ("impostos", contem(['categoria', 'custo'], ['Imposto', 'IRPF', 'IRPJ', 'PIS', 'COFINS', 'ISS', 'Tributo'])),
+    # Atividades de investimento
+    ("investimento", or_(
+        Financeiro.tipo_custo == 'Investimento',
+        contem(['categoria', 'custo'], ['Investimento', 'Ativo', 'Equipamento', 'Expansao'])
+    )),
+    # Distribuicao de lucros / pro-labore
+    ("distribuicao_lucros", or_(
+        Financeiro.centro_custo == 'Societario',
+        contem(['categoria', 'custo'], ['Pro-labore', 'Distribuicao', 'Dividendo', 'Lucro', 'Societario', 'Socio'])
+    )),
+    # Emprestimos
+    ("emprestimos", contem(['categoria'], ['Emprestimo', 'Financiamento', 'Juros'])),
+    # Pagamento de salarios
+    ("salarios", contem(['categoria', 'custo'], ['Equipe', 'Salario', 'Folha', 'Funcionario', 'CLT', 'PJ'])),
+    # Pagamento a fornecedores (operacao, ferramentas)
+    ("fornecedores", contem(['categoria', 'custo', 'centro_custo'], ['Ferramenta', 'Software', 'Fornecedor', 'Servico', 'Operacao'])),
+    # Outras despesas operacionais
+    ("outras_operacionais", contem(['centro_custo'], ['operac'])),
+]
+
+
+# ==================== DRE ====================
+
+REGRAS_DRE_SAIDA: List[Tuple[str, ColumnElement]] = [
+    # Deducoes (impostos sobre receita, devoluções)
+    ("deducoes", contem(['categoria'], ['Imposto', 'Devolucao', 'Cancelamento', 'Estorno'])),
+    # Despesas Financeiras
+    ("financeiras", or_(
+        Financeiro.centro_custo == 'Financeiro',
+        contem(['categoria'], ['Juros', 'Taxa', 'Multa', 'IOF', 'Financeiro'])
+    )),
+    # CMV / Custos Diretos (variaveis, relacionados a entrega)
+    ("cmv", or_(
+        Financeiro.tipo_custo == 'Variavel',
+        and_(Financeiro.centro_custo == 'Operacao', _sem_nulo('tipo_custo') != 'Fixo')
+    )),
+    # Despesas Operacionais (fixas: comercial, administrativo, operacao fixa)
+    ("comerciais", Financeiro.centro_custo == 'Comercial'),
+    ("administrativas", Financeiro.centro_custo == 'Administrativo'),
+    ("operacionais", and_(Financeiro.centro_custo == 'Operacao', Financeiro.tipo_custo == 'Fixo')),
+    # Salarios e equipe (usados quando nao ha centro de custo)
+    ("equipe", contem(['categoria', 'custo'], ['Equipe', 'Salario', 'Folha'])),
+]
+
+
+def _case(regras: List[Tuple[str, ColumnElement]], padrao: str):
+    return case(*[(condicao, literal(bucket)) for bucket, condicao in regras], else_=literal(padrao))
+
+
+def bucket_dfc():
+    """Expressão SQL com o bucket do DFC de cada movimentação (entradas e saídas)."""
+    return case(
+        (Financeiro.tipo == "entrada", _case(REGRAS_DFC_ENTRADA, "outras_entradas")),
+        else_=_case(REGRAS_DFC_SAIDA, BUCKET_NAO_CLASSIFICADO)
+    ).label("bucket")
+
+
+def bucket_dre():
+    """Expressão SQL com o bucket do DRE de cada movimentação (entradas viram receita)."""
+    return case(
+        (Financeiro.tipo == "entrada", literal("receita")),
+        else_=_case(REGRAS_DRE_SAIDA, BUCKET_NAO_CLASSIFICADO)
+    ).label("bucket")
@@ -73,6 +73,22 @@ def init_db():
     Base.metadata.create_all(bind=engine)
     print("Database tables created successfully")
 
+    # Colunas novas dos modelos que faltam em tabelas criadas antes delas
+    from app.database_colunas import garantir_colunas
+    garantir_colunas(engine)
+
+    # Índices dos modelos que faltam em tabelas criadas antes deles
+    from app.database_indexes import garantir_indices
+    garantir_indices(engine)
+
+    # Popula os rollups comerciais em bancos que já tinham métricas
+    from app.rollups import garantir_rollups
+    db = SessionLocal()
+    try:
+        garantir_rollups(db)
+    finally:
+        db.close()
+
 
 def reset_db():
     """
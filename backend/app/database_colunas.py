@@ -0,0 +1,90 @@
+"""
+Colunas novas dos modelos aplicadas em bancos existentes.
+
+create_all só cria tabelas que não existem; colunas acrescentadas aos
+modelos depois (ex.: periodo, row_hash, updated_at) ficam faltando em bancos antigos e toda
+consulta ORM do modelo falha com "no such column". garantir_colunas compara
+COLUNAS com o banco e adiciona as que faltam (ALTER TABLE ... ADD COLUMN).
+Roda a cada startup (init_db), antes de garantir_indices, que cria os
+índices dessas colunas.
+
+As migrations SQL (app/migrations/) continuam valendo para quem aplica o
+schema à mão; aqui é o mesmo ALTER, idempotente.
+
+Também pode ser executado direto:
+    python -m app.database_colunas
+"""
+
+import logging
+from typing import Callable, List, Tuple
+
+from sqlalchemy import inspect, text
+from sqlalchemy.engine import Engine
+
+from app.database import engine
+
+logger = logging.getLogger(__name__)
+
+
+def _periodo(dialeto: str) -> str:
+    # SQLite só aceita coluna gerada VIRTUAL no ALTER TABLE (STORED só no CREATE TABLE);
+    # o valor é calculado na leitura e pode ser indexado
+    armazenamento = "VIRTUAL" if dialeto == "sqlite" else "STORED"
+    return f"INTEGER GENERATED ALWAYS AS (ano * 100 + mes) {armazenamento}"
+
+
+# (tabela, coluna, definição da coluna para o dialeto)
+COLUNAS: List[Tuple[str, str, Callable[[str], str]]] = [
+    # Migration 005
+    ("vendas", "periodo", _periodo),
+    ("financeiro", "periodo", _periodo),
+    ("social_selling_metricas", "periodo", _periodo),
+    ("sdr_metricas", "periodo", _periodo),
+    ("closer_metricas", "periodo", _periodo),
+    # Migration 006
+    ("sheets_metricas_diarias", "row_hash", lambda dialeto: "VARCHAR(64)"),
+    # Migration 007
+    ("vendas", "updated_at", lambda dialeto: "TIMESTAMP"),
+    ("financeiro", "updated_at", lambda dialeto: "TIMESTAMP"),
+]
+
+
+def garantir_colunas(bind: Engine = engine) -> List[str]:
+    """
+    Adiciona as colunas de COLUNAS que ainda não existem no banco.
+    Retorna "tabela.coluna" das colunas criadas (vazio se já estava tudo criado).
+    """
+    criadas = []
+    inspetor = inspect(bind)
+    tabelas = set(inspetor.get_table_names())
+
+    for tabela, coluna, definicao in COLUNAS:
+        if tabela not in tabelas:
+            continue  # create_all cria a tabela já com a coluna
+        if coluna in {c["name"] for c in inspetor.get_columns(tabela)}:
+            continue
+        try:
+            with bind.begin() as conn:
+                conn.execute(text(
+                    f"ALTER TABLE {tabela} ADD COLUMN {coluna} {definicao(bind.dialect.name)}"
+                ))
+            criadas.append(f"{tabela}.{coluna}")
+        except Exception as e:
+            # Outro worker pode ter criado a coluna ao mesmo tempo
+            logger.warning(f"Erro ao criar coluna {tabela}.{coluna}: {str(e)}")
+
+    if criadas:
+        logger.info(f"Colunas criadas: {', '.join(criadas)}")
+    return criadas
+
+
+if __name__ == "__main__":
+    print("=" * 60)
+    print("CRIANDO COLUNAS DOS MODELOS")
+    print("=" * 60)
+
+    criadas = garantir_colunas()
+    for nome in criadas:
+        print(f"✓ Coluna {nome} criada")
+    if not criadas:
+        print("⏭️  Todas as colunas já existem")
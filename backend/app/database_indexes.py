@@ -1,111 +1,65 @@
 """
-Script para criar índices compostos otimizados no banco de dados.
-Executa uma única vez para melhorar performance de queries.
-"""
-
-from sqlalchemy import text, Index
-from app.database import engine
-from app.models.models import (
-    SocialSellingMetrica,
-    SDRMetrica,
-    CloserMetrica,
-    Venda,
-    Financeiro,
-    Meta
-)
+Índices declarados nos modelos (__table_args__) aplicados em bancos existentes.
 
-def create_composite_indexes():
-    """Cria índices compostos para otimizar queries comuns"""
+create_all só cria os índices junto com tabelas novas; em tabelas que já
+existem ele não faz nada. garantir_indices compara os índices dos modelos
+com os do banco e cria os que faltam (CREATE INDEX IF NOT EXISTS), então
+pode rodar a cada startup (init_db) e em vários workers ao mesmo tempo.
 
-    indexes_to_create = [
-        # Social Selling: queries por mes+ano+vendedor
-        Index('idx_ss_mes_ano_vendedor',
-              SocialSellingMetrica.mes,
-              SocialSellingMetrica.ano,
-              SocialSellingMetrica.vendedor),
+Também pode ser executado direto:
+    python -m app.database_indexes
+"""
 
-        # SDR: queries por mes+ano+sdr e mes+ano+funil
-        Index('idx_sdr_mes_ano_sdr',
-              SDRMetrica.mes,
-              SDRMetrica.ano,
-              SDRMetrica.sdr),
-        Index('idx_sdr_mes_ano_funil',
-              SDRMetrica.mes,
-              SDRMetrica.ano,
-              SDRMetrica.funil),
+import logging
+from typing import List
 
-        # Closer: queries por mes+ano+closer e mes+ano+funil
-        Index('idx_closer_mes_ano_closer',
-              CloserMetrica.mes,
-              CloserMetrica.ano,
-              CloserMetrica.closer),
-        Index('idx_closer_mes_ano_funil',
-              CloserMetrica.mes,
-              CloserMetrica.ano,
-              CloserMetrica.funil),
+from sqlalchemy import inspect
+from sqlalchemy.engine import Engine
+from sqlalchemy.schema import CreateIndex
 
-        # Vendas: queries por mes+ano+vendedor
-        Index('idx_vendas_mes_ano_vendedor',
-              Venda.mes,
-              Venda.ano,
-              Venda.vendedor),
-        Index('idx_vendas_mes_ano_closer',
-              Venda.mes,
-              Venda.ano,
-              Venda.closer),
+from app.database import Base, engine
 
-        # Financeiro: queries por mes+ano+tipo
-        Index('idx_financeiro_mes_ano_tipo',
-              Financeiro.mes,
-              Financeiro.ano,
-              Financeiro.tipo),
-        Index('idx_financeiro_mes_ano_tipo_previsto',
-              Financeiro.mes,
-              Financeiro.ano,
-              Financeiro.tipo,
-              Financeiro.previsto_realizado),
+logger = logging.getLogger(__name__)
 
-        # Meta: queries por mes+ano+pessoa_id
-        Index('idx_meta_mes_ano_pessoa',
-              Meta.mes,
-              Meta.ano,
-              Meta.pessoa_id),
-    ]
 
-    print("="*60)
-    print("CRIANDO ÍNDICES COMPOSTOS OTIMIZADOS")
-    print("="*60)
+def garantir_indices(bind: Engine = engine) -> List[str]:
+    """
+    Cria os índices dos modelos que ainda não existem no banco.
+    Retorna os nomes dos índices criados (vazio se já estava tudo criado).
+    """
+    import app.models.models  # noqa: F401 - registra os modelos em Base.metadata
 
-    with engine.connect() as conn:
-        for idx in indexes_to_create:
-            try:
-                # Verificar se o índice já existe
-                check_query = text(f"""
-                    SELECT COUNT(*)
-                    FROM sqlite_master
-                    WHERE type='index' AND name=:index_name
-                """)
-                result = conn.execute(check_query, {"index_name": idx.name}).scalar()
+    criados = []
+    inspetor = inspect(bind)
+    tabelas = set(inspetor.get_table_names())
 
-                if result > 0:
-                    print(f"⏭️  Índice {idx.name} já existe")
-                else:
-                    idx.create(engine)
-                    print(f"✓ Índice {idx.name} criado com sucesso")
+    for tabela in Base.metadata.sorted_tables:
+        if tabela.name not in tabelas:
+            continue  # create_all cria a tabela já com os índices
+        existentes = {indice["name"] for indice in inspetor.get_indexes(tabela.name)}
 
+        for indice in sorted(tabela.indexes, key=lambda i: i.name):
+            if indice.name in existentes:
+                continue
+            try:
+                with bind.begin() as conn:
+                    conn.execute(CreateIndex(indice, if_not_exists=True))
+                criados.append(indice.name)
             except Exception as e:
-                print(f"⚠️  Erro ao criar índice {idx.name}: {e}")
+                logger.warning(f"Erro ao criar índice {indice.name}: {str(e)}")
 
-        conn.commit()
+    if criados:
+        logger.info(f"Índices criados: {', '.join(criados)}")
+    return criados
 
-    print("\n" + "="*60)
-    print("✅ ÍNDICES COMPOSTOS CRIADOS COM SUCESSO!")
-    print("="*60)
-    print("\nÍndices criados melhoram performance de queries como:")
-    print("- Busca de métricas por mês/ano/pessoa")
-    print("- Agregações por período")
-    print("- Filtros combinados")
-    print("\nEstimativa de melhoria: 30-50% mais rápido\n")
 
 if __name__ == "__main__":
-    create_composite_indexes()
+    print("=" * 60)
+    print("CRIANDO ÍNDICES DOS MODELOS")
+    print("=" * 60)
+
+    criados = garantir_indices()
+    for nome in criados:
+        print(f"✓ Índice {nome} criado")
+    if not criados:
+        print("⏭️  Todos os índices já existem")
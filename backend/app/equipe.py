@@ -0,0 +1,114 @@
+"""
+Equipe do período: pessoas cadastradas com a meta de cada uma no mês.
+
+Os endpoints por pessoa (resumo de pessoas, dashboards comerciais,
+consolidação, scorecard) buscavam a pessoa e a meta uma a uma, duas
+consultas por pessoa. carregar_equipe faz um único SELECT de pessoas com
+LEFT JOIN nas metas do (mes, ano) e guarda o resultado no cache de
+respostas (tags "pessoas" e "metas:ano-mes"), então o número de consultas
+não depende do tamanho do time. As escritas em pessoas e metas invalidam
+essas tags.
+"""
+
+from dataclasses import asdict, dataclass
+from typing import Any, Dict, List, Optional
+
+from sqlalchemy.orm import Session, contains_eager
+
+from app import cache
+from app.models.models import Meta, Pessoa
+
+# Colunas da meta guardadas no cache (sem as datas de controle)
+CAMPOS_META = [
+    coluna.name for coluna in Meta.__table__.columns
+    if coluna.name not in ("created_at", "updated_at")
+]
+
+
+@dataclass
+class Membro:
+    """Pessoa da equipe com a meta do período (None se não tem meta)."""
+    id: int
+    nome: str
+    funcao: str
+    ativo: bool
+    nivel_senioridade: Optional[int]
+    meta: Optional[Dict[str, Any]] = None
+
+    def meta_valor(self, campo: str) -> Any:
+        """Valor do campo da meta (ex: "meta_leads"); 0 sem meta ou campo vazio."""
+        if not self.meta:
+            return 0
+        return self.meta.get(campo) or 0
+
+
+class Equipe:
+    """Membros da equipe num período, indexados por nome e por função."""
+
+    def __init__(self, membros: List[Membro]):
+        self.membros = membros
+        self._por_nome = {m.nome: m for m in membros}
+
+    def membro(self, nome: str) -> Optional[Membro]:
+        return self._por_nome.get(nome)
+
+    def meta(self, nome: str) -> Optional[Dict[str, Any]]:
+        """Meta do período da pessoa, ou None."""
+        membro = self._por_nome.get(nome)
+        return membro.meta if membro else None
+
+    def da_funcao(self, *funcoes: str, apenas_ativos: bool = False) -> List[Membro]:
+        return [
+            m for m in self.membros
+            if m.funcao in funcoes and (m.ativo or not apenas_ativos)
+        ]
+
+    def com_meta(self, *funcoes: str) -> List[Membro]:
+        """Membros com meta no período (só das funções informadas, se houver)."""
+        return [m for m in self.membros if m.meta and (not funcoes or m.funcao in funcoes)]
+
+
+def metas_por_nome(db: Session, mes: int, ano: int) -> Dict[str, Meta]:
+    """
+    Metas (objetos Meta) do período indexadas pelo nome da pessoa, com
+    meta.pessoa já carregado. Uma consulta; para quem precisa do modelo em
+    vez dos valores em cache de carregar_equipe.
+    """
+    metas = db.query(Meta).join(Meta.pessoa).options(contains_eager(Meta.pessoa)).filter(
+        Meta.mes == mes,
+        Meta.ano == ano
+    ).order_by(Meta.id.desc()).all()
+    # Ordem decrescente: com duas metas no mês, vale a primeira (menor id)
+    return {meta.pessoa.nome: meta for meta in metas}
+
+
+def _consultar(db: Session, mes: int, ano: int) -> List[Dict[str, Any]]:
+    linhas = db.query(Pessoa, Meta).outerjoin(
+        Pessoa.metas.and_(Meta.mes == mes, Meta.ano == ano)
+    ).order_by(Pessoa.funcao, Pessoa.nome, Meta.id).all()
+
+    membros: Dict[int, Dict[str, Any]] = {}
+    for pessoa, meta in linhas:
+        if pessoa.id in membros:
+            continue  # Mais de uma meta no mês: vale a primeira
+        membros[pessoa.id] = asdict(Membro(
+            id=pessoa.id,
+            nome=pessoa.nome,
+            funcao=pessoa.funcao,
+            ativo=bool(pessoa.ativo),
+            nivel_senioridade=pessoa.nivel_senioridade,
+            meta={campo: getattr(meta, campo) for campo in CAMPOS_META} if meta else None,
+        ))
+    return list(membros.values())
+
+
+def carregar_equipe(db: Session, mes: int, ano: int) -> Equipe:
+    """Pessoas (ativas e inativas) com a meta de (mes, ano). Uma consulta, com cache."""
+    membros = cache.valor_em_cache(
+        "equipe.periodo",
+        [Pessoa.__tablename__, Meta.__tablename__],
+        {"mes": mes, "ano": ano},
+        lambda: _consultar(db, mes, ano)
+    )
+    return Equipe([Membro(**m) for m in membros])
+
@@ -0,0 +1,315 @@
+"""
+Exportações em segundo plano (POST /export/jobs).
+
+Exportações de períodos longos passam do timeout dos proxies (Railway,
+Vercel) quando geradas dentro da requisição. Aqui o POST só registra o job
+em export_jobs e o entrega a um pool de threads (EXPORT_WORKERS); o frontend
+consulta o progresso e baixa o arquivo quando o status for "concluido".
+
+O estado fica no banco, então qualquer worker do uvicorn responde o status.
+O arquivo é gravado em EXPORT_DIR com o nome da chave de cache: hash do tipo,
+período, formato e da versão dos dados (count, max(id), sum(id) e
+max(updated_at) das linhas do período, ver exportacao.versao_tabela).
+Exportar de novo um período sem alterações reaproveita o arquivo (cache_hit)
+com uma consulta agregada por tabela, sem ler as linhas.
+Quando EXPORT_DIR passa de EXPORT_CACHE_MAX_MB, os arquivos usados há mais
+tempo são apagados.
+
+Enquanto o job está pendente ou em execução, o processo que o criou segura
+um lock (flock) em EXPORT_DIR/<id>.lock. Se o worker morre no meio, o lock é
+solto pelo sistema e o job, que ficaria "executando" para sempre, é marcado
+como erro no startup (marcar_interrompidos).
+"""
+
+import json
+import logging
+import os
+import tempfile
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Tuple
+
+from sqlalchemy.orm import Session
+
+from app import exportacao
+from app.database import SessionLocal, engine
+from app.models.models import ExportJob
+
+logger = logging.getLogger(__name__)
+
+EXPORT_DIR = os.getenv("EXPORT_DIR", os.path.join(tempfile.gettempdir(), "medgm_exports"))
+EXPORT_CACHE_MAX_MB = int(os.getenv("EXPORT_CACHE_MAX_MB", "500"))
+EXPORT_WORKERS = int(os.getenv("EXPORT_WORKERS", "2"))
+
+# Sufixo dos arquivos ainda em geração e dos locks dos jobs (ignorados pela limpeza)
+SUFIXO_PARCIAL = ".parcial"
+SUFIXO_LOCK = ".lock"
+
+_executor = ThreadPoolExecutor(max_workers=EXPORT_WORKERS, thread_name_prefix="export")
+
+# Progresso parcial (linhas, %) dos jobs em execução neste processo. No
+# PostgreSQL ele também é gravado no banco a cada lote; no SQLite gravar
+# enquanto outra conexão lê as linhas trava o banco (database is locked),
+# então lá o progresso parcial só é visto pelo worker que gera o arquivo.
+_progresso: Dict[str, Tuple[int, int]] = {}
+PROGRESSO_NO_BANCO = engine.dialect.name != "sqlite"
+
+# Arquivos de lock abertos dos jobs deste processo (id -> arquivo)
+_locks: Dict[str, Any] = {}
+
+
+def _caminho_lock(job_id: str) -> str:
+    return os.path.join(EXPORT_DIR, f"{job_id}{SUFIXO_LOCK}")
+
+
+def _travar(job_id: str):
+    """Segura o lock do job até _liberar (ou até o processo morrer)."""
+    try:
+        import fcntl
+    except ImportError:  # Windows: sem flock
+        return
+    os.makedirs(EXPORT_DIR, exist_ok=True)
+    arquivo = open(_caminho_lock(job_id), "a")
+    fcntl.flock(arquivo.fileno(), fcntl.LOCK_EX)
+    _locks[job_id] = arquivo
+
+
+def _liberar(job_id: str):
+    arquivo = _locks.pop(job_id, None)
+    if arquivo is None:
+        return
+    try:
+        os.remove(arquivo.name)
+    except FileNotFoundError:
+        pass
+    arquivo.close()
+
+
+def _orfao(job_id: str) -> bool:
+    """Se nenhum processo segura o lock do job (o worker que o criou morreu)."""
+    try:
+        import fcntl
+    except ImportError:  # Windows: sem flock, vale um worker só
+        return True
+
+    caminho = _caminho_lock(job_id)
+    try:
+        arquivo = open(caminho, "a")
+    except OSError:
+        return True
+    with arquivo:
+        try:
+            fcntl.flock(arquivo.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except OSError:
+            return False
+        try:
+            os.remove(caminho)
+        except FileNotFoundError:
+            pass
+        fcntl.flock(arquivo.fileno(), fcntl.LOCK_UN)
+    return True
+
+
+def marcar_interrompidos() -> int:
+    """
+    Marca como erro os jobs que ficaram "pendente" ou "executando" porque o
+    worker morreu antes de terminar. Roda no startup; jobs de outro worker
+    vivo (lock segurado) não são tocados. Retorna quantos foram marcados.
+    """
+    db = SessionLocal()
+    try:
+        jobs = db.query(ExportJob).filter(ExportJob.status.in_(["pendente", "executando"])).all()
+        interrompidos = [job for job in jobs if _orfao(job.id)]
+        for job in interrompidos:
+            job.status = "erro"
+            job.erro = "Exportação interrompida (worker encerrado antes do fim); gere de novo"
+            job.finalizado_em = datetime.now()
+        db.commit()
+    except Exception as e:
+        db.rollback()
+        logger.error(f"Erro ao marcar exportações interrompidas: {str(e)}")
+        return 0
+    finally:
+        db.close()
+
+    if interrompidos:
+        logger.info(f"{len(interrompidos)} exportação(ões) interrompida(s) marcada(s) como erro")
+    return len(interrompidos)
+
+
+def caminho_arquivo(chave: str, formato: str) -> str:
+    return os.path.join(EXPORT_DIR, f"{chave}.{exportacao.FORMATOS[formato][1]}")
+
+
+def criar_job(db: Session, tipo: str, formato: str, parametros: Dict[str, Any],
+              abas: List[exportacao.Aba], nome_base: str) -> ExportJob:
+    """
+    Registra o job e agenda a geração. abas já deve estar filtrada
+    (uma aba só para CSV, ver exportacao.escolher_aba).
+    """
+    job_id = uuid.uuid4().hex
+    # Lock antes de gravar o job: o startup de outro worker nunca o vê sem dono
+    _travar(job_id)
+    job = ExportJob(
+        id=job_id,
+        tipo=tipo,
+        formato=formato,
+        parametros=json.dumps(parametros, ensure_ascii=False),
+        status="pendente",
+        nome_arquivo=f"{nome_base}.{exportacao.FORMATOS[formato][1]}",
+    )
+    try:
+        db.add(job)
+        db.commit()
+        db.refresh(job)
+        _executor.submit(executar_job, job.id, abas)
+    except Exception:
+        _liberar(job_id)
+        raise
+    return job
+
+
+def executar_job(job_id: str, abas: List[exportacao.Aba]):
+    """Gera (ou reaproveita) o arquivo do job. Roda no pool de exportação."""
+    db = SessionLocal()
+    # Sessão separada para ler as linhas: os commits de progresso em db
+    # não podem fechar o cursor da consulta em andamento
+    leitura = SessionLocal()
+    job = None
+    try:
+        job = db.query(ExportJob).filter(ExportJob.id == job_id).first()
+        if job is None:
+            return
+        job.status = "executando"
+        job.iniciado_em = datetime.now()
+        db.commit()
+
+        chave, total = exportacao.impressao_digital(leitura, abas, job.tipo, job.formato, job.parametros)
+        job.chave_cache = chave
+        job.total_linhas = total
+        db.commit()
+
+        caminho = caminho_arquivo(chave, job.formato)
+        if os.path.exists(caminho):
+            os.utime(caminho)  # Marca como usado recentemente (limpeza por LRU)
+            job.cache_hit = True
+        else:
+            _gerar_arquivo(db, leitura, job, abas, caminho)
+            limpar_cache(preservar=caminho)
+
+        job.status = "concluido"
+        job.progresso = 100
+        job.linhas_processadas = total
+        job.tamanho_bytes = os.path.getsize(caminho)
+
+    except Exception as e:
+        db.rollback()
+        logger.error(f"Erro na exportação {job_id}: {str(e)}")
+        if job is not None:
+            job.status = "erro"
+            job.erro = str(e)
+
+    finally:
+        if job is not None:
+            job.finalizado_em = datetime.now()
+            try:
+                db.commit()
+            except Exception as e:
+                db.rollback()
+                logger.error(f"Erro ao registrar exportação {job_id}: {str(e)}")
+        leitura.close()
+        db.close()
+        _liberar(job_id)
+
+
+def _gerar_arquivo(db: Session, leitura: Session, job: ExportJob, abas: List[exportacao.Aba], caminho: str):
+    """Grava num arquivo parcial e renomeia no final (outro job nunca vê arquivo pela metade)."""
+    os.makedirs(EXPORT_DIR, exist_ok=True)
+    parcial = f"{caminho}.{job.id}{SUFIXO_PARCIAL}"
+
+    def progresso(linhas: int):
+        percentual = min(99, int(linhas * 100 / job.total_linhas)) if job.total_linhas else 0
+        _progresso[job.id] = (linhas, percentual)
+        if PROGRESSO_NO_BANCO:
+            job.linhas_processadas = linhas
+            job.progresso = percentual
+            db.commit()
+
+    try:
+        if job.formato == "xlsx":
+            exportacao.gerar_xlsx(leitura, abas, destino=parcial, progresso=progresso)
+        else:
+            with open(parcial, "wb") as f:
+                for bloco in exportacao.gerar_csv(abas[0], compactar=job.formato == "csv.gz", progresso=progresso):
+                    f.write(bloco)
+        os.replace(parcial, caminho)
+    finally:
+        _progresso.pop(job.id, None)
+        if os.path.exists(parcial):
+            os.remove(parcial)
+
+
+def limpar_cache(preservar: Optional[str] = None, limite_bytes: Optional[int] = None) -> int:
+    """
+    Apaga os arquivos usados há mais tempo até EXPORT_DIR caber no limite.
+    Retorna quantos arquivos foram apagados.
+    """
+    limite = limite_bytes if limite_bytes is not None else EXPORT_CACHE_MAX_MB * 1024 * 1024
+    if not os.path.isdir(EXPORT_DIR):
+        return 0
+
+    arquivos = []
+    for nome in os.listdir(EXPORT_DIR):
+        caminho = os.path.join(EXPORT_DIR, nome)
+        if nome.endswith((SUFIXO_PARCIAL, SUFIXO_LOCK)) or not os.path.isfile(caminho):
+            continue
+        info = os.stat(caminho)
+        arquivos.append((info.st_mtime, info.st_size, caminho))
+
+    total = sum(tamanho for _, tamanho, _ in arquivos)
+    apagados = 0
+    for _, tamanho, caminho in sorted(arquivos):
+        if total <= limite:
+            break
+        if caminho == preservar:
+            continue
+        try:
+            os.remove(caminho)
+            total -= tamanho
+            apagados += 1
+        except FileNotFoundError:
+            pass
+    return apagados
+
+
+def caminho_download(job: ExportJob) -> Optional[str]:
+    """Arquivo do job concluído, ou None se ainda não existe / já foi apagado."""
+    if job.status != "concluido" or not job.chave_cache:
+        return None
+    caminho = caminho_arquivo(job.chave_cache, job.formato)
+    return caminho if os.path.exists(caminho) else None
+
+
+def serializar(job: ExportJob) -> Dict[str, Any]:
+    linhas, percentual = job.linhas_processadas, job.progresso
+    if job.status == "executando" and job.id in _progresso:
+        linhas, percentual = _progresso[job.id]
+
+    return {
+        "id": job.id,
+        "tipo": job.tipo,
+        "formato": job.formato,
+        "parametros": json.loads(job.parametros) if job.parametros else None,
+        "status": job.status,
+        "progresso": percentual,
+        "linhas_processadas": linhas,
+        "total_linhas": job.total_linhas,
+        "cache_hit": job.cache_hit,
+        "tamanho_bytes": job.tamanho_bytes,
+        "erro": job.erro,
+        "criado_em": job.criado_em.isoformat() if job.criado_em else None,
+        "iniciado_em": job.iniciado_em.isoformat() if job.iniciado_em else None,
+        "finalizado_em": job.finalizado_em.isoformat() if job.finalizado_em else None,
+        "download_url": f"/export/jobs/{job.id}/download" if job.status == "concluido" else None,
+    }
@@ -0,0 +1,220 @@
+"""
+Exportação em streaming para Excel, CSV e CSV gzip.
+
+Cada aba da exportação é descrita por uma Aba: nome, colunas e uma função
+que recebe a sessão e gera as linhas. As consultas usam yield_per (cursor no
+servidor no PostgreSQL), então as linhas passam uma a uma do banco para o
+arquivo, sem carregar o período inteiro em memória.
+
+- csv / csv.gz: gerados enquanto são enviados (StreamingResponse), em blocos
+  de TAMANHO_LOTE linhas. Uma aba por arquivo.
+- xlsx: workbook write-only do openpyxl. O zip do xlsx só fica completo no
+  final, então o arquivo é montado num SpooledTemporaryFile (memória até
+  LIMITE_MEMORIA_XLSX, depois disco anônimo, apagado ao fechar) e enviado em
+  blocos. Nenhum arquivo fica no disco depois da resposta.
+
+As exportações grandes também podem rodar em segundo plano, gravando o
+arquivo em EXPORT_DIR (ver app/export_jobs.py).
+"""
+
+import csv
+import hashlib
+import io
+import tempfile
+import zlib
+from dataclasses import dataclass
+from typing import Any, Callable, Iterable, Iterator, List, Optional, Sequence, Tuple
+
+from fastapi import HTTPException
+from fastapi.responses import StreamingResponse
+from openpyxl import Workbook
+from openpyxl.utils import get_column_letter
+from sqlalchemy import func
+from sqlalchemy.orm import Query, Session
+
+from app.database import SessionLocal
+
+TAMANHO_LOTE = 1000
+TAMANHO_BLOCO = 64 * 1024
+LIMITE_MEMORIA_XLSX = 8 * 1024 * 1024
+LARGURA_MAXIMA_COLUNA = 50
+
+FORMATOS = {
+    "xlsx": ("application/vnd.openxmlformats-officedocument.spreadsheetml.sheet", "xlsx"),
+    "csv": ("text/csv; charset=utf-8", "csv"),
+    "csv.gz": ("application/gzip", "csv.gz"),
+}
+
+
+@dataclass
+class Aba:
+    """Uma aba do Excel (ou um CSV)."""
+    nome: str
+    colunas: List[str]
+    linhas: Callable[[Session], Iterable[Sequence[Any]]]
+    vazio: Optional[str] = None  # Mensagem da aba quando não há linhas
+    chave: str = ""  # Identificador usado em aba= nos exports CSV
+    # (total de linhas, versão dos dados) lidos de metadados, sem ler as linhas (ver versao_tabela)
+    versao: Optional[Callable[[Session], Tuple[int, Any]]] = None
+
+
+def linhas_query(query: Query, converter: Callable[[Any], Sequence[Any]]) -> Iterator[Sequence[Any]]:
+    """Percorre a consulta em lotes (yield_per), convertendo cada resultado numa linha."""
+    for resultado in query.yield_per(TAMANHO_LOTE):
+        yield converter(resultado)
+
+
+def escolher_aba(abas: List[Aba], aba: Optional[str]) -> Aba:
+    """CSV tem uma aba só: a pedida em aba=, ou a única da exportação."""
+    if aba is None and len(abas) == 1:
+        return abas[0]
+    for candidata in abas:
+        if candidata.chave == aba:
+            return candidata
+    opcoes = ", ".join(a.chave for a in abas)
+    raise HTTPException(status_code=400, detail=f"Informe aba= para exportar em CSV. Opções: {opcoes}")
+
+
+# ==================== CSV ====================
+
+def gerar_csv(aba: Aba, compactar: bool, progresso: Optional[Callable[[int], None]] = None) -> Iterator[bytes]:
+    """
+    Gera o CSV em blocos, com sessão própria (roda depois do endpoint retornar).
+    progresso(linhas) é chamado a cada lote.
+    """
+    compressor = zlib.compressobj(wbits=31) if compactar else None  # wbits=31: formato gzip
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+
+    def bloco(final: bool = False) -> bytes:
+        dados = buffer.getvalue().encode("utf-8")
+        buffer.seek(0)
+        buffer.truncate()
+        if compressor is None:
+            return dados
+        return compressor.compress(dados) + (compressor.flush() if final else b"")
+
+    db = SessionLocal()
+    try:
+        buffer.write("\ufeff")  # BOM: Excel abre o CSV como UTF-8
+        writer.writerow(aba.colunas)
+        for i, linha in enumerate(aba.linhas(db), start=1):
+            writer.writerow(linha)
+            if i % TAMANHO_LOTE == 0:
+                if progresso:
+                    progresso(i)
+                dados = bloco()
+                if dados:
+                    yield dados
+        yield bloco(final=True)
+    finally:
+        db.close()
+
+
+# ==================== XLSX ====================
+
+def gerar_xlsx(db: Session, abas: List[Aba], destino=None,
+               progresso: Optional[Callable[[int], None]] = None):
+    """
+    Monta o xlsx (write-only) em destino (caminho ou arquivo aberto). Sem
+    destino, usa um arquivo temporário anônimo e o retorna posicionado no início.
+    progresso(linhas) é chamado a cada lote, somando todas as abas.
+    """
+    wb = Workbook(write_only=True)
+    escritas = 0
+    for aba in abas:
+        ws = wb.create_sheet(title=aba.nome[:31])
+        # No modo write-only a largura precisa ser definida antes das linhas
+        for idx, coluna in enumerate(aba.colunas, start=1):
+            ws.column_dimensions[get_column_letter(idx)].width = min(max(len(coluna) + 4, 12), LARGURA_MAXIMA_COLUNA)
+
+        ws.append(aba.colunas)
+        vazia = True
+        for linha in aba.linhas(db):
+            ws.append(list(linha))
+            vazia = False
+            escritas += 1
+            if progresso and escritas % TAMANHO_LOTE == 0:
+                progresso(escritas)
+        if vazia and aba.vazio:
+            ws.append([aba.vazio])
+
+    if destino is not None:
+        wb.save(destino)
+        return destino
+
+    arquivo = tempfile.SpooledTemporaryFile(max_size=LIMITE_MEMORIA_XLSX)
+    wb.save(arquivo)
+    arquivo.seek(0)
+    return arquivo
+
+
+def versao_tabela(modelo, filtros: Sequence[Any]) -> Callable[[Session], Tuple[int, Any]]:
+    """
+    Versão das linhas filtradas de uma tabela numa consulta agregada:
+    count(*), max(id) e sum(id) mudam com inserções e remoções, e
+    max(updated_at) com alterações. O modelo precisa de id e updated_at.
+    """
+    def versao(db: Session) -> Tuple[int, Any]:
+        total, maior_id, soma_ids, alterado = db.query(
+            func.count(modelo.id), func.max(modelo.id), func.sum(modelo.id), func.max(modelo.updated_at)
+        ).filter(*filtros).one()
+        return total, (modelo.__tablename__, total, maior_id, soma_ids, str(alterado))
+    return versao
+
+
+def impressao_digital(db: Session, abas: List[Aba], *partes: Any) -> Tuple[str, int]:
+    """
+    Hash (sha256) da versão dos dados das abas e das partes extras (tipo,
+    período...), e o total de linhas. Abas com versao usam só metadados (uma
+    consulta agregada, sem ler as linhas); as demais têm as linhas lidas e
+    incluídas no hash.
+    """
+    h = hashlib.sha256(repr(partes).encode())
+    total = 0
+    for aba in abas:
+        h.update(repr((aba.nome, aba.colunas)).encode())
+        if aba.versao is not None:
+            linhas, versao = aba.versao(db)
+            h.update(repr(versao).encode())
+            total += linhas
+            continue
+        for linha in aba.linhas(db):
+            h.update(repr(tuple(linha)).encode())
+            total += 1
+    return h.hexdigest(), total
+
+
+def _ler_em_blocos(arquivo) -> Iterator[bytes]:
+    try:
+        while True:
+            dados = arquivo.read(TAMANHO_BLOCO)
+            if not dados:
+                break
+            yield dados
+    finally:
+        arquivo.close()
+
+
+# ==================== RESPOSTA ====================
+
+def resposta(db: Session, abas: List[Aba], formato: str, nome_base: str,
+             aba: Optional[str] = None) -> StreamingResponse:
+    """StreamingResponse da exportação no formato pedido (xlsx, csv, csv.gz)."""
+    if formato not in FORMATOS:
+        raise HTTPException(status_code=400, detail=f"Formato inválido. Use: {', '.join(FORMATOS)}")
+    media_type, extensao = FORMATOS[formato]
+
+    if formato == "xlsx":
+        corpo = _ler_em_blocos(gerar_xlsx(db, abas))
+        filename = f"{nome_base}.{extensao}"
+    else:
+        escolhida = escolher_aba(abas, aba)
+        corpo = gerar_csv(escolhida, compactar=formato == "csv.gz")
+        filename = f"{nome_base}_{escolhida.chave}.{extensao}" if len(abas) > 1 else f"{nome_base}.{extensao}"
+
+    return StreamingResponse(
+        corpo,
+        media_type=media_type,
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'}
+    )
@@ -0,0 +1,151 @@
+"""
+KPIs dos funis Quiz SE e Venda Direta calculados por coluna.
+
+As listagens montavam um dict por linha com uma dúzia de divisões em Python.
+Aqui as métricas do período são lidas com um SELECT das colunas (sem ORM)
+direto para um DataFrame e cada KPI é uma divisão de colunas NumPy, com
+divisão segura (denominador 0 dá 0, como antes).
+
+Os totais do período (e a visão por dia) somam as métricas brutas e só
+depois dividem, então as taxas são ponderadas pelo volume: o CTR do período
+é cliques / impressões do período, não a média dos CTRs diários.
+
+Cada KPI é (nome, numerador, denominador, fator); a mesma definição serve
+para uma métrica isolada (calcular_valores), para as linhas e para os totais.
+"""
+
+from datetime import date
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+
+from app.models.models import QuizMetrics, VendaDiretaMetrics
+
+Kpi = Tuple[str, str, str, float]
+
+KPIS_TRAFEGO: List[Kpi] = [
+    ("hook_rate", "cliques", "impressoes", 100),
+    ("body_rate", "pageviews", "cliques", 100),
+    ("ctr", "cliques", "impressoes", 100),
+    ("cpc", "verba", "cliques", 1),
+]
+
+# funil -> (modelo, métricas brutas, KPIs)
+FUNIS: Dict[str, Tuple[Any, List[str], List[Kpi]]] = {
+    "quiz": (QuizMetrics, [
+        "verba", "impressoes", "cliques", "pageviews", "quiz_inicio", "quiz_end", "leads",
+    ], KPIS_TRAFEGO + [
+        ("taxa_conclusao_quiz", "quiz_end", "quiz_inicio", 100),
+        ("taxa_conversao", "leads", "pageviews", 100),
+        ("cpl", "verba", "leads", 1),
+    ]),
+    "venda_direta": (VendaDiretaMetrics, [
+        "verba", "impressoes", "cliques", "pageviews", "leads", "checkout_inicio", "vendas", "receita",
+    ], KPIS_TRAFEGO + [
+        ("taxa_conversao", "leads", "pageviews", 100),
+        ("cvr_checkout", "vendas", "checkout_inicio", 100),
+        ("cvr_geral_funil", "vendas", "pageviews", 100),
+        ("aov", "receita", "vendas", 1),
+        ("cpa", "verba", "vendas", 1),
+        ("roas", "receita", "verba", 1),
+    ]),
+}
+
+COLUNAS_IDENTIFICACAO = ["id", "data", "campanha_nome", "campanha_id"]
+
+
+def colunas(funil: str) -> List[str]:
+    """Colunas de uma linha de métrica com KPIs, na ordem da resposta."""
+    _, brutas, kpis = FUNIS[funil]
+    return COLUNAS_IDENTIFICACAO + brutas + [nome for nome, _, _, _ in kpis]
+
+
+def dividir(numerador, denominador, fator: float = 1) -> np.ndarray:
+    """numerador / denominador * fator por elemento; 0 onde o denominador não é positivo."""
+    numerador = np.asarray(numerador, dtype=float)
+    denominador = np.asarray(denominador, dtype=float)
+    resultado = np.zeros(np.broadcast(numerador, denominador).shape)
+    np.divide(numerador * fator, denominador, out=resultado, where=denominador > 0)
+    return resultado
+
+
+def calcular_valores(valores: Dict[str, Any], funil: str) -> Dict[str, float]:
+    """KPIs de uma métrica isolada (dict com as métricas brutas)."""
+    _, _, kpis = FUNIS[funil]
+    return {
+        nome: float(dividir(valores[num] or 0, valores[den] or 0, fator))
+        for nome, num, den, fator in kpis
+    }
+
+
+def aplicar_kpis(df: pd.DataFrame, funil: str) -> pd.DataFrame:
+    """Acrescenta as colunas de KPI ao DataFrame de métricas brutas."""
+    _, _, kpis = FUNIS[funil]
+    for nome, num, den, fator in kpis:
+        df[nome] = dividir(df[num].to_numpy(), df[den].to_numpy(), fator)
+    return df
+
+
+def carregar(db: Session, funil: str, mes: Optional[int] = None, ano: Optional[int] = None,
+             data_inicio: Optional[date] = None, data_fim: Optional[date] = None,
+             campanha: Optional[str] = None) -> pd.DataFrame:
+    """
+    Métricas brutas do funil (mais recentes primeiro) num DataFrame, com as
+    colunas de KPI já calculadas. Uma consulta.
+    """
+    modelo, brutas, _ = FUNIS[funil]
+    consulta = select(*[getattr(modelo, coluna) for coluna in COLUNAS_IDENTIFICACAO + brutas])
+    if mes:
+        consulta = consulta.where(modelo.mes == mes)
+    if ano:
+        consulta = consulta.where(modelo.ano == ano)
+    if data_inicio:
+        consulta = consulta.where(modelo.data >= data_inicio)
+    if data_fim:
+        consulta = consulta.where(modelo.data <= data_fim)
+    if campanha:
+        consulta = consulta.where(modelo.campanha_nome.ilike(f"%{campanha}%"))
+
+    resultado = db.execute(consulta.order_by(modelo.data.desc()))
+    df = pd.DataFrame(resultado.all(), columns=list(resultado.keys()))
+    for coluna in brutas:
+        df[coluna] = df[coluna].fillna(0)
+    return aplicar_kpis(df, funil)
+
+
+def _datas_iso(df: pd.DataFrame) -> pd.DataFrame:
+    df = df.copy()
+    df["data"] = df["data"].map(lambda d: d.isoformat() if d else None)
+    return df
+
+
+def linhas(df: pd.DataFrame, funil: str) -> List[Dict[str, Any]]:
+    """Uma linha (dict) por métrica, no formato de calculate_*_kpis."""
+    return _datas_iso(df)[colunas(funil)].to_dict(orient="records")
+
+
+def por_dia(df: pd.DataFrame, funil: str) -> pd.DataFrame:
+    """Métricas brutas somadas por data (todas as campanhas), com KPIs ponderados."""
+    _, brutas, _ = FUNIS[funil]
+    dias = df.groupby("data", sort=True)[brutas].sum().reset_index()
+    return aplicar_kpis(dias, funil)
+
+
+def linhas_por_dia(dias: pd.DataFrame) -> List[Dict[str, Any]]:
+    """Um dict por dia (saída de por_dia)."""
+    return _datas_iso(dias).to_dict(orient="records")
+
+
+def totais(df: pd.DataFrame, funil: str) -> Dict[str, Any]:
+    """Soma das métricas brutas do período e KPIs sobre as somas."""
+    _, brutas, _ = FUNIS[funil]
+    somas = {coluna: np.asarray(df[coluna].sum()).item() for coluna in brutas}
+    return {**somas, **calcular_valores(somas, funil)}
+
+
+def colunar(df: pd.DataFrame) -> Dict[str, List[Any]]:
+    """Formato por coluna ({coluna: [valores]}), mais compacto para gráficos."""
+    return {coluna: valores.tolist() for coluna, valores in _datas_iso(df).items()}
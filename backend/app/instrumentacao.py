@@ -0,0 +1,222 @@
+"""
+Instrumentação das requisições: consultas SQL, tempo de banco e tempo total.
+
+Os eventos before/after_cursor_execute do engine somam, para a requisição em
+andamento, a quantidade de consultas, o tempo gasto no banco e as linhas
+retornadas. A requisição é identificada por um contextvar, que o Starlette
+propaga para o threadpool dos endpoints síncronos. Consultas fora de uma
+requisição (scheduler, scripts) não são contadas.
+
+Cada resposta recebe o header Server-Timing (aparece na aba Network do
+navegador) e os números vão para histogramas por rota, expostos em formato
+Prometheus em GET /internal/metrics.
+
+Linhas retornadas vêm de cursor.rowcount: no PostgreSQL (psycopg2) inclui
+SELECT; no SQLite o driver devolve -1 para SELECT e só DML é contado.
+
+Variáveis:
+- INSTRUMENTACAO=off desliga o middleware e os eventos.
+- METRICS_TOKEN, se definido, é exigido em /internal/metrics
+  (header Authorization: Bearer <token>).
+"""
+
+import os
+import threading
+import time
+from contextvars import ContextVar
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Sequence, Tuple
+
+from sqlalchemy import event
+from starlette.requests import Request
+from starlette.routing import Match
+
+from app.database import engine
+
+INSTRUMENTACAO_ATIVA = os.getenv("INSTRUMENTACAO", "on").lower() != "off"
+METRICS_TOKEN = os.getenv("METRICS_TOKEN")
+
+# Rota usada para requisições que não casaram com nenhum endpoint (404),
+# para não criar uma série por URL
+ROTA_DESCONHECIDA = "desconhecida"
+
+BUCKETS_SEGUNDOS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+BUCKETS_CONSULTAS = (1, 2, 5, 10, 20, 50, 100, 200, 500)
+BUCKETS_LINHAS = (10, 100, 1000, 10000, 100000)
+
+
+@dataclass
+class MedicaoRequisicao:
+    consultas: int = 0
+    tempo_db: float = 0.0
+    linhas: int = 0
+
+
+_medicao_atual: ContextVar[Optional[MedicaoRequisicao]] = ContextVar("medicao_atual", default=None)
+
+
+# ==================== EVENTOS DO SQLALCHEMY ====================
+
+def _antes_consulta(conn, cursor, statement, parameters, context, executemany):
+    if _medicao_atual.get() is not None:
+        conn.info.setdefault("inicio_consultas", []).append(time.perf_counter())
+
+
+def _depois_consulta(conn, cursor, statement, parameters, context, executemany):
+    medicao = _medicao_atual.get()
+    if medicao is None:
+        return
+    inicios = conn.info.get("inicio_consultas")
+    if not inicios:
+        return
+    medicao.consultas += 1
+    medicao.tempo_db += time.perf_counter() - inicios.pop()
+    if cursor.rowcount and cursor.rowcount > 0:
+        medicao.linhas += cursor.rowcount
+
+
+def instalar_eventos(alvo=engine):
+    """Registra os eventos de contagem no engine (uma vez)."""
+    if not event.contains(alvo, "before_cursor_execute", _antes_consulta):
+        event.listen(alvo, "before_cursor_execute", _antes_consulta)
+        event.listen(alvo, "after_cursor_execute", _depois_consulta)
+
+
+# ==================== HISTOGRAMAS ====================
+
+class Histograma:
+    """Histograma no formato do Prometheus, com uma série por conjunto de labels."""
+
+    def __init__(self, nome: str, ajuda: str, buckets: Sequence[float]):
+        self.nome = nome
+        self.ajuda = ajuda
+        self.buckets = tuple(buckets)
+        self._series: Dict[Tuple[Tuple[str, str], ...], List] = {}
+        self._lock = threading.Lock()
+
+    def observar(self, valor: float, **labels):
+        chave = tuple(sorted(labels.items()))
+        with self._lock:
+            serie = self._series.get(chave)
+            if serie is None:
+                # [contagem por bucket, soma, total]
+                serie = self._series[chave] = [[0] * len(self.buckets), 0.0, 0]
+            for i, limite in enumerate(self.buckets):
+                if valor <= limite:
+                    serie[0][i] += 1
+            serie[1] += valor
+            serie[2] += 1
+
+    def renderizar(self) -> List[str]:
+        linhas = [f"# HELP {self.nome} {self.ajuda}", f"# TYPE {self.nome} histogram"]
+        with self._lock:
+            series = [(chave, list(c), soma, total) for chave, (c, soma, total) in sorted(self._series.items())]
+        for chave, contagens, soma, total in series:
+            for limite, contagem in zip(self.buckets, contagens):
+                linhas.append(f"{self.nome}_bucket{_labels(chave, le=_numero(limite))} {contagem}")
+            linhas.append(f"{self.nome}_bucket{_labels(chave, le='+Inf')} {total}")
+            linhas.append(f"{self.nome}_sum{_labels(chave)} {_numero(soma)}")
+            linhas.append(f"{self.nome}_count{_labels(chave)} {total}")
+        return linhas
+
+    def limpar(self):
+        with self._lock:
+            self._series.clear()
+
+
+def _numero(valor: float) -> str:
+    return repr(float(valor)) if not float(valor).is_integer() else str(int(valor))
+
+
+def _escapar(valor: str) -> str:
+    return str(valor).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _labels(chave, **extras) -> str:
+    pares = list(chave) + list(extras.items())
+    return "{" + ",".join(f'{nome}="{_escapar(valor)}"' for nome, valor in pares) + "}"
+
+
+DURACAO = Histograma(
+    "medgm_http_request_duration_seconds",
+    "Tempo total da requisição, por rota",
+    BUCKETS_SEGUNDOS
+)
+DURACAO_DB = Histograma(
+    "medgm_db_time_per_request_seconds",
+    "Tempo gasto em consultas SQL por requisição",
+    BUCKETS_SEGUNDOS
+)
+CONSULTAS = Histograma(
+    "medgm_db_queries_per_request",
+    "Quantidade de consultas SQL por requisição",
+    BUCKETS_CONSULTAS
+)
+LINHAS = Histograma(
+    "medgm_db_rows_per_request",
+    "Linhas retornadas/afetadas pelo banco por requisição",
+    BUCKETS_LINHAS
+)
+HISTOGRAMAS = [DURACAO, DURACAO_DB, CONSULTAS, LINHAS]
+
+
+def renderizar_metricas() -> str:
+    """Todas as métricas no formato texto do Prometheus."""
+    linhas = []
+    for histograma in HISTOGRAMAS:
+        linhas.extend(histograma.renderizar())
+    return "\n".join(linhas) + "\n"
+
+
+def limpar_metricas():
+    for histograma in HISTOGRAMAS:
+        histograma.limpar()
+
+
+# ==================== MIDDLEWARE ====================
+
+def rota_da_requisicao(request: Request) -> str:
+    """Template da rota (ex: /metas/{meta_id}), para manter poucas séries."""
+    endpoint = request.scope.get("endpoint")
+    if endpoint is None:
+        return ROTA_DESCONHECIDA
+    for rota in request.app.router.routes:
+        if getattr(rota, "endpoint", None) is endpoint and rota.matches(request.scope)[0] == Match.FULL:
+            return rota.path
+    return ROTA_DESCONHECIDA
+
+
+def server_timing(medicao: MedicaoRequisicao, total: float) -> str:
+    return (
+        f'db;dur={medicao.tempo_db * 1000:.1f};desc="{medicao.consultas} consultas", '
+        f'linhas;desc="{medicao.linhas}", '
+        f'total;dur={total * 1000:.1f}'
+    )
+
+
+async def middleware_instrumentacao(request: Request, call_next):
+    """Mede a requisição, adiciona Server-Timing e alimenta os histogramas."""
+    if not INSTRUMENTACAO_ATIVA:
+        return await call_next(request)
+
+    medicao = MedicaoRequisicao()
+    token = _medicao_atual.set(medicao)
+    inicio = time.perf_counter()
+    try:
+        response = await call_next(request)
+    finally:
+        _medicao_atual.reset(token)
+    total = time.perf_counter() - inicio
+
+    response.headers["Server-Timing"] = server_timing(medicao, total)
+
+    labels = {"metodo": request.method, "rota": rota_da_requisicao(request)}
+    DURACAO.observar(total, **labels)
+    DURACAO_DB.observar(medicao.tempo_db, **labels)
+    CONSULTAS.observar(medicao.consultas, **labels)
+    LINHAS.observar(medicao.linhas, **labels)
+    return response
+
+
+if INSTRUMENTACAO_ATIVA:
+    instalar_eventos()
@@ -6,10 +6,12 @@ from fastapi import FastAPI, Request
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.responses import RedirectResponse
 from dotenv import load_dotenv
+import anyio
 import os
 
 from app.database import init_db
-from app.routers import upload, metrics, crud, comercial, config, export, import_csv, funil, metas, demonstrativos, projecao, vendas, meta_ads, funil_metrics, google_sheets
+from app import export_jobs, instrumentacao
+from app.routers import upload, metrics, crud, comercial, config, export, import_csv, funil, metas, demonstrativos, projecao, vendas, meta_ads, funil_metrics, google_sheets, internal
 from app.scheduler import start_scheduler, stop_scheduler
 
 # Carrega variáveis de ambiente
@@ -61,6 +63,10 @@ async def force_https_middleware(request: Request, call_next):
     response = await call_next(request)
     return response
 
+# Middleware de instrumentação: consultas SQL e tempos por requisição
+# (header Server-Timing e /internal/metrics, ver app/instrumentacao.py)
+app.middleware("http")(instrumentacao.middleware_instrumentacao)
+
 # Include routers
 app.include_router(upload.router)
 app.include_router(metrics.router)
@@ -77,6 +83,7 @@ app.include_router(vendas.router)
 app.include_router(meta_ads.router)
 app.include_router(funil_metrics.router)
 app.include_router(google_sheets.router)
+app.include_router(internal.router)
 
 
 @app.on_event("startup")
@@ -86,6 +93,14 @@ async def startup_event():
     """
     print("Starting MedGM Analytics API...")
     init_db()
+    export_jobs.marcar_interrompidos()  # Exportações órfãs de um worker que morreu
+
+    # Os endpoints são síncronos e rodam no threadpool do anyio (padrão: 40
+    # threads), fora do event loop. THREADPOOL_WORKERS ajusta o tamanho.
+    threadpool_workers = os.getenv("THREADPOOL_WORKERS")
+    if threadpool_workers:
+        anyio.to_thread.current_default_thread_limiter().total_tokens = int(threadpool_workers)
+
     start_scheduler()  # Inicia sincronização automática do Google Sheets
     print("API ready!")
 
@@ -195,6 +210,9 @@ async def root():
                 "dre": "/demonstrativos/dre?mes=1&ano=2026",
                 "dfc_anual": "/demonstrativos/dfc/anual?ano=2026",
                 "dre_anual": "/demonstrativos/dre/anual?ano=2026"
+            },
+            "internal": {
+                "metrics": "/internal/metrics"
             }
         }
     }
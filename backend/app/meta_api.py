@@ -0,0 +1,66 @@
+"""
+Sessões da Meta Marketing API reaproveitadas entre requisições.
+
+FacebookAdsApi.init cria uma sessão nova e troca a API padrão global do SDK a
+cada chamada; com requisições simultâneas (e as threads de meta_insights) uma
+requisição pode acabar usando a sessão ou o token de outra.
+
+Aqui cada access token tem um FacebookAdsApi próprio, criado uma vez, com
+sessão HTTP e pool de conexões do tamanho de META_MAX_WORKERS. Os objetos do
+SDK recebem a API explicitamente (conta(config), campanha(config, id)) e a
+API padrão global não é usada. Salvar ou desativar a configuração em
+/meta/config descarta as sessões (invalidar).
+"""
+
+import threading
+from typing import Dict, Optional
+
+from facebook_business.adobjects.adaccount import AdAccount
+from facebook_business.adobjects.campaign import Campaign
+from facebook_business.api import FacebookAdsApi
+from facebook_business.session import FacebookSession
+from requests.adapters import HTTPAdapter
+
+from app.meta_insights import META_MAX_WORKERS
+from app.models.models import MetaAdsConfig
+
+# access token -> API
+_apis: Dict[str, FacebookAdsApi] = {}
+_lock = threading.Lock()
+
+
+def criar_api(access_token: str) -> FacebookAdsApi:
+    """FacebookAdsApi com sessão própria (fora do cache, ex.: validar um token novo)."""
+    sessao = FacebookSession(access_token=access_token)
+    adaptador = HTTPAdapter(pool_connections=1, pool_maxsize=META_MAX_WORKERS)
+    sessao.requests.mount("https://", adaptador)
+    return FacebookAdsApi(sessao)
+
+
+def api_para(access_token: str) -> FacebookAdsApi:
+    """API do token, criada na primeira chamada e reaproveitada depois."""
+    with _lock:
+        api = _apis.get(access_token)
+        if api is None:
+            api = _apis[access_token] = criar_api(access_token)
+        return api
+
+
+def invalidar(access_token: Optional[str] = None):
+    """Descarta a sessão do token (ou todas) e fecha as conexões."""
+    with _lock:
+        tokens = [access_token] if access_token is not None else list(_apis)
+        removidas = [_apis.pop(token) for token in tokens if token in _apis]
+
+    for api in removidas:
+        api._session.requests.close()
+
+
+def conta(config: MetaAdsConfig) -> AdAccount:
+    """Conta de anúncios da configuração, ligada à sessão do token."""
+    return AdAccount(config.ad_account_id, api=api_para(config.access_token))
+
+
+def campanha(config: MetaAdsConfig, campaign_id: str) -> Campaign:
+    """Campanha ligada à sessão do token da configuração."""
+    return Campaign(campaign_id, api=api_para(config.access_token))
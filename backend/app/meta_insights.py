@@ -0,0 +1,129 @@
+"""
+Busca de insights do Meta Ads em paralelo.
+
+Os endpoints que olham várias campanhas (ou vários anúncios) faziam uma
+chamada get_insights por vez, então o tempo crescia linearmente com o número
+de campanhas. Aqui as chamadas rodam num pool de threads limitado
+(META_MAX_WORKERS) e os cursores são consumidos dentro da própria thread.
+
+Limite de uso da API: quando uma chamada recebe erro de rate limit, a conta
+inteira é pausada (todas as threads daquela conta esperam) com backoff
+exponencial antes de tentar de novo.
+
+Os objetos só precisam ter get_insights(fields=, params=) e get('id'), então
+os testes usam fakes no lugar de facebook_business (ver test_meta_insights.py).
+"""
+
+import logging
+import os
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+META_MAX_WORKERS = int(os.getenv("META_MAX_WORKERS", "8"))
+META_MAX_TENTATIVAS = int(os.getenv("META_MAX_TENTATIVAS", "4"))
+META_BACKOFF_BASE = float(os.getenv("META_BACKOFF_BASE", "2.0"))  # segundos
+
+# Códigos de erro de limite de uso da Graph API
+# 4: app, 17: usuário, 32: página, 613: chamadas por período, 80000-80014: business use case
+CODIGOS_RATE_LIMIT = {4, 17, 32, 613} | set(range(80000, 80015))
+
+# Tipos de ação contados como conversão nos endpoints de campanhas
+ACOES_CONVERSAO = ['purchase', 'lead', 'complete_registration']
+
+
+def _codigo_erro(erro: Exception) -> Optional[int]:
+    codigo = getattr(erro, "api_error_code", None)
+    return codigo() if callable(codigo) else codigo
+
+
+def eh_rate_limit(erro: Exception) -> bool:
+    """Se o erro é de limite de uso (vale esperar e tentar de novo)."""
+    if _codigo_erro(erro) in CODIGOS_RATE_LIMIT:
+        return True
+    status = getattr(erro, "http_status", None)
+    status = status() if callable(status) else status
+    return status == 429
+
+
+class LimiteConta:
+    """Pausa compartilhada por conta de anúncios entre as threads do pool."""
+
+    def __init__(self):
+        self._pausado_ate: Dict[str, float] = {}
+        self._lock = threading.Lock()
+
+    def aguardar(self, conta: str):
+        with self._lock:
+            ate = self._pausado_ate.get(conta, 0)
+        espera = ate - time.monotonic()
+        if espera > 0:
+            time.sleep(espera)
+
+    def pausar(self, conta: str, segundos: float):
+        with self._lock:
+            ate = time.monotonic() + segundos
+            if ate > self._pausado_ate.get(conta, 0):
+                self._pausado_ate[conta] = ate
+
+
+limite_contas = LimiteConta()
+
+
+def buscar_com_backoff(objeto, fields: List[str], params: Dict[str, Any], conta: str) -> List[Any]:
+    """get_insights com espera e nova tentativa em caso de rate limit. Outros erros sobem."""
+    for tentativa in range(META_MAX_TENTATIVAS):
+        limite_contas.aguardar(conta)
+        try:
+            # list() consome a paginação do cursor aqui, dentro da thread
+            return list(objeto.get_insights(fields=fields, params=params))
+        except Exception as e:
+            if not eh_rate_limit(e) or tentativa == META_MAX_TENTATIVAS - 1:
+                raise
+            espera = META_BACKOFF_BASE * (2 ** tentativa) * (1 + random.random() * 0.25)
+            logger.warning(f"Rate limit do Meta na conta {conta}, aguardando {espera:.1f}s")
+            limite_contas.pausar(conta, espera)
+    return []
+
+
+def buscar_insights(
+    objetos: Iterable[Any],
+    fields: List[str],
+    params: Dict[str, Any],
+    conta: str = "default",
+    max_workers: int = META_MAX_WORKERS
+) -> List[Tuple[Any, Optional[List[Any]]]]:
+    """
+    Chama get_insights de cada objeto (campanha, anúncio...) em paralelo.
+
+    Retorna [(objeto, insights)] na mesma ordem da entrada. Se a chamada de um
+    objeto falhar, o erro é registrado no log e insights vem como None, como
+    os endpoints já faziam (pulam a campanha e seguem com as demais).
+    """
+    objetos = list(objetos)
+    if not objetos:
+        return []
+
+    def buscar(objeto):
+        try:
+            return buscar_com_backoff(objeto, fields, params, conta)
+        except Exception as e:
+            logger.error(f"Erro ao buscar insights de {objeto.get('id')}: {str(e)}")
+            return None
+
+    with ThreadPoolExecutor(max_workers=max(1, min(max_workers, len(objetos)))) as pool:
+        return list(zip(objetos, pool.map(buscar, objetos)))
+
+
+def somar_conversoes(insight, tipos: List[str] = ACOES_CONVERSAO) -> int:
+    """Soma as ações do insight cujos action_type estão em tipos."""
+    total = 0
+    if 'actions' in insight:
+        for action in insight['actions']:
+            if action['action_type'] in tipos:
+                total += int(action['value'])
+    return total
@@ -0,0 +1,221 @@
+"""
+Armazém local dos insights do Meta Ads.
+
+Os insights diários por campanha, conjunto e anúncio são gravados em
+meta_insights_*_diario e os endpoints /meta/insights/* e
+/meta/campaigns/performance respondem a partir do banco.
+
+Sincronização incremental com MetaAdsConfig.last_sync como marca d'água:
+- primeira vez (ou conta sem dados): busca os últimos META_BACKFILL_DIAS dias;
+- depois: busca só a janela de atribuição (META_JANELA_ATRIBUICAO_DIAS)
+  antes da última sincronização até hoje, porque o Meta ainda ajusta
+  conversões desses dias. Dias mais antigos não mudam e não são buscados de novo.
+
+Os dias buscados são regravados por inteiro (apaga o intervalo e insere).
+
+reach (pessoas únicas) é gravado por dia e objeto, mas não soma entre dias
+nem entre objetos: os endpoints só o devolvem quando a agregação tem uma
+linha e, nos demais casos, respondem reach = null (ver alcance em
+app/routers/meta_ads.py).
+"""
+
+import logging
+import os
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date, datetime, timedelta
+from typing import Any, Dict, List, Optional, Tuple
+
+from sqlalchemy import insert
+from sqlalchemy.orm import Session
+
+from app import meta_api, meta_insights
+from app.models.models import (
+    MetaAdsConfig, MetaCampanha,
+    MetaInsightCampanhaDiario, MetaInsightAdsetDiario, MetaInsightAdDiario
+)
+
+logger = logging.getLogger(__name__)
+
+JANELA_ATRIBUICAO_DIAS = int(os.getenv("META_JANELA_ATRIBUICAO_DIAS", "28"))
+BACKFILL_DIAS = int(os.getenv("META_BACKFILL_DIAS", "365"))
+DIAS_POR_CHAMADA = 30  # Tamanho de cada time_range pedido à API
+
+# level -> (modelo, colunas de identificação, chave do objeto)
+NIVEIS = {
+    "campaign": (MetaInsightCampanhaDiario, ["campaign_id", "campaign_name"], "campaign_id"),
+    "adset": (MetaInsightAdsetDiario, ["campaign_id", "campaign_name", "adset_id", "adset_name"], "adset_id"),
+    "ad": (MetaInsightAdDiario, ["campaign_id", "campaign_name", "adset_id", "adset_name", "ad_id", "ad_name"], "ad_id"),
+}
+
+CAMPOS_METRICAS = ['impressions', 'clicks', 'spend', 'reach', 'actions', 'action_values']
+
+# coluna -> action_type
+ACOES = {
+    "leads": "lead",
+    "registros": "complete_registration",
+    "purchases": "purchase",
+    "pixel_purchases": "offsite_conversion.fb_pixel_purchase",
+}
+ACOES_RECEITA = ['purchase', 'offsite_conversion.fb_pixel_purchase']
+
+# Presets aceitos pelos endpoints (mesmos nomes do date_preset da Graph API)
+DIAS_PRESET = {"last_3d": 3, "last_7d": 7, "last_14d": 14, "last_28d": 28, "last_30d": 30, "last_90d": 90}
+
+
+def intervalo_preset(date_preset: str, hoje: Optional[date] = None) -> Tuple[date, date]:
+    """
+    Converte um date_preset da Graph API em (inicio, fim), inclusivos.
+    Como no Meta, last_Nd não inclui hoje.
+    """
+    hoje = hoje or date.today()
+    ontem = hoje - timedelta(days=1)
+    if date_preset == "today":
+        return hoje, hoje
+    if date_preset == "yesterday":
+        return ontem, ontem
+    if date_preset in DIAS_PRESET:
+        return hoje - timedelta(days=DIAS_PRESET[date_preset]), ontem
+    if date_preset == "this_month":
+        return hoje.replace(day=1), hoje
+    if date_preset == "last_month":
+        fim = hoje.replace(day=1) - timedelta(days=1)
+        return fim.replace(day=1), fim
+    if date_preset == "this_year":
+        return hoje.replace(month=1, day=1), hoje
+    if date_preset == "maximum":
+        return date(2000, 1, 1), hoje
+    raise ValueError(f"date_preset inválido: {date_preset}")
+
+
+def periodo_sincronizacao(last_sync: Optional[datetime], tem_dados: bool,
+                          hoje: Optional[date] = None) -> Tuple[date, date]:
+    """Intervalo a buscar na próxima sincronização (ver docstring do módulo)."""
+    hoje = hoje or date.today()
+    if last_sync is None or not tem_dados:
+        return hoje - timedelta(days=BACKFILL_DIAS), hoje
+    return min(last_sync.date(), hoje) - timedelta(days=JANELA_ATRIBUICAO_DIAS), hoje
+
+
+def _janelas(inicio: date, fim: date, dias: int = DIAS_POR_CHAMADA) -> List[Tuple[date, date]]:
+    janelas = []
+    atual = inicio
+    while atual <= fim:
+        ate = min(atual + timedelta(days=dias - 1), fim)
+        janelas.append((atual, ate))
+        atual = ate + timedelta(days=1)
+    return janelas
+
+
+def linha_insight(ad_account_id: str, insight, colunas_ids: List[str]) -> Dict[str, Any]:
+    """Converte um insight diário da API numa linha de meta_insights_*_diario."""
+    linha = {
+        "ad_account_id": ad_account_id,
+        "data": date.fromisoformat(insight.get('date_start')),
+        "impressions": int(insight.get('impressions', 0)),
+        "clicks": int(insight.get('clicks', 0)),
+        "reach": int(insight.get('reach', 0)),
+        "spend": float(insight.get('spend', 0)),
+        "receita": 0.0,
+    }
+    for coluna in colunas_ids:
+        linha[coluna] = insight.get(coluna)
+
+    for coluna, action_type in ACOES.items():
+        linha[coluna] = meta_insights.somar_conversoes(insight, [action_type])
+
+    if 'action_values' in insight:
+        for action_value in insight['action_values']:
+            if action_value['action_type'] in ACOES_RECEITA:
+                linha["receita"] += float(action_value['value'])
+    return linha
+
+
+def _sincronizar_campanhas(db: Session, conta, ad_account_id: str) -> int:
+    campanhas = list(conta.get_campaigns(
+        fields=['id', 'name', 'status', 'effective_status', 'objective'],
+        params={'effective_status': ['ACTIVE', 'PAUSED', 'ARCHIVED']}
+    ))
+
+    db.query(MetaCampanha).filter(MetaCampanha.ad_account_id == ad_account_id).delete(synchronize_session=False)
+    if campanhas:
+        db.execute(insert(MetaCampanha), [
+            {
+                "ad_account_id": ad_account_id,
+                "campaign_id": c.get('id'),
+                "name": c.get('name'),
+                "status": c.get('status'),
+                "effective_status": c.get('effective_status'),
+                "objective": c.get('objective'),
+            }
+            for c in campanhas
+        ])
+    return len(campanhas)
+
+
+def sincronizar_insights(db: Session, config: MetaAdsConfig, conta=None,
+                         hoje: Optional[date] = None) -> Dict[str, Any]:
+    """
+    Sincroniza campanhas e insights diários da conta de config.
+    Usa a sessão do token da config (app/meta_api.py). Faz commit e atualiza last_sync.
+    Se alguma chamada falhar, nada é gravado e a marca d'água não anda.
+    """
+    conta = conta if conta is not None else meta_api.conta(config)
+    ad_account_id = config.ad_account_id
+
+    tem_dados = db.query(MetaInsightCampanhaDiario.id).filter(
+        MetaInsightCampanhaDiario.ad_account_id == ad_account_id
+    ).first() is not None
+    inicio, fim = periodo_sincronizacao(config.last_sync, tem_dados, hoje)
+
+    # Uma chamada por (nível, janela de 30 dias), em paralelo
+    tarefas = [(nivel, janela) for nivel in NIVEIS for janela in _janelas(inicio, fim)]
+
+    def buscar(tarefa):
+        nivel, (desde, ate) = tarefa
+        _, colunas_ids, _ = NIVEIS[nivel]
+        return meta_insights.buscar_com_backoff(
+            conta,
+            fields=colunas_ids + CAMPOS_METRICAS,
+            params={
+                'level': nivel,
+                'time_range': {'since': desde.isoformat(), 'until': ate.isoformat()},
+                'time_increment': 1,
+                'limit': 500,
+            },
+            conta=ad_account_id
+        )
+
+    with ThreadPoolExecutor(max_workers=max(1, min(meta_insights.META_MAX_WORKERS, len(tarefas)))) as pool:
+        respostas = list(pool.map(buscar, tarefas))
+
+    resumo = {
+        "inicio": inicio.isoformat(),
+        "fim": fim.isoformat(),
+        "backfill": not tem_dados or config.last_sync is None,
+        "campanhas": _sincronizar_campanhas(db, conta, ad_account_id),
+    }
+
+    for nivel, (modelo, colunas_ids, chave) in NIVEIS.items():
+        # Uma linha por (dia, objeto); se a API repetir, vale a última
+        linhas = {}
+        for (nivel_tarefa, _), insights in zip(tarefas, respostas):
+            if nivel_tarefa != nivel:
+                continue
+            for insight in insights:
+                linha = linha_insight(ad_account_id, insight, colunas_ids)
+                linhas[(linha["data"], linha[chave])] = linha
+
+        db.query(modelo).filter(
+            modelo.ad_account_id == ad_account_id,
+            modelo.data >= inicio,
+            modelo.data <= fim
+        ).delete(synchronize_session=False)
+        if linhas:
+            db.execute(insert(modelo), list(linhas.values()))
+        resumo[nivel] = len(linhas)
+
+    config.last_sync = datetime.now()
+    db.commit()
+
+    logger.info(f"Insights do Meta sincronizados: {resumo}")
+    return resumo
@@ -0,0 +1,129 @@
+"""
+Cálculo em lote do realizado das metas (PUT /metas/calcular-realizado).
+
+Em vez de buscar a pessoa e as métricas de cada meta, lê as metas do período
+com a pessoa (uma consulta), soma cada tabela de origem agrupada por
+(nome, mes) (uma consulta por tabela) e grava realizado, delta e
+perc_atingimento de todas as metas num único UPDATE em lote (executemany
+pela chave primária). Serve para um mês ou para o ano inteiro.
+
+Origem por função da pessoa:
+- social_selling: SocialSellingMetrica (ativações e leads; % pelos leads)
+- sdr: SDRMetrica (reuniões agendadas e realizadas; % pelas realizadas)
+- closer: Venda (quantidade e valor bruto; % pelo faturamento)
+"""
+
+from typing import Any, Dict, List, Optional, Tuple
+
+from sqlalchemy import func, update
+from sqlalchemy.orm import Session, contains_eager
+
+from app.models.models import Meta, SDRMetrica, SocialSellingMetrica, Venda
+
+# função normalizada -> (modelo, coluna do nome, somas: campo realizado -> expressão)
+ORIGENS = {
+    "social_selling": (SocialSellingMetrica, SocialSellingMetrica.vendedor, {
+        "ativacoes": func.sum(func.coalesce(SocialSellingMetrica.ativacoes, 0)),
+        "leads": func.sum(func.coalesce(SocialSellingMetrica.leads_gerados, 0)),
+    }),
+    "sdr": (SDRMetrica, SDRMetrica.sdr, {
+        "reunioes_agendadas": func.sum(func.coalesce(SDRMetrica.reunioes_agendadas, 0)),
+        "reunioes": func.sum(func.coalesce(SDRMetrica.reunioes_realizadas, 0)),
+    }),
+    "closer": (Venda, Venda.closer, {
+        "vendas": func.count(Venda.id),
+        "faturamento": func.sum(func.coalesce(Venda.valor_bruto, 0)),
+    }),
+}
+
+# Ordem de prioridade do % de atingimento: o primeiro campo com meta > 0
+PRIORIDADE_ATINGIMENTO = {
+    "social_selling": ["leads", "ativacoes"],
+    "sdr": ["reunioes", "reunioes_agendadas"],
+    "closer": ["faturamento", "vendas"],
+}
+
+
+def normalizar_funcao(funcao: Optional[str]) -> str:
+    funcao = (funcao or "").lower()
+    return "social_selling" if funcao == "social selling" else funcao
+
+
+def _somas(db: Session, funcao: str, ano: int, mes: Optional[int],
+           nomes: List[str]) -> Dict[Tuple[str, int], Dict[str, Any]]:
+    """Somas da origem da função agrupadas por (nome, mes)."""
+    modelo, coluna_nome, expressoes = ORIGENS[funcao]
+    query = db.query(
+        coluna_nome, modelo.mes, *[expressao.label(campo) for campo, expressao in expressoes.items()]
+    ).filter(modelo.ano == ano, coluna_nome.in_(nomes))
+    if mes is not None:
+        query = query.filter(modelo.mes == mes)
+
+    return {
+        (linha[0], linha[1]): {campo: linha._mapping[campo] or 0 for campo in expressoes}
+        for linha in query.group_by(coluna_nome, modelo.mes).all()
+    }
+
+
+def calcular(db: Session, ano: int, mes: Optional[int] = None) -> int:
+    """
+    Recalcula as metas de pessoas do mês (ou do ano, sem mes).
+    Retorna quantas metas foram lidas (0 se não há metas no período).
+    Não faz commit.
+    """
+    query = db.query(Meta).join(Meta.pessoa).options(contains_eager(Meta.pessoa)).filter(Meta.ano == ano)
+    if mes is not None:
+        query = query.filter(Meta.mes == mes)
+
+    metas = query.all()
+    if not metas:
+        return 0
+
+    nomes_por_funcao: Dict[str, set] = {}
+    for meta in metas:
+        nomes_por_funcao.setdefault(normalizar_funcao(meta.pessoa.funcao), set()).add(meta.pessoa.nome)
+
+    somas = {
+        funcao: _somas(db, funcao, ano, mes, sorted(nomes))
+        for funcao, nomes in nomes_por_funcao.items() if funcao in ORIGENS
+    }
+
+    valores = []
+    for meta in metas:
+        funcao = normalizar_funcao(meta.pessoa.funcao)
+        if funcao in ORIGENS:
+            valores.append(_valores_meta(meta, funcao, somas[funcao].get((meta.pessoa.nome, meta.mes), {})))
+
+    if valores:
+        db.execute(update(Meta), valores)
+    return len(metas)
+
+
+# Todos os campos calculados (realizado_<campo> e delta_<campo>)
+CAMPOS = [campo for _, _, expressoes in ORIGENS.values() for campo in expressoes]
+
+
+def _valores_meta(meta: Meta, funcao: str, realizado: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    realizado_*, delta_* e perc_atingimento de uma meta (linha do UPDATE em
+    lote). Todas as linhas têm as mesmas colunas, para o UPDATE sair num único
+    executemany; os campos de outras funções mantêm o valor atual.
+    """
+    valores: Dict[str, Any] = {"id": meta.id}
+    for campo in CAMPOS:
+        if campo in ORIGENS[funcao][2]:
+            feito = realizado.get(campo, 0)
+            valores[f"realizado_{campo}"] = feito
+            valores[f"delta_{campo}"] = feito - (getattr(meta, f"meta_{campo}") or 0)
+        else:
+            valores[f"realizado_{campo}"] = getattr(meta, f"realizado_{campo}")
+            valores[f"delta_{campo}"] = getattr(meta, f"delta_{campo}")
+
+    # Sem meta definida mantém o % anterior
+    valores["perc_atingimento"] = meta.perc_atingimento
+    for campo in PRIORIDADE_ATINGIMENTO[funcao]:
+        alvo = getattr(meta, f"meta_{campo}")
+        if alvo and alvo > 0:
+            valores["perc_atingimento"] = (valores[f"realizado_{campo}"] / alvo) * 100
+            break
+    return valores
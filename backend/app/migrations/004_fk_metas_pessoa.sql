@@ -0,0 +1,21 @@
+-- Migration 004: Chave estrangeira metas.pessoa_id -> pessoas.id
+-- Apagar uma pessoa mantém as metas dela, com pessoa_id NULL (ON DELETE SET NULL)
+-- Data: 2026-10-17
+
+-- Backup recomendado antes de executar:
+-- pg_dump -t metas > backup_metas_20261017.sql
+
+-- Metas de pessoas que não existem mais impediriam a constraint.
+-- Conferir antes quais são (ficam no banco, só perdem o vínculo):
+SELECT id, mes, ano, pessoa_id
+FROM metas
+WHERE pessoa_id IS NOT NULL
+  AND pessoa_id NOT IN (SELECT id FROM pessoas);
+
+UPDATE metas SET pessoa_id = NULL
+WHERE pessoa_id IS NOT NULL
+  AND pessoa_id NOT IN (SELECT id FROM pessoas);
+
+ALTER TABLE metas DROP CONSTRAINT IF EXISTS metas_pessoa_id_fkey;
+ALTER TABLE metas ADD CONSTRAINT metas_pessoa_id_fkey
+  FOREIGN KEY (pessoa_id) REFERENCES pessoas(id) ON DELETE SET NULL;
@@ -0,0 +1,16 @@
+-- Migration 005: Coluna periodo (ano * 100 + mes) em vendas, financeiro e métricas comerciais
+-- Coluna gerada pelo banco (PostgreSQL 12+): o ADD COLUMN já preenche as linhas existentes
+-- e inserts/updates de ano ou mes a mantêm atualizada
+-- Data: 2026-10-17
+
+ALTER TABLE vendas ADD COLUMN IF NOT EXISTS periodo INTEGER GENERATED ALWAYS AS (ano * 100 + mes) STORED;
+ALTER TABLE financeiro ADD COLUMN IF NOT EXISTS periodo INTEGER GENERATED ALWAYS AS (ano * 100 + mes) STORED;
+ALTER TABLE social_selling_metricas ADD COLUMN IF NOT EXISTS periodo INTEGER GENERATED ALWAYS AS (ano * 100 + mes) STORED;
+ALTER TABLE sdr_metricas ADD COLUMN IF NOT EXISTS periodo INTEGER GENERATED ALWAYS AS (ano * 100 + mes) STORED;
+ALTER TABLE closer_metricas ADD COLUMN IF NOT EXISTS periodo INTEGER GENERATED ALWAYS AS (ano * 100 + mes) STORED;
+
+CREATE INDEX IF NOT EXISTS ix_vendas_periodo ON vendas (periodo);
+CREATE INDEX IF NOT EXISTS ix_financeiro_periodo ON financeiro (periodo);
+CREATE INDEX IF NOT EXISTS ix_social_selling_metricas_periodo ON social_selling_metricas (periodo);
+CREATE INDEX IF NOT EXISTS ix_sdr_metricas_periodo ON sdr_metricas (periodo);
+CREATE INDEX IF NOT EXISTS ix_closer_metricas_periodo ON closer_metricas (periodo);
@@ -0,0 +1,7 @@
+-- Migration 006: Impressão digital por linha nas métricas diárias do Google Sheets
+-- A sincronização compara o hash das células de cada linha com o gravado e só
+-- regrava as linhas que mudaram. Linhas existentes ficam sem hash (NULL) e são
+-- atualizadas uma vez na próxima sincronização.
+-- Data: 2026-10-17
+
+ALTER TABLE sheets_metricas_diarias ADD COLUMN IF NOT EXISTS row_hash VARCHAR(64);
@@ -0,0 +1,9 @@
+-- Migration 007: updated_at em vendas e financeiro
+-- A exportação em segundo plano reaproveita o arquivo gerado quando
+-- count(*), max(id), sum(id) e max(updated_at) do período não mudaram, sem
+-- ler as linhas. O valor é gravado pela aplicação (insert e update); linhas
+-- existentes ficam com NULL até a próxima alteração.
+-- Data: 2026-10-17
+
+ALTER TABLE vendas ADD COLUMN IF NOT EXISTS updated_at TIMESTAMP;
+ALTER TABLE financeiro ADD COLUMN IF NOT EXISTS updated_at TIMESTAMP;
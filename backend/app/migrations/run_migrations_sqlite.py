@@ -14,18 +14,24 @@ from datetime import datetime
 # Adicionar diretório raiz ao path
 sys.path.append(str(Path(__file__).parent.parent.parent))
 
-from app.database import engine, SessionLocal, DATABASE_DIR
+from app import database
+from app.database import engine, SessionLocal
 from sqlalchemy import text, inspect
 import json
 
 def backup_database():
     """Criar backup do banco de dados"""
-    db_path = Path(DATABASE_DIR) / "medgm_analytics.db"
+    # DATABASE_DIR só existe no banco padrão (sem DATABASE_URL)
+    if not hasattr(database, "DATABASE_DIR"):
+        print("⚠️  DATABASE_URL definido: faça o backup do banco manualmente.")
+        return None
+
+    db_path = Path(database.DATABASE_DIR) / "medgm_analytics.db"
     if not db_path.exists():
         print("⚠️  Banco de dados não encontrado. Será criado novo.")
         return None
 
-    backup_path = Path(DATABASE_DIR) / f"medgm_analytics_backup_{datetime.now().strftime('%Y%m%d_%H%M%S')}.db"
+    backup_path = Path(database.DATABASE_DIR) / f"medgm_analytics_backup_{datetime.now().strftime('%Y%m%d_%H%M%S')}.db"
     shutil.copy2(db_path, backup_path)
     print(f"✅ Backup criado: {backup_path}")
     return backup_path
@@ -416,6 +422,55 @@ def migrate_closer():
         print(f"✅ {len(metricas_antigas)} métricas de Closer migradas")
 
 
+def migrate_periodo():
+    """Adicionar coluna periodo (ano * 100 + mes) nas tabelas com mes/ano"""
+    print("\n=== MIGRAÇÃO: Coluna periodo ===")
+
+    for tabela in ['vendas', 'financeiro', 'social_selling_metricas', 'sdr_metricas', 'closer_metricas']:
+        if check_column_exists(tabela, 'periodo'):
+            print(f"⏭️  {tabela} já tem periodo")
+            continue
+
+        with engine.begin() as conn:
+            # SQLite só aceita coluna gerada VIRTUAL no ALTER TABLE (STORED só no CREATE TABLE);
+            # o valor é calculado na leitura e pode ser indexado
+            conn.execute(text(
+                f"ALTER TABLE {tabela} ADD COLUMN periodo INTEGER GENERATED ALWAYS AS (ano * 100 + mes) VIRTUAL"
+            ))
+            conn.execute(text(f"CREATE INDEX IF NOT EXISTS ix_{tabela}_periodo ON {tabela} (periodo)"))
+        print(f"✅ {tabela}: periodo adicionado")
+
+
+def migrate_sheets_row_hash():
+    """Adicionar row_hash (hash das células da linha) em sheets_metricas_diarias"""
+    print("\n=== MIGRAÇÃO: Hash por linha do Google Sheets ===")
+
+    if 'sheets_metricas_diarias' not in inspect(engine).get_table_names():
+        print("⏭️  sheets_metricas_diarias ainda não existe (create_all cria com a coluna)")
+        return
+    if check_column_exists('sheets_metricas_diarias', 'row_hash'):
+        print("⏭️  sheets_metricas_diarias já tem row_hash")
+        return
+
+    with engine.begin() as conn:
+        conn.execute(text("ALTER TABLE sheets_metricas_diarias ADD COLUMN row_hash VARCHAR(64)"))
+    print("✅ sheets_metricas_diarias: row_hash adicionado")
+
+
+def migrate_updated_at():
+    """Adicionar updated_at em vendas e financeiro (versão dos dados nas exportações)"""
+    print("\n=== MIGRAÇÃO: updated_at em vendas e financeiro ===")
+
+    for tabela in ['vendas', 'financeiro']:
+        if check_column_exists(tabela, 'updated_at'):
+            print(f"⏭️  {tabela} já tem updated_at")
+            continue
+
+        with engine.begin() as conn:
+            conn.execute(text(f"ALTER TABLE {tabela} ADD COLUMN updated_at TIMESTAMP"))
+        print(f"✅ {tabela}: updated_at adicionado")
+
+
 def main():
     print("=" * 60)
     print("EXECUÇÃO DE MIGRATIONS - SQLITE")
@@ -435,6 +490,9 @@ def main():
         migrate_social_selling()
         migrate_sdr()
         migrate_closer()
+        migrate_periodo()
+        migrate_sheets_row_hash()
+        migrate_updated_at()
 
         print("\n" + "=" * 60)
         print("✅ TODAS AS MIGRATIONS CONCLUÍDAS COM SUCESSO!")
@@ -2,7 +2,10 @@
 SQLAlchemy models for MedGM Analytics database.
 """
 
-from sqlalchemy import Column, Integer, String, Float, Date, DateTime, Boolean, Text
+from datetime import datetime
+
+from sqlalchemy import Column, Integer, String, Float, Date, DateTime, Boolean, Text, UniqueConstraint, Index, ForeignKey, Computed, text
+from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
 from app.database import Base
 
@@ -13,6 +16,10 @@ class Venda(Base):
     Contém dados de todas as vendas realizadas.
     """
     __tablename__ = "vendas"
+    __table_args__ = (
+        Index('idx_vendas_mes_ano_vendedor', 'mes', 'ano', 'vendedor'),
+        Index('idx_vendas_mes_ano_closer', 'mes', 'ano', 'closer'),
+    )
 
     id = Column(Integer, primary_key=True, index=True, autoincrement=True)
     data = Column(Date, nullable=False, index=True)
@@ -27,6 +34,8 @@ class Venda(Base):
     vendedor = Column(String(100), nullable=True, index=True)
     mes = Column(Integer, nullable=False, index=True)  # 1-12
     ano = Column(Integer, nullable=False, index=True)  # 2025, 2026, etc
+    # ano * 100 + mes (ex: 202503), calculado pelo banco; filtros por intervalo em app/periodo.py
+    periodo = Column(Integer, Computed("ano * 100 + mes", persisted=True), index=True)
 
     # Campos adicionais
     closer = Column(String(100), nullable=True, index=True)  # Nome do closer responsável
@@ -37,6 +46,9 @@ class Venda(Base):
     valor_pago = Column(Float, nullable=True)  # Valor efetivamente pago
 
     created_at = Column(DateTime, server_default=func.now())
+    # Relógio do Python (microssegundos): no SQLite o func.now() só tem segundos, e a
+    # exportação em segundo plano usa max(updated_at) para saber se os dados mudaram
+    updated_at = Column(DateTime, default=datetime.now, onupdate=datetime.now)
 
     def __repr__(self):
         return f"<Venda(id={self.id}, cliente='{self.cliente}', valor_bruto={self.valor_bruto}, funil='{self.funil}')>"
@@ -48,6 +60,15 @@ class Financeiro(Base):
     Modelo expandido com campos detalhados.
     """
     __tablename__ = "financeiro"
+    __table_args__ = (
+        Index('idx_financeiro_mes_ano_tipo_previsto', 'mes', 'ano', 'tipo', 'previsto_realizado'),
+        # Só realizado (DRE, DFC, dashboards): listagem já ordenada por data e soma
+        # por categoria lida só do índice (previsto_realizado entra para o SQLite cobrir)
+        Index('idx_financeiro_realizado_cobertura', 'ano', 'mes', 'tipo', 'data', 'categoria', 'valor',
+              'previsto_realizado',
+              postgresql_where=text("previsto_realizado = 'realizado'"),
+              sqlite_where=text("previsto_realizado = 'realizado'")),
+    )
 
     id = Column(Integer, primary_key=True, index=True, autoincrement=True)
     tipo = Column(String(50), nullable=False, index=True)  # 'entrada' ou 'saida'
@@ -69,9 +90,13 @@ class Financeiro(Base):
     data = Column(Date, nullable=True, index=True)
     mes = Column(Integer, nullable=False, index=True)  # 1-12
     ano = Column(Integer, nullable=False, index=True)  # 2025, 2026, etc
+    periodo = Column(Integer, Computed("ano * 100 + mes", persisted=True), index=True)  # ano * 100 + mes
     previsto_realizado = Column(String(20), nullable=True, default='realizado')  # 'previsto' ou 'realizado'
 
     created_at = Column(DateTime, server_default=func.now())
+    # Relógio do Python (microssegundos): no SQLite o func.now() só tem segundos, e a
+    # exportação em segundo plano usa max(updated_at) para saber se os dados mudaram
+    updated_at = Column(DateTime, default=datetime.now, onupdate=datetime.now)
 
     def __repr__(self):
         return f"<Financeiro(id={self.id}, tipo='{self.tipo}', categoria='{self.categoria}', valor={self.valor})>"
@@ -127,10 +152,14 @@ class SocialSellingMetrica(Base):
     Metas são centralizadas na tabela Meta.
     """
     __tablename__ = "social_selling_metricas"
+    __table_args__ = (
+        Index('idx_ss_mes_ano_vendedor', 'mes', 'ano', 'vendedor'),
+    )
 
     id = Column(Integer, primary_key=True, index=True, autoincrement=True)
     mes = Column(Integer, nullable=False, index=True)
     ano = Column(Integer, nullable=False, index=True)
+    periodo = Column(Integer, Computed("ano * 100 + mes", persisted=True), index=True)  # ano * 100 + mes
     data = Column(Date, nullable=True, index=True)  # Data específica da métrica
     vendedor = Column(String(100), nullable=False, index=True)  # Nome do vendedor SS
 
@@ -157,10 +186,15 @@ class SDRMetrica(Base):
     Metas são centralizadas na tabela Meta.
     """
     __tablename__ = "sdr_metricas"
+    __table_args__ = (
+        Index('idx_sdr_mes_ano_sdr', 'mes', 'ano', 'sdr'),
+        Index('idx_sdr_mes_ano_funil', 'mes', 'ano', 'funil'),
+    )
 
     id = Column(Integer, primary_key=True, index=True, autoincrement=True)
     mes = Column(Integer, nullable=False, index=True)
     ano = Column(Integer, nullable=False, index=True)
+    periodo = Column(Integer, Computed("ano * 100 + mes", persisted=True), index=True)  # ano * 100 + mes
     data = Column(Date, nullable=True, index=True)  # Data específica da métrica
     sdr = Column(String(100), nullable=False, index=True)  # Nome do SDR
     funil = Column(String(100), nullable=False, index=True)  # SS, Quiz, Indicacao, Webinario
@@ -188,10 +222,15 @@ class CloserMetrica(Base):
     Metas são centralizadas na tabela Meta.
     """
     __tablename__ = "closer_metricas"
+    __table_args__ = (
+        Index('idx_closer_mes_ano_closer', 'mes', 'ano', 'closer'),
+        Index('idx_closer_mes_ano_funil', 'mes', 'ano', 'funil'),
+    )
 
     id = Column(Integer, primary_key=True, index=True, autoincrement=True)
     mes = Column(Integer, nullable=False, index=True)
     ano = Column(Integer, nullable=False, index=True)
+    periodo = Column(Integer, Computed("ano * 100 + mes", persisted=True), index=True)  # ano * 100 + mes
     data = Column(Date, nullable=True, index=True)  # Data específica da métrica
     closer = Column(String(100), nullable=False, index=True)  # Nome do Closer
     funil = Column(String(100), nullable=False, index=True)  # SS, Quiz, Indicacao, Webinario
@@ -219,6 +258,95 @@ class CloserMetrica(Base):
         return f"<CloserMetrica(id={self.id}, closer='{self.closer}', funil='{self.funil}', mes={self.mes}, ano={self.ano})>"
 
 
+# ==================== ROLLUPS COMERCIAIS ====================
+
+class ComercialRollupMensal(Base):
+    """
+    Totais mensais materializados das métricas comerciais.
+    Uma linha por (origem, ano, mes, pessoa, funil), mantida por app.rollups
+    a cada escrita em SocialSellingMetrica, SDRMetrica e CloserMetrica.
+    """
+    __tablename__ = "comercial_rollup_mensal"
+    __table_args__ = (
+        UniqueConstraint('origem', 'ano', 'mes', 'pessoa', 'funil', name='uq_rollup_mensal_chave'),
+        Index('idx_rollup_mensal_periodo', 'origem', 'ano', 'mes'),
+    )
+
+    id = Column(Integer, primary_key=True, index=True, autoincrement=True)
+    origem = Column(String(20), nullable=False)  # social_selling, sdr, closer
+    ano = Column(Integer, nullable=False)
+    mes = Column(Integer, nullable=False)
+    pessoa = Column(String(100), nullable=False)  # vendedor, sdr ou closer
+    funil = Column(String(100), nullable=False, default='')  # '' para Social Selling
+    registros = Column(Integer, nullable=False, default=0)  # Linhas diárias agregadas
+
+    # Social Selling
+    ativacoes = Column(Integer, nullable=False, default=0)
+    conversoes = Column(Integer, nullable=False, default=0)
+    leads_gerados = Column(Integer, nullable=False, default=0)
+
+    # SDR
+    leads_recebidos = Column(Integer, nullable=False, default=0)
+    reunioes_agendadas = Column(Integer, nullable=False, default=0)
+    reunioes_realizadas = Column(Integer, nullable=False, default=0)
+
+    # Closer
+    calls_agendadas = Column(Integer, nullable=False, default=0)
+    calls_realizadas = Column(Integer, nullable=False, default=0)
+    vendas = Column(Integer, nullable=False, default=0)
+    faturamento = Column(Float, nullable=False, default=0.0)
+    booking = Column(Float, nullable=False, default=0.0)
+    faturamento_bruto = Column(Float, nullable=False, default=0.0)
+    faturamento_liquido = Column(Float, nullable=False, default=0.0)
+
+    updated_at = Column(DateTime, server_default=func.now(), onupdate=func.now())
+
+    def __repr__(self):
+        return f"<ComercialRollupMensal(origem='{self.origem}', pessoa='{self.pessoa}', funil='{self.funil}', mes={self.mes}, ano={self.ano})>"
+
+
+class ComercialRollupDiario(Base):
+    """
+    Totais diários materializados das métricas comerciais.
+    Uma linha por (origem, data, pessoa, funil); só considera registros com data.
+    """
+    __tablename__ = "comercial_rollup_diario"
+    __table_args__ = (
+        UniqueConstraint('origem', 'ano', 'mes', 'data', 'pessoa', 'funil', name='uq_rollup_diario_chave'),
+        Index('idx_rollup_diario_periodo', 'origem', 'ano', 'mes', 'data'),
+    )
+
+    id = Column(Integer, primary_key=True, index=True, autoincrement=True)
+    origem = Column(String(20), nullable=False)
+    ano = Column(Integer, nullable=False)
+    mes = Column(Integer, nullable=False)
+    data = Column(Date, nullable=False)
+    pessoa = Column(String(100), nullable=False)
+    funil = Column(String(100), nullable=False, default='')
+    registros = Column(Integer, nullable=False, default=0)
+
+    ativacoes = Column(Integer, nullable=False, default=0)
+    conversoes = Column(Integer, nullable=False, default=0)
+    leads_gerados = Column(Integer, nullable=False, default=0)
+
+    leads_recebidos = Column(Integer, nullable=False, default=0)
+    reunioes_agendadas = Column(Integer, nullable=False, default=0)
+    reunioes_realizadas = Column(Integer, nullable=False, default=0)
+
+    calls_agendadas = Column(Integer, nullable=False, default=0)
+    calls_realizadas = Column(Integer, nullable=False, default=0)
+    vendas = Column(Integer, nullable=False, default=0)
+    faturamento = Column(Float, nullable=False, default=0.0)
+    booking = Column(Float, nullable=False, default=0.0)
+    faturamento_bruto = Column(Float, nullable=False, default=0.0)
+    faturamento_liquido = Column(Float, nullable=False, default=0.0)
+
+    updated_at = Column(DateTime, server_default=func.now(), onupdate=func.now())
+
+    def __repr__(self):
+        return f"<ComercialRollupDiario(origem='{self.origem}', pessoa='{self.pessoa}', funil='{self.funil}', data={self.data})>"
+
+
 # ==================== NOVOS MODELOS DE CONFIGURAÇÃO ====================
 
 class Pessoa(Base):
@@ -237,6 +365,12 @@ class Pessoa(Base):
     created_at = Column(DateTime, server_default=func.now())
     updated_at = Column(DateTime, server_default=func.now(), onupdate=func.now())
 
+    # Metas da pessoa. Apagar a pessoa mantém o histórico de metas com
+    # pessoa_id NULL (o ORM anula o vínculo, o que vale também no SQLite sem
+    # PRAGMA foreign_keys; no PostgreSQL o FK tem ON DELETE SET NULL). Para
+    # tirar alguém da equipe sem perder nada, use ativo=False.
+    metas = relationship("Meta", back_populates="pessoa")
+
     def __repr__(self):
         return f"<Pessoa(id={self.id}, nome='{self.nome}', funcao='{self.funcao}')>"
 
@@ -288,12 +422,15 @@ class Meta(Base):
     Permite acompanhar metas vs realizado por mes.
     """
     __tablename__ = "metas"
+    __table_args__ = (
+        Index('idx_meta_mes_ano_pessoa', 'mes', 'ano', 'pessoa_id'),
+    )
 
     id = Column(Integer, primary_key=True, index=True, autoincrement=True)
     mes = Column(Integer, nullable=False, index=True)
     ano = Column(Integer, nullable=False, index=True)
     tipo = Column(String(20), nullable=False, default="pessoa")  # pessoa | empresa
-    pessoa_id = Column(Integer, nullable=True, index=True)
+    pessoa_id = Column(Integer, ForeignKey("pessoas.id", ondelete="SET NULL"), nullable=True, index=True)
 
     # Metas possiveis
     meta_ativacoes = Column(Integer, nullable=True)
@@ -325,6 +462,8 @@ class Meta(Base):
     created_at = Column(DateTime, server_default=func.now())
     updated_at = Column(DateTime, server_default=func.now(), onupdate=func.now())
 
+    pessoa = relationship("Pessoa", back_populates="metas")
+
     def __repr__(self):
         return f"<Meta(id={self.id}, mes={self.mes}, ano={self.ano}, pessoa_id={self.pessoa_id})>"
 
@@ -429,6 +568,9 @@ class QuizMetrics(Base):
     Armazena métricas de campanha + conversão.
     """
     __tablename__ = "quiz_metrics"
+    __table_args__ = (
+        Index('idx_quiz_ano_mes_data', 'ano', 'mes', 'data'),
+    )
 
     id = Column(Integer, primary_key=True, index=True, autoincrement=True)
     data = Column(Date, nullable=False, index=True)
@@ -461,6 +603,9 @@ class VendaDiretaMetrics(Base):
     Armazena métricas de campanha + conversão + vendas.
     """
     __tablename__ = "venda_direta_metrics"
+    __table_args__ = (
+        Index('idx_venda_direta_ano_mes_data', 'ano', 'mes', 'data'),
+    )
 
     id = Column(Integer, primary_key=True, index=True, autoincrement=True)
     data = Column(Date, nullable=False, index=True)
@@ -486,3 +631,257 @@ class VendaDiretaMetrics(Base):
 
     def __repr__(self):
         return f"<VendaDiretaMetrics(id={self.id}, campanha='{self.campanha_nome}', data={self.data}, vendas={self.vendas})>"
+
+
+# ==================== GOOGLE SHEETS ====================
+
+class SheetsSnapshot(Base):
+    """
+    Estado da última sincronização de cada aba do Google Sheets.
+    O hash do conteúdo permite pular a gravação quando a aba não mudou.
+    """
+    __tablename__ = "sheets_snapshots"
+
+    id = Column(Integer, primary_key=True, index=True, autoincrement=True)
+    tipo = Column(String(30), nullable=False, unique=True)  # captura_lead, venda_direta
+    aba = Column(String(255), nullable=False)  # Nome da aba na planilha
+    content_hash = Column(String(64), nullable=False)  # sha256 dos valores da aba
+    linhas = Column(Integer, nullable=False, default=0)  # Linhas diárias gravadas
+    synced_at = Column(DateTime, nullable=True)  # Última leitura da planilha
+    changed_at = Column(DateTime, nullable=True)  # Última vez que o conteúdo mudou
+
+    def __repr__(self):
+        return f"<SheetsSnapshot(tipo='{self.tipo}', linhas={self.linhas}, hash='{self.content_hash[:8]}')>"
+
+
+class SheetsMetricaDiaria(Base):
+    """
+    Linhas da "Análise Diária" das abas de tráfego do Google Sheets.
+    Gravadas pela sincronização; os endpoints de leitura consultam esta tabela
+    em vez de baixar a planilha a cada requisição.
+    """
+    __tablename__ = "sheets_metricas_diarias"
+    __table_args__ = (
+        UniqueConstraint('tipo', 'data', name='uq_sheets_diaria_tipo_data'),
+        Index('idx_sheets_diaria_periodo', 'tipo', 'ano', 'mes'),
+    )
+
+    id = Column(Integer, primary_key=True, index=True, autoincrement=True)
+    tipo = Column(String(30), nullable=False)  # captura_lead, venda_direta
+    data = Column(Date, nullable=False)
+    dia = Column(Integer, nullable=False)
+    mes = Column(Integer, nullable=False)
+    ano = Column(Integer, nullable=False)
+
+    # Métricas comuns
+    valor_gasto = Column(Float, default=0)
+    cliques = Column(Integer, default=0)
+    cpc = Column(Float, default=0)
+    ctr = Column(Float, default=0)
+    cpm = Column(Float, default=0)
+    connect_rate = Column(Float, default=0)
+    conv_pg = Column(Float, default=0)
+    opt_in = Column(Float, default=0)
+    impressoes = Column(Integer, default=0)
+    vis_pagina = Column(Integer, default=0)
+    vv_3s = Column(Integer, default=0)
+    vv_75 = Column(Integer, default=0)
+    hook_rate = Column(Float, default=0)
+    view_75 = Column(Float, default=0)
+
+    # Captura de Lead (Quiz/SE)
+    leads = Column(Integer, default=0)
+    cpl = Column(Float, default=0)
+
+    # Venda Direta (Isca/Script)
+    vendas = Column(Integer, default=0)
+    cpa = Column(Float, default=0)
+    init_checkout = Column(Integer, default=0)
+
+    # sha256 das células da linha na planilha; linhas com o mesmo hash não são regravadas
+    row_hash = Column(String(64), nullable=True)
+
+    updated_at = Column(DateTime, server_default=func.now(), onupdate=func.now())
+
+    def __repr__(self):
+        return f"<SheetsMetricaDiaria(tipo='{self.tipo}', data={self.data})>"
+
+
+# ==================== JOBS AGENDADOS ====================
+
+class JobExecucao(Base):
+    """
+    Histórico de execuções das tarefas agendadas (ex: sincronização do Google Sheets).
+    Gravado pelo próprio job, então vale para todos os workers do uvicorn.
+    """
+    __tablename__ = "job_execucoes"
+    __table_args__ = (
+        Index('idx_job_execucoes_job_inicio', 'job', 'iniciado_em'),
+    )
+
+    id = Column(Integer, primary_key=True, index=True, autoincrement=True)
+    job = Column(String(100), nullable=False)  # sync_google_sheets
+    origem = Column(String(20), nullable=False, default="agendado")  # agendado, manual
+    status = Column(String(20), nullable=False, default="executando")  # executando, sucesso, erro, interrompido
+    iniciado_em = Column(DateTime, nullable=False)
+    finalizado_em = Column(DateTime, nullable=True)
+    duracao_ms = Column(Integer, nullable=True)
+    linhas = Column(Integer, nullable=True)  # Linhas gravadas/conferidas
+    detalhes = Column(Text, nullable=True)  # Resumo em JSON
+    erro = Column(Text, nullable=True)
+
+    def __repr__(self):
+        return f"<JobExecucao(job='{self.job}', status='{self.status}', duracao_ms={self.duracao_ms})>"
+
+
+class ExportJob(Base):
+    """
+    Exportações geradas em segundo plano (POST /export/jobs).
+    O arquivo fica em EXPORT_DIR, nomeado pela chave de cache (tipo, período,
+    formato e versão dos dados), e é reaproveitado enquanto os dados não mudarem.
+    """
+    __tablename__ = "export_jobs"
+
+    id = Column(String(32), primary_key=True)  # uuid4 hex, usado na URL de download
+    tipo = Column(String(20), nullable=False)  # financeiro, vendas, completo
+    formato = Column(String(10), nullable=False, default="xlsx")  # xlsx, csv, csv.gz
+    parametros = Column(Text, nullable=True)  # Período e aba em JSON
+    status = Column(String(20), nullable=False, default="pendente")  # pendente, executando, concluido, erro (também se interrompido)
+    progresso = Column(Integer, nullable=False, default=0)  # 0-100
+    linhas_processadas = Column(Integer, nullable=False, default=0)
+    total_linhas = Column(Integer, nullable=True)
+    chave_cache = Column(String(64), nullable=True)
+    cache_hit = Column(Boolean, nullable=False, default=False)  # Arquivo reaproveitado de outra exportação
+    nome_arquivo = Column(String(255), nullable=True)  # Nome sugerido no download
+    tamanho_bytes = Column(Integer, nullable=True)
+    erro = Column(Text, nullable=True)
+    criado_em = Column(DateTime, nullable=False, server_default=func.now())
+    iniciado_em = Column(DateTime, nullable=True)
+    finalizado_em = Column(DateTime, nullable=True)
+
+    def __repr__(self):
+        return f"<ExportJob(id='{self.id}', tipo='{self.tipo}', status='{self.status}', progresso={self.progresso})>"
+
+
+# ==================== META ADS (INSIGHTS LOCAIS) ====================
+
+class MetaCampanha(Base):
+    """
+    Campanhas da conta de anúncios (nome e status), atualizadas a cada
+    sincronização de insights.
+    """
+    __tablename__ = "meta_campanhas"
+    __table_args__ = (
+        UniqueConstraint('ad_account_id', 'campaign_id', name='uq_meta_campanha'),
+    )
+
+    id = Column(Integer, primary_key=True, index=True, autoincrement=True)
+    ad_account_id = Column(String(50), nullable=False)
+    campaign_id = Column(String(50), nullable=False)
+    name = Column(String(255), nullable=True)
+    status = Column(String(30), nullable=True)
+    effective_status = Column(String(30), nullable=True)
+    objective = Column(String(50), nullable=True)
+    updated_at = Column(DateTime, server_default=func.now(), onupdate=func.now())
+
+    def __repr__(self):
+        return f"<MetaCampanha(campaign_id='{self.campaign_id}', name='{self.name}')>"
+
+
+class MetaInsightCampanhaDiario(Base):
+    """
+    Insights diários por campanha (level=campaign, time_increment=1).
+    Base dos endpoints /meta/insights/* e /meta/campaigns/performance.
+    """
+    __tablename__ = "meta_insights_campanha_diario"
+    __table_args__ = (
+        UniqueConstraint('ad_account_id', 'data', 'campaign_id', name='uq_meta_insight_campanha_dia'),
+        Index('idx_meta_insight_campanha_conta_data', 'ad_account_id', 'data'),
+    )
+
+    id = Column(Integer, primary_key=True, index=True, autoincrement=True)
+    ad_account_id = Column(String(50), nullable=False)
+    data = Column(Date, nullable=False)
+    campaign_id = Column(String(50), nullable=False)
+    campaign_name = Column(String(255), nullable=True)
+
+    impressions = Column(Integer, default=0)
+    clicks = Column(Integer, default=0)
+    reach = Column(Integer, default=0)
+    spend = Column(Float, default=0)
+    leads = Column(Integer, default=0)  # action_type lead
+    registros = Column(Integer, default=0)  # action_type complete_registration
+    purchases = Column(Integer, default=0)  # action_type purchase
+    pixel_purchases = Column(Integer, default=0)  # action_type offsite_conversion.fb_pixel_purchase
+    receita = Column(Float, default=0)  # action_values de purchase + pixel purchase
+
+    updated_at = Column(DateTime, server_default=func.now(), onupdate=func.now())
+
+    def __repr__(self):
+        return f"<MetaInsightCampanhaDiario(campaign_id='{self.campaign_id}', data={self.data}, spend={self.spend})>"
+
+
+class MetaInsightAdsetDiario(Base):
+    """Insights diários por conjunto de anúncios (level=adset)."""
+    __tablename__ = "meta_insights_adset_diario"
+    __table_args__ = (
+        UniqueConstraint('ad_account_id', 'data', 'adset_id', name='uq_meta_insight_adset_dia'),
+        Index('idx_meta_insight_adset_conta_data', 'ad_account_id', 'data'),
+    )
+
+    id = Column(Integer, primary_key=True, index=True, autoincrement=True)
+    ad_account_id = Column(String(50), nullable=False)
+    data = Column(Date, nullable=False)
+    campaign_id = Column(String(50), nullable=False)
+    campaign_name = Column(String(255), nullable=True)
+    adset_id = Column(String(50), nullable=False)
+    adset_name = Column(String(255), nullable=True)
+
+    impressions = Column(Integer, default=0)
+    clicks = Column(Integer, default=0)
+    reach = Column(Integer, default=0)
+    spend = Column(Float, default=0)
+    leads = Column(Integer, default=0)
+    registros = Column(Integer, default=0)
+    purchases = Column(Integer, default=0)
+    pixel_purchases = Column(Integer, default=0)
+    receita = Column(Float, default=0)
+
+    updated_at = Column(DateTime, server_default=func.now(), onupdate=func.now())
+
+    def __repr__(self):
+        return f"<MetaInsightAdsetDiario(adset_id='{self.adset_id}', data={self.data}, spend={self.spend})>"
+
+
+class MetaInsightAdDiario(Base):
+    """Insights diários por anúncio (level=ad). Base de /meta/ads/performance."""
+    __tablename__ = "meta_insights_ad_diario"
+    __table_args__ = (
+        UniqueConstraint('ad_account_id', 'data', 'ad_id', name='uq_meta_insight_ad_dia'),
+        Index('idx_meta_insight_ad_conta_data', 'ad_account_id', 'data'),
+    )
+
+    id = Column(Integer, primary_key=True, index=True, autoincrement=True)
+    ad_account_id = Column(String(50), nullable=False)
+    data = Column(Date, nullable=False)
+    campaign_id = Column(String(50), nullable=False)
+    campaign_name = Column(String(255), nullable=True)
+    adset_id = Column(String(50), nullable=True)
+    adset_name = Column(String(255), nullable=True)
+    ad_id = Column(String(50), nullable=False)
+    ad_name = Column(String(255), nullable=True)
+
+    impressions = Column(Integer, default=0)
+    clicks = Column(Integer, default=0)
+    reach = Column(Integer, default=0)
+    spend = Column(Float, default=0)
+    leads = Column(Integer, default=0)
+    registros = Column(Integer, default=0)
+    purchases = Column(Integer, default=0)
+    pixel_purchases = Column(Integer, default=0)
+    receita = Column(Float, default=0)
+
+    updated_at = Column(DateTime, server_default=func.now(), onupdate=func.now())
+
+    def __repr__(self):
+        return f"<MetaInsightAdDiario(ad_id='{self.ad_id}', data={self.data}, spend={self.spend})>"
@@ -0,0 +1,117 @@
+"""
+Paginação por cursor (keyset) para as listagens.
+
+Em vez de OFFSET, cada página continua a partir da chave da última linha
+retornada: WHERE (chave) < (última chave) ORDER BY chave DESC LIMIT n. O custo
+de uma página não depende de quantas linhas vêm antes dela, e inserções
+durante a navegação não fazem linhas se repetirem ou sumirem.
+
+A chave termina sempre no id, para ser única. O cursor é a chave da última
+linha codificada em base64 (opaco para o frontend).
+
+fields= permite pedir só algumas colunas (ex: fields=id,data,valor); o SELECT
+busca só essas colunas, mais as da chave.
+"""
+
+import base64
+import json
+from datetime import date, datetime
+from typing import Any, Dict, List, Optional, Sequence
+
+from fastapi import HTTPException
+from sqlalchemy import and_, or_
+from sqlalchemy.orm import Query
+
+LIMITE_PADRAO = 100
+LIMITE_MAXIMO = 1000
+
+
+def campos_do_modelo(modelo) -> List[str]:
+    """Nomes de todas as colunas do modelo, na ordem da tabela."""
+    return [coluna.name for coluna in modelo.__table__.columns]
+
+
+def campos_selecionados(fields: Optional[str], disponiveis: Sequence[str]) -> List[str]:
+    """Valida fields= ("id,data,valor"). Sem fields, retorna todos os disponíveis."""
+    if not fields:
+        return list(disponiveis)
+
+    campos = [campo.strip() for campo in fields.split(",") if campo.strip()]
+    invalidos = [campo for campo in campos if campo not in disponiveis]
+    if invalidos or not campos:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Campos inválidos: {', '.join(invalidos) or fields}. Disponíveis: {', '.join(disponiveis)}"
+        )
+    return campos
+
+
+def codificar_cursor(valores: Sequence[Any]) -> str:
+    bruto = json.dumps([v.isoformat() if isinstance(v, (date, datetime)) else v for v in valores])
+    return base64.urlsafe_b64encode(bruto.encode()).decode().rstrip("=")
+
+
+def decodificar_cursor(cursor: str, chave: Sequence) -> List[Any]:
+    """Converte o cursor de volta para os valores da chave (datas incluídas)."""
+    try:
+        bruto = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        valores = json.loads(bruto)
+        if not isinstance(valores, list) or len(valores) != len(chave):
+            raise ValueError("tamanho")
+
+        convertidos = []
+        for coluna, valor in zip(chave, valores):
+            tipo = coluna.type.python_type
+            if valor is not None and tipo in (date, datetime):
+                valor = tipo.fromisoformat(valor)
+            elif valor is not None:
+                valor = tipo(valor)
+            convertidos.append(valor)
+        return convertidos
+    except Exception:
+        raise HTTPException(status_code=400, detail="Cursor inválido")
+
+
+def _depois_de(chave: Sequence, valores: Sequence[Any]):
+    """Condição "chave < valores" em ordem lexicográfica (ORDER BY ... DESC)."""
+    condicoes = []
+    for i, (coluna, valor) in enumerate(zip(chave, valores)):
+        iguais = [c == v for c, v in zip(chave[:i], valores[:i])]
+        condicoes.append(and_(*iguais, coluna < valor))
+    return or_(*condicoes)
+
+
+def paginar(query: Query, modelo, chave: Sequence, campos: Sequence[str],
+            limit: int = LIMITE_PADRAO, cursor: Optional[str] = None) -> Dict[str, Any]:
+    """
+    Uma página de query (já filtrada), da chave mais recente para a mais antiga.
+
+    chave: colunas não nulas terminando no id (ex: [Venda.data, Venda.id]).
+    campos: colunas devolvidas em cada item.
+    Retorna {"items": [...], "next_cursor": str | None, "limit": limit};
+    next_cursor None indica a última página.
+    """
+    nomes_chave = [f"_chave_{i}" for i in range(len(chave))]
+    query = query.with_entities(
+        *[getattr(modelo, campo) for campo in campos],
+        *[coluna.label(nome) for coluna, nome in zip(chave, nomes_chave)]
+    )
+
+    if cursor:
+        query = query.filter(_depois_de(chave, decodificar_cursor(cursor, chave)))
+
+    # Uma linha a mais indica se existe próxima página
+    linhas = query.order_by(*[coluna.desc() for coluna in chave]).limit(limit + 1).all()
+    tem_mais = len(linhas) > limit
+    linhas = linhas[:limit]
+
+    next_cursor = None
+    if tem_mais:
+        ultima = linhas[-1]._mapping
+        next_cursor = codificar_cursor([ultima[nome] for nome in nomes_chave])
+
+    return {
+        "items": [{campo: linha._mapping[campo] for campo in campos} for linha in linhas],
+        "next_cursor": next_cursor,
+        "limit": limit,
+    }
@@ -0,0 +1,33 @@
+"""
+Filtros por intervalo de meses.
+
+Venda, Financeiro e as métricas comerciais têm a coluna periodo
+(ano * 100 + mes, ex: 202503), calculada pelo banco e indexada. Filtrar
+intervalos por periodo usa o índice e atravessa a virada do ano; as
+alternativas antigas não faziam as duas coisas:
+- (ano * 100 + mes) >= inicio: expressão sobre as colunas, sem índice;
+- extract('year') <= ano AND extract('month') <= mes: além de não usar
+  índice, descarta de dezembro/2024 para trás quando a referência é 03/2025.
+"""
+
+from typing import List, Optional
+
+from sqlalchemy.sql.elements import ColumnElement
+
+
+def periodo(ano: int, mes: int) -> int:
+    """Valor da coluna periodo para (ano, mes). Ex: periodo(2025, 3) == 202503."""
+    return ano * 100 + mes
+
+
+def filtro_periodo(modelo, inicio: Optional[int] = None, fim: Optional[int] = None) -> List[ColumnElement]:
+    """
+    Condições para inicio <= periodo <= fim (valores de periodo(); sem
+    inicio ou sem fim o intervalo fica aberto daquele lado).
+    """
+    condicoes = []
+    if inicio is not None:
+        condicoes.append(modelo.periodo >= inicio)
+    if fim is not None:
+        condicoes.append(modelo.periodo <= fim)
+    return condicoes
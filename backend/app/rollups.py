@@ -0,0 +1,282 @@
+"""
+Rollups materializados das métricas comerciais.
+
+Mantém as tabelas ComercialRollupMensal (ano, mes, pessoa, funil) e
+ComercialRollupDiario (data, pessoa, funil) em dia com SocialSellingMetrica,
+SDRMetrica e CloserMetrica. Os endpoints de escrita aplicam deltas a cada
+create/update/delete e os importadores recalculam os períodos afetados, para
+que os dashboards leiam totais prontos em vez de reagregar as linhas diárias.
+"""
+
+from collections import defaultdict
+from datetime import date, datetime
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+from sqlalchemy import func, insert, or_, and_, true
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.orm import Session
+
+from app.models.models import (
+    SocialSellingMetrica, SDRMetrica, CloserMetrica,
+    ComercialRollupMensal, ComercialRollupDiario
+)
+
+# origem -> (modelo, coluna da pessoa, coluna do funil, campos somados)
+ORIGENS = {
+    'social_selling': (
+        SocialSellingMetrica, 'vendedor', None,
+        ['ativacoes', 'conversoes', 'leads_gerados']
+    ),
+    'sdr': (
+        SDRMetrica, 'sdr', 'funil',
+        ['leads_recebidos', 'reunioes_agendadas', 'reunioes_realizadas']
+    ),
+    'closer': (
+        CloserMetrica, 'closer', 'funil',
+        ['calls_agendadas', 'calls_realizadas', 'vendas', 'faturamento',
+         'booking', 'faturamento_bruto', 'faturamento_liquido']
+    ),
+}
+
+_ORIGEM_POR_MODELO = {modelo: origem for origem, (modelo, _, _, _) in ORIGENS.items()}
+
+
+def origem_de(registro) -> str:
+    """Retorna a origem ('social_selling', 'sdr', 'closer') de um registro de métrica."""
+    return _ORIGEM_POR_MODELO[type(registro)]
+
+
+def _normalizar_data(valor) -> Optional[date]:
+    if isinstance(valor, datetime):
+        return valor.date()
+    return valor
+
+
+def _chaves(registro) -> Tuple[tuple, Optional[tuple]]:
+    """Chaves mensal e diária (ou None se o registro não tem data) de um registro."""
+    origem = origem_de(registro)
+    _, col_pessoa, col_funil, _ = ORIGENS[origem]
+    pessoa = getattr(registro, col_pessoa) or ''
+    funil = (getattr(registro, col_funil) or '') if col_funil else ''
+    chave_mensal = (origem, registro.ano, registro.mes, pessoa, funil)
+    data = _normalizar_data(registro.data)
+    chave_diaria = (origem, registro.ano, registro.mes, data, pessoa, funil) if data else None
+    return chave_mensal, chave_diaria
+
+
+def _acumular(deltas: Dict[tuple, Dict[str, float]], chave: tuple, registro, sinal: int):
+    origem = chave[0]
+    campos = ORIGENS[origem][3]
+    acumulado = deltas[chave]
+    acumulado['registros'] = acumulado.get('registros', 0) + sinal
+    for campo in campos:
+        acumulado[campo] = acumulado.get(campo, 0) + sinal * (getattr(registro, campo) or 0)
+
+
+def _upsert(db: Session, modelo):
+    """INSERT ... ON CONFLICT do dialeto do banco (PostgreSQL ou SQLite)."""
+    if db.get_bind().dialect.name == "postgresql":
+        return pg_insert(modelo.__table__)
+    return sqlite_insert(modelo.__table__)
+
+
+def _aplicar_deltas(db: Session, modelo, colunas_chave: List[str], deltas: Dict[tuple, Dict[str, float]]):
+    """
+    Soma os deltas nas linhas de rollup direto no SQL, criando as que faltam
+    e removendo as que ficaram sem registros.
+
+    A soma é feita pelo banco (INSERT ... ON CONFLICT DO UPDATE SET
+    campo = campo + excluded.campo), não lida e regravada em Python: duas
+    escritas simultâneas na mesma chave (threads do threadpool ou workers)
+    não perdem o delta uma da outra nem falham na unique da chave nova.
+    """
+    if not deltas:
+        return
+
+    # Um executemany por origem (cada uma soma campos diferentes), em ordem de
+    # chave para que transações concorrentes travem as linhas na mesma ordem
+    por_origem = defaultdict(list)
+    for chave in sorted(deltas, key=repr):
+        por_origem[chave[0]].append(chave)
+
+    for origem, chaves in por_origem.items():
+        campos = ['registros'] + ORIGENS[origem][3]
+        linhas = [
+            {**dict(zip(colunas_chave, chave)), **{campo: deltas[chave].get(campo, 0) for campo in campos}}
+            for chave in chaves
+        ]
+        stmt = _upsert(db, modelo)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=colunas_chave,
+            set_={
+                **{campo: modelo.__table__.c[campo] + stmt.excluded[campo] for campo in campos},
+                'updated_at': func.now(),
+            }
+        )
+        db.execute(stmt, linhas)
+
+    db.query(modelo).filter(
+        modelo.registros <= 0,
+        or_(*[
+            and_(*[getattr(modelo, col) == valor for col, valor in zip(colunas_chave, chave)])
+            for chave in deltas
+        ])
+    ).delete(synchronize_session=False)
+
+
+def aplicar_registros(db: Session, registros: Iterable, sinal: int = 1):
+    """
+    Aplica incrementalmente a contribuição dos registros nos rollups.
+
+    Use sinal=1 após criar registros, sinal=-1 antes de deletar. Para updates,
+    chame com -1 antes de alterar os campos e com +1 depois.
+    """
+    mensal = defaultdict(dict)
+    diario = defaultdict(dict)
+
+    for registro in registros:
+        chave_mensal, chave_diaria = _chaves(registro)
+        _acumular(mensal, chave_mensal, registro, sinal)
+        if chave_diaria:
+            _acumular(diario, chave_diaria, registro, sinal)
+
+    _aplicar_deltas(db, ComercialRollupMensal, ['origem', 'ano', 'mes', 'pessoa', 'funil'], mensal)
+    _aplicar_deltas(db, ComercialRollupDiario, ['origem', 'ano', 'mes', 'data', 'pessoa', 'funil'], diario)
+
+
+def recalcular_periodos(db: Session, origem: str, periodos: Optional[Set[Tuple[int, int]]] = None):
+    """
+    Reconstrói os rollups de uma origem a partir da tabela bruta.
+    periodos é um conjunto de (ano, mes); None reconstrói todos os períodos.
+    Usado pelos importadores e pelas remoções em massa.
+    """
+    if periodos is not None and not periodos:
+        return
+
+    modelo, col_pessoa, col_funil, campos = ORIGENS[origem]
+    pessoa_expr = getattr(modelo, col_pessoa)
+    funil_expr = func.coalesce(getattr(modelo, col_funil), '') if col_funil else None
+
+    def _filtro_periodo(alvo):
+        if periodos is None:
+            return true()
+        return or_(*[and_(alvo.ano == ano, alvo.mes == mes) for ano, mes in periodos])
+
+    for rollup in (ComercialRollupMensal, ComercialRollupDiario):
+        db.query(rollup).filter(
+            rollup.origem == origem,
+            _filtro_periodo(rollup)
+        ).delete(synchronize_session=False)
+
+    somas = [func.coalesce(func.sum(getattr(modelo, campo)), 0).label(campo) for campo in campos]
+
+    for rollup, com_data in ((ComercialRollupMensal, False), (ComercialRollupDiario, True)):
+        grupo = [modelo.ano, modelo.mes]
+        if com_data:
+            grupo.append(modelo.data)
+        grupo.append(pessoa_expr)
+        if funil_expr is not None:
+            grupo.append(funil_expr)
+
+        query = db.query(*grupo, func.count(modelo.id).label('registros'), *somas).filter(
+            _filtro_periodo(modelo)
+        )
+        if com_data:
+            query = query.filter(modelo.data.isnot(None))
+
+        linhas = []
+        for row in query.group_by(*grupo).all():
+            valores = list(row)
+            linha = {'origem': origem, 'ano': valores.pop(0), 'mes': valores.pop(0)}
+            if com_data:
+                linha['data'] = _normalizar_data(valores.pop(0))
+            linha['pessoa'] = valores.pop(0) or ''
+            linha['funil'] = valores.pop(0) if funil_expr is not None else ''
+            linha['registros'] = valores.pop(0)
+            for campo in campos:
+                linha[campo] = valores.pop(0)
+            linhas.append(linha)
+
+        if linhas:
+            db.execute(insert(rollup), linhas)
+
+
+def recalcular_registros(db: Session, registros: Iterable):
+    """Recalcula os períodos (ano, mes) tocados por uma lista de registros."""
+    periodos = defaultdict(set)
+    for registro in registros:
+        periodos[origem_de(registro)].add((registro.ano, registro.mes))
+    db.flush()
+    for origem, periodos_origem in periodos.items():
+        recalcular_periodos(db, origem, periodos_origem)
+
+
+def reconstruir_rollups(db: Session):
+    """Reconstrói todos os rollups comerciais a partir das tabelas brutas."""
+    for origem in ORIGENS:
+        recalcular_periodos(db, origem)
+
+
+def garantir_rollups(db: Session):
+    """
+    Popula os rollups na primeira execução (tabelas vazias mas com métricas brutas).
+    Chamado no startup via init_db.
+    """
+    if db.query(ComercialRollupMensal.id).first() is not None:
+        return
+    if not any(db.query(modelo.id).first() for modelo, _, _, _ in ORIGENS.values()):
+        return
+    reconstruir_rollups(db)
+    db.commit()
+
+
+# ==================== LEITURA ====================
+
+_COLUNA_AGRUPAMENTO = {
+    'pessoa': lambda modelo: modelo.pessoa,
+    'funil': lambda modelo: modelo.funil,
+    'data': lambda modelo: modelo.data,
+}
+
+
+def _consultar(db: Session, modelo, origem: str, mes: int, ano: int,
+               funil: Optional[str], pessoa: Optional[str], agrupar_por: Optional[str]):
+    campos = ORIGENS[origem][3]
+    somas = [func.coalesce(func.sum(getattr(modelo, campo)), 0).label(campo) for campo in campos]
+
+    colunas = []
+    if agrupar_por:
+        colunas.append(_COLUNA_AGRUPAMENTO[agrupar_por](modelo).label(agrupar_por))
+
+    query = db.query(*colunas, *somas).filter(
+        modelo.origem == origem,
+        modelo.mes == mes,
+        modelo.ano == ano
+    )
+    if funil:
+        query = query.filter(modelo.funil == funil)
+    if pessoa:
+        query = query.filter(modelo.pessoa == pessoa)
+
+    if agrupar_por:
+        coluna = _COLUNA_AGRUPAMENTO[agrupar_por](modelo)
+        return query.group_by(coluna).order_by(coluna).all()
+    return query.first()
+
+
+def consultar_mensal(db: Session, origem: str, mes: int, ano: int,
+                     funil: Optional[str] = None, pessoa: Optional[str] = None,
+                     agrupar_por: Optional[str] = None):
+    """
+    Totais do mês a partir do rollup mensal.
+    Sem agrupar_por retorna uma linha; com 'pessoa' ou 'funil' retorna uma por grupo.
+    As colunas têm os mesmos nomes dos campos da tabela bruta (ex: ativacoes, vendas).
+    """
+    return _consultar(db, ComercialRollupMensal, origem, mes, ano, funil, pessoa, agrupar_por)
+
+
+def consultar_diario(db: Session, origem: str, mes: int, ano: int,
+                     funil: Optional[str] = None, pessoa: Optional[str] = None):
+    """Totais por dia do mês a partir do rollup diário, ordenados por data."""
+    return _consultar(db, ComercialRollupDiario, origem, mes, ano, funil, pessoa, 'data')
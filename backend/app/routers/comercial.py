@@ -7,7 +7,10 @@ from fastapi import APIRouter, Depends, HTTPException, Query
 from sqlalchemy.orm import Session
 from sqlalchemy import func
 from app.database import get_db
-from app.models.models import SocialSellingMetrica, SDRMetrica, CloserMetrica, Meta, Pessoa
+from app.models.models import SocialSellingMetrica, SDRMetrica, CloserMetrica
+from app import cache, paginacao, rollups
+from app.equipe import carregar_equipe
+from app.periodo import periodo
 from pydantic import BaseModel, field_validator
 from typing import Optional, List, Dict, Any
 from datetime import date, datetime
@@ -87,7 +90,7 @@ class CloserCreate(BaseModel):
 # ============ SOCIAL SELLING ============
 
 @router.post("/social-selling")
-async def create_social_selling(item: SocialSellingCreate, db: Session = Depends(get_db)):
+def create_social_selling(item: SocialSellingCreate, db: Session = Depends(get_db)):
     """
     Cria uma nova métrica de Social Selling.
     Calcula automaticamente as taxas de conversão.
@@ -103,8 +106,10 @@ async def create_social_selling(item: SocialSellingCreate, db: Session = Depends
             tx_conv_lead=round(tx_conv_lead, 2)
         )
         db.add(novo)
+        rollups.aplicar_registros(db, [novo])
         db.commit()
         db.refresh(novo)
+        cache.invalidar_registros(novo)
         return {
             "id": novo.id,
             "message": "Métrica de Social Selling criada com sucesso",
@@ -121,7 +126,7 @@ async def create_social_selling(item: SocialSellingCreate, db: Session = Depends
 
 
 @router.get("/social-selling")
-async def get_social_selling(mes: int, ano: int, db: Session = Depends(get_db)):
+def get_social_selling(mes: int, ano: int, db: Session = Depends(get_db)):
     """
     Busca todas as métricas de Social Selling para um mês/ano específico.
     """
@@ -136,23 +141,32 @@ async def get_social_selling(mes: int, ano: int, db: Session = Depends(get_db)):
 
 
 @router.get("/social-selling/all")
-async def get_all_social_selling(db: Session = Depends(get_db)):
+def get_all_social_selling(
+    limit: int = Query(paginacao.LIMITE_PADRAO, ge=1, le=paginacao.LIMITE_MAXIMO),
+    cursor: Optional[str] = Query(None, description="next_cursor da página anterior"),
+    fields: Optional[str] = Query(None, description="Colunas separadas por vírgula"),
+    db: Session = Depends(get_db)
+):
     """
-    Busca todas as métricas de Social Selling (todos os períodos).
+    Busca as métricas de Social Selling de todos os períodos, do mais recente para o
+    mais antigo. Paginado por cursor em (ano, mes, id): passe o next_cursor
+    da resposta em cursor para buscar a próxima página (None na última).
     """
     try:
-        metricas = db.query(SocialSellingMetrica).order_by(
-            SocialSellingMetrica.ano.desc(),
-            SocialSellingMetrica.mes.desc(),
-            SocialSellingMetrica.vendedor
-        ).all()
-        return metricas
+        campos = paginacao.campos_selecionados(fields, paginacao.campos_do_modelo(SocialSellingMetrica))
+        return paginacao.paginar(
+            db.query(SocialSellingMetrica), SocialSellingMetrica,
+            [SocialSellingMetrica.ano, SocialSellingMetrica.mes, SocialSellingMetrica.id],
+            campos, limit, cursor
+        )
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Erro ao buscar métricas: {str(e)}")
 
 
 @router.put("/social-selling/{id}")
-async def update_social_selling(id: int, item: SocialSellingCreate, db: Session = Depends(get_db)):
+def update_social_selling(id: int, item: SocialSellingCreate, db: Session = Depends(get_db)):
     """
     Atualiza uma métrica de Social Selling existente.
     Recalcula as taxas automaticamente.
@@ -166,13 +180,18 @@ async def update_social_selling(id: int, item: SocialSellingCreate, db: Session
         tx_ativ_conv = (item.conversoes / item.ativacoes * 100) if item.ativacoes > 0 else 0
         tx_conv_lead = (item.leads_gerados / item.conversoes * 100) if item.conversoes > 0 else 0
 
+        periodo_anterior = (registro.mes, registro.ano)
+        rollups.aplicar_registros(db, [registro], sinal=-1)
         for key, value in item.dict().items():
             setattr(registro, key, value)
         registro.tx_ativ_conv = round(tx_ativ_conv, 2)
         registro.tx_conv_lead = round(tx_conv_lead, 2)
+        rollups.aplicar_registros(db, [registro])
 
         db.commit()
+        cache.invalidar(registro.__tablename__, *periodo_anterior)
         db.refresh(registro)
+        cache.invalidar_registros(registro)
         return {
             "message": "Métrica atualizada com sucesso",
             "data": {
@@ -189,7 +208,7 @@ async def update_social_selling(id: int, item: SocialSellingCreate, db: Session
 
 
 @router.delete("/social-selling/{id}")
-async def delete_social_selling(id: int, db: Session = Depends(get_db)):
+def delete_social_selling(id: int, db: Session = Depends(get_db)):
     """
     Deleta uma métrica de Social Selling.
     """
@@ -205,8 +224,10 @@ async def delete_social_selling(id: int, db: Session = Depends(get_db)):
             "ano": registro.ano
         }
 
+        rollups.aplicar_registros(db, [registro], sinal=-1)
         db.delete(registro)
         db.commit()
+        cache.invalidar(registro.__tablename__, info["mes"], info["ano"])
         return {
             "message": "Métrica deletada com sucesso",
             "deleted": info
@@ -221,7 +242,7 @@ async def delete_social_selling(id: int, db: Session = Depends(get_db)):
 # ============ SDR ============
 
 @router.post("/sdr")
-async def create_sdr(item: SDRCreate, db: Session = Depends(get_db)):
+def create_sdr(item: SDRCreate, db: Session = Depends(get_db)):
     """
     Cria uma nova métrica de SDR.
     Calcula automaticamente as taxas de agendamento e comparecimento.
@@ -236,8 +257,10 @@ async def create_sdr(item: SDRCreate, db: Session = Depends(get_db)):
             tx_comparecimento=round(tx_comp, 2)
         )
         db.add(novo)
+        rollups.aplicar_registros(db, [novo])
         db.commit()
         db.refresh(novo)
+        cache.invalidar_registros(novo)
         return {
             "id": novo.id,
             "message": "Métrica de SDR criada com sucesso",
@@ -255,7 +278,7 @@ async def create_sdr(item: SDRCreate, db: Session = Depends(get_db)):
 
 
 @router.get("/sdr")
-async def get_sdr(mes: int, ano: int, db: Session = Depends(get_db)):
+def get_sdr(mes: int, ano: int, db: Session = Depends(get_db)):
     """
     Busca todas as métricas de SDR para um mês/ano específico.
     """
@@ -270,24 +293,32 @@ async def get_sdr(mes: int, ano: int, db: Session = Depends(get_db)):
 
 
 @router.get("/sdr/all")
-async def get_all_sdr(db: Session = Depends(get_db)):
+def get_all_sdr(
+    limit: int = Query(paginacao.LIMITE_PADRAO, ge=1, le=paginacao.LIMITE_MAXIMO),
+    cursor: Optional[str] = Query(None, description="next_cursor da página anterior"),
+    fields: Optional[str] = Query(None, description="Colunas separadas por vírgula"),
+    db: Session = Depends(get_db)
+):
     """
-    Busca todas as métricas de SDR (todos os períodos).
+    Busca as métricas de SDR de todos os períodos, do mais recente para o
+    mais antigo. Paginado por cursor em (ano, mes, id): passe o next_cursor
+    da resposta em cursor para buscar a próxima página (None na última).
     """
     try:
-        metricas = db.query(SDRMetrica).order_by(
-            SDRMetrica.ano.desc(),
-            SDRMetrica.mes.desc(),
-            SDRMetrica.sdr,
-            SDRMetrica.funil
-        ).all()
-        return metricas
+        campos = paginacao.campos_selecionados(fields, paginacao.campos_do_modelo(SDRMetrica))
+        return paginacao.paginar(
+            db.query(SDRMetrica), SDRMetrica,
+            [SDRMetrica.ano, SDRMetrica.mes, SDRMetrica.id],
+            campos, limit, cursor
+        )
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Erro ao buscar métricas: {str(e)}")
 
 
 @router.put("/sdr/{id}")
-async def update_sdr(id: int, item: SDRCreate, db: Session = Depends(get_db)):
+def update_sdr(id: int, item: SDRCreate, db: Session = Depends(get_db)):
     """
     Atualiza uma métrica de SDR existente.
     Recalcula as taxas automaticamente.
@@ -300,13 +331,18 @@ async def update_sdr(id: int, item: SDRCreate, db: Session = Depends(get_db)):
         tx_agend = (item.reunioes_agendadas / item.leads_recebidos * 100) if item.leads_recebidos > 0 else 0
         tx_comp = (item.reunioes_realizadas / item.reunioes_agendadas * 100) if item.reunioes_agendadas > 0 else 0
 
+        periodo_anterior = (registro.mes, registro.ano)
+        rollups.aplicar_registros(db, [registro], sinal=-1)
         for key, value in item.dict().items():
             setattr(registro, key, value)
         registro.tx_agendamento = round(tx_agend, 2)
         registro.tx_comparecimento = round(tx_comp, 2)
+        rollups.aplicar_registros(db, [registro])
 
         db.commit()
+        cache.invalidar(registro.__tablename__, *periodo_anterior)
         db.refresh(registro)
+        cache.invalidar_registros(registro)
         return {
             "message": "Métrica atualizada com sucesso",
             "data": {
@@ -323,7 +359,7 @@ async def update_sdr(id: int, item: SDRCreate, db: Session = Depends(get_db)):
 
 
 @router.delete("/sdr/{id}")
-async def delete_sdr(id: int, db: Session = Depends(get_db)):
+def delete_sdr(id: int, db: Session = Depends(get_db)):
     """
     Deleta uma métrica de SDR.
     """
@@ -340,8 +376,10 @@ async def delete_sdr(id: int, db: Session = Depends(get_db)):
             "ano": registro.ano
         }
 
+        rollups.aplicar_registros(db, [registro], sinal=-1)
         db.delete(registro)
         db.commit()
+        cache.invalidar(registro.__tablename__, info["mes"], info["ano"])
         return {
             "message": "Métrica deletada com sucesso",
             "deleted": info
@@ -356,7 +394,7 @@ async def delete_sdr(id: int, db: Session = Depends(get_db)):
 # ============ CLOSER ============
 
 @router.post("/closer")
-async def create_closer(item: CloserCreate, db: Session = Depends(get_db)):
+def create_closer(item: CloserCreate, db: Session = Depends(get_db)):
     """
     Cria uma nova métrica de Closer.
     Calcula automaticamente as taxas e ticket médio.
@@ -373,8 +411,10 @@ async def create_closer(item: CloserCreate, db: Session = Depends(get_db)):
             ticket_medio=round(ticket, 2)
         )
         db.add(novo)
+        rollups.aplicar_registros(db, [novo])
         db.commit()
         db.refresh(novo)
+        cache.invalidar_registros(novo)
         return {
             "id": novo.id,
             "message": "Métrica de Closer criada com sucesso",
@@ -393,7 +433,7 @@ async def create_closer(item: CloserCreate, db: Session = Depends(get_db)):
 
 
 @router.get("/closer")
-async def get_closer(mes: int, ano: int, db: Session = Depends(get_db)):
+def get_closer(mes: int, ano: int, db: Session = Depends(get_db)):
     """
     Busca todas as métricas de Closer para um mês/ano específico.
     """
@@ -408,24 +448,32 @@ async def get_closer(mes: int, ano: int, db: Session = Depends(get_db)):
 
 
 @router.get("/closer/all")
-async def get_all_closer(db: Session = Depends(get_db)):
+def get_all_closer(
+    limit: int = Query(paginacao.LIMITE_PADRAO, ge=1, le=paginacao.LIMITE_MAXIMO),
+    cursor: Optional[str] = Query(None, description="next_cursor da página anterior"),
+    fields: Optional[str] = Query(None, description="Colunas separadas por vírgula"),
+    db: Session = Depends(get_db)
+):
     """
-    Busca todas as métricas de Closer (todos os períodos).
+    Busca as métricas de Closer de todos os períodos, do mais recente para o
+    mais antigo. Paginado por cursor em (ano, mes, id): passe o next_cursor
+    da resposta em cursor para buscar a próxima página (None na última).
     """
     try:
-        metricas = db.query(CloserMetrica).order_by(
-            CloserMetrica.ano.desc(),
-            CloserMetrica.mes.desc(),
-            CloserMetrica.closer,
-            CloserMetrica.funil
-        ).all()
-        return metricas
+        campos = paginacao.campos_selecionados(fields, paginacao.campos_do_modelo(CloserMetrica))
+        return paginacao.paginar(
+            db.query(CloserMetrica), CloserMetrica,
+            [CloserMetrica.ano, CloserMetrica.mes, CloserMetrica.id],
+            campos, limit, cursor
+        )
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Erro ao buscar métricas: {str(e)}")
 
 
 @router.put("/closer/{id}")
-async def update_closer(id: int, item: CloserCreate, db: Session = Depends(get_db)):
+def update_closer(id: int, item: CloserCreate, db: Session = Depends(get_db)):
     """
     Atualiza uma métrica de Closer existente.
     Recalcula as taxas e ticket médio automaticamente.
@@ -439,14 +487,19 @@ async def update_closer(id: int, item: CloserCreate, db: Session = Depends(get_d
         tx_conv = (item.vendas / item.calls_realizadas * 100) if item.calls_realizadas > 0 else 0
         ticket = (item.faturamento_bruto / item.vendas) if item.vendas > 0 else 0
 
+        periodo_anterior = (registro.mes, registro.ano)
+        rollups.aplicar_registros(db, [registro], sinal=-1)
         for key, value in item.dict().items():
             setattr(registro, key, value)
         registro.tx_comparecimento = round(tx_comp, 2)
         registro.tx_conversao = round(tx_conv, 2)
         registro.ticket_medio = round(ticket, 2)
+        rollups.aplicar_registros(db, [registro])
 
         db.commit()
+        cache.invalidar(registro.__tablename__, *periodo_anterior)
         db.refresh(registro)
+        cache.invalidar_registros(registro)
         return {
             "message": "Métrica atualizada com sucesso",
             "data": {
@@ -464,7 +517,7 @@ async def update_closer(id: int, item: CloserCreate, db: Session = Depends(get_d
 
 
 @router.delete("/closer/{id}")
-async def delete_closer(id: int, db: Session = Depends(get_db)):
+def delete_closer(id: int, db: Session = Depends(get_db)):
     """
     Deleta uma métrica de Closer.
     """
@@ -481,8 +534,10 @@ async def delete_closer(id: int, db: Session = Depends(get_db)):
             "ano": registro.ano
         }
 
+        rollups.aplicar_registros(db, [registro], sinal=-1)
         db.delete(registro)
         db.commit()
+        cache.invalidar(registro.__tablename__, info["mes"], info["ano"])
         return {
             "message": "Métrica deletada com sucesso",
             "deleted": info
@@ -497,7 +552,7 @@ async def delete_closer(id: int, db: Session = Depends(get_db)):
 # ============ DELETE POR MÊS/ANO (MASSA) ============
 
 @router.delete("/metricas/social-selling")
-async def delete_social_selling_por_mes(
+def delete_social_selling_por_mes(
     mes: int = Query(..., ge=1, le=12),
     ano: int = Query(..., ge=2020),
     db: Session = Depends(get_db)
@@ -516,7 +571,9 @@ async def delete_social_selling_por_mes(
         for registro in registros:
             db.delete(registro)
 
+        rollups.recalcular_registros(db, registros)
         db.commit()
+        cache.invalidar(SocialSellingMetrica.__tablename__, mes, ano)
         return {
             "message": f"Métricas de Social Selling deletadas: {mes}/{ano}",
             "deletados": count
@@ -527,7 +584,7 @@ async def delete_social_selling_por_mes(
 
 
 @router.delete("/metricas/sdr")
-async def delete_sdr_por_mes(
+def delete_sdr_por_mes(
     mes: int = Query(..., ge=1, le=12),
     ano: int = Query(..., ge=2020),
     db: Session = Depends(get_db)
@@ -546,7 +603,9 @@ async def delete_sdr_por_mes(
         for registro in registros:
             db.delete(registro)
 
+        rollups.recalcular_registros(db, registros)
         db.commit()
+        cache.invalidar(SDRMetrica.__tablename__, mes, ano)
         return {
             "message": f"Métricas de SDR deletadas: {mes}/{ano}",
             "deletados": count
@@ -557,7 +616,7 @@ async def delete_sdr_por_mes(
 
 
 @router.delete("/metricas/closer")
-async def delete_closer_por_mes(
+def delete_closer_por_mes(
     mes: int = Query(..., ge=1, le=12),
     ano: int = Query(..., ge=2020),
     db: Session = Depends(get_db)
@@ -576,7 +635,9 @@ async def delete_closer_por_mes(
         for registro in registros:
             db.delete(registro)
 
+        rollups.recalcular_registros(db, registros)
         db.commit()
+        cache.invalidar(CloserMetrica.__tablename__, mes, ano)
         return {
             "message": f"Métricas de Closer deletadas: {mes}/{ano}",
             "deletados": count
@@ -589,7 +650,8 @@ async def delete_closer_por_mes(
 # ============ DASHBOARDS CONSOLIDADOS ============
 
 @router.get("/dashboard/social-selling")
-async def dashboard_social_selling(mes: int, ano: int, db: Session = Depends(get_db)):
+@cache.cache_resposta("comercial.dashboard_social_selling", ['social_selling_metricas', 'metas', 'pessoas'])
+def dashboard_social_selling(mes: int, ano: int, db: Session = Depends(get_db)):
     """
     Dashboard consolidado de Social Selling com totais e métricas agregadas.
     """
@@ -620,15 +682,11 @@ async def dashboard_social_selling(mes: int, ano: int, db: Session = Depends(get
         total_conversoes = sum(m.conversoes for m in metricas)
         total_leads = sum(m.leads_gerados for m in metricas)
 
-        # Buscar metas da tabela Meta
-        metas_query = db.query(Meta).join(Pessoa, Meta.pessoa_id == Pessoa.id).filter(
-            Meta.mes == mes,
-            Meta.ano == ano,
-            Pessoa.funcao == 'social_selling'
-        ).all()
+        # Metas da equipe de Social Selling no mês
+        metas_ss = carregar_equipe(db, mes, ano).com_meta('social_selling')
 
-        total_meta_ativacoes = sum(m.meta_ativacoes or 0 for m in metas_query)
-        total_meta_leads = sum(m.meta_leads or 0 for m in metas_query)
+        total_meta_ativacoes = sum(m.meta_valor('meta_ativacoes') for m in metas_ss)
+        total_meta_leads = sum(m.meta_valor('meta_leads') for m in metas_ss)
 
         return {
             "metricas_por_vendedor": metricas,
@@ -649,7 +707,8 @@ async def dashboard_social_selling(mes: int, ano: int, db: Session = Depends(get
 
 
 @router.get("/dashboard/social-selling-diario")
-async def dashboard_social_selling_diario(
+@cache.cache_resposta("comercial.dashboard_social_selling_diario", ['social_selling_metricas', 'metas', 'pessoas'])
+def dashboard_social_selling_diario(
     mes: int,
     ano: int,
     vendedor: Optional[str] = None,
@@ -676,21 +735,15 @@ async def dashboard_social_selling_diario(
 
         metricas = query.all()
 
-        # Buscar metas mensais da tabela Meta
-        meta_query = db.query(Meta).join(Pessoa, Meta.pessoa_id == Pessoa.id).filter(
-            Meta.mes == mes,
-            Meta.ano == ano,
-            Pessoa.funcao == 'social_selling'
-        )
-
-        if vendedor:
-            meta_query = meta_query.filter(Pessoa.nome == vendedor)
-
-        metas = meta_query.all()
+        # Metas mensais da equipe de Social Selling
+        metas = [
+            m for m in carregar_equipe(db, mes, ano).com_meta('social_selling')
+            if not vendedor or m.nome == vendedor
+        ]
 
         # Calcular metas mensais totais
-        meta_ativacoes_mensal = sum(m.meta_ativacoes or 0 for m in metas)
-        meta_leads_mensal = sum(m.meta_leads or 0 for m in metas)
+        meta_ativacoes_mensal = sum(m.meta_valor('meta_ativacoes') for m in metas)
+        meta_leads_mensal = sum(m.meta_valor('meta_leads') for m in metas)
 
         # Calcular número de dias do mês
         dias_no_mes = monthrange(ano, mes)[1]
@@ -750,7 +803,8 @@ async def dashboard_social_selling_diario(
 
 
 @router.get("/dashboard/social-selling-comparativo")
-async def dashboard_social_selling_comparativo(
+@cache.cache_resposta("comercial.dashboard_social_selling_comparativo", ['social_selling_metricas', 'metas', 'pessoas'])
+def dashboard_social_selling_comparativo(
     mes: int = Query(..., ge=1, le=12),
     ano: int = Query(..., ge=2020),
     db: Session = Depends(get_db)
@@ -780,28 +834,19 @@ async def dashboard_social_selling_comparativo(
             dados_por_vendedor[metrica.vendedor]['conversoes'] += metrica.conversoes
             dados_por_vendedor[metrica.vendedor]['leads'] += metrica.leads_gerados
 
-        # Buscar metas para cada vendedor
+        # Metas de cada vendedor (equipe do mês)
+        equipe = carregar_equipe(db, mes, ano)
         resultado = []
         for vendedor, totais in dados_por_vendedor.items():
-            # Buscar pessoa
-            pessoa = db.query(Pessoa).filter(Pessoa.nome == vendedor).first()
-
-            # Buscar meta
-            meta = None
-            if pessoa:
-                meta = db.query(Meta).filter(
-                    Meta.pessoa_id == pessoa.id,
-                    Meta.mes == mes,
-                    Meta.ano == ano
-                ).first()
+            pessoa = equipe.membro(vendedor)
 
             # Calcular taxas
             tx_ativ_conv = (totais['conversoes'] / totais['ativacoes'] * 100) if totais['ativacoes'] > 0 else 0
             tx_conv_lead = (totais['leads'] / totais['conversoes'] * 100) if totais['conversoes'] > 0 else 0
 
             # Calcular % de atingimento
-            ativacoes_meta = meta.meta_ativacoes if meta else 0
-            leads_meta = meta.meta_leads if meta else 0
+            ativacoes_meta = pessoa.meta_valor('meta_ativacoes') if pessoa else 0
+            leads_meta = pessoa.meta_valor('meta_leads') if pessoa else 0
             ativacoes_perc = (totais['ativacoes'] / ativacoes_meta * 100) if ativacoes_meta > 0 else 0
             leads_perc = (totais['leads'] / leads_meta * 100) if leads_meta > 0 else 0
 
@@ -827,7 +872,8 @@ async def dashboard_social_selling_comparativo(
 
 
 @router.get("/dashboard/sdr-diario")
-async def dashboard_sdr_diario(
+@cache.cache_resposta("comercial.dashboard_sdr_diario", ['sdr_metricas', 'metas', 'pessoas'])
+def dashboard_sdr_diario(
     mes: int,
     ano: int,
     sdr: Optional[str] = None,
@@ -858,20 +904,14 @@ async def dashboard_sdr_diario(
 
         metricas = query.all()
 
-        # Buscar metas mensais da tabela Meta
-        meta_query = db.query(Meta).join(Pessoa, Meta.pessoa_id == Pessoa.id).filter(
-            Meta.mes == mes,
-            Meta.ano == ano,
-            Pessoa.funcao == 'sdr'
-        )
-
-        if sdr:
-            meta_query = meta_query.filter(Pessoa.nome == sdr)
-
-        metas = meta_query.all()
+        # Metas mensais da equipe de SDR
+        metas = [
+            m for m in carregar_equipe(db, mes, ano).com_meta('sdr')
+            if not sdr or m.nome == sdr
+        ]
 
         # Calcular metas mensais totais
-        meta_reunioes_mensal = sum(m.meta_reunioes or 0 for m in metas)
+        meta_reunioes_mensal = sum(m.meta_valor('meta_reunioes') for m in metas)
 
         # Calcular número de dias do mês
         dias_no_mes = monthrange(ano, mes)[1]
@@ -948,7 +988,8 @@ async def dashboard_sdr_diario(
 
 
 @router.get("/dashboard/sdr")
-async def dashboard_sdr(mes: int, ano: int, db: Session = Depends(get_db)):
+@cache.cache_resposta("comercial.dashboard_sdr", ['sdr_metricas', 'metas', 'pessoas'])
+def dashboard_sdr(mes: int, ano: int, db: Session = Depends(get_db)):
     """
     Dashboard consolidado de SDR agrupado por pessoa e por funil.
     """
@@ -971,26 +1012,23 @@ async def dashboard_sdr(mes: int, ano: int, db: Session = Depends(get_db)):
                 por_funil[m.funil] = []
             por_funil[m.funil].append(m)
 
-        # Buscar metas da tabela Meta por SDR
+        # Totais por SDR já agregados no rollup mensal
+        totais_rollup = rollups.consultar_mensal(db, 'sdr', mes, ano, agrupar_por='pessoa')
+
+        # Metas por SDR (equipe do mês)
+        equipe = carregar_equipe(db, mes, ano)
         metas_por_sdr = {}
-        for sdr in por_sdr.keys():
-            pessoa = db.query(Pessoa).filter(Pessoa.nome == sdr).first()
-            if pessoa:
-                meta = db.query(Meta).filter(
-                    Meta.pessoa_id == pessoa.id,
-                    Meta.mes == mes,
-                    Meta.ano == ano
-                ).first()
-                metas_por_sdr[sdr] = meta.meta_reunioes if meta else 0
-            else:
-                metas_por_sdr[sdr] = 0
+        for sdr in (t.pessoa for t in totais_rollup):
+            pessoa = equipe.membro(sdr)
+            metas_por_sdr[sdr] = pessoa.meta_valor('meta_reunioes') if pessoa else 0
 
         # Calcular totais por SDR
         totais_por_sdr = {}
-        for sdr, lista_metricas in por_sdr.items():
-            total_leads = sum(m.leads_recebidos for m in lista_metricas)
-            total_agendadas = sum(m.reunioes_agendadas for m in lista_metricas)
-            total_realizadas = sum(m.reunioes_realizadas for m in lista_metricas)
+        for totais in totais_rollup:
+            sdr = totais.pessoa
+            total_leads = int(totais.leads_recebidos)
+            total_agendadas = int(totais.reunioes_agendadas)
+            total_realizadas = int(totais.reunioes_realizadas)
             total_meta = metas_por_sdr.get(sdr, 0)
 
             totais_por_sdr[sdr] = {
@@ -1014,7 +1052,8 @@ async def dashboard_sdr(mes: int, ano: int, db: Session = Depends(get_db)):
 
 
 @router.get("/dashboard/closer-diario")
-async def dashboard_closer_diario(
+@cache.cache_resposta("comercial.dashboard_closer_diario", ['closer_metricas', 'metas', 'pessoas'])
+def dashboard_closer_diario(
     mes: int,
     ano: int,
     closer: Optional[str] = None,
@@ -1043,21 +1082,15 @@ async def dashboard_closer_diario(
 
         metricas = query.all()
 
-        # Buscar metas mensais da tabela Meta
-        meta_query = db.query(Meta).join(Pessoa, Meta.pessoa_id == Pessoa.id).filter(
-            Meta.mes == mes,
-            Meta.ano == ano,
-            Pessoa.funcao == 'closer'
-        )
-
-        if closer:
-            meta_query = meta_query.filter(Pessoa.nome == closer)
-
-        metas = meta_query.all()
+        # Metas mensais da equipe de Closer
+        metas = [
+            m for m in carregar_equipe(db, mes, ano).com_meta('closer')
+            if not closer or m.nome == closer
+        ]
 
         # Calcular metas mensais totais
-        meta_vendas_mensal = sum(m.meta_vendas or 0 for m in metas)
-        meta_faturamento_mensal = sum(m.meta_faturamento or 0 for m in metas)
+        meta_vendas_mensal = sum(m.meta_valor('meta_vendas') for m in metas)
+        meta_faturamento_mensal = sum(m.meta_valor('meta_faturamento') for m in metas)
 
         # Calcular número de dias do mês
         dias_no_mes = monthrange(ano, mes)[1]
@@ -1182,7 +1215,8 @@ async def dashboard_closer_diario(
 
 
 @router.get("/dashboard/closer")
-async def dashboard_closer(mes: int, ano: int, db: Session = Depends(get_db)):
+@cache.cache_resposta("comercial.dashboard_closer", ['closer_metricas', 'metas', 'pessoas'])
+def dashboard_closer(mes: int, ano: int, db: Session = Depends(get_db)):
     """
     Dashboard consolidado de Closer agrupado por pessoa e por funil.
     """
@@ -1196,41 +1230,33 @@ async def dashboard_closer(mes: int, ano: int, db: Session = Depends(get_db)):
         por_closer: Dict[str, Dict[str, Any]] = {}
         por_funil: Dict[str, List[Any]] = {}
 
-        # Buscar metas da tabela Meta por Closer
+        # Totais por closer já agregados no rollup mensal
+        totais_rollup = rollups.consultar_mensal(db, 'closer', mes, ano, agrupar_por='pessoa')
+
+        # Metas por Closer (equipe do mês)
+        equipe = carregar_equipe(db, mes, ano)
         metas_por_closer = {}
-        closers_unicos = set(m.closer for m in metricas)
-        for closer in closers_unicos:
-            pessoa = db.query(Pessoa).filter(Pessoa.nome == closer).first()
-            if pessoa:
-                meta = db.query(Meta).filter(
-                    Meta.pessoa_id == pessoa.id,
-                    Meta.mes == mes,
-                    Meta.ano == ano
-                ).first()
-                if meta:
-                    metas_por_closer[closer] = {
-                        "meta_vendas": meta.meta_vendas or 0,
-                        "meta_faturamento": meta.meta_faturamento or 0
-                    }
-            if closer not in metas_por_closer:
-                metas_por_closer[closer] = {"meta_vendas": 0, "meta_faturamento": 0}
+        for closer in (t.pessoa for t in totais_rollup):
+            pessoa = equipe.membro(closer)
+            metas_por_closer[closer] = {
+                "meta_vendas": pessoa.meta_valor('meta_vendas') if pessoa else 0,
+                "meta_faturamento": pessoa.meta_valor('meta_faturamento') if pessoa else 0
+            }
+
+        for totais in totais_rollup:
+            por_closer[totais.pessoa] = {
+                "metricas": [],
+                "total_calls_agendadas": int(totais.calls_agendadas),
+                "total_calls_realizadas": int(totais.calls_realizadas),
+                "total_vendas": int(totais.vendas),
+                "total_faturamento": float(totais.faturamento_bruto),
+                "meta_vendas": metas_por_closer[totais.pessoa]["meta_vendas"],
+                "meta_faturamento": metas_por_closer[totais.pessoa]["meta_faturamento"]
+            }
 
         for m in metricas:
-            if m.closer not in por_closer:
-                por_closer[m.closer] = {
-                    "metricas": [],
-                    "total_calls_agendadas": 0,
-                    "total_calls_realizadas": 0,
-                    "total_vendas": 0,
-                    "total_faturamento": 0,
-                    "meta_vendas": metas_por_closer[m.closer]["meta_vendas"],
-                    "meta_faturamento": metas_por_closer[m.closer]["meta_faturamento"]
-                }
-            por_closer[m.closer]["metricas"].append(m)
-            por_closer[m.closer]["total_calls_agendadas"] += m.calls_agendadas
-            por_closer[m.closer]["total_calls_realizadas"] += m.calls_realizadas
-            por_closer[m.closer]["total_vendas"] += m.vendas
-            por_closer[m.closer]["total_faturamento"] += m.faturamento_bruto
+            if m.closer in por_closer:
+                por_closer[m.closer]["metricas"].append(m)
 
             if m.funil not in por_funil:
                 por_funil[m.funil] = []
@@ -1268,58 +1294,46 @@ async def dashboard_closer(mes: int, ano: int, db: Session = Depends(get_db)):
         raise HTTPException(status_code=500, detail=f"Erro ao gerar dashboard: {str(e)}")
 
 
-# ============ CONSOLIDAR METRICAS DO MES ============
+# ============ ROLLUPS ============
 
-@router.put("/consolidar-mes")
-async def consolidar_metricas_mes(mes: int, ano: int, db: Session = Depends(get_db)):
-    """Consolida todas as metricas diarias do mes em totais por pessoa"""
+@router.post("/rollups/reconstruir")
+def reconstruir_rollups(db: Session = Depends(get_db)):
+    """
+    Reconstrói os rollups mensais e diários a partir das métricas brutas.
+    Útil após cargas feitas por scripts que escrevem direto nas tabelas.
+    """
     try:
-        # Buscar metas uma única vez no início da função
-        metas_ss = db.query(Meta).join(Pessoa, Meta.pessoa_id == Pessoa.id).filter(
-            Meta.mes == mes,
-            Meta.ano == ano,
-            Pessoa.funcao == 'social_selling'
-        ).all()
-
-        metas_sdr = db.query(Meta).join(Pessoa, Meta.pessoa_id == Pessoa.id).filter(
-            Meta.mes == mes,
-            Meta.ano == ano,
-            Pessoa.funcao == 'sdr'
-        ).all()
+        rollups.reconstruir_rollups(db)
+        db.commit()
+        cache.limpar()
+        return {"message": "Rollups comerciais reconstruídos com sucesso"}
+    except Exception as e:
+        db.rollback()
+        raise HTTPException(status_code=500, detail=f"Erro ao reconstruir rollups: {str(e)}")
 
-        metas_closer = db.query(Meta).join(Pessoa, Meta.pessoa_id == Pessoa.id).filter(
-            Meta.mes == mes,
-            Meta.ano == ano,
-            Pessoa.funcao == 'closer'
-        ).all()
 
-        # Criar dicionários de metas por nome
-        metas_por_nome = {}
-        for meta in metas_ss + metas_sdr + metas_closer:
-            pessoa = db.query(Pessoa).filter(Pessoa.id == meta.pessoa_id).first()
-            if pessoa:
-                metas_por_nome[pessoa.nome] = meta
+# ============ CONSOLIDAR METRICAS DO MES ============
 
-        # Social Selling - Agrupar por vendedor
-        ss_metricas = db.query(SocialSellingMetrica).filter(
-            SocialSellingMetrica.mes == mes,
-            SocialSellingMetrica.ano == ano
-        ).all()
+@router.put("/consolidar-mes")
+def consolidar_metricas_mes(mes: int, ano: int, db: Session = Depends(get_db)):
+    """Consolida todas as metricas diarias do mes em totais por pessoa"""
+    try:
+        # Metas do mês por nome (equipe comercial)
+        metas_por_nome = {
+            m.nome: m for m in carregar_equipe(db, mes, ano).com_meta('social_selling', 'sdr', 'closer')
+        }
 
+        # Social Selling - Totais por vendedor (rollup mensal)
         por_vendedor_ss = {}
-        for metrica in ss_metricas:
-            if metrica.vendedor not in por_vendedor_ss:
-                meta = metas_por_nome.get(metrica.vendedor)
-                por_vendedor_ss[metrica.vendedor] = {
-                    "ativacoes": 0,
-                    "conversoes": 0,
-                    "leads_gerados": 0,
-                    "meta_ativacoes": meta.meta_ativacoes if meta else 0,
-                    "meta_leads": meta.meta_leads if meta else 0
-                }
-            por_vendedor_ss[metrica.vendedor]["ativacoes"] += metrica.ativacoes or 0
-            por_vendedor_ss[metrica.vendedor]["conversoes"] += metrica.conversoes or 0
-            por_vendedor_ss[metrica.vendedor]["leads_gerados"] += metrica.leads_gerados or 0
+        for totais in rollups.consultar_mensal(db, 'social_selling', mes, ano, agrupar_por='pessoa'):
+            meta = metas_por_nome.get(totais.pessoa)
+            por_vendedor_ss[totais.pessoa] = {
+                "ativacoes": int(totais.ativacoes),
+                "conversoes": int(totais.conversoes),
+                "leads_gerados": int(totais.leads_gerados),
+                "meta_ativacoes": meta.meta_valor('meta_ativacoes') if meta else 0,
+                "meta_leads": meta.meta_valor('meta_leads') if meta else 0
+            }
 
         # Calcular taxas de SS
         for vendedor, totais in por_vendedor_ss.items():
@@ -1336,25 +1350,16 @@ async def consolidar_metricas_mes(mes: int, ano: int, db: Session = Depends(get_
                 (totais["leads_gerados"] / totais["meta_leads"] * 100) if totais["meta_leads"] > 0 else 0, 2
             )
 
-        # SDR - Agrupar por sdr
-        sdr_metricas = db.query(SDRMetrica).filter(
-            SDRMetrica.mes == mes,
-            SDRMetrica.ano == ano
-        ).all()
-
+        # SDR - Totais por sdr (rollup mensal)
         por_sdr = {}
-        for metrica in sdr_metricas:
-            if metrica.sdr not in por_sdr:
-                meta = metas_por_nome.get(metrica.sdr)
-                por_sdr[metrica.sdr] = {
-                    "leads_recebidos": 0,
-                    "reunioes_agendadas": 0,
-                    "reunioes_realizadas": 0,
-                    "meta_reunioes": meta.meta_reunioes if meta else 0
-                }
-            por_sdr[metrica.sdr]["leads_recebidos"] += metrica.leads_recebidos or 0
-            por_sdr[metrica.sdr]["reunioes_agendadas"] += metrica.reunioes_agendadas or 0
-            por_sdr[metrica.sdr]["reunioes_realizadas"] += metrica.reunioes_realizadas or 0
+        for totais in rollups.consultar_mensal(db, 'sdr', mes, ano, agrupar_por='pessoa'):
+            meta = metas_por_nome.get(totais.pessoa)
+            por_sdr[totais.pessoa] = {
+                "leads_recebidos": int(totais.leads_recebidos),
+                "reunioes_agendadas": int(totais.reunioes_agendadas),
+                "reunioes_realizadas": int(totais.reunioes_realizadas),
+                "meta_reunioes": meta.meta_valor('meta_reunioes') if meta else 0
+            }
 
         # Calcular taxas de SDR
         for sdr, totais in por_sdr.items():
@@ -1368,28 +1373,18 @@ async def consolidar_metricas_mes(mes: int, ano: int, db: Session = Depends(get_
                 (totais["reunioes_realizadas"] / totais["meta_reunioes"] * 100) if totais["meta_reunioes"] > 0 else 0, 2
             )
 
-        # Closer - Agrupar por closer
-        closer_metricas = db.query(CloserMetrica).filter(
-            CloserMetrica.mes == mes,
-            CloserMetrica.ano == ano
-        ).all()
-
+        # Closer - Totais por closer (rollup mensal)
         por_closer = {}
-        for metrica in closer_metricas:
-            if metrica.closer not in por_closer:
-                meta = metas_por_nome.get(metrica.closer)
-                por_closer[metrica.closer] = {
-                    "calls_agendadas": 0,
-                    "calls_realizadas": 0,
-                    "vendas": 0,
-                    "faturamento": 0,
-                    "meta_vendas": meta.meta_vendas if meta else 0,
-                    "meta_faturamento": meta.meta_faturamento if meta else 0
-                }
-            por_closer[metrica.closer]["calls_agendadas"] += metrica.calls_agendadas or 0
-            por_closer[metrica.closer]["calls_realizadas"] += metrica.calls_realizadas or 0
-            por_closer[metrica.closer]["vendas"] += metrica.vendas or 0
-            por_closer[metrica.closer]["faturamento"] += metrica.faturamento_bruto or 0
+        for totais in rollups.consultar_mensal(db, 'closer', mes, ano, agrupar_por='pessoa'):
+            meta = metas_por_nome.get(totais.pessoa)
+            por_closer[totais.pessoa] = {
+                "calls_agendadas": int(totais.calls_agendadas),
+                "calls_realizadas": int(totais.calls_realizadas),
+                "vendas": int(totais.vendas),
+                "faturamento": float(totais.faturamento_bruto),
+                "meta_vendas": meta.meta_valor('meta_vendas') if meta else 0,
+                "meta_faturamento": meta.meta_valor('meta_faturamento') if meta else 0
+            }
 
         # Calcular taxas de Closer
         for closer, totais in por_closer.items():
@@ -1433,7 +1428,7 @@ async def consolidar_metricas_mes(mes: int, ano: int, db: Session = Depends(get_
 
 
 @router.get("/scorecard-individual")
-async def get_scorecard_individual(
+def get_scorecard_individual(
     mes: int,
     ano: int,
     db: Session = Depends(get_db)
@@ -1442,35 +1437,42 @@ async def get_scorecard_individual(
     Retorna scorecard individual de cada pessoa da equipe com tendência.
     Mostra: meta, realizado, %, status (vai bater ou não).
     """
-    from app.models.models import Meta, Pessoa, Venda
+    from app.models.models import Venda
     from datetime import datetime
     from dateutil.relativedelta import relativedelta
 
     try:
-        # Buscar todas as metas do mês
-        metas = db.query(Meta).filter(
-            Meta.mes == mes,
-            Meta.ano == ano
-        ).all()
+        # Pessoas com meta no mês
+        membros = carregar_equipe(db, mes, ano).com_meta()
+
+        # Os 3 meses anteriores (histórico)
+        meses_hist = [datetime(ano, mes, 1) - relativedelta(months=i) for i in range(1, 4)]
+        equipes_hist = [carregar_equipe(db, d.month, d.year) for d in meses_hist]
+
+        # Vendas líquidas por closer nos 4 meses, numa consulta
+        periodos = [periodo(ano, mes)] + [periodo(d.year, d.month) for d in meses_hist]
+        vendas_por_mes = {
+            (closer, m, a): total or 0
+            for closer, m, a, total in db.query(
+                Venda.closer, Venda.mes, Venda.ano, func.sum(Venda.valor_liquido)
+            ).filter(
+                Venda.closer.in_([p.nome for p in membros]),
+                Venda.periodo.in_(periodos)
+            ).group_by(Venda.closer, Venda.mes, Venda.ano)
+        } if membros else {}
 
         scorecards = []
 
-        for meta in metas:
-            if not meta.pessoa:
-                continue
-
-            pessoa_nome = meta.pessoa.nome
-            area = meta.pessoa.cargo or "Indefinido"
+        for pessoa in membros:
+            pessoa_nome = pessoa.nome
+            area = pessoa.funcao or "Indefinido"
+            meta_faturamento = pessoa.meta_valor('meta_faturamento')
 
-            # Buscar realizado do mês atual
-            vendas_mes = db.query(func.sum(Venda.valor_liquido)).filter(
-                Venda.closer == pessoa_nome,
-                Venda.mes == mes,
-                Venda.ano == ano
-            ).scalar() or 0
+            # Realizado do mês atual
+            vendas_mes = vendas_por_mes.get((pessoa_nome, mes, ano), 0)
 
             # Calcular % da meta
-            perc_meta = (vendas_mes / meta.meta_faturamento * 100) if meta.meta_faturamento > 0 else 0
+            perc_meta = (vendas_mes / meta_faturamento * 100) if meta_faturamento > 0 else 0
 
             # Calcular dias úteis do mês
             primeiro_dia = datetime(ano, mes, 1)
@@ -1486,7 +1488,7 @@ async def get_scorecard_individual(
             if dia_atual > 0:
                 ritmo_diario = vendas_mes / dia_atual
                 projecao_fim_mes = ritmo_diario * dias_totais
-                perc_projecao = (projecao_fim_mes / meta.meta_faturamento * 100) if meta.meta_faturamento > 0 else 0
+                perc_projecao = (projecao_fim_mes / meta_faturamento * 100) if meta_faturamento > 0 else 0
             else:
                 projecao_fim_mes = 0
                 perc_projecao = 0
@@ -1507,31 +1509,22 @@ async def get_scorecard_individual(
 
             # Histórico (últimos 3 meses)
             historico = []
-            for i in range(1, 4):
-                data_hist = datetime(ano, mes, 1) - relativedelta(months=i)
+            for data_hist, equipe_hist in zip(meses_hist, equipes_hist):
                 mes_hist = data_hist.month
                 ano_hist = data_hist.year
 
-                meta_hist = db.query(Meta).filter(
-                    Meta.pessoa_id == meta.pessoa_id,
-                    Meta.mes == mes_hist,
-                    Meta.ano == ano_hist
-                ).first()
+                pessoa_hist = equipe_hist.membro(pessoa_nome)
+                if pessoa_hist and pessoa_hist.meta:
+                    vendas_hist = vendas_por_mes.get((pessoa_nome, mes_hist, ano_hist), 0)
+                    meta_hist = pessoa_hist.meta_valor('meta_faturamento')
 
-                if meta_hist:
-                    vendas_hist = db.query(func.sum(Venda.valor_liquido)).filter(
-                        Venda.closer == pessoa_nome,
-                        Venda.mes == mes_hist,
-                        Venda.ano == ano_hist
-                    ).scalar() or 0
-
-                    perc_hist = (vendas_hist / meta_hist.meta_faturamento * 100) if meta_hist.meta_faturamento > 0 else 0
+                    perc_hist = (vendas_hist / meta_hist * 100) if meta_hist > 0 else 0
 
                     historico.append({
                         "mes": mes_hist,
                         "ano": ano_hist,
                         "mes_nome": data_hist.strftime("%B"),
-                        "meta": round(meta_hist.meta_faturamento, 2),
+                        "meta": round(meta_hist, 2),
                         "realizado": round(vendas_hist, 2),
                         "perc": round(perc_hist, 2)
                     })
@@ -1539,7 +1532,7 @@ async def get_scorecard_individual(
             scorecards.append({
                 "pessoa": pessoa_nome,
                 "area": area,
-                "meta_mes": round(meta.meta_faturamento, 2),
+                "meta_mes": round(meta_faturamento, 2),
                 "realizado_mes": round(vendas_mes, 2),
                 "perc_meta": round(perc_meta, 2),
                 "projecao_fim_mes": round(projecao_fim_mes, 2),
@@ -1550,7 +1543,7 @@ async def get_scorecard_individual(
                 "dias_decorridos": dia_atual,
                 "dias_totais": dias_totais,
                 "ritmo_diario": round(ritmo_diario, 2) if dia_atual > 0 else 0,
-                "falta_para_meta": round(max(0, meta.meta_faturamento - vendas_mes), 2),
+                "falta_para_meta": round(max(0, meta_faturamento - vendas_mes), 2),
                 "historico": historico
             })
 
@@ -1569,7 +1562,7 @@ async def get_scorecard_individual(
 
 
 @router.get("/social-selling/tracking-diario")
-async def tracking_diario_social_selling(
+def tracking_diario_social_selling(
     mes: int,
     ano: int,
     vendedor: str = Query(None, description="Filtrar por vendedor específico"),
@@ -1705,7 +1698,12 @@ async def tracking_diario_social_selling(
 # ==================== DASHBOARD GERAL ====================
 
 @router.get("/dashboard/geral")
-async def dashboard_geral(
+@cache.cache_resposta(
+    "comercial.dashboard_geral",
+    ['social_selling_metricas', 'sdr_metricas', 'closer_metricas', 'metas', 'pessoas'],
+    meses_anteriores=1
+)
+def dashboard_geral(
     mes: int,
     ano: int,
     funil: str = Query("todos", description="Filtro: todos, SS, Quiz, Indicacao, Webinario"),
@@ -1721,35 +1719,24 @@ async def dashboard_geral(
         
         # ========== SOCIAL SELLING ==========
         
-        # KPIs Social Selling
-        ss_kpis = db.query(
-            func.sum(SocialSellingMetrica.ativacoes).label('ativacoes'),
-            func.sum(SocialSellingMetrica.conversoes).label('conversoes'),
-            func.sum(SocialSellingMetrica.leads_gerados).label('leads')
-        ).filter(
-            SocialSellingMetrica.mes == mes,
-            SocialSellingMetrica.ano == ano
-        ).first()
+        # KPIs Social Selling (rollup mensal)
+        ss_kpis = rollups.consultar_mensal(db, 'social_selling', mes, ano)
         
+        # Metas da equipe no mês, por nome e área
+        equipe = carregar_equipe(db, mes, ano)
+
+        def metas_da_area(trecho):
+            return {m.nome: m for m in equipe.com_meta() if trecho in (m.funcao or '').lower()}
+
         # Metas Social Selling
-        metas_ss_raw = db.query(Meta, Pessoa).join(Pessoa, Meta.pessoa_id == Pessoa.id).filter(
-            Meta.mes == mes,
-            Meta.ano == ano,
-            func.lower(Pessoa.funcao).like('%social%')
-        ).all()
+        metas_ss = metas_da_area('social')
 
-        # Convert to list of Meta objects with pessoa attribute attached
-        metas_ss = []
-        for meta, pessoa in metas_ss_raw:
-            meta.pessoa = pessoa
-            metas_ss.append(meta)
-        
-        meta_ativacoes = sum(m.meta_ativacoes or 0 for m in metas_ss)
-        meta_leads = sum(m.meta_leads or 0 for m in metas_ss)
+        meta_ativacoes = sum(m.meta_valor('meta_ativacoes') for m in metas_ss.values())
+        meta_leads = sum(m.meta_valor('meta_leads') for m in metas_ss.values())
         
         ativacoes = int(ss_kpis.ativacoes or 0)
         conversoes = int(ss_kpis.conversoes or 0)
-        leads = int(ss_kpis.leads or 0)
+        leads = int(ss_kpis.leads_gerados or 0)
         
         perc_ativacoes = (ativacoes / meta_ativacoes * 100) if meta_ativacoes > 0 else 0
         perc_leads = (leads / meta_leads * 100) if meta_leads > 0 else 0
@@ -1757,46 +1744,32 @@ async def dashboard_geral(
         tx_conv_lead = (leads / conversoes * 100) if conversoes > 0 else 0
         
         # Por vendedor (Social Selling)
-        vendedores_ss = db.query(
-            SocialSellingMetrica.vendedor,
-            func.sum(SocialSellingMetrica.ativacoes).label('ativacoes'),
-            func.sum(SocialSellingMetrica.conversoes).label('conversoes'),
-            func.sum(SocialSellingMetrica.leads_gerados).label('leads')
-        ).filter(
-            SocialSellingMetrica.mes == mes,
-            SocialSellingMetrica.ano == ano
-        ).group_by(SocialSellingMetrica.vendedor).all()
+        vendedores_ss = rollups.consultar_mensal(db, 'social_selling', mes, ano, agrupar_por='pessoa')
         
         por_vendedor = []
         for v in vendedores_ss:
-            meta_vendedor = next((m for m in metas_ss if m.pessoa and m.pessoa.nome == v.vendedor), None)
-            meta_v = meta_vendedor.meta_leads or 0 if meta_vendedor else 0
-            perc_v = (v.leads / meta_v * 100) if meta_v > 0 else 0
+            meta_vendedor = metas_ss.get(v.pessoa)
+            meta_v = meta_vendedor.meta_valor('meta_leads') if meta_vendedor else 0
+            perc_v = (v.leads_gerados / meta_v * 100) if meta_v > 0 else 0
             
             por_vendedor.append({
-                "vendedor": v.vendedor,
+                "vendedor": v.pessoa,
                 "ativacoes": int(v.ativacoes or 0),
                 "conversoes": int(v.conversoes or 0),
-                "leads": int(v.leads or 0),
+                "leads": int(v.leads_gerados or 0),
                 "meta": meta_v,
                 "perc": round(perc_v, 1),
                 "status": "verde" if perc_v >= 80 else "amarelo" if perc_v >= 40 else "vermelho"
             })
         
-        # Acumulado diário de ativações
-        ativacoes_diarias = db.query(
-            func.extract('day', SocialSellingMetrica.data).label('dia'),
-            func.sum(SocialSellingMetrica.ativacoes).label('ativacoes')
-        ).filter(
-            SocialSellingMetrica.mes == mes,
-            SocialSellingMetrica.ano == ano,
-            SocialSellingMetrica.data.isnot(None)
-        ).group_by(func.extract('day', SocialSellingMetrica.data)).order_by('dia').all()
+        # Acumulado diário de ativações (rollup diário)
+        ativacoes_diarias = rollups.consultar_diario(db, 'social_selling', mes, ano)
 
         # Criar dicionário com ativações diárias (apenas dias que têm registros)
         ativacoes_por_dia = {}
-        for dia_num, ativ in ativacoes_diarias:
-            ativacoes_por_dia[int(dia_num)] = int(ativ or 0)
+        for linha in ativacoes_diarias:
+            dia_num = linha.data.day
+            ativacoes_por_dia[dia_num] = ativacoes_por_dia.get(dia_num, 0) + int(linha.ativacoes or 0)
 
         # Calcular acumulados para TODOS os dias do mês
         acumulado_ativacoes = []
@@ -1822,70 +1795,28 @@ async def dashboard_geral(
             funil_filter = funil
         
         # SDR (filtrável por funil)
-        sdr_query = db.query(
-            func.sum(SDRMetrica.leads_recebidos).label('leads'),
-            func.sum(SDRMetrica.reunioes_agendadas).label('agendadas'),
-            func.sum(SDRMetrica.reunioes_realizadas).label('realizadas')
-        ).filter(
-            SDRMetrica.mes == mes,
-            SDRMetrica.ano == ano
-        )
-        if funil_filter:
-            sdr_query = sdr_query.filter(SDRMetrica.funil == funil_filter)
-        
-        sdr_kpis = sdr_query.first()
+        sdr_kpis = rollups.consultar_mensal(db, 'sdr', mes, ano, funil=funil_filter)
         
         # Closer (filtrável por funil)
-        closer_query = db.query(
-            func.sum(CloserMetrica.calls_agendadas).label('calls_agendadas'),
-            func.sum(CloserMetrica.calls_realizadas).label('calls_realizadas'),
-            func.sum(CloserMetrica.vendas).label('vendas'),
-            func.sum(CloserMetrica.faturamento_bruto).label('faturamento')
-        ).filter(
-            CloserMetrica.mes == mes,
-            CloserMetrica.ano == ano
-        )
-        if funil_filter:
-            closer_query = closer_query.filter(CloserMetrica.funil == funil_filter)
-        
-        closer_kpis = closer_query.first()
+        closer_kpis = rollups.consultar_mensal(db, 'closer', mes, ano, funil=funil_filter)
         
         # Metas Comercial
-        metas_sdr_raw = db.query(Meta, Pessoa).join(Pessoa, Meta.pessoa_id == Pessoa.id).filter(
-            Meta.mes == mes,
-            Meta.ano == ano,
-            func.lower(Pessoa.funcao).like('%sdr%')
-        ).all()
-
-        metas_sdr = []
-        for meta, pessoa in metas_sdr_raw:
-            meta.pessoa = pessoa
-            metas_sdr.append(meta)
-
-        metas_closer_raw = db.query(Meta, Pessoa).join(Pessoa, Meta.pessoa_id == Pessoa.id).filter(
-            Meta.mes == mes,
-            Meta.ano == ano,
-            func.lower(Pessoa.funcao).like('%closer%')
-        ).all()
-
-        metas_closer = []
-        for meta, pessoa in metas_closer_raw:
-            meta.pessoa = pessoa
-            metas_closer.append(meta)
+        metas_sdr = metas_da_area('sdr')
+        metas_closer = metas_da_area('closer')
+
+        meta_leads_sdr = sum(m.meta_valor('meta_leads') for m in metas_sdr.values())
+        meta_reunioes_agend = sum(m.meta_valor('meta_reunioes_agendadas') for m in metas_sdr.values())
+        meta_reunioes_real = sum(m.meta_valor('meta_reunioes') for m in metas_sdr.values())
+        meta_vendas = sum(m.meta_valor('meta_vendas') for m in metas_closer.values())
+        meta_faturamento = sum(m.meta_valor('meta_faturamento') for m in metas_closer.values())
         
-        meta_leads_sdr = sum(m.meta_leads or 0 for m in metas_sdr)
-        meta_reunioes_agend = sum(m.meta_reunioes_agendadas or 0 for m in metas_sdr)
-        meta_reunioes_real = sum(m.meta_reunioes or 0 for m in metas_sdr)
-        meta_vendas = sum(m.meta_vendas or 0 for m in metas_closer)
-        meta_faturamento = sum(m.meta_faturamento or 0 for m in metas_closer)
-        
-        leads_com = int(sdr_kpis.leads or 0)
-        agendadas = int(sdr_kpis.agendadas or 0)
-        realizadas = int(sdr_kpis.realizadas or 0)
+        leads_com = int(sdr_kpis.leads_recebidos or 0)
+        agendadas = int(sdr_kpis.reunioes_agendadas or 0)
+        realizadas = int(sdr_kpis.reunioes_realizadas or 0)
         calls_agend = int(closer_kpis.calls_agendadas or 0)
         calls_real = int(closer_kpis.calls_realizadas or 0)
         vendas = int(closer_kpis.vendas or 0)
-        faturamento = float(closer_kpis.faturamento or 0)
+        faturamento = float(closer_kpis.faturamento_bruto or 0)
         
         ticket_medio = (faturamento / vendas) if vendas > 0 else 0
         
@@ -1906,50 +1837,30 @@ async def dashboard_geral(
         por_pessoa = []
         
         # SDRs individuais
-        sdrs = db.query(
-            SDRMetrica.sdr,
-            func.sum(SDRMetrica.reunioes_realizadas).label('realizadas')
-        ).filter(
-            SDRMetrica.mes == mes,
-            SDRMetrica.ano == ano
-        )
-        if funil_filter:
-            sdrs = sdrs.filter(SDRMetrica.funil == funil_filter)
-        sdrs = sdrs.group_by(SDRMetrica.sdr).all()
+        sdrs = rollups.consultar_mensal(db, 'sdr', mes, ano, funil=funil_filter, agrupar_por='pessoa')
         
         for s in sdrs:
-            meta_sdr = next((m for m in metas_sdr if m.pessoa and m.pessoa.nome == s.sdr), None)
-            meta_s = meta_sdr.meta_reunioes or 0 if meta_sdr else 0
-            perc_s = (s.realizadas / meta_s * 100) if meta_s > 0 else 0
+            meta_sdr = metas_sdr.get(s.pessoa)
+            meta_s = meta_sdr.meta_valor('meta_reunioes') if meta_sdr else 0
+            perc_s = (s.reunioes_realizadas / meta_s * 100) if meta_s > 0 else 0
             
             por_pessoa.append({
-                "pessoa": s.sdr,
+                "pessoa": s.pessoa,
                 "area": "SDR",
                 "metrica": "Reuniões Realizadas",
-                "realizado": int(s.realizadas or 0),
+                "realizado": int(s.reunioes_realizadas or 0),
                 "meta": meta_s,
                 "perc": round(perc_s, 1),
                 "status": "verde" if perc_s >= 80 else "amarelo" if perc_s >= 40 else "vermelho"
             })
         
         # Closers individuais
-        closers = db.query(
-            CloserMetrica.closer,
-            func.sum(CloserMetrica.calls_realizadas).label('calls_realizadas'),
-            func.sum(CloserMetrica.vendas).label('vendas'),
-            func.sum(CloserMetrica.faturamento_bruto).label('faturamento')
-        ).filter(
-            CloserMetrica.mes == mes,
-            CloserMetrica.ano == ano
-        )
-        if funil_filter:
-            closers = closers.filter(CloserMetrica.funil == funil_filter)
-        closers = closers.group_by(CloserMetrica.closer).all()
+        closers = rollups.consultar_mensal(db, 'closer', mes, ano, funil=funil_filter, agrupar_por='pessoa')
 
         for c in closers:
-            meta_closer = next((m for m in metas_closer if m.pessoa and m.pessoa.nome == c.closer), None)
-            meta_fat = meta_closer.meta_faturamento or 0 if meta_closer else 0
-            perc_c = (c.faturamento / meta_fat * 100) if meta_fat > 0 else 0
+            meta_closer = metas_closer.get(c.pessoa)
+            meta_fat = meta_closer.meta_valor('meta_faturamento') if meta_closer else 0
+            perc_c = (c.faturamento_bruto / meta_fat * 100) if meta_fat > 0 else 0
 
             # Calcular tx de conversão do closer
             tx_conv_closer = (c.vendas / c.calls_realizadas * 100) if c.calls_realizadas and c.calls_realizadas > 0 else 0
@@ -1965,10 +1876,10 @@ async def dashboard_geral(
             pipeline_ativo = 0  # Placeholder - definir como 0 por enquanto
 
             por_pessoa.append({
-                "pessoa": c.closer,
+                "pessoa": c.pessoa,
                 "area": "Closer",
                 "metrica": "Faturamento",
-                "realizado": int(c.faturamento or 0),
+                "realizado": int(c.faturamento_bruto or 0),
                 "meta": int(meta_fat),
                 "perc": round(perc_c, 1),
                 "status": "verde" if perc_c >= 80 else "amarelo" if perc_c >= 40 else "vermelho",
@@ -1978,28 +1889,15 @@ async def dashboard_geral(
                 "pipeline_ativo": pipeline_ativo
             })
         
-        # Acumulados diários (vendas e faturamento) - USANDO APENAS CLOSER_METRICAS
-        closer_query = db.query(
-            func.extract('day', CloserMetrica.data).label('dia'),
-            func.sum(CloserMetrica.vendas).label('vendas'),
-            func.sum(CloserMetrica.faturamento_bruto).label('faturamento')
-        ).filter(
-            CloserMetrica.mes == mes,
-            CloserMetrica.ano == ano,
-            CloserMetrica.data.isnot(None)
-        )
-        if funil_filter:
-            closer_query = closer_query.filter(CloserMetrica.funil == funil_filter)
-
-        closer_diario = closer_query.group_by(func.extract('day', CloserMetrica.data)).order_by('dia').all()
+        # Acumulados diários (vendas e faturamento) - rollup diário de CLOSER_METRICAS
+        closer_diario = rollups.consultar_diario(db, 'closer', mes, ano, funil=funil_filter)
 
         # Criar dicionário com dados diários (apenas dias que têm registros)
         dados_por_dia = {}
-        for dia_num, v_dia, fat_dia in closer_diario:
-            dados_por_dia[int(dia_num)] = {
-                'vendas': int(v_dia or 0),
-                'faturamento': float(fat_dia or 0)
-            }
+        for linha in closer_diario:
+            dados_dia = dados_por_dia.setdefault(linha.data.day, {'vendas': 0, 'faturamento': 0.0})
+            dados_dia['vendas'] += int(linha.vendas or 0)
+            dados_dia['faturamento'] += float(linha.faturamento_bruto or 0)
 
         # Calcular acumulados para TODOS os dias do mês
         acumulado_vendas_arr = []
@@ -2065,63 +1963,27 @@ async def dashboard_geral(
         ano_anterior = ano - 1 if mes == 1 else ano
 
         # Social Selling mês anterior
-        ss_anterior = db.query(
-            func.sum(SocialSellingMetrica.ativacoes).label('ativacoes'),
-            func.sum(SocialSellingMetrica.conversoes).label('conversoes'),
-            func.sum(SocialSellingMetrica.leads_gerados).label('leads')
-        ).filter(
-            SocialSellingMetrica.mes == mes_anterior,
-            SocialSellingMetrica.ano == ano_anterior
-        ).first()
+        ss_anterior = rollups.consultar_mensal(db, 'social_selling', mes_anterior, ano_anterior)
 
         # Comercial mês anterior (com filtro de funil se aplicável)
-        leads_query_ant = db.query(func.sum(SDRMetrica.leads_recebidos).label('total')).filter(
-            SDRMetrica.mes == mes_anterior,
-            SDRMetrica.ano == ano_anterior
-        )
-        agend_query_ant = db.query(func.sum(SDRMetrica.reunioes_agendadas).label('total')).filter(
-            SDRMetrica.mes == mes_anterior,
-            SDRMetrica.ano == ano_anterior
-        )
-        real_query_ant = db.query(func.sum(SDRMetrica.reunioes_realizadas).label('total')).filter(
-            SDRMetrica.mes == mes_anterior,
-            SDRMetrica.ano == ano_anterior
-        )
+        sdr_ant = rollups.consultar_mensal(db, 'sdr', mes_anterior, ano_anterior, funil=funil_filter)
 
-        if funil_filter:
-            leads_query_ant = leads_query_ant.filter(SDRMetrica.funil == funil_filter)
-            agend_query_ant = agend_query_ant.filter(SDRMetrica.funil == funil_filter)
-            real_query_ant = real_query_ant.filter(SDRMetrica.funil == funil_filter)
-
-        leads_com_ant = int(leads_query_ant.scalar() or 0)
-        agendadas_ant = int(agend_query_ant.scalar() or 0)
-        realizadas_ant = int(real_query_ant.scalar() or 0)
+        leads_com_ant = int(sdr_ant.leads_recebidos or 0)
+        agendadas_ant = int(sdr_ant.reunioes_agendadas or 0)
+        realizadas_ant = int(sdr_ant.reunioes_realizadas or 0)
 
         # Closer mês anterior (com filtro de funil se aplicável)
-        closer_query_ant = db.query(
-            func.sum(CloserMetrica.calls_agendadas).label('calls_agend'),
-            func.sum(CloserMetrica.calls_realizadas).label('calls_real'),
-            func.sum(CloserMetrica.vendas).label('vendas'),
-            func.sum(CloserMetrica.faturamento_bruto).label('faturamento')
-        ).filter(
-            CloserMetrica.mes == mes_anterior,
-            CloserMetrica.ano == ano_anterior
-        )
-
-        if funil_filter:
-            closer_query_ant = closer_query_ant.filter(CloserMetrica.funil == funil_filter)
-
-        closer_ant = closer_query_ant.first()
+        closer_ant = rollups.consultar_mensal(db, 'closer', mes_anterior, ano_anterior, funil=funil_filter)
 
         vendas_ant = int(closer_ant.vendas or 0) if closer_ant else 0
-        faturamento_ant = float(closer_ant.faturamento or 0) if closer_ant else 0
+        faturamento_ant = float(closer_ant.faturamento_bruto or 0) if closer_ant else 0
         ticket_medio_ant = (faturamento_ant / vendas_ant) if vendas_ant > 0 else 0
 
         mes_anterior_data = {
             "social_selling": {
                 "ativacoes": int(ss_anterior.ativacoes or 0) if ss_anterior else 0,
                 "conversoes": int(ss_anterior.conversoes or 0) if ss_anterior else 0,
-                "leads": int(ss_anterior.leads or 0) if ss_anterior else 0
+                "leads": int(ss_anterior.leads_gerados or 0) if ss_anterior else 0
             },
             "comercial": {
                 "leads": leads_com_ant,
@@ -2135,12 +1997,15 @@ async def dashboard_geral(
 
         # ========== FUNIS DISPONÍVEIS (dinâmico) ==========
 
-        funis_disponiveis = db.query(CloserMetrica.funil).filter(
-            CloserMetrica.mes == mes,
-            CloserMetrica.ano == ano,
-            CloserMetrica.funil.isnot(None)
-        ).distinct().all()
-        funis_dinamicos = sorted(set(f[0] for f in funis_disponiveis if f[0]))
+        closer_por_funil = {
+            linha.funil: linha
+            for linha in rollups.consultar_mensal(db, 'closer', mes, ano, agrupar_por='funil')
+        }
+        sdr_por_funil = {
+            linha.funil: linha
+            for linha in rollups.consultar_mensal(db, 'sdr', mes, ano, agrupar_por='funil')
+        }
+        funis_dinamicos = sorted(f for f in closer_por_funil if f)
 
         # ========== FUNIL POR ORIGEM ==========
 
@@ -2150,32 +2015,15 @@ async def dashboard_geral(
         funis_lista = funis_dinamicos if funis_dinamicos else ["SS", "Isca", "Quiz"]
 
         for funil_nome in funis_lista:
-            # SDR por funil
-            sdr_funil = db.query(
-                func.sum(SDRMetrica.leads_recebidos).label('leads'),
-                func.sum(SDRMetrica.reunioes_agendadas).label('agendadas'),
-                func.sum(SDRMetrica.reunioes_realizadas).label('realizadas')
-            ).filter(
-                SDRMetrica.mes == mes,
-                SDRMetrica.ano == ano,
-                SDRMetrica.funil == funil_nome
-            ).first()
-
-            # Closer por funil
-            closer_funil = db.query(
-                func.sum(CloserMetrica.vendas).label('vendas'),
-                func.sum(CloserMetrica.faturamento_bruto).label('faturamento')
-            ).filter(
-                CloserMetrica.mes == mes,
-                CloserMetrica.ano == ano,
-                CloserMetrica.funil == funil_nome
-            ).first()
-
-            leads_f = int(sdr_funil.leads or 0) if sdr_funil else 0
-            agendadas_f = int(sdr_funil.agendadas or 0) if sdr_funil else 0
-            realizadas_f = int(sdr_funil.realizadas or 0) if sdr_funil else 0
+            # SDR e Closer por funil (já agrupados pelo rollup)
+            sdr_funil = sdr_por_funil.get(funil_nome)
+            closer_funil = closer_por_funil.get(funil_nome)
+
+            leads_f = int(sdr_funil.leads_recebidos or 0) if sdr_funil else 0
+            agendadas_f = int(sdr_funil.reunioes_agendadas or 0) if sdr_funil else 0
+            realizadas_f = int(sdr_funil.reunioes_realizadas or 0) if sdr_funil else 0
             vendas_f = int(closer_funil.vendas or 0) if closer_funil else 0
-            faturamento_f = float(closer_funil.faturamento or 0) if closer_funil else 0
+            faturamento_f = float(closer_funil.faturamento_bruto or 0) if closer_funil else 0
 
             tx_comparecimento_f = (realizadas_f / agendadas_f * 100) if agendadas_f > 0 else 0
             tx_conversao_f = (vendas_f / realizadas_f * 100) if realizadas_f > 0 else 0
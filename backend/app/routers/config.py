@@ -7,7 +7,10 @@ from fastapi import APIRouter, Depends, HTTPException
 from sqlalchemy.orm import Session
 from sqlalchemy import func
 from app.database import get_db
-from app.models.models import Pessoa, ProdutoConfig, FunilConfig, Meta
+from app.models.models import Meta, Pessoa, ProdutoConfig, FunilConfig
+from app.rollups import reconstruir_rollups
+from app import cache
+from app.equipe import carregar_equipe
 from pydantic import BaseModel
 from typing import Optional
 
@@ -64,7 +67,7 @@ class FunilUpdate(BaseModel):
 
 @router.get("/pessoas")
 @router.get("/pessoas/")  # Aceita ambas versões
-async def list_pessoas(
+def list_pessoas(
     funcao: Optional[str] = None,
     ativo: Optional[bool] = None,
     db: Session = Depends(get_db)
@@ -100,8 +103,64 @@ async def list_pessoas(
         raise HTTPException(status_code=500, detail=f"Erro ao listar pessoas: {str(e)}")
 
 
+# ==================== PESSOAS COM METAS ====================
+# Declarado antes de /pessoas/{id}, senão "resumo" casa com {id}
+
+@router.get("/pessoas/resumo")
+def get_pessoas_resumo(
+    mes: int,
+    ano: int,
+    funcao: Optional[str] = None,
+    db: Session = Depends(get_db)
+):
+    """
+    Retorna pessoas com suas metas do mês específico.
+    Metas agora vêm exclusivamente da tabela Meta.
+    Pessoas e metas vêm da equipe do período (uma consulta, com cache).
+    """
+    try:
+        equipe = carregar_equipe(db, mes, ano)
+
+        resultado = []
+        for pessoa in equipe.membros:
+            if not pessoa.ativo or (funcao and pessoa.funcao != funcao):
+                continue
+
+            resultado.append({
+                "id": pessoa.id,
+                "nome": pessoa.nome,
+                "funcao": pessoa.funcao,
+                "ativo": pessoa.ativo,
+                "nivel_senioridade": pessoa.nivel_senioridade,
+                "meta_mes": {
+                    "ativacoes": pessoa.meta_valor("meta_ativacoes"),
+                    "leads": pessoa.meta_valor("meta_leads"),
+                    "reunioes": pessoa.meta_valor("meta_reunioes"),
+                    "vendas": pessoa.meta_valor("meta_vendas"),
+                    "faturamento": pessoa.meta_valor("meta_faturamento")
+                },
+                "realizado": {
+                    "ativacoes": pessoa.meta_valor("realizado_ativacoes"),
+                    "leads": pessoa.meta_valor("realizado_leads"),
+                    "reunioes": pessoa.meta_valor("realizado_reunioes"),
+                    "vendas": pessoa.meta_valor("realizado_vendas"),
+                    "faturamento": pessoa.meta_valor("realizado_faturamento")
+                },
+                "perc_atingimento": pessoa.meta_valor("perc_atingimento")
+            })
+
+        return {
+            "total": len(resultado),
+            "mes": mes,
+            "ano": ano,
+            "pessoas": resultado
+        }
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Erro ao buscar pessoas: {str(e)}")
+
+
 @router.get("/pessoas/{id}")
-async def get_pessoa(id: int, db: Session = Depends(get_db)):
+def get_pessoa(id: int, db: Session = Depends(get_db)):
     """
     Busca uma pessoa por ID.
     """
@@ -125,7 +184,7 @@ async def get_pessoa(id: int, db: Session = Depends(get_db)):
 
 @router.post("/pessoas")
 @router.post("/pessoas/")  # Aceita ambas versões
-async def create_pessoa(item: PessoaCreate, db: Session = Depends(get_db)):
+def create_pessoa(item: PessoaCreate, db: Session = Depends(get_db)):
     """
     Cria uma nova pessoa no sistema.
     """
@@ -138,6 +197,7 @@ async def create_pessoa(item: PessoaCreate, db: Session = Depends(get_db)):
         nova = Pessoa(**item.dict())
         db.add(nova)
         db.commit()
+        cache.invalidar(Pessoa.__tablename__)
         db.refresh(nova)
 
         return {
@@ -158,7 +218,7 @@ async def create_pessoa(item: PessoaCreate, db: Session = Depends(get_db)):
 
 
 @router.put("/pessoas/{id}")
-async def update_pessoa(id: int, item: PessoaUpdate, db: Session = Depends(get_db)):
+def update_pessoa(id: int, item: PessoaUpdate, db: Session = Depends(get_db)):
     """
     Atualiza uma pessoa existente.
     """
@@ -178,6 +238,7 @@ async def update_pessoa(id: int, item: PessoaUpdate, db: Session = Depends(get_d
             setattr(pessoa, key, value)
 
         db.commit()
+        cache.invalidar(Pessoa.__tablename__)
         db.refresh(pessoa)
 
         return {
@@ -197,7 +258,7 @@ async def update_pessoa(id: int, item: PessoaUpdate, db: Session = Depends(get_d
 
 
 @router.delete("/pessoas/{id}")
-async def delete_pessoa(id: int, db: Session = Depends(get_db)):
+def delete_pessoa(id: int, db: Session = Depends(get_db)):
     """
     Deleta uma pessoa.
     """
@@ -212,8 +273,10 @@ async def delete_pessoa(id: int, db: Session = Depends(get_db)):
             "funcao": pessoa.funcao
         }
 
-        db.delete(pessoa)
+        db.delete(pessoa)  # As metas ficam no histórico, com pessoa_id NULL
         db.commit()
+        cache.invalidar(Pessoa.__tablename__)
+        cache.invalidar(Meta.__tablename__)
 
         return {
             "message": "Pessoa deletada com sucesso",
@@ -230,7 +293,7 @@ async def delete_pessoa(id: int, db: Session = Depends(get_db)):
 
 @router.get("/produtos")
 @router.get("/produtos/")  # Aceita ambas versões
-async def list_produtos(
+def list_produtos(
     categoria: Optional[str] = None,
     ativo: Optional[bool] = None,
     db: Session = Depends(get_db)
@@ -267,7 +330,7 @@ async def list_produtos(
 
 
 @router.get("/produtos/{id}")
-async def get_produto(id: int, db: Session = Depends(get_db)):
+def get_produto(id: int, db: Session = Depends(get_db)):
     """
     Busca um produto por ID.
     """
@@ -292,7 +355,7 @@ async def get_produto(id: int, db: Session = Depends(get_db)):
 
 @router.post("/produtos")
 @router.post("/produtos/")  # Aceita ambas versões
-async def create_produto(item: ProdutoCreate, db: Session = Depends(get_db)):
+def create_produto(item: ProdutoCreate, db: Session = Depends(get_db)):
     """
     Cria um novo produto.
     Agora valida unicidade pela combinação (nome + plano).
@@ -335,7 +398,7 @@ async def create_produto(item: ProdutoCreate, db: Session = Depends(get_db)):
 
 
 @router.put("/produtos/{id}")
-async def update_produto(id: int, item: ProdutoUpdate, db: Session = Depends(get_db)):
+def update_produto(id: int, item: ProdutoUpdate, db: Session = Depends(get_db)):
     """
     Atualiza um produto existente.
     Valida unicidade pela combinação (nome + plano).
@@ -388,7 +451,7 @@ async def update_produto(id: int, item: ProdutoUpdate, db: Session = Depends(get
 
 
 @router.delete("/produtos/{id}")
-async def delete_produto(id: int, db: Session = Depends(get_db)):
+def delete_produto(id: int, db: Session = Depends(get_db)):
     """
     Deleta um produto.
     """
@@ -421,7 +484,7 @@ async def delete_produto(id: int, db: Session = Depends(get_db)):
 
 @router.get("/funis")
 @router.get("/funis/")  # Aceita ambas versões
-async def list_funis(
+def list_funis(
     ativo: Optional[bool] = None,
     db: Session = Depends(get_db)
 ):
@@ -454,7 +517,7 @@ async def list_funis(
 
 
 @router.get("/funis/{id}")
-async def get_funil(id: int, db: Session = Depends(get_db)):
+def get_funil(id: int, db: Session = Depends(get_db)):
     """
     Busca um funil por ID.
     """
@@ -478,7 +541,7 @@ async def get_funil(id: int, db: Session = Depends(get_db)):
 
 @router.post("/funis")
 @router.post("/funis/")  # Aceita ambas versões
-async def create_funil(item: FunilCreate, db: Session = Depends(get_db)):
+def create_funil(item: FunilCreate, db: Session = Depends(get_db)):
     """
     Cria um novo funil.
     """
@@ -510,7 +573,7 @@ async def create_funil(item: FunilCreate, db: Session = Depends(get_db)):
 
 
 @router.put("/funis/{id}")
-async def update_funil(id: int, item: FunilUpdate, db: Session = Depends(get_db)):
+def update_funil(id: int, item: FunilUpdate, db: Session = Depends(get_db)):
     """
     Atualiza um funil existente.
     """
@@ -548,7 +611,7 @@ async def update_funil(id: int, item: FunilUpdate, db: Session = Depends(get_db)
 
 
 @router.delete("/funis/{id}")
-async def delete_funil(id: int, db: Session = Depends(get_db)):
+def delete_funil(id: int, db: Session = Depends(get_db)):
     """
     Deleta um funil.
     """
@@ -576,73 +639,10 @@ async def delete_funil(id: int, db: Session = Depends(get_db)):
         raise HTTPException(status_code=500, detail=f"Erro ao deletar funil: {str(e)}")
 
 
-# ==================== PESSOAS COM METAS ====================
-
-@router.get("/pessoas/resumo")
-async def get_pessoas_resumo(
-    mes: int,
-    ano: int,
-    funcao: Optional[str] = None,
-    db: Session = Depends(get_db)
-):
-    """
-    Retorna pessoas com suas metas do mês específico.
-    Metas agora vêm exclusivamente da tabela Meta.
-    """
-    try:
-        query = db.query(Pessoa).filter(Pessoa.ativo == True)
-
-        if funcao:
-            query = query.filter(Pessoa.funcao == funcao)
-
-        pessoas = query.order_by(Pessoa.funcao, Pessoa.nome).all()
-
-        resultado = []
-        for pessoa in pessoas:
-            # Buscar meta do mês
-            meta = db.query(Meta).filter(
-                Meta.pessoa_id == pessoa.id,
-                Meta.mes == mes,
-                Meta.ano == ano
-            ).first()
-
-            resultado.append({
-                "id": pessoa.id,
-                "nome": pessoa.nome,
-                "funcao": pessoa.funcao,
-                "ativo": pessoa.ativo,
-                "nivel_senioridade": pessoa.nivel_senioridade,
-                "meta_mes": {
-                    "ativacoes": meta.meta_ativacoes if meta else 0,
-                    "leads": meta.meta_leads if meta else 0,
-                    "reunioes": meta.meta_reunioes if meta else 0,
-                    "vendas": meta.meta_vendas if meta else 0,
-                    "faturamento": meta.meta_faturamento if meta else 0
-                },
-                "realizado": {
-                    "ativacoes": meta.realizado_ativacoes if meta else 0,
-                    "leads": meta.realizado_leads if meta else 0,
-                    "reunioes": meta.realizado_reunioes if meta else 0,
-                    "vendas": meta.realizado_vendas if meta else 0,
-                    "faturamento": meta.realizado_faturamento if meta else 0
-                },
-                "perc_atingimento": meta.perc_atingimento if meta else 0
-            })
-
-        return {
-            "total": len(resultado),
-            "mes": mes,
-            "ano": ano,
-            "pessoas": resultado
-        }
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=f"Erro ao buscar pessoas: {str(e)}")
-
-
 # ==================== UTILITARIOS ====================
 
 @router.get("/resumo")
-async def get_config_resumo(db: Session = Depends(get_db)):
+def get_config_resumo(db: Session = Depends(get_db)):
     """
     Retorna um resumo de todas as configurações.
     """
@@ -682,7 +682,7 @@ async def get_config_resumo(db: Session = Depends(get_db)):
 
 
 @router.post("/seed")
-async def seed_config(db: Session = Depends(get_db)):
+def seed_config(db: Session = Depends(get_db)):
     """
     Popula configurações iniciais padrão.
     Agora sem campos de meta nas pessoas.
@@ -732,6 +732,7 @@ async def seed_config(db: Session = Depends(get_db)):
             db.add(FunilConfig(**f))
 
         db.commit()
+        cache.invalidar(Pessoa.__tablename__)
 
         return {
             "message": "Configurações iniciais criadas com sucesso",
@@ -747,7 +748,7 @@ async def seed_config(db: Session = Depends(get_db)):
 
 
 @router.delete("/clear-test-data")
-async def clear_test_data(db: Session = Depends(get_db)):
+def clear_test_data(db: Session = Depends(get_db)):
     """
     Limpa TODOS os dados de teste do banco.
     CUIDADO: Esta operação não pode ser desfeita!
@@ -765,7 +766,9 @@ async def clear_test_data(db: Session = Depends(get_db)):
         db.query(SDRMetrica).delete()
         db.query(CloserMetrica).delete()
 
+        reconstruir_rollups(db)
         db.commit()
+        cache.limpar()
 
         return {
             "status": "success",
@@ -784,7 +787,7 @@ async def clear_test_data(db: Session = Depends(get_db)):
 
 
 @router.get("/backup-data")
-async def backup_data(db: Session = Depends(get_db)):
+def backup_data(db: Session = Depends(get_db)):
     """
     Exporta TODOS os dados do banco em formato JSON.
     Use este endpoint para fazer backups periódicos.
@@ -861,7 +864,7 @@ async def backup_data(db: Session = Depends(get_db)):
 
 
 @router.post("/restore-data")
-async def restore_data(backup: dict, db: Session = Depends(get_db)):
+def restore_data(backup: dict, db: Session = Depends(get_db)):
     """
     Restaura dados de um backup JSON.
     ATENÇÃO: Isso vai SUBSTITUIR todos os dados atuais!
@@ -917,7 +920,10 @@ async def restore_data(backup: dict, db: Session = Depends(get_db)):
             )
             db.add(metrica)
 
+        db.flush()
+        reconstruir_rollups(db)
         db.commit()
+        cache.limpar()
 
         return {
             "status": "success",
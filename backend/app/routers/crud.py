@@ -3,9 +3,10 @@ FastAPI router for CRUD operations on Financeiro and Vendas.
 Allows manual data entry, editing, and deletion through the interface.
 """
 
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Query
 from sqlalchemy.orm import Session
 from app.database import get_db
+from app import cache, paginacao
 from app.models.models import Financeiro, Venda
 from pydantic import BaseModel, field_validator
 from datetime import date, datetime
@@ -103,8 +104,45 @@ class VendaUpdate(BaseModel):
 
 # ==================== FINANCEIRO CRUD ====================
 
+@router.get("/financeiro")
+def list_financeiro(
+    mes: Optional[int] = Query(None, ge=1, le=12),
+    ano: Optional[int] = Query(None, ge=2020),
+    tipo: Optional[str] = Query(None, description="entrada ou saida"),
+    limit: int = Query(paginacao.LIMITE_PADRAO, ge=1, le=paginacao.LIMITE_MAXIMO),
+    cursor: Optional[str] = Query(None, description="next_cursor da página anterior"),
+    fields: Optional[str] = Query(None, description="Colunas separadas por vírgula (ex: id,tipo,valor)"),
+    db: Session = Depends(get_db)
+):
+    """
+    Lista as transações financeiras, do período mais recente para o mais antigo.
+    Paginado por cursor em (ano, mes, id): passe o next_cursor da resposta em
+    cursor para buscar a próxima página (None na última).
+    """
+    try:
+        campos = paginacao.campos_selecionados(fields, paginacao.campos_do_modelo(Financeiro))
+
+        query = db.query(Financeiro)
+        if mes:
+            query = query.filter(Financeiro.mes == mes)
+        if ano:
+            query = query.filter(Financeiro.ano == ano)
+        if tipo:
+            query = query.filter(Financeiro.tipo == tipo)
+
+        return paginacao.paginar(
+            query, Financeiro,
+            [Financeiro.ano, Financeiro.mes, Financeiro.id],
+            campos, limit, cursor
+        )
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Erro ao listar transações: {str(e)}")
+
+
 @router.post("/financeiro")
-async def create_financeiro(item: FinanceiroCreate, db: Session = Depends(get_db)):
+def create_financeiro(item: FinanceiroCreate, db: Session = Depends(get_db)):
     """
     Cria uma nova transação financeira (entrada ou saída).
     """
@@ -113,6 +151,7 @@ async def create_financeiro(item: FinanceiroCreate, db: Session = Depends(get_db
         db.add(novo)
         db.commit()
         db.refresh(novo)
+        cache.invalidar_registros(novo)
         return {
             "id": novo.id,
             "message": "Transação criada com sucesso",
@@ -130,7 +169,7 @@ async def create_financeiro(item: FinanceiroCreate, db: Session = Depends(get_db
 
 
 @router.put("/financeiro/{id}")
-async def update_financeiro(id: int, item: FinanceiroUpdate, db: Session = Depends(get_db)):
+def update_financeiro(id: int, item: FinanceiroUpdate, db: Session = Depends(get_db)):
     """
     Atualiza uma transação financeira existente.
     """
@@ -139,6 +178,8 @@ async def update_financeiro(id: int, item: FinanceiroUpdate, db: Session = Depen
         if not registro:
             raise HTTPException(status_code=404, detail="Registro não encontrado")
 
+        periodo_anterior = (registro.mes, registro.ano)
+
         # Atualizar apenas os campos fornecidos
         update_data = item.dict(exclude_unset=True)
 
@@ -151,7 +192,9 @@ async def update_financeiro(id: int, item: FinanceiroUpdate, db: Session = Depen
             setattr(registro, key, value)
 
         db.commit()
+        cache.invalidar(registro.__tablename__, *periodo_anterior)
         db.refresh(registro)
+        cache.invalidar_registros(registro)
         return {
             "message": "Transação atualizada com sucesso",
             "data": {
@@ -170,7 +213,7 @@ async def update_financeiro(id: int, item: FinanceiroUpdate, db: Session = Depen
 
 
 @router.delete("/financeiro/{id}")
-async def delete_financeiro(id: int, db: Session = Depends(get_db)):
+def delete_financeiro(id: int, db: Session = Depends(get_db)):
     """
     Deleta uma transação financeira.
     """
@@ -187,8 +230,10 @@ async def delete_financeiro(id: int, db: Session = Depends(get_db)):
             "valor": registro.valor
         }
 
+        periodo = (registro.mes, registro.ano)
         db.delete(registro)
         db.commit()
+        cache.invalidar(registro.__tablename__, *periodo)
         return {
             "message": "Transação deletada com sucesso",
             "deleted": info
@@ -203,7 +248,7 @@ async def delete_financeiro(id: int, db: Session = Depends(get_db)):
 # ==================== VENDA CRUD ====================
 
 @router.post("/venda")
-async def create_venda(item: VendaCreate, db: Session = Depends(get_db)):
+def create_venda(item: VendaCreate, db: Session = Depends(get_db)):
     """
     Cria uma nova venda.
     """
@@ -212,6 +257,7 @@ async def create_venda(item: VendaCreate, db: Session = Depends(get_db)):
         db.add(nova)
         db.commit()
         db.refresh(nova)
+        cache.invalidar_registros(nova)
         return {
             "id": nova.id,
             "message": "Venda criada com sucesso",
@@ -233,7 +279,7 @@ async def create_venda(item: VendaCreate, db: Session = Depends(get_db)):
 
 
 @router.put("/venda/{id}")
-async def update_venda(id: int, item: VendaUpdate, db: Session = Depends(get_db)):
+def update_venda(id: int, item: VendaUpdate, db: Session = Depends(get_db)):
     """
     Atualiza uma venda existente.
     """
@@ -242,6 +288,8 @@ async def update_venda(id: int, item: VendaUpdate, db: Session = Depends(get_db)
         if not venda:
             raise HTTPException(status_code=404, detail="Venda não encontrada")
 
+        periodo_anterior = (venda.mes, venda.ano)
+
         # Atualizar apenas os campos fornecidos
         update_data = item.dict(exclude_unset=True)
 
@@ -254,7 +302,9 @@ async def update_venda(id: int, item: VendaUpdate, db: Session = Depends(get_db)
             setattr(venda, key, value)
 
         db.commit()
+        cache.invalidar(venda.__tablename__, *periodo_anterior)
         db.refresh(venda)
+        cache.invalidar_registros(venda)
         return {
             "message": "Venda atualizada com sucesso",
             "data": {
@@ -277,7 +327,7 @@ async def update_venda(id: int, item: VendaUpdate, db: Session = Depends(get_db)
 
 
 @router.delete("/venda/{id}")
-async def delete_venda(id: int, db: Session = Depends(get_db)):
+def delete_venda(id: int, db: Session = Depends(get_db)):
     """
     Deleta uma venda.
     """
@@ -293,8 +343,10 @@ async def delete_venda(id: int, db: Session = Depends(get_db)):
             "valor": venda.valor
         }
 
+        periodo = (venda.mes, venda.ano)
         db.delete(venda)
         db.commit()
+        cache.invalidar(venda.__tablename__, *periodo)
         return {
             "message": "Venda deletada com sucesso",
             "deleted": info
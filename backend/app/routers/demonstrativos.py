@@ -5,8 +5,10 @@ DFC (Demonstracao de Fluxo de Caixa) e DRE (Demonstracao de Resultado do Exercic
 
 from fastapi import APIRouter, Depends, HTTPException
 from sqlalchemy.orm import Session
-from sqlalchemy import func
+from sqlalchemy import case, func
+from app import classificacao_financeira
 from app.database import get_db
+from app.cache import cache_resposta
 from app.models.models import Financeiro, Venda
 from typing import Optional
 
@@ -14,7 +16,8 @@ router = APIRouter(prefix="/demonstrativos", tags=["Demonstrativos Financeiros"]
 
 
 @router.get("/dfc")
-async def demonstracao_fluxo_caixa(
+@cache_resposta("demonstrativos.dfc", ['financeiro'], meses_anteriores=lambda mes, ano: mes - 1)
+def demonstracao_fluxo_caixa(
     mes: int,
     ano: int,
     db: Session = Depends(get_db)
@@ -29,105 +32,45 @@ async def demonstracao_fluxo_caixa(
     - Variacao de Caixa
     """
     try:
-        # Buscar todas as movimentacoes do periodo
-        entradas = db.query(Financeiro).filter(
+        # Total de cada linha do DFC em um unico GROUP BY
+        # (regras em app/classificacao_financeira.py)
+        bucket = classificacao_financeira.bucket_dfc()
+        totais = dict(db.query(bucket, func.sum(Financeiro.valor)).filter(
             Financeiro.mes == mes,
             Financeiro.ano == ano,
-            Financeiro.tipo == "entrada",
+            Financeiro.tipo.in_(["entrada", "saida"]),
             Financeiro.previsto_realizado == "realizado"
-        ).all()
+        ).group_by(bucket).all())
 
-        saidas = db.query(Financeiro).filter(
-            Financeiro.mes == mes,
-            Financeiro.ano == ano,
-            Financeiro.tipo == "saida",
-            Financeiro.previsto_realizado == "realizado"
-        ).all()
+        def total(nome):
+            return totais.get(nome) or 0
 
         # ==================== ATIVIDADES OPERACIONAIS ====================
 
         # Recebimentos de clientes (vendas, recorrencia, mensalidades)
-        categorias_receita = ['Venda', 'Recorrencia', 'Mensalidade', 'MRR', 'TCV', 'Assessoria', 'Consultoria']
-        recebimento_clientes = sum(
-            e.valor for e in entradas
-            if any(cat.lower() in (e.categoria or '').lower() or cat.lower() in (e.produto or '').lower()
-                   for cat in categorias_receita)
-        )
+        recebimento_clientes = total("recebimento_clientes")
 
         # Se nao encontrou por categoria, somar todas as entradas
         if recebimento_clientes == 0:
-            recebimento_clientes = sum(e.valor for e in entradas)
-
-        # Pagamento a fornecedores (operacao, ferramentas)
-        categorias_fornecedor = ['Ferramenta', 'Software', 'Fornecedor', 'Servico', 'Operacao']
-        pagamento_fornecedores = sum(
-            s.valor for s in saidas
-            if any(cat.lower() in (s.categoria or '').lower() or
-                   cat.lower() in (s.custo or '').lower() or
-                   cat.lower() in (s.centro_custo or '').lower()
-                   for cat in categorias_fornecedor)
-        )
-
-        # Pagamento de salarios
-        categorias_salario = ['Equipe', 'Salario', 'Folha', 'Funcionario', 'CLT', 'PJ']
-        pagamento_salarios = sum(
-            s.valor for s in saidas
-            if any(cat.lower() in (s.categoria or '').lower() or
-                   cat.lower() in (s.custo or '').lower()
-                   for cat in categorias_salario)
-        )
-
-        # Impostos pagos
-        categorias_imposto = ['Imposto', 'IRPF', 'IRPJ', 'PIS', 'COFINS', 'ISS', 'Tributo']
-        impostos_pagos = sum(
-            s.valor for s in saidas
-            if any(cat.lower() in (s.categoria or '').lower() or
-                   cat.lower() in (s.custo or '').lower()
-                   for cat in categorias_imposto)
-        )
-
-        # Outras despesas operacionais
-        outras_operacionais = sum(
-            s.valor for s in saidas
-            if s.centro_custo and 'operac' in s.centro_custo.lower()
-        ) - pagamento_fornecedores - pagamento_salarios - impostos_pagos
-
-        if outras_operacionais < 0:
-            outras_operacionais = 0
+            recebimento_clientes = total("outras_entradas")
+
+        pagamento_fornecedores = total("fornecedores")
+        pagamento_salarios = total("salarios")
+        impostos_pagos = total("impostos")
+        outras_operacionais = total("outras_operacionais")
 
         subtotal_operacional = recebimento_clientes - pagamento_fornecedores - pagamento_salarios - impostos_pagos - outras_operacionais
 
         # ==================== ATIVIDADES DE INVESTIMENTO ====================
 
-        categorias_investimento = ['Investimento', 'Ativo', 'Equipamento', 'Expansao']
-        compra_ativos = sum(
-            s.valor for s in saidas
-            if s.tipo_custo == 'Investimento' or
-            any(cat.lower() in (s.categoria or '').lower() or
-                cat.lower() in (s.custo or '').lower()
-                for cat in categorias_investimento)
-        )
+        compra_ativos = total("investimento")
 
         subtotal_investimento = -compra_ativos
 
         # ==================== ATIVIDADES DE FINANCIAMENTO ====================
 
-        # Distribuicao de lucros / pro-labore
-        categorias_financiamento = ['Pro-labore', 'Distribuicao', 'Dividendo', 'Lucro', 'Societario', 'Socio']
-        distribuicao_lucros = sum(
-            s.valor for s in saidas
-            if s.centro_custo == 'Societario' or
-            any(cat.lower() in (s.categoria or '').lower() or
-                cat.lower() in (s.custo or '').lower()
-                for cat in categorias_financiamento)
-        )
-
-        # Emprestimos
-        categorias_emprestimo = ['Emprestimo', 'Financiamento', 'Juros']
-        emprestimos = sum(
-            s.valor for s in saidas
-            if any(cat.lower() in (s.categoria or '').lower() for cat in categorias_emprestimo)
-        )
+        distribuicao_lucros = total("distribuicao_lucros")
+        emprestimos = total("emprestimos")
 
         subtotal_financiamento = -distribuicao_lucros - emprestimos
 
@@ -136,23 +79,14 @@ async def demonstracao_fluxo_caixa(
         variacao_caixa = subtotal_operacional + subtotal_investimento + subtotal_financiamento
 
         # Calcular saldo inicial (somando meses anteriores do ano)
-        saldo_inicial = 0
-        for m in range(1, mes):
-            entradas_ant = db.query(func.sum(Financeiro.valor)).filter(
-                Financeiro.mes == m,
-                Financeiro.ano == ano,
-                Financeiro.tipo == "entrada",
-                Financeiro.previsto_realizado == "realizado"
-            ).scalar() or 0
-
-            saidas_ant = db.query(func.sum(Financeiro.valor)).filter(
-                Financeiro.mes == m,
-                Financeiro.ano == ano,
-                Financeiro.tipo == "saida",
-                Financeiro.previsto_realizado == "realizado"
-            ).scalar() or 0
-
-            saldo_inicial += (entradas_ant - saidas_ant)
+        saldo_inicial = db.query(func.sum(
+            case((Financeiro.tipo == "entrada", Financeiro.valor), else_=-Financeiro.valor)
+        )).filter(
+            Financeiro.mes < mes,
+            Financeiro.ano == ano,
+            Financeiro.tipo.in_(["entrada", "saida"]),
+            Financeiro.previsto_realizado == "realizado"
+        ).scalar() or 0
 
         saldo_final = saldo_inicial + variacao_caixa
 
@@ -187,7 +121,8 @@ async def demonstracao_fluxo_caixa(
 
 
 @router.get("/dre")
-async def demonstracao_resultado(
+@cache_resposta("demonstrativos.dre", ['financeiro'])
+def demonstracao_resultado(
     mes: int,
     ano: int,
     db: Session = Depends(get_db)
@@ -207,32 +142,27 @@ async def demonstracao_resultado(
     - (=) Lucro Liquido
     """
     try:
-        # Buscar receitas
-        receitas = db.query(Financeiro).filter(
+        # Total de cada linha do DRE em um unico GROUP BY
+        # (regras em app/classificacao_financeira.py)
+        bucket = classificacao_financeira.bucket_dre()
+        totais = dict(db.query(bucket, func.sum(Financeiro.valor)).filter(
             Financeiro.mes == mes,
             Financeiro.ano == ano,
-            Financeiro.tipo == "entrada",
+            Financeiro.tipo.in_(["entrada", "saida"]),
             Financeiro.previsto_realizado == "realizado"
-        ).all()
+        ).group_by(bucket).all())
 
-        # Buscar custos
-        custos = db.query(Financeiro).filter(
-            Financeiro.mes == mes,
-            Financeiro.ano == ano,
-            Financeiro.tipo == "saida",
-            Financeiro.previsto_realizado == "realizado"
-        ).all()
+        def total(nome):
+            return totais.get(nome) or 0
+
+        total_custos = sum(valor or 0 for nome, valor in totais.items() if nome != "receita")
 
         # ==================== RECEITA ====================
 
-        receita_bruta = sum(r.valor for r in receitas)
+        receita_bruta = total("receita")
 
         # Deducoes (impostos sobre receita, devoluções)
-        categorias_deducao = ['Imposto', 'Devolucao', 'Cancelamento', 'Estorno']
-        deducoes = sum(
-            c.valor for c in custos
-            if any(cat.lower() in (c.categoria or '').lower() for cat in categorias_deducao)
-        )
+        deducoes = total("deducoes")
 
         # Limitar deducoes a no maximo 20% da receita
         deducoes = min(deducoes, receita_bruta * 0.2)
@@ -242,42 +172,19 @@ async def demonstracao_resultado(
         # ==================== CUSTOS ====================
 
         # CMV / Custos Diretos (variaveis, relacionados a entrega)
-        cmv = sum(
-            c.valor for c in custos
-            if c.tipo_custo == 'Variavel' or
-            c.centro_custo == 'Operacao' and c.tipo_custo != 'Fixo'
-        )
+        cmv = total("cmv")
 
         lucro_bruto = receita_liquida - cmv
         margem_bruta_pct = (lucro_bruto / receita_liquida * 100) if receita_liquida > 0 else 0
 
         # Despesas Operacionais (fixas: comercial, administrativo, operacao fixa)
-        despesas_comerciais = sum(
-            c.valor for c in custos
-            if c.centro_custo == 'Comercial'
-        )
-
-        despesas_administrativas = sum(
-            c.valor for c in custos
-            if c.centro_custo == 'Administrativo'
-        )
-
-        despesas_operacionais = sum(
-            c.valor for c in custos
-            if c.centro_custo == 'Operacao' and c.tipo_custo == 'Fixo'
-        )
-
-        # Se nao temos categorias, calcular baseado em tipo
+        despesas_comerciais = total("comerciais")
+        despesas_administrativas = total("administrativas")
+        despesas_operacionais = total("operacionais")
+
+        # Se nao temos categorias, usar salarios e equipe
         if despesas_comerciais + despesas_administrativas + despesas_operacionais == 0:
-            # Salarios e equipe
-            categorias_equipe = ['Equipe', 'Salario', 'Folha']
-            despesas_equipe = sum(
-                c.valor for c in custos
-                if any(cat.lower() in (c.categoria or '').lower() or
-                       cat.lower() in (c.custo or '').lower()
-                       for cat in categorias_equipe)
-            )
-            despesas_operacionais = despesas_equipe
+            despesas_operacionais = total("equipe")
 
         total_despesas_operacionais = despesas_comerciais + despesas_administrativas + despesas_operacionais
 
@@ -285,18 +192,13 @@ async def demonstracao_resultado(
         margem_ebitda_pct = (ebitda / receita_liquida * 100) if receita_liquida > 0 else 0
 
         # Despesas Financeiras
-        categorias_financeiras = ['Juros', 'Taxa', 'Multa', 'IOF', 'Financeiro']
-        despesas_financeiras = sum(
-            c.valor for c in custos
-            if c.centro_custo == 'Financeiro' or
-            any(cat.lower() in (c.categoria or '').lower() for cat in categorias_financeiras)
-        )
+        despesas_financeiras = total("financeiras")
 
         lucro_liquido = ebitda - despesas_financeiras
         margem_liquida_pct = (lucro_liquido / receita_liquida * 100) if receita_liquida > 0 else 0
 
         # Detalhamento das despesas nao categorizadas
-        despesas_nao_categorizadas = sum(c.valor for c in custos) - cmv - total_despesas_operacionais - despesas_financeiras - deducoes
+        despesas_nao_categorizadas = total_custos - cmv - total_despesas_operacionais - despesas_financeiras - deducoes
         if despesas_nao_categorizadas < 0:
             despesas_nao_categorizadas = 0
 
@@ -334,27 +236,35 @@ async def demonstracao_resultado(
         raise HTTPException(status_code=500, detail=f"Erro ao gerar DRE: {str(e)}")
 
 
+def _totais_mensais(db: Session, ano: int):
+    """
+    Entradas e saidas realizadas de cada mes do ano em uma unica consulta.
+    Retorna {mes: (entradas, saidas)} so com os meses que tem movimentacao.
+    """
+    linhas = db.query(
+        Financeiro.mes,
+        func.sum(case((Financeiro.tipo == "entrada", Financeiro.valor), else_=0)),
+        func.sum(case((Financeiro.tipo == "saida", Financeiro.valor), else_=0))
+    ).filter(
+        Financeiro.ano == ano,
+        Financeiro.tipo.in_(["entrada", "saida"]),
+        Financeiro.previsto_realizado == "realizado"
+    ).group_by(Financeiro.mes).all()
+
+    return {mes: (entradas or 0, saidas or 0) for mes, entradas, saidas in linhas}
+
+
 @router.get("/dfc/anual")
-async def dfc_anual(ano: int, db: Session = Depends(get_db)):
+def dfc_anual(ano: int, db: Session = Depends(get_db)):
     """Retorna o DFC acumulado do ano mes a mes"""
     try:
+        totais = _totais_mensais(db, ano)
+
         historico = []
         saldo_acumulado = 0
 
         for mes in range(1, 13):
-            entradas = db.query(func.sum(Financeiro.valor)).filter(
-                Financeiro.mes == mes,
-                Financeiro.ano == ano,
-                Financeiro.tipo == "entrada",
-                Financeiro.previsto_realizado == "realizado"
-            ).scalar() or 0
-
-            saidas = db.query(func.sum(Financeiro.valor)).filter(
-                Financeiro.mes == mes,
-                Financeiro.ano == ano,
-                Financeiro.tipo == "saida",
-                Financeiro.previsto_realizado == "realizado"
-            ).scalar() or 0
+            entradas, saidas = totais.get(mes, (0, 0))
 
             variacao = entradas - saidas
             saldo_acumulado += variacao
@@ -382,40 +292,24 @@ async def dfc_anual(ano: int, db: Session = Depends(get_db)):
 
 
 @router.get("/dre/anual")
-async def dre_anual(ano: int, db: Session = Depends(get_db)):
+def dre_anual(ano: int, db: Session = Depends(get_db)):
     """Retorna o DRE acumulado do ano mes a mes"""
     try:
+        totais = _totais_mensais(db, ano)
+
         historico = []
-        acumulado = {
-            "receita_bruta": 0,
-            "deducoes": 0,
-            "cmv": 0,
-            "despesas_operacionais": 0,
-            "despesas_financeiras": 0
-        }
+        receita_acumulada = 0
+        custos_acumulados = 0
 
         for mes in range(1, 13):
-            receitas = db.query(func.sum(Financeiro.valor)).filter(
-                Financeiro.mes == mes,
-                Financeiro.ano == ano,
-                Financeiro.tipo == "entrada",
-                Financeiro.previsto_realizado == "realizado"
-            ).scalar() or 0
-
-            custos = db.query(func.sum(Financeiro.valor)).filter(
-                Financeiro.mes == mes,
-                Financeiro.ano == ano,
-                Financeiro.tipo == "saida",
-                Financeiro.previsto_realizado == "realizado"
-            ).scalar() or 0
+            receitas, custos = totais.get(mes, (0, 0))
 
             if receitas > 0 or custos > 0:
                 lucro = receitas - custos
                 margem = (lucro / receitas * 100) if receitas > 0 else 0
 
-                acumulado["receita_bruta"] += receitas
-                receita_liquida_acum = acumulado["receita_bruta"] - acumulado["deducoes"]
-                lucro_acum = acumulado["receita_bruta"] - (acumulado["cmv"] + acumulado["despesas_operacionais"] + acumulado["despesas_financeiras"] + acumulado["deducoes"])
+                receita_acumulada += receitas
+                custos_acumulados += custos
 
                 historico.append({
                     "mes": mes,
@@ -424,8 +318,8 @@ async def dre_anual(ano: int, db: Session = Depends(get_db)):
                     "custos": custos,
                     "lucro": lucro,
                     "margem_pct": margem,
-                    "receita_acumulada": acumulado["receita_bruta"],
-                    "lucro_acumulado": acumulado["receita_bruta"] - (custos + sum(h.get('custos', 0) for h in historico[:-1]) if historico else custos)
+                    "receita_acumulada": receita_acumulada,
+                    "lucro_acumulado": receita_acumulada - custos_acumulados
                 })
 
         total_receitas = sum(h['receita'] for h in historico)
@@ -1,28 +1,34 @@
 """
 FastAPI router for Excel export functionality.
 Exports financial, sales, and metrics data to Excel files.
+
+Os exports de um mês são gerados em memória; completo e periodo saem em
+streaming (Excel, CSV ou CSV gzip), ver app/exportacao.py. Períodos longos
+podem ser exportados em segundo plano via /export/jobs (app/export_jobs.py).
 """
 
 from fastapi import APIRouter, Depends, Query, HTTPException
-from fastapi.responses import FileResponse
+from fastapi.responses import FileResponse, Response
+from pydantic import BaseModel, Field
 from sqlalchemy.orm import Session
-from sqlalchemy import func
+from sqlalchemy import case, func
 import pandas as pd
-import os
+import io
 from datetime import datetime
 from typing import Optional
 
+from app import export_jobs, exportacao
 from app.database import get_db
+from app.equipe import metas_por_nome
+from app.periodo import filtro_periodo, periodo
 from app.models.models import (
     Financeiro, Venda, SocialSellingMetrica, SDRMetrica, CloserMetrica,
-    Pessoa, Meta
+    Pessoa, Meta, ExportJob
 )
 
 router = APIRouter(prefix="/export", tags=["Exportação"])
 
-# Diretório temporário para arquivos exportados
-EXPORT_DIR = "/tmp/medgm_exports"
-os.makedirs(EXPORT_DIR, exist_ok=True)
+MEDIA_TYPE_XLSX = 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'
 
 
 def format_currency(value):
@@ -30,6 +36,15 @@ def format_currency(value):
     return f"R$ {value:,.2f}".replace(",", "X").replace(".", ",").replace("X", ".")
 
 
+def _resposta_excel(buffer: io.BytesIO, filename: str) -> Response:
+    """Excel gerado em memória (exports de um mês), sem arquivo em disco."""
+    return Response(
+        buffer.getvalue(),
+        media_type=MEDIA_TYPE_XLSX,
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'}
+    )
+
+
 def get_mes_nome(mes):
     """Retorna nome do mês."""
     meses = ['', 'Janeiro', 'Fevereiro', 'Março', 'Abril', 'Maio', 'Junho',
@@ -38,7 +53,7 @@ def get_mes_nome(mes):
 
 
 @router.get("/financeiro")
-async def export_financeiro(
+def export_financeiro(
     mes: int = Query(..., ge=1, le=12),
     ano: int = Query(..., ge=2020, le=2030),
     db: Session = Depends(get_db)
@@ -102,9 +117,9 @@ async def export_financeiro(
 
         # Salvar Excel
         filename = f"financeiro_{get_mes_nome(mes)}_{ano}.xlsx"
-        filepath = os.path.join(EXPORT_DIR, filename)
+        buffer = io.BytesIO()
 
-        with pd.ExcelWriter(filepath, engine='openpyxl') as writer:
+        with pd.ExcelWriter(buffer, engine='openpyxl') as writer:
             df.to_excel(writer, sheet_name='Financeiro', index=False)
 
             # Ajustar largura das colunas
@@ -113,11 +128,7 @@ async def export_financeiro(
                 max_length = max(df[col].astype(str).apply(len).max(), len(col)) + 2
                 worksheet.column_dimensions[chr(65 + idx)].width = min(max_length, 50)
 
-        return FileResponse(
-            filepath,
-            filename=filename,
-            media_type='application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'
-        )
+        return _resposta_excel(buffer, filename)
 
     except HTTPException:
         raise
@@ -126,7 +137,7 @@ async def export_financeiro(
 
 
 @router.get("/vendas")
-async def export_vendas(
+def export_vendas(
     mes: int = Query(..., ge=1, le=12),
     ano: int = Query(..., ge=2020, le=2030),
     db: Session = Depends(get_db)
@@ -188,9 +199,9 @@ async def export_vendas(
         df = pd.concat([df, totais_df], ignore_index=True)
 
         filename = f"vendas_{get_mes_nome(mes)}_{ano}.xlsx"
-        filepath = os.path.join(EXPORT_DIR, filename)
+        buffer = io.BytesIO()
 
-        with pd.ExcelWriter(filepath, engine='openpyxl') as writer:
+        with pd.ExcelWriter(buffer, engine='openpyxl') as writer:
             df.to_excel(writer, sheet_name='Vendas', index=False)
 
             worksheet = writer.sheets['Vendas']
@@ -198,11 +209,7 @@ async def export_vendas(
                 max_length = max(df[col].astype(str).apply(len).max(), len(col)) + 2
                 worksheet.column_dimensions[chr(65 + idx)].width = min(max_length, 50)
 
-        return FileResponse(
-            filepath,
-            filename=filename,
-            media_type='application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'
-        )
+        return _resposta_excel(buffer, filename)
 
     except HTTPException:
         raise
@@ -211,7 +218,7 @@ async def export_vendas(
 
 
 @router.get("/social-selling")
-async def export_social_selling(
+def export_social_selling(
     mes: int = Query(..., ge=1, le=12),
     ano: int = Query(..., ge=2020, le=2030),
     db: Session = Depends(get_db)
@@ -228,18 +235,8 @@ async def export_social_selling(
         if not dados:
             raise HTTPException(status_code=404, detail="Nenhuma métrica de Social Selling encontrada")
 
-        # Buscar metas da tabela Meta
-        metas_dict = {}
-        for metrica in dados:
-            pessoa = db.query(Pessoa).filter(Pessoa.nome == metrica.vendedor).first()
-            if pessoa:
-                meta = db.query(Meta).filter(
-                    Meta.pessoa_id == pessoa.id,
-                    Meta.mes == mes,
-                    Meta.ano == ano
-                ).first()
-                if meta:
-                    metas_dict[metrica.vendedor] = meta
+        # Metas do mês por nome da pessoa (uma consulta)
+        metas_dict = metas_por_nome(db, mes, ano)
 
         df = pd.DataFrame([{
             'Mês': get_mes_nome(mes),
@@ -283,12 +280,12 @@ async def export_social_selling(
         df = pd.concat([df, totais_df], ignore_index=True)
 
         filename = f"social_selling_{get_mes_nome(mes)}_{ano}.xlsx"
-        filepath = os.path.join(EXPORT_DIR, filename)
+        buffer = io.BytesIO()
 
-        with pd.ExcelWriter(filepath, engine='openpyxl') as writer:
+        with pd.ExcelWriter(buffer, engine='openpyxl') as writer:
             df.to_excel(writer, sheet_name='Social Selling', index=False)
 
-        return FileResponse(filepath, filename=filename)
+        return _resposta_excel(buffer, filename)
 
     except HTTPException:
         raise
@@ -297,7 +294,7 @@ async def export_social_selling(
 
 
 @router.get("/sdr")
-async def export_sdr(
+def export_sdr(
     mes: int = Query(..., ge=1, le=12),
     ano: int = Query(..., ge=2020, le=2030),
     db: Session = Depends(get_db)
@@ -314,18 +311,8 @@ async def export_sdr(
         if not dados:
             raise HTTPException(status_code=404, detail="Nenhuma métrica de SDR encontrada")
 
-        # Buscar metas da tabela Meta
-        metas_dict = {}
-        for metrica in dados:
-            pessoa = db.query(Pessoa).filter(Pessoa.nome == metrica.sdr).first()
-            if pessoa:
-                meta = db.query(Meta).filter(
-                    Meta.pessoa_id == pessoa.id,
-                    Meta.mes == mes,
-                    Meta.ano == ano
-                ).first()
-                if meta:
-                    metas_dict[metrica.sdr] = meta
+        # Metas do mês por nome da pessoa (uma consulta)
+        metas_dict = metas_por_nome(db, mes, ano)
 
         df = pd.DataFrame([{
             'Mês': get_mes_nome(mes),
@@ -343,12 +330,12 @@ async def export_sdr(
         } for d in dados])
 
         filename = f"sdr_{get_mes_nome(mes)}_{ano}.xlsx"
-        filepath = os.path.join(EXPORT_DIR, filename)
+        buffer = io.BytesIO()
 
-        with pd.ExcelWriter(filepath, engine='openpyxl') as writer:
+        with pd.ExcelWriter(buffer, engine='openpyxl') as writer:
             df.to_excel(writer, sheet_name='SDR', index=False)
 
-        return FileResponse(filepath, filename=filename)
+        return _resposta_excel(buffer, filename)
 
     except HTTPException:
         raise
@@ -357,7 +344,7 @@ async def export_sdr(
 
 
 @router.get("/closer")
-async def export_closer(
+def export_closer(
     mes: int = Query(..., ge=1, le=12),
     ano: int = Query(..., ge=2020, le=2030),
     db: Session = Depends(get_db)
@@ -374,18 +361,8 @@ async def export_closer(
         if not dados:
             raise HTTPException(status_code=404, detail="Nenhuma métrica de Closer encontrada")
 
-        # Buscar metas da tabela Meta
-        metas_dict = {}
-        for metrica in dados:
-            pessoa = db.query(Pessoa).filter(Pessoa.nome == metrica.closer).first()
-            if pessoa:
-                meta = db.query(Meta).filter(
-                    Meta.pessoa_id == pessoa.id,
-                    Meta.mes == mes,
-                    Meta.ano == ano
-                ).first()
-                if meta:
-                    metas_dict[metrica.closer] = meta
+        # Metas do mês por nome da pessoa (uma consulta)
+        metas_dict = metas_por_nome(db, mes, ano)
 
         df = pd.DataFrame([{
             'Mês': get_mes_nome(mes),
@@ -407,12 +384,12 @@ async def export_closer(
         } for d in dados])
 
         filename = f"closer_{get_mes_nome(mes)}_{ano}.xlsx"
-        filepath = os.path.join(EXPORT_DIR, filename)
+        buffer = io.BytesIO()
 
-        with pd.ExcelWriter(filepath, engine='openpyxl') as writer:
+        with pd.ExcelWriter(buffer, engine='openpyxl') as writer:
             df.to_excel(writer, sheet_name='Closer', index=False)
 
-        return FileResponse(filepath, filename=filename)
+        return _resposta_excel(buffer, filename)
 
     except HTTPException:
         raise
@@ -420,258 +397,280 @@ async def export_closer(
         raise HTTPException(status_code=500, detail=f"Erro ao exportar: {str(e)}")
 
 
+# ==================== EXPORTAÇÃO EM STREAMING ====================
+# Abas das exportações completo/periodo (ver app/exportacao.py)
+
+COLUNAS_FINANCEIRO = ['Mês', 'Ano', 'ID', 'Tipo', 'Data', 'Categoria', 'Descrição', 'Valor', 'Previsto/Realizado']
+COLUNAS_VENDAS = ['Mês', 'Ano', 'ID', 'Data', 'Cliente', 'Valor Bruto', 'Valor Líquido', 'Funil', 'Vendedor', 'Closer', 'Produto']
+
+
+def _linha_financeiro(d):
+    return [
+        get_mes_nome(d.mes), d.ano, d.id,
+        'Entrada' if d.tipo == 'entrada' else 'Saída',
+        d.data.strftime('%d/%m/%Y') if d.data else '',
+        d.categoria or '', d.descricao or '', d.valor, d.previsto_realizado or ''
+    ]
+
+
+def _linha_venda(d):
+    return [
+        get_mes_nome(d.mes), d.ano, d.id,
+        d.data.strftime('%d/%m/%Y') if d.data else '',
+        d.cliente or '',
+        d.valor_bruto or d.valor or 0,
+        d.valor_liquido or d.valor or 0,
+        d.funil or '', d.vendedor or '', d.closer or '', d.produto or ''
+    ]
+
+
+def _aba_financeiro(filtros, ordem) -> exportacao.Aba:
+    return exportacao.Aba(
+        nome='Financeiro', chave='financeiro', colunas=COLUNAS_FINANCEIRO,
+        linhas=lambda db: exportacao.linhas_query(
+            db.query(Financeiro).filter(*filtros).order_by(*ordem), _linha_financeiro
+        ),
+        vazio='Sem dados financeiros neste período',
+        versao=exportacao.versao_tabela(Financeiro, filtros)
+    )
+
+
+def _aba_vendas(filtros, ordem) -> exportacao.Aba:
+    return exportacao.Aba(
+        nome='Vendas', chave='vendas', colunas=COLUNAS_VENDAS,
+        linhas=lambda db: exportacao.linhas_query(
+            db.query(Venda).filter(*filtros).order_by(*ordem), _linha_venda
+        ),
+        vazio='Sem vendas neste período',
+        versao=exportacao.versao_tabela(Venda, filtros)
+    )
+
+
+def _com_meta(db: Session, modelo, coluna_pessoa, mes: int, ano: int, *colunas_meta):
+    """Métricas do mês com as metas da pessoa (Meta via Pessoa.nome), numa consulta."""
+    return db.query(modelo, *colunas_meta).outerjoin(
+        Pessoa, Pessoa.nome == coluna_pessoa
+    ).outerjoin(
+        Pessoa.metas.and_(Meta.mes == mes, Meta.ano == ano)
+    ).filter(modelo.mes == mes, modelo.ano == ano)
+
+
+def _abas_completo(mes: int, ano: int):
+    data_ref = f"01/{mes:02d}/{ano}"
+
+    def linhas_ss(db):
+        query = _com_meta(db, SocialSellingMetrica, SocialSellingMetrica.vendedor, mes, ano,
+                          Meta.meta_ativacoes, Meta.meta_leads)
+        return exportacao.linhas_query(query, lambda r: [
+            get_mes_nome(mes), ano, data_ref, r[0].vendedor,
+            r[0].ativacoes, r.meta_ativacoes or 0, r[0].conversoes, f"{r[0].tx_ativ_conv or 0:.1f}%",
+            r[0].leads_gerados, r.meta_leads or 0, f"{r[0].tx_conv_lead or 0:.1f}%"
+        ])
+
+    def linhas_sdr(db):
+        query = _com_meta(db, SDRMetrica, SDRMetrica.sdr, mes, ano, Meta.meta_reunioes)
+        return exportacao.linhas_query(query, lambda r: [
+            get_mes_nome(mes), ano, data_ref, r[0].sdr, r[0].funil,
+            r[0].leads_recebidos, r[0].reunioes_agendadas, f"{r[0].tx_agendamento or 0:.1f}%",
+            r[0].reunioes_realizadas, f"{r[0].tx_comparecimento or 0:.1f}%", r.meta_reunioes or 0
+        ])
+
+    def linhas_closer(db):
+        query = db.query(CloserMetrica).filter(CloserMetrica.mes == mes, CloserMetrica.ano == ano)
+        return exportacao.linhas_query(query, lambda d: [
+            get_mes_nome(mes), ano, data_ref, d.closer, d.funil,
+            d.calls_agendadas, d.calls_realizadas, f"{d.tx_comparecimento or 0:.1f}%",
+            d.vendas, f"{d.tx_conversao or 0:.1f}%", d.faturamento, d.ticket_medio
+        ])
+
+    def linhas_resumo(db):
+        total_entradas, total_saidas = db.query(
+            func.coalesce(func.sum(case((Financeiro.tipo == 'entrada', Financeiro.valor), else_=0)), 0),
+            func.coalesce(func.sum(case((Financeiro.tipo == 'saida', Financeiro.valor), else_=0)), 0)
+        ).filter(Financeiro.mes == mes, Financeiro.ano == ano).one()
+        total_vendas, total_faturamento = db.query(
+            func.count(Venda.id),
+            func.coalesce(func.sum(func.coalesce(func.nullif(Venda.valor_bruto, 0), Venda.valor, 0)), 0)
+        ).filter(Venda.mes == mes, Venda.ano == ano).one()
+
+        return [
+            ['Período', f"{get_mes_nome(mes)} {ano}"],
+            ['Total Entradas', f"R$ {total_entradas:,.2f}"],
+            ['Total Saídas', f"R$ {total_saidas:,.2f}"],
+            ['Saldo', f"R$ {total_entradas - total_saidas:,.2f}"],
+            ['Total Vendas', total_vendas],
+            ['Faturamento', f"R$ {total_faturamento:,.2f}"],
+            ['Ticket Médio', f"R$ {total_faturamento / total_vendas:,.2f}" if total_vendas > 0 else "R$ 0,00"],
+            ['Data Exportação', datetime.now().strftime('%d/%m/%Y %H:%M')],
+        ]
+
+    return [
+        _aba_financeiro([Financeiro.mes == mes, Financeiro.ano == ano], [Financeiro.data.desc()]),
+        _aba_vendas([Venda.mes == mes, Venda.ano == ano], [Venda.data.desc()]),
+        exportacao.Aba(
+            nome='Social Selling', chave='social_selling', linhas=linhas_ss,
+            colunas=['Mês', 'Ano', 'Data', 'Vendedor', 'Ativações', 'Meta Ativações', 'Conversões',
+                     'Tx Ativ>Conv', 'Leads', 'Meta Leads', 'Tx Conv>Lead'],
+            vazio='Sem métricas de Social Selling neste período'
+        ),
+        exportacao.Aba(
+            nome='SDR', chave='sdr', linhas=linhas_sdr,
+            colunas=['Mês', 'Ano', 'Data', 'SDR', 'Funil', 'Leads', 'Agendadas', 'Tx Agend.',
+                     'Realizadas', 'Tx Comp.', 'Meta'],
+            vazio='Sem métricas de SDR neste período'
+        ),
+        exportacao.Aba(
+            nome='Closer', chave='closer', linhas=linhas_closer,
+            colunas=['Mês', 'Ano', 'Data', 'Closer', 'Funil', 'Calls Agend.', 'Calls Real.', 'Tx Comp.',
+                     'Vendas', 'Tx Conv.', 'Faturamento', 'Ticket'],
+            vazio='Sem métricas de Closer neste período'
+        ),
+        exportacao.Aba(nome='Resumo', chave='resumo', colunas=['Métrica', 'Valor'], linhas=linhas_resumo),
+    ]
+
+
+def _abas_periodo(tipo: str, mes_inicio: int, ano_inicio: int, mes_fim: int, ano_fim: int):
+    """Abas da exportação por período; valida o período e o tipo."""
+    inicio = periodo(ano_inicio, mes_inicio)
+    fim = periodo(ano_fim, mes_fim)
+
+    if inicio > fim:
+        raise HTTPException(status_code=400, detail="Período inválido: data inicial maior que final")
+    if tipo not in ['financeiro', 'vendas', 'completo']:
+        raise HTTPException(status_code=400, detail="Tipo inválido. Use: financeiro, vendas, completo")
+
+    abas = []
+    if tipo in ['financeiro', 'completo']:
+        abas.append(_aba_financeiro(
+            filtro_periodo(Financeiro, inicio, fim),
+            [Financeiro.periodo, Financeiro.data]
+        ))
+    if tipo in ['vendas', 'completo']:
+        abas.append(_aba_vendas(
+            filtro_periodo(Venda, inicio, fim),
+            [Venda.periodo, Venda.data]
+        ))
+    return abas
+
+
 @router.get("/completo")
-async def export_completo(
+def export_completo(
     mes: int = Query(..., ge=1, le=12),
     ano: int = Query(..., ge=2020, le=2030),
+    formato: str = Query("xlsx", description="xlsx, csv ou csv.gz"),
+    aba: Optional[str] = Query(None, description="Aba exportada em CSV: financeiro, vendas, social_selling, sdr, closer, resumo"),
     db: Session = Depends(get_db)
 ):
     """
-    Exporta todos os dados em um único Excel com múltiplas abas.
+    Exporta todos os dados do mês em um único Excel com múltiplas abas,
+    ou uma das abas em CSV / CSV gzip. A resposta é enviada em streaming.
     """
     try:
-        filename = f"medgm_completo_{get_mes_nome(mes)}_{ano}.xlsx"
-        filepath = os.path.join(EXPORT_DIR, filename)
-
-        with pd.ExcelWriter(filepath, engine='openpyxl') as writer:
-            # Aba Financeiro
-            fin = db.query(Financeiro).filter(
-                Financeiro.mes == mes,
-                Financeiro.ano == ano
-            ).order_by(Financeiro.data.desc()).all()
-
-            if fin:
-                df_fin = pd.DataFrame([{
-                    'Mês': get_mes_nome(mes),
-                    'Ano': ano,
-                    'ID': d.id,
-                    'Tipo': 'Entrada' if d.tipo == 'entrada' else 'Saída',
-                    'Data': d.data.strftime('%d/%m/%Y') if d.data else '',
-                    'Categoria': d.categoria or '',
-                    'Descrição': d.descricao or '',
-                    'Valor': d.valor,
-                    'Previsto/Realizado': d.previsto_realizado or ''
-                } for d in fin])
-                df_fin.to_excel(writer, sheet_name='Financeiro', index=False)
-            else:
-                pd.DataFrame({'Info': ['Sem dados financeiros neste período']}).to_excel(
-                    writer, sheet_name='Financeiro', index=False
-                )
-
-            # Aba Vendas
-            vendas = db.query(Venda).filter(
-                Venda.mes == mes,
-                Venda.ano == ano
-            ).order_by(Venda.data.desc()).all()
-
-            if vendas:
-                df_vendas = pd.DataFrame([{
-                    'Mês': get_mes_nome(mes),
-                    'Ano': ano,
-                    'ID': d.id,
-                    'Data': d.data.strftime('%d/%m/%Y') if d.data else '',
-                    'Cliente': d.cliente or '',
-                    'Valor Bruto': d.valor_bruto or d.valor or 0,
-                    'Valor Líquido': d.valor_liquido or d.valor or 0,
-                    'Funil': d.funil or '',
-                    'Vendedor': d.vendedor or '',
-                    'Closer': d.closer or '',
-                    'Produto': d.produto or ''
-                } for d in vendas])
-                df_vendas.to_excel(writer, sheet_name='Vendas', index=False)
-            else:
-                pd.DataFrame({'Info': ['Sem vendas neste período']}).to_excel(
-                    writer, sheet_name='Vendas', index=False
-                )
-
-            # Aba Social Selling
-            ss = db.query(SocialSellingMetrica).filter(
-                SocialSellingMetrica.mes == mes,
-                SocialSellingMetrica.ano == ano
-            ).all()
-
-            if ss:
-                df_ss = pd.DataFrame([{
-                    'Mês': get_mes_nome(mes),
-                    'Ano': ano,
-                    'Data': f"01/{mes:02d}/{ano}",
-                    'Vendedor': d.vendedor,
-                    'Ativações': d.ativacoes,
-                    'Meta Ativações': d.meta_ativacoes,
-                    'Conversões': d.conversoes,
-                    'Tx Ativ>Conv': f"{d.tx_ativ_conv:.1f}%",
-                    'Leads': d.leads_gerados,
-                    'Meta Leads': d.meta_leads,
-                    'Tx Conv>Lead': f"{d.tx_conv_lead:.1f}%"
-                } for d in ss])
-                df_ss.to_excel(writer, sheet_name='Social Selling', index=False)
-            else:
-                pd.DataFrame({'Info': ['Sem métricas de Social Selling neste período']}).to_excel(
-                    writer, sheet_name='Social Selling', index=False
-                )
-
-            # Aba SDR
-            sdr = db.query(SDRMetrica).filter(
-                SDRMetrica.mes == mes,
-                SDRMetrica.ano == ano
-            ).all()
-
-            if sdr:
-                df_sdr = pd.DataFrame([{
-                    'Mês': get_mes_nome(mes),
-                    'Ano': ano,
-                    'Data': f"01/{mes:02d}/{ano}",
-                    'SDR': d.sdr,
-                    'Funil': d.funil,
-                    'Leads': d.leads_recebidos,
-                    'Agendadas': d.reunioes_agendadas,
-                    'Tx Agend.': f"{d.tx_agendamento:.1f}%",
-                    'Realizadas': d.reunioes_realizadas,
-                    'Tx Comp.': f"{d.tx_comparecimento:.1f}%",
-                    'Meta': d.meta_reunioes
-                } for d in sdr])
-                df_sdr.to_excel(writer, sheet_name='SDR', index=False)
-            else:
-                pd.DataFrame({'Info': ['Sem métricas de SDR neste período']}).to_excel(
-                    writer, sheet_name='SDR', index=False
-                )
-
-            # Aba Closer
-            closer = db.query(CloserMetrica).filter(
-                CloserMetrica.mes == mes,
-                CloserMetrica.ano == ano
-            ).all()
-
-            if closer:
-                df_closer = pd.DataFrame([{
-                    'Mês': get_mes_nome(mes),
-                    'Ano': ano,
-                    'Data': f"01/{mes:02d}/{ano}",
-                    'Closer': d.closer,
-                    'Funil': d.funil,
-                    'Calls Agend.': d.calls_agendadas,
-                    'Calls Real.': d.calls_realizadas,
-                    'Tx Comp.': f"{d.tx_comparecimento:.1f}%",
-                    'Vendas': d.vendas,
-                    'Tx Conv.': f"{d.tx_conversao:.1f}%",
-                    'Faturamento': d.faturamento,
-                    'Ticket': d.ticket_medio
-                } for d in closer])
-                df_closer.to_excel(writer, sheet_name='Closer', index=False)
-            else:
-                pd.DataFrame({'Info': ['Sem métricas de Closer neste período']}).to_excel(
-                    writer, sheet_name='Closer', index=False
-                )
-
-            # Aba Resumo
-            total_entradas = sum(d.valor for d in fin if d.tipo == 'entrada') if fin else 0
-            total_saidas = sum(d.valor for d in fin if d.tipo == 'saida') if fin else 0
-            total_vendas = len(vendas) if vendas else 0
-            total_faturamento = sum((d.valor_bruto or d.valor or 0) for d in vendas) if vendas else 0
-
-            resumo_data = {
-                'Métrica': [
-                    'Período',
-                    'Total Entradas',
-                    'Total Saídas',
-                    'Saldo',
-                    'Total Vendas',
-                    'Faturamento',
-                    'Ticket Médio',
-                    'Data Exportação'
-                ],
-                'Valor': [
-                    f"{get_mes_nome(mes)} {ano}",
-                    f"R$ {total_entradas:,.2f}",
-                    f"R$ {total_saidas:,.2f}",
-                    f"R$ {total_entradas - total_saidas:,.2f}",
-                    total_vendas,
-                    f"R$ {total_faturamento:,.2f}",
-                    f"R$ {total_faturamento / total_vendas:,.2f}" if total_vendas > 0 else "R$ 0,00",
-                    datetime.now().strftime('%d/%m/%Y %H:%M')
-                ]
-            }
-            pd.DataFrame(resumo_data).to_excel(writer, sheet_name='Resumo', index=False)
-
-        return FileResponse(
-            filepath,
-            filename=filename,
-            media_type='application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'
+        return exportacao.resposta(
+            db, _abas_completo(mes, ano), formato,
+            f"medgm_completo_{get_mes_nome(mes)}_{ano}", aba
         )
 
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Erro ao exportar: {str(e)}")
 
 
 @router.get("/periodo")
-async def export_periodo(
+def export_periodo(
     mes_inicio: int = Query(..., ge=1, le=12),
     ano_inicio: int = Query(..., ge=2020, le=2030),
     mes_fim: int = Query(..., ge=1, le=12),
     ano_fim: int = Query(..., ge=2020, le=2030),
     tipo: str = Query("financeiro", description="financeiro, vendas, completo"),
+    formato: str = Query("xlsx", description="xlsx, csv ou csv.gz"),
+    aba: Optional[str] = Query(None, description="Aba exportada em CSV quando tipo=completo: financeiro ou vendas"),
     db: Session = Depends(get_db)
 ):
     """
-    Exporta dados de um período customizado.
+    Exporta dados de um período customizado (Excel, CSV ou CSV gzip), em
+    streaming: as linhas são lidas do banco em lotes, sem carregar o período
+    inteiro em memória.
     """
     try:
-        # Validar período
-        inicio = ano_inicio * 100 + mes_inicio
-        fim = ano_fim * 100 + mes_fim
-
-        if inicio > fim:
-            raise HTTPException(status_code=400, detail="Período inválido: data inicial maior que final")
-
-        filename = f"medgm_{tipo}_{mes_inicio}_{ano_inicio}_a_{mes_fim}_{ano_fim}.xlsx"
-        filepath = os.path.join(EXPORT_DIR, filename)
-
-        with pd.ExcelWriter(filepath, engine='openpyxl') as writer:
-            if tipo in ['financeiro', 'completo']:
-                fin = db.query(Financeiro).filter(
-                    (Financeiro.ano * 100 + Financeiro.mes) >= inicio,
-                    (Financeiro.ano * 100 + Financeiro.mes) <= fim
-                ).order_by(Financeiro.ano, Financeiro.mes, Financeiro.data).all()
-
-                if fin:
-                    df_fin = pd.DataFrame([{
-                        'Mês': get_mes_nome(d.mes),
-                        'Ano': d.ano,
-                        'Tipo': 'Entrada' if d.tipo == 'entrada' else 'Saída',
-                        'Data': d.data.strftime('%d/%m/%Y') if d.data else '',
-                        'Categoria': d.categoria or '',
-                        'Descrição': d.descricao or '',
-                        'Valor': d.valor
-                    } for d in fin])
-                    df_fin.to_excel(writer, sheet_name='Financeiro', index=False)
-
-            if tipo in ['vendas', 'completo']:
-                vendas = db.query(Venda).filter(
-                    (Venda.ano * 100 + Venda.mes) >= inicio,
-                    (Venda.ano * 100 + Venda.mes) <= fim
-                ).order_by(Venda.ano, Venda.mes, Venda.data).all()
-
-                if vendas:
-                    df_vendas = pd.DataFrame([{
-                        'Mês': get_mes_nome(d.mes),
-                        'Ano': d.ano,
-                        'Data': d.data.strftime('%d/%m/%Y') if d.data else '',
-                        'Cliente': d.cliente or '',
-                        'Valor Bruto': d.valor_bruto or d.valor or 0,
-                        'Valor Líquido': d.valor_liquido or d.valor or 0,
-                        'Funil': d.funil or '',
-                        'Vendedor': d.vendedor or '',
-                        'Closer': d.closer or ''
-                    } for d in vendas])
-                    df_vendas.to_excel(writer, sheet_name='Vendas', index=False)
-
-        return FileResponse(
-            filepath,
-            filename=filename,
-            media_type='application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'
+        abas = _abas_periodo(tipo, mes_inicio, ano_inicio, mes_fim, ano_fim)
+        return exportacao.resposta(
+            db, abas, formato,
+            f"medgm_{tipo}_{mes_inicio}_{ano_inicio}_a_{mes_fim}_{ano_fim}", aba
         )
 
     except HTTPException:
         raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Erro ao exportar: {str(e)}")
+
+
+# ==================== EXPORTAÇÃO EM SEGUNDO PLANO ====================
+
+class ExportJobCreate(BaseModel):
+    tipo: str = "completo"  # financeiro, vendas, completo
+    mes_inicio: int = Field(..., ge=1, le=12)
+    ano_inicio: int = Field(..., ge=2020, le=2030)
+    mes_fim: int = Field(..., ge=1, le=12)
+    ano_fim: int = Field(..., ge=2020, le=2030)
+    formato: str = "xlsx"  # xlsx, csv, csv.gz
+    aba: Optional[str] = None  # CSV de tipo=completo: financeiro ou vendas
+
+
+@router.post("/jobs", status_code=202)
+def criar_export_job(item: ExportJobCreate, db: Session = Depends(get_db)):
+    """
+    Cria uma exportação por período em segundo plano (mesmos parâmetros de
+    /export/periodo). Acompanhe em GET /export/jobs/{id} e baixe o arquivo em
+    download_url quando o status for "concluido".
+    """
+    try:
+        if item.formato not in exportacao.FORMATOS:
+            raise HTTPException(status_code=400, detail=f"Formato inválido. Use: {', '.join(exportacao.FORMATOS)}")
+
+        abas = _abas_periodo(item.tipo, item.mes_inicio, item.ano_inicio, item.mes_fim, item.ano_fim)
+        nome_base = f"medgm_{item.tipo}_{item.mes_inicio}_{item.ano_inicio}_a_{item.mes_fim}_{item.ano_fim}"
+        if item.formato != "xlsx":
+            escolhida = exportacao.escolher_aba(abas, item.aba)
+            if len(abas) > 1:
+                nome_base = f"{nome_base}_{escolhida.chave}"
+            abas = [escolhida]
+
+        job = export_jobs.criar_job(
+            db, item.tipo, item.formato,
+            item.dict(exclude={"tipo", "formato"}),
+            abas, nome_base
+        )
+        return export_jobs.serializar(job)
+
+    except HTTPException:
+        raise
+    except Exception as e:
+        db.rollback()
+        raise HTTPException(status_code=500, detail=f"Erro ao criar exportação: {str(e)}")
+
+
+@router.get("/jobs/{job_id}")
+def status_export_job(job_id: str, db: Session = Depends(get_db)):
+    """Status e progresso (0-100) de uma exportação em segundo plano."""
+    job = db.query(ExportJob).filter(ExportJob.id == job_id).first()
+    if not job:
+        raise HTTPException(status_code=404, detail="Exportação não encontrada")
+    return export_jobs.serializar(job)
+
+
+@router.get("/jobs/{job_id}/download")
+def download_export_job(job_id: str, db: Session = Depends(get_db)):
+    """Arquivo de uma exportação concluída."""
+    job = db.query(ExportJob).filter(ExportJob.id == job_id).first()
+    if not job:
+        raise HTTPException(status_code=404, detail="Exportação não encontrada")
+    if job.status != "concluido":
+        raise HTTPException(status_code=409, detail=f"Exportação ainda não concluída (status: {job.status})")
+
+    caminho = export_jobs.caminho_download(job)
+    if caminho is None:
+        raise HTTPException(status_code=410, detail="Arquivo expirado, crie a exportação novamente")
+
+    return FileResponse(caminho, filename=job.nome_arquivo, media_type=exportacao.FORMATOS[job.formato][0])
@@ -7,6 +7,7 @@ from fastapi import APIRouter, Depends, HTTPException
 from sqlalchemy.orm import Session
 from sqlalchemy import func
 from app.database import get_db
+from app.cache import cache_resposta
 from app.models.models import SocialSellingMetrica, SDRMetrica, CloserMetrica, Venda
 from typing import Optional
 
@@ -14,7 +15,11 @@ router = APIRouter(prefix="/funil", tags=["Funil de Conversao"])
 
 
 @router.get("/completo")
-async def funil_completo(
+@cache_resposta(
+    "funil.completo",
+    ['social_selling_metricas', 'sdr_metricas', 'closer_metricas', 'vendas']
+)
+def funil_completo(
     mes: int,
     ano: int,
     agrupamento: str = "geral",
@@ -75,25 +80,27 @@ async def funil_completo(
 
 def _calcular_funil_geral(ss_data, sdr_data, closer_data, vendas_data):
     """Calcula o funil agregado geral"""
-    # Totais
-    ativacoes = sum(s.ativacoes or 0 for s in ss_data)
-    conversoes = sum(s.conversoes or 0 for s in ss_data)
-    leads = sum(s.leads_gerados or 0 for s in ss_data)
-
-    # SDR - somar leads recebidos como input e reunioes como output
-    leads_sdr = sum(r.leads_recebidos or 0 for r in sdr_data)
-    reunioes_agendadas = sum(r.reunioes_agendadas or 0 for r in sdr_data)
-    reunioes_realizadas = sum(r.reunioes_realizadas or 0 for r in sdr_data)
-
-    # Closer
-    calls_closer = sum(c.calls_realizadas or 0 for c in closer_data)
-    vendas = sum(c.vendas or 0 for c in closer_data)
-    faturamento = sum(c.faturamento or 0 for c in closer_data)
-
+    return _montar_funil_geral(
+        ativacoes=sum(s.ativacoes or 0 for s in ss_data),
+        conversoes=sum(s.conversoes or 0 for s in ss_data),
+        leads=sum(s.leads_gerados or 0 for s in ss_data),
+        leads_sdr=sum(r.leads_recebidos or 0 for r in sdr_data),
+        reunioes_agendadas=sum(r.reunioes_agendadas or 0 for r in sdr_data),
+        reunioes_realizadas=sum(r.reunioes_realizadas or 0 for r in sdr_data),
+        vendas=sum(c.vendas or 0 for c in closer_data),
+        faturamento=sum(c.faturamento or 0 for c in closer_data),
+        qtd_vendas=len(vendas_data),
+        faturamento_vendas=sum(v.valor_bruto or v.valor or 0 for v in vendas_data)
+    )
+
+
+def _montar_funil_geral(ativacoes, conversoes, leads, leads_sdr, reunioes_agendadas,
+                        reunioes_realizadas, vendas, faturamento, qtd_vendas, faturamento_vendas):
+    """Monta o funil geral a partir dos totais de cada etapa"""
     # Se nao temos dados de closer, pegar das vendas
-    if vendas == 0 and vendas_data:
-        vendas = len(vendas_data)
-        faturamento = sum(v.valor_bruto or v.valor or 0 for v in vendas_data)
+    if vendas == 0 and qtd_vendas:
+        vendas = qtd_vendas
+        faturamento = faturamento_vendas
 
     # Calcular taxas
     taxas = {
@@ -218,7 +225,7 @@ def _calcular_funil_por_canal(ss_data, sdr_data, closer_data, vendas_data):
 
 
 @router.get("/historico")
-async def funil_historico(
+def funil_historico(
     ano: int,
     db: Session = Depends(get_db)
 ):
@@ -226,35 +233,59 @@ async def funil_historico(
     Retorna o historico do funil mes a mes para um ano.
     """
     try:
+        # Uma consulta por tabela agrupada por mes, em vez de 4 consultas por mes
+        ss_por_mes = {linha.mes: linha for linha in db.query(
+            SocialSellingMetrica.mes,
+            func.count(SocialSellingMetrica.id).label('registros'),
+            func.coalesce(func.sum(SocialSellingMetrica.ativacoes), 0).label('ativacoes'),
+            func.coalesce(func.sum(SocialSellingMetrica.conversoes), 0).label('conversoes'),
+            func.coalesce(func.sum(SocialSellingMetrica.leads_gerados), 0).label('leads')
+        ).filter(SocialSellingMetrica.ano == ano).group_by(SocialSellingMetrica.mes).all()}
+
+        sdr_por_mes = {linha.mes: linha for linha in db.query(
+            SDRMetrica.mes,
+            func.count(SDRMetrica.id).label('registros'),
+            func.coalesce(func.sum(SDRMetrica.leads_recebidos), 0).label('leads_sdr'),
+            func.coalesce(func.sum(SDRMetrica.reunioes_agendadas), 0).label('reunioes_agendadas'),
+            func.coalesce(func.sum(SDRMetrica.reunioes_realizadas), 0).label('reunioes_realizadas')
+        ).filter(SDRMetrica.ano == ano).group_by(SDRMetrica.mes).all()}
+
+        closer_por_mes = {linha.mes: linha for linha in db.query(
+            CloserMetrica.mes,
+            func.count(CloserMetrica.id).label('registros'),
+            func.coalesce(func.sum(CloserMetrica.vendas), 0).label('vendas'),
+            func.coalesce(func.sum(CloserMetrica.faturamento), 0).label('faturamento')
+        ).filter(CloserMetrica.ano == ano).group_by(CloserMetrica.mes).all()}
+
+        vendas_por_mes = {linha.mes: linha for linha in db.query(
+            Venda.mes,
+            func.count(Venda.id).label('registros'),
+            func.coalesce(func.sum(
+                func.coalesce(func.nullif(Venda.valor_bruto, 0), Venda.valor, 0)
+            ), 0).label('faturamento')
+        ).filter(Venda.ano == ano).group_by(Venda.mes).all()}
+
         historico = []
 
         for mes in range(1, 13):
-            # Social Selling
-            ss_data = db.query(SocialSellingMetrica).filter(
-                SocialSellingMetrica.mes == mes,
-                SocialSellingMetrica.ano == ano
-            ).all()
-
-            # SDR
-            sdr_data = db.query(SDRMetrica).filter(
-                SDRMetrica.mes == mes,
-                SDRMetrica.ano == ano
-            ).all()
-
-            # Closer
-            closer_data = db.query(CloserMetrica).filter(
-                CloserMetrica.mes == mes,
-                CloserMetrica.ano == ano
-            ).all()
-
-            # Vendas
-            vendas_data = db.query(Venda).filter(
-                Venda.mes == mes,
-                Venda.ano == ano
-            ).all()
-
-            if ss_data or sdr_data or closer_data or vendas_data:
-                funil = _calcular_funil_geral(ss_data, sdr_data, closer_data, vendas_data)
+            ss = ss_por_mes.get(mes)
+            sdr = sdr_por_mes.get(mes)
+            closer = closer_por_mes.get(mes)
+            vendas = vendas_por_mes.get(mes)
+
+            if ss or sdr or closer or vendas:
+                funil = _montar_funil_geral(
+                    ativacoes=ss.ativacoes if ss else 0,
+                    conversoes=ss.conversoes if ss else 0,
+                    leads=ss.leads if ss else 0,
+                    leads_sdr=sdr.leads_sdr if sdr else 0,
+                    reunioes_agendadas=sdr.reunioes_agendadas if sdr else 0,
+                    reunioes_realizadas=sdr.reunioes_realizadas if sdr else 0,
+                    vendas=closer.vendas if closer else 0,
+                    faturamento=closer.faturamento if closer else 0,
+                    qtd_vendas=vendas.registros if vendas else 0,
+                    faturamento_vendas=vendas.faturamento if vendas else 0
+                )
                 funil['mes'] = mes
                 funil['ano'] = ano
                 funil['mes_nome'] = _get_mes_nome(mes)
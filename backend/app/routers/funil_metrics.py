@@ -5,14 +5,12 @@ Handles metrics tracking and automatic KPI calculations.
 
 from fastapi import APIRouter, Depends, HTTPException, Query
 from sqlalchemy.orm import Session
+from app import funil_kpis, meta_api
 from app.database import get_db
 from app.models.models import QuizMetrics, VendaDiretaMetrics, MetaAdsConfig
 from pydantic import BaseModel, field_validator
 from typing import Optional, List
 from datetime import date, datetime, timedelta
-from facebook_business.api import FacebookAdsApi
-from facebook_business.adobjects.adaccount import AdAccount
-from facebook_business.adobjects.campaign import Campaign
 
 router = APIRouter(prefix="/funil", tags=["Funil Metrics"])
 
@@ -102,70 +100,49 @@ class VendaDiretaMetricsUpdate(BaseModel):
 
 # ============ HELPER FUNCTIONS ============
 
-def calculate_quiz_kpis(metric):
-    """Calcula KPIs automaticamente para Quiz SE"""
+def _kpis_da_metrica(metric, funil):
+    """Métricas brutas e KPIs de um registro (regras em app/funil_kpis.py)"""
+    _, brutas, _ = funil_kpis.FUNIS[funil]
     kpis = {
         "id": metric.id,
         "data": metric.data.isoformat() if metric.data else None,
         "campanha_nome": metric.campanha_nome,
         "campanha_id": metric.campanha_id,
         # Métricas brutas
-        "verba": metric.verba,
-        "impressoes": metric.impressoes,
-        "cliques": metric.cliques,
-        "pageviews": metric.pageviews,
-        "quiz_inicio": metric.quiz_inicio,
-        "quiz_end": metric.quiz_end,
-        "leads": metric.leads,
+        **{coluna: getattr(metric, coluna) for coluna in brutas},
     }
-
-    # Cálculos
-    kpis["hook_rate"] = (metric.cliques / metric.impressoes * 100) if metric.impressoes > 0 else 0
-    kpis["body_rate"] = (metric.pageviews / metric.cliques * 100) if metric.cliques > 0 else 0
-    kpis["ctr"] = (metric.cliques / metric.impressoes * 100) if metric.impressoes > 0 else 0
-    kpis["cpc"] = (metric.verba / metric.cliques) if metric.cliques > 0 else 0
-    kpis["taxa_conclusao_quiz"] = (metric.quiz_end / metric.quiz_inicio * 100) if metric.quiz_inicio > 0 else 0
-    kpis["taxa_conversao"] = (metric.leads / metric.pageviews * 100) if metric.pageviews > 0 else 0
-    kpis["cpl"] = (metric.verba / metric.leads) if metric.leads > 0 else 0
-
+    kpis.update(funil_kpis.calcular_valores(kpis, funil))
     return kpis
 
+def calculate_quiz_kpis(metric):
+    """Calcula KPIs automaticamente para Quiz SE"""
+    return _kpis_da_metrica(metric, "quiz")
+
 def calculate_venda_direta_kpis(metric):
     """Calcula KPIs automaticamente para Venda Direta"""
-    kpis = {
-        "id": metric.id,
-        "data": metric.data.isoformat() if metric.data else None,
-        "campanha_nome": metric.campanha_nome,
-        "campanha_id": metric.campanha_id,
-        # Métricas brutas
-        "verba": metric.verba,
-        "impressoes": metric.impressoes,
-        "cliques": metric.cliques,
-        "pageviews": metric.pageviews,
-        "leads": metric.leads,
-        "checkout_inicio": metric.checkout_inicio,
-        "vendas": metric.vendas,
-        "receita": metric.receita,
+    return _kpis_da_metrica(metric, "venda_direta")
+
+def _kpis_periodo(db, funil, data_inicio, data_fim, campanha, formato):
+    """Por dia e totais do período; taxas dos totais ponderadas pelo volume"""
+    if data_inicio > data_fim:
+        raise HTTPException(status_code=400, detail="Período inválido: data inicial maior que final")
+    if formato not in ("linhas", "colunas"):
+        raise HTTPException(status_code=400, detail="Formato inválido. Use: linhas ou colunas")
+
+    df = funil_kpis.carregar(db, funil, data_inicio=data_inicio, data_fim=data_fim, campanha=campanha)
+    dias = funil_kpis.por_dia(df, funil)
+    return {
+        "data_inicio": data_inicio.isoformat(),
+        "data_fim": data_fim.isoformat(),
+        "formato": formato,
+        "dias": funil_kpis.colunar(dias) if formato == "colunas" else funil_kpis.linhas_por_dia(dias),
+        "totais": funil_kpis.totais(df, funil),
     }
 
-    # Cálculos
-    kpis["hook_rate"] = (metric.cliques / metric.impressoes * 100) if metric.impressoes > 0 else 0
-    kpis["body_rate"] = (metric.pageviews / metric.cliques * 100) if metric.cliques > 0 else 0
-    kpis["ctr"] = (metric.cliques / metric.impressoes * 100) if metric.impressoes > 0 else 0
-    kpis["cpc"] = (metric.verba / metric.cliques) if metric.cliques > 0 else 0
-    kpis["taxa_conversao"] = (metric.leads / metric.pageviews * 100) if metric.pageviews > 0 else 0
-    kpis["cvr_checkout"] = (metric.vendas / metric.checkout_inicio * 100) if metric.checkout_inicio > 0 else 0
-    kpis["cvr_geral_funil"] = (metric.vendas / metric.pageviews * 100) if metric.pageviews > 0 else 0
-    kpis["aov"] = (metric.receita / metric.vendas) if metric.vendas > 0 else 0
-    kpis["cpa"] = (metric.verba / metric.vendas) if metric.vendas > 0 else 0
-    kpis["roas"] = (metric.receita / metric.verba) if metric.verba > 0 else 0
-
-    return kpis
-
 # ============ QUIZ SE ENDPOINTS ============
 
 @router.post("/quiz")
-async def create_quiz_metrics(item: QuizMetricsCreate, db: Session = Depends(get_db)):
+def create_quiz_metrics(item: QuizMetricsCreate, db: Session = Depends(get_db)):
     """Cria nova entrada de métricas Quiz SE"""
     try:
         metric = QuizMetrics(
@@ -190,8 +167,24 @@ async def create_quiz_metrics(item: QuizMetricsCreate, db: Session = Depends(get
         db.rollback()
         raise HTTPException(status_code=500, detail=f"Erro ao criar métricas: {str(e)}")
 
+@router.get("/quiz/kpis")
+def get_quiz_kpis(
+    data_inicio: date = Query(..., description="Data inicial (YYYY-MM-DD)"),
+    data_fim: date = Query(..., description="Data final (YYYY-MM-DD)"),
+    campanha: Optional[str] = Query(None),
+    formato: str = Query("linhas", description="linhas (um objeto por dia) ou colunas (uma lista por métrica)"),
+    db: Session = Depends(get_db)
+):
+    """KPIs Quiz SE por dia e totais do período (para os gráficos)"""
+    try:
+        return _kpis_periodo(db, "quiz", data_inicio, data_fim, campanha, formato)
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Erro ao calcular KPIs: {str(e)}")
+
 @router.get("/quiz")
-async def list_quiz_metrics(
+def list_quiz_metrics(
     mes: Optional[int] = Query(None, ge=1, le=12),
     ano: Optional[int] = Query(None, ge=2020),
     campanha: Optional[str] = Query(None),
@@ -199,21 +192,13 @@ async def list_quiz_metrics(
 ):
     """Lista métricas Quiz SE com KPIs calculados"""
     try:
-        query = db.query(QuizMetrics)
-        if mes:
-            query = query.filter(QuizMetrics.mes == mes)
-        if ano:
-            query = query.filter(QuizMetrics.ano == ano)
-        if campanha:
-            query = query.filter(QuizMetrics.campanha_nome.ilike(f"%{campanha}%"))
-
-        metrics = query.order_by(QuizMetrics.data.desc()).all()
-        return [calculate_quiz_kpis(m) for m in metrics]
+        df = funil_kpis.carregar(db, "quiz", mes=mes, ano=ano, campanha=campanha)
+        return funil_kpis.linhas(df, "quiz")
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Erro ao listar métricas: {str(e)}")
 
 @router.get("/quiz/{id}")
-async def get_quiz_metrics(id: int, db: Session = Depends(get_db)):
+def get_quiz_metrics(id: int, db: Session = Depends(get_db)):
     """Busca métrica Quiz SE por ID"""
     metric = db.query(QuizMetrics).filter(QuizMetrics.id == id).first()
     if not metric:
@@ -221,7 +206,7 @@ async def get_quiz_metrics(id: int, db: Session = Depends(get_db)):
     return calculate_quiz_kpis(metric)
 
 @router.put("/quiz/{id}")
-async def update_quiz_metrics(id: int, item: QuizMetricsUpdate, db: Session = Depends(get_db)):
+def update_quiz_metrics(id: int, item: QuizMetricsUpdate, db: Session = Depends(get_db)):
     """Atualiza métrica Quiz SE"""
     try:
         metric = db.query(QuizMetrics).filter(QuizMetrics.id == id).first()
@@ -261,7 +246,7 @@ async def update_quiz_metrics(id: int, item: QuizMetricsUpdate, db: Session = De
         raise HTTPException(status_code=500, detail=f"Erro ao atualizar métrica: {str(e)}")
 
 @router.delete("/quiz/{id}")
-async def delete_quiz_metrics(id: int, db: Session = Depends(get_db)):
+def delete_quiz_metrics(id: int, db: Session = Depends(get_db)):
     """Deleta métrica Quiz SE"""
     try:
         metric = db.query(QuizMetrics).filter(QuizMetrics.id == id).first()
@@ -279,7 +264,7 @@ async def delete_quiz_metrics(id: int, db: Session = Depends(get_db)):
 # ============ VENDA DIRETA ENDPOINTS ============
 
 @router.post("/venda-direta")
-async def create_venda_direta_metrics(item: VendaDiretaMetricsCreate, db: Session = Depends(get_db)):
+def create_venda_direta_metrics(item: VendaDiretaMetricsCreate, db: Session = Depends(get_db)):
     """Cria nova entrada de métricas Venda Direta"""
     try:
         metric = VendaDiretaMetrics(
@@ -305,8 +290,24 @@ async def create_venda_direta_metrics(item: VendaDiretaMetricsCreate, db: Sessio
         db.rollback()
         raise HTTPException(status_code=500, detail=f"Erro ao criar métricas: {str(e)}")
 
+@router.get("/venda-direta/kpis")
+def get_venda_direta_kpis(
+    data_inicio: date = Query(..., description="Data inicial (YYYY-MM-DD)"),
+    data_fim: date = Query(..., description="Data final (YYYY-MM-DD)"),
+    campanha: Optional[str] = Query(None),
+    formato: str = Query("linhas", description="linhas (um objeto por dia) ou colunas (uma lista por métrica)"),
+    db: Session = Depends(get_db)
+):
+    """KPIs Venda Direta por dia e totais do período (para os gráficos)"""
+    try:
+        return _kpis_periodo(db, "venda_direta", data_inicio, data_fim, campanha, formato)
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Erro ao calcular KPIs: {str(e)}")
+
 @router.get("/venda-direta")
-async def list_venda_direta_metrics(
+def list_venda_direta_metrics(
     mes: Optional[int] = Query(None, ge=1, le=12),
     ano: Optional[int] = Query(None, ge=2020),
     campanha: Optional[str] = Query(None),
@@ -314,21 +315,13 @@ async def list_venda_direta_metrics(
 ):
     """Lista métricas Venda Direta com KPIs calculados"""
     try:
-        query = db.query(VendaDiretaMetrics)
-        if mes:
-            query = query.filter(VendaDiretaMetrics.mes == mes)
-        if ano:
-            query = query.filter(VendaDiretaMetrics.ano == ano)
-        if campanha:
-            query = query.filter(VendaDiretaMetrics.campanha_nome.ilike(f"%{campanha}%"))
-
-        metrics = query.order_by(VendaDiretaMetrics.data.desc()).all()
-        return [calculate_venda_direta_kpis(m) for m in metrics]
+        df = funil_kpis.carregar(db, "venda_direta", mes=mes, ano=ano, campanha=campanha)
+        return funil_kpis.linhas(df, "venda_direta")
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Erro ao listar métricas: {str(e)}")
 
 @router.get("/venda-direta/{id}")
-async def get_venda_direta_metrics(id: int, db: Session = Depends(get_db)):
+def get_venda_direta_metrics(id: int, db: Session = Depends(get_db)):
     """Busca métrica Venda Direta por ID"""
     metric = db.query(VendaDiretaMetrics).filter(VendaDiretaMetrics.id == id).first()
     if not metric:
@@ -336,7 +329,7 @@ async def get_venda_direta_metrics(id: int, db: Session = Depends(get_db)):
     return calculate_venda_direta_kpis(metric)
 
 @router.put("/venda-direta/{id}")
-async def update_venda_direta_metrics(id: int, item: VendaDiretaMetricsUpdate, db: Session = Depends(get_db)):
+def update_venda_direta_metrics(id: int, item: VendaDiretaMetricsUpdate, db: Session = Depends(get_db)):
     """Atualiza métrica Venda Direta"""
     try:
         metric = db.query(VendaDiretaMetrics).filter(VendaDiretaMetrics.id == id).first()
@@ -378,7 +371,7 @@ async def update_venda_direta_metrics(id: int, item: VendaDiretaMetricsUpdate, d
         raise HTTPException(status_code=500, detail=f"Erro ao atualizar métrica: {str(e)}")
 
 @router.delete("/venda-direta/{id}")
-async def delete_venda_direta_metrics(id: int, db: Session = Depends(get_db)):
+def delete_venda_direta_metrics(id: int, db: Session = Depends(get_db)):
     """Deleta métrica Venda Direta"""
     try:
         metric = db.query(VendaDiretaMetrics).filter(VendaDiretaMetrics.id == id).first()
@@ -396,7 +389,7 @@ async def delete_venda_direta_metrics(id: int, db: Session = Depends(get_db)):
 # ============ IMPORTAÇÃO DO META ADS ============
 
 @router.get("/meta/campanhas")
-async def get_campanhas_para_importar(
+def get_campanhas_para_importar(
     date_start: str = Query(..., description="Data inicial (YYYY-MM-DD)"),
     date_end: str = Query(..., description="Data final (YYYY-MM-DD)"),
     db: Session = Depends(get_db)
@@ -411,9 +404,7 @@ async def get_campanhas_para_importar(
         if not config:
             raise HTTPException(status_code=404, detail="Meta Ads não configurado")
 
-        # Inicializar API
-        FacebookAdsApi.init(access_token=config.access_token)
-        account = AdAccount(config.ad_account_id)
+        account = meta_api.conta(config)
 
         # Buscar campanhas
         campaigns = account.get_campaigns(
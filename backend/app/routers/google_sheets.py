@@ -4,12 +4,20 @@ Puxa dados de métricas de tráfego automaticamente das planilhas do Google
 """
 
 from fastapi import APIRouter, HTTPException, Depends
+from sqlalchemy import insert, update
 from sqlalchemy.orm import Session
 from datetime import datetime
 import gspread
 from google.oauth2.service_account import Credentials
 import os
-from typing import Optional
+import threading
+import time
+import pandas as pd
+from typing import Optional, Dict, Any, List
+
+from app import sheets_diario
+from app.database import get_db
+from app.models.models import SheetsSnapshot, SheetsMetricaDiaria
 
 router = APIRouter(prefix="/google-sheets", tags=["Google Sheets"])
 
@@ -22,8 +30,70 @@ SCOPES = [
     'https://www.googleapis.com/auth/drive.readonly'
 ]
 
+# Abas sincronizadas: tipo -> nome da aba
+ABAS = {
+    "captura_lead": "[QUIZ] [SE] Métricas de Trafego",
+    "venda_direta": "[ISCA] [SCRIPT] Métricas de Trafego",
+}
+
+# Campos gravados em SheetsMetricaDiaria para cada tipo (além de data/dia/mes/ano)
+CAMPOS = {
+    "captura_lead": [
+        "valor_gasto", "leads", "cpl", "cliques", "cpc", "ctr", "cpm", "connect_rate",
+        "conv_pg", "opt_in", "impressoes", "vis_pagina", "vv_3s", "vv_75", "hook_rate", "view_75",
+    ],
+    "venda_direta": [
+        "valor_gasto", "vendas", "cpa", "cliques", "cpc", "ctr", "cpm", "connect_rate",
+        "conv_pg", "opt_in", "impressoes", "vis_pagina", "vv_3s", "vv_75", "init_checkout",
+        "hook_rate", "view_75",
+    ],
+}
+
+
+# Cliente e planilha reaproveitados entre requisições e pelo scheduler.
+# O cliente do gspread usa uma AuthorizedSession (requests.Session com pool de
+# conexões) que renova o token de acesso sozinha quando ele expira; o handle da
+# planilha (metadados de open_by_key) é reaberto depois de GOOGLE_SHEETS_CACHE_TTL s.
+PLANILHA_TTL = int(os.getenv("GOOGLE_SHEETS_CACHE_TTL", "300"))
+_cliente = None
+_planilha = None  # (spreadsheet, expira_em)
+_cliente_lock = threading.Lock()
+
 
 def get_google_sheets_client():
+    """
+    Cliente autenticado para Google Sheets, criado na primeira chamada e
+    reaproveitado pelo processo (ver limpar_cache_google_sheets)
+    """
+    global _cliente
+    with _cliente_lock:
+        if _cliente is None:
+            _cliente = criar_google_sheets_client()
+        return _cliente
+
+
+def abrir_planilha():
+    """Planilha SPREADSHEET_ID, reaberta (open_by_key) no máximo a cada PLANILHA_TTL segundos"""
+    global _planilha
+    with _cliente_lock:
+        if _planilha is not None and _planilha[1] > time.monotonic():
+            return _planilha[0]
+
+    spreadsheet = get_google_sheets_client().open_by_key(SPREADSHEET_ID)
+    with _cliente_lock:
+        _planilha = (spreadsheet, time.monotonic() + PLANILHA_TTL)
+    return spreadsheet
+
+
+def limpar_cache_google_sheets():
+    """Descarta cliente e planilha em cache; a próxima chamada autentica e abre de novo"""
+    global _cliente, _planilha
+    with _cliente_lock:
+        _cliente = None
+        _planilha = None
+
+
+def criar_google_sheets_client():
     """
     Cria e retorna um cliente autenticado para Google Sheets
 
@@ -83,24 +153,8 @@ def parse_percentage(value_str):
         return 0.0
 
 
-def parse_date(date_str, year=None):
-    """Converte string de data DD/M para objeto datetime"""
-    if not date_str or date_str.strip() == "":
-        return None
-    try:
-        parts = date_str.split("/")
-        day = int(parts[0])
-        month = int(parts[1])
-        # Se o ano não for especificado, usa o ano atual
-        if year is None:
-            year = datetime.now().year
-        return datetime(year, month, day)
-    except:
-        return None
-
-
 @router.get("/sync-metrics")
-async def sync_metrics_from_sheets():
+def sync_metrics_from_sheets(db: Session = Depends(get_db)):
     """
     Sincroniza métricas de tráfego das planilhas do Google Sheets
 
@@ -108,261 +162,228 @@ async def sync_metrics_from_sheets():
     - [QUIZ] [SE] Métricas de Trafego (Captura de Lead)
     - [ISCA] [SCRIPT] Métricas de Trafego (Venda Direta)
 
-    Retorna os dados processados no formato esperado pelos dashboards
+    Grava as linhas diárias em sheets_metricas_diarias (abas sem mudança
+    desde a última sincronização são puladas pelo hash do conteúdo; nas
+    demais só as linhas novas ou alteradas são gravadas) e retorna os dados
+    no formato esperado pelos dashboards, com as contagens de linhas
+    inseridas/atualizadas/inalteradas/removidas por aba
     """
+    from app.scheduler import lock_entre_processos
+
     try:
-        client = get_google_sheets_client()
-        spreadsheet = client.open_by_key(SPREADSHEET_ID)
+        with lock_entre_processos() as obtido:
+            if not obtido:
+                raise HTTPException(status_code=409, detail="Sincronização já em andamento")
+
+            resumo = sincronizar_planilha(db, abrir_planilha())
 
-        # Buscar dados de ambas as abas
-        quiz_data = sync_quiz_se_metrics(spreadsheet)
-        script_data = sync_isca_script_metrics(spreadsheet)
+        data = {}
+        for tipo in ABAS:
+            data[tipo] = resumo[tipo] if "error" in resumo[tipo] else montar_resposta(db, tipo)
 
         return {
             "success": True,
             "message": "Métricas sincronizadas com sucesso",
-            "data": {
-                "captura_lead": quiz_data,
-                "venda_direta": script_data
-            }
+            "sincronizacao": resumo,
+            "data": data
         }
+    except HTTPException:
+        raise
     except Exception as e:
+        db.rollback()
         raise HTTPException(status_code=500, detail=f"Erro ao sincronizar: {str(e)}")
 
 
-def sync_quiz_se_metrics(spreadsheet):
-    """Sincroniza métricas da aba QUIZ/SE (Captura de Lead)"""
-    try:
-        worksheet = spreadsheet.worksheet("[QUIZ] [SE] Métricas de Trafego")
-
-        # Pegar todos os valores
-        all_values = worksheet.get_all_values()
-
-        # Encontrar onde começa a análise diária (linha com "Análise Diária")
-        daily_start_row = None
-        for idx, row in enumerate(all_values):
-            if row and "Análise Diária" in str(row[0]):
-                daily_start_row = idx + 2  # Pular header também
-                break
-
-        if not daily_start_row:
-            return {"error": "Seção de Análise Diária não encontrada"}
-
-        # Processar dados diários
-        daily_data = []
-        headers = all_values[daily_start_row - 1]  # Header row
-
-        for row in all_values[daily_start_row:]:
-            if not row or not row[0]:  # Linha vazia
-                continue
-
-            date_obj = parse_date(row[0])
-            if not date_obj:
-                continue
-
-            daily_data.append({
-                "data": date_obj.strftime("%Y-%m-%d"),
-                "dia": date_obj.day,
-                "mes": date_obj.month,
-                "ano": date_obj.year,
-                "valor_gasto": parse_currency(row[1]) if len(row) > 1 else 0,
-                "leads": int(row[2]) if len(row) > 2 and row[2].strip() else 0,
-                "cpl": parse_currency(row[3]) if len(row) > 3 else 0,
-                "cliques": int(row[4]) if len(row) > 4 and row[4].strip() else 0,
-                "cpc": parse_currency(row[5]) if len(row) > 5 else 0,
-                "ctr": parse_percentage(row[6]) if len(row) > 6 else 0,
-                "cpm": parse_currency(row[7]) if len(row) > 7 else 0,
-                "connect_rate": parse_percentage(row[8]) if len(row) > 8 else 0,
-                "conv_pg": parse_percentage(row[9]) if len(row) > 9 else 0,
-                "opt_in": parse_percentage(row[10]) if len(row) > 10 else 0,
-                "impressoes": int(row[11]) if len(row) > 11 and row[11].strip() else 0,
-                "vis_pagina": int(row[12]) if len(row) > 12 and row[12].strip() else 0,
-                "vv_3s": int(row[13]) if len(row) > 13 and row[13].strip() else 0,
-                "vv_75": int(row[14]) if len(row) > 14 and row[14].strip() else 0,
-                "hook_rate": parse_percentage(row[15]) if len(row) > 15 else 0,
-                "view_75": parse_percentage(row[16]) if len(row) > 16 else 0,
-            })
-
-        # Calcular totais
-        totais = {
-            "valor_gasto": sum(d["valor_gasto"] for d in daily_data),
-            "leads": sum(d["leads"] for d in daily_data),
-            "cliques": sum(d["cliques"] for d in daily_data),
-            "impressoes": sum(d["impressoes"] for d in daily_data),
-        }
+@router.post("/sync-metrics/executar", status_code=202)
+def disparar_sync_metrics():
+    """
+    Dispara a sincronização em segundo plano e retorna imediatamente.
+    Acompanhe o resultado em GET /google-sheets/sync-metrics/status.
+    """
+    from app.scheduler import disparar_sync_google_sheets
 
-        # Calcular médias ponderadas
-        if totais["leads"] > 0:
-            totais["cpl"] = totais["valor_gasto"] / totais["leads"]
-        else:
-            totais["cpl"] = 0
+    iniciado = disparar_sync_google_sheets()
+    return {
+        "success": True,
+        "iniciado": iniciado,
+        "message": "Sincronização iniciada" if iniciado else "Sincronização já em andamento"
+    }
 
-        if totais["cliques"] > 0:
-            totais["cpc"] = totais["valor_gasto"] / totais["cliques"]
-        else:
-            totais["cpc"] = 0
 
-        if totais["impressoes"] > 0:
-            totais["ctr"] = (totais["cliques"] / totais["impressoes"]) * 100
-            totais["cpm"] = (totais["valor_gasto"] / totais["impressoes"]) * 1000
-        else:
-            totais["ctr"] = 0
-            totais["cpm"] = 0
+@router.get("/sync-metrics/status")
+def status_sync_metrics(limite: int = 10, db: Session = Depends(get_db)):
+    """
+    Últimas execuções da sincronização (agendadas e manuais), com duração e linhas.
+    """
+    from app.scheduler import JOB_SYNC_SHEETS, listar_execucoes
 
-        return {
-            "dados_diarios": daily_data,
-            "totais": totais,
-            "tipo": "captura_lead"
-        }
-    except Exception as e:
-        return {"error": f"Erro ao processar aba Quiz/SE: {str(e)}"}
+    return listar_execucoes(db, JOB_SYNC_SHEETS, limite)
 
 
-def sync_isca_script_metrics(spreadsheet):
-    """Sincroniza métricas da aba ISCA/SCRIPT (Venda Direta)"""
-    try:
-        worksheet = spreadsheet.worksheet("[ISCA] [SCRIPT] Métricas de Trafego")
-
-        # Pegar todos os valores
-        all_values = worksheet.get_all_values()
-
-        # Encontrar onde começa a análise diária
-        daily_start_row = None
-        for idx, row in enumerate(all_values):
-            if row and "Análise Diária" in str(row[0]):
-                daily_start_row = idx + 2
-                break
-
-        if not daily_start_row:
-            return {"error": "Seção de Análise Diária não encontrada"}
-
-        # Processar dados diários
-        daily_data = []
-
-        for row in all_values[daily_start_row:]:
-            if not row or not row[0]:
-                continue
-
-            date_obj = parse_date(row[0])
-            if not date_obj:
-                continue
-
-            daily_data.append({
-                "data": date_obj.strftime("%Y-%m-%d"),
-                "dia": date_obj.day,
-                "mes": date_obj.month,
-                "ano": date_obj.year,
-                "valor_gasto": parse_currency(row[1]) if len(row) > 1 else 0,
-                "vendas": int(row[2]) if len(row) > 2 and row[2].strip() else 0,
-                "cpa": parse_currency(row[3]) if len(row) > 3 else 0,
-                "cliques": int(row[4]) if len(row) > 4 and row[4].strip() else 0,
-                "cpc": parse_currency(row[5]) if len(row) > 5 else 0,
-                "ctr": parse_percentage(row[6]) if len(row) > 6 else 0,
-                "cpm": parse_currency(row[7]) if len(row) > 7 else 0,
-                "connect_rate": parse_percentage(row[8]) if len(row) > 8 else 0,
-                "conv_pg": parse_percentage(row[9]) if len(row) > 9 else 0,
-                "opt_in": parse_percentage(row[10]) if len(row) > 10 else 0,
-                "impressoes": int(row[11]) if len(row) > 11 and row[11].strip() else 0,
-                "vis_pagina": int(row[12]) if len(row) > 12 and row[12].strip() else 0,
-                "vv_3s": int(row[13]) if len(row) > 13 and row[13].strip() else 0,
-                "vv_75": int(row[14]) if len(row) > 14 and row[14].strip() else 0,
-                "init_checkout": int(row[15]) if len(row) > 15 and row[15].strip() else 0,
-                "hook_rate": parse_percentage(row[16]) if len(row) > 16 else 0,
-                "view_75": parse_percentage(row[17]) if len(row) > 17 else 0,
-            })
-
-        # Calcular totais
-        totais = {
-            "valor_gasto": sum(d["valor_gasto"] for d in daily_data),
-            "vendas": sum(d["vendas"] for d in daily_data),
-            "cliques": sum(d["cliques"] for d in daily_data),
-            "impressoes": sum(d["impressoes"] for d in daily_data),
-            "init_checkout": sum(d["init_checkout"] for d in daily_data),
-        }
+# ==================== SNAPSHOTS NO BANCO ====================
 
-        # Calcular médias
-        if totais["vendas"] > 0:
-            totais["cpa"] = totais["valor_gasto"] / totais["vendas"]
-        else:
-            totais["cpa"] = 0
+hash_valores = sheets_diario.hash_valores
 
-        if totais["cliques"] > 0:
-            totais["cpc"] = totais["valor_gasto"] / totais["cliques"]
-        else:
-            totais["cpc"] = 0
 
-        if totais["impressoes"] > 0:
-            totais["ctr"] = (totais["cliques"] / totais["impressoes"]) * 100
-            totais["cpm"] = (totais["valor_gasto"] / totais["impressoes"]) * 1000
-        else:
-            totais["ctr"] = 0
-            totais["cpm"] = 0
+def persistir_aba(db: Session, tipo: str, all_values) -> Dict[str, Any]:
+    """
+    Grava as linhas diárias de uma aba em SheetsMetricaDiaria.
+
+    Se o hash do conteúdo (aba ou seção) for igual ao da última
+    sincronização, não converte nada. Senão converte as linhas por coluna e
+    compara a impressão digital (hash das células) de cada linha com a
+    gravada para a mesma data: só as linhas novas ou alteradas são gravadas
+    (INSERT / UPDATE em lote), e as datas que saíram da planilha são apagadas.
+    """
+    agora = datetime.now()
+    content_hash = hash_valores(all_values)
+    snapshot = db.query(SheetsSnapshot).filter(SheetsSnapshot.tipo == tipo).first()
 
-        # ROAS simulado (você pode adicionar faturamento na planilha depois)
-        totais["roas"] = 0
-        totais["faturamento"] = 0
+    if snapshot and snapshot.content_hash == content_hash:
+        snapshot.synced_at = agora
+        return {"alterado": False, "linhas": snapshot.linhas,
+                "inseridas": 0, "atualizadas": 0, "inalteradas": snapshot.linhas, "removidas": 0}
 
-        return {
-            "dados_diarios": daily_data,
-            "totais": totais,
-            "tipo": "venda_direta"
-        }
+    try:
+        df = sheets_diario.converter(all_values, CAMPOS[tipo])
     except Exception as e:
-        return {"error": f"Erro ao processar aba Isca/Script: {str(e)}"}
+        return {"error": f"Erro ao processar aba {ABAS[tipo]}: {str(e)}"}
+    if df is None:
+        return {"error": "Seção de Análise Diária não encontrada"}
+
+    # Uma linha por data (se a planilha repetir a data, vale a última)
+    df = df.drop_duplicates("data", keep="last")
+
+    gravadas = pd.DataFrame(
+        db.query(SheetsMetricaDiaria.id, SheetsMetricaDiaria.data, SheetsMetricaDiaria.row_hash)
+        .filter(SheetsMetricaDiaria.tipo == tipo).all(),
+        columns=["id", "data", "hash_gravado"]
+    )
+    df = df.merge(gravadas, on="data", how="left")
+
+    novas = df[df["id"].isna()].drop(columns=["id", "hash_gravado"]).assign(tipo=tipo)
+    alteradas = df[df["id"].notna() & (df["row_hash"] != df["hash_gravado"])].drop(columns=["data", "hash_gravado"])
+    alteradas = alteradas.assign(id=alteradas["id"].astype("int64"))
+    removidas = gravadas.loc[~gravadas["data"].isin(df["data"]), "id"].tolist()
+
+    if removidas:
+        db.query(SheetsMetricaDiaria).filter(SheetsMetricaDiaria.id.in_(removidas)).delete(synchronize_session=False)
+    if len(novas):
+        db.execute(insert(SheetsMetricaDiaria), novas.to_dict(orient="records"))
+    if len(alteradas):
+        db.execute(update(SheetsMetricaDiaria), alteradas.to_dict(orient="records"))
+
+    if snapshot is None:
+        snapshot = SheetsSnapshot(tipo=tipo)
+        db.add(snapshot)
+    snapshot.aba = ABAS[tipo]
+    snapshot.content_hash = content_hash
+    snapshot.linhas = len(df)
+    snapshot.synced_at = agora
+    snapshot.changed_at = agora
+
+    return {"alterado": True, "linhas": len(df), "inseridas": len(novas), "atualizadas": len(alteradas),
+            "inalteradas": len(df) - len(novas) - len(alteradas), "removidas": len(removidas)}
+
+
+def sincronizar_planilha(db: Session, spreadsheet) -> Dict[str, Any]:
+    """
+    Lê a seção "Análise Diária" das abas configuradas em ABAS (uma chamada à
+    API para todas, ver app/sheets_diario.py) e grava os snapshots. Faz commit.
+    """
+    secoes = sheets_diario.ler_secoes(spreadsheet, ABAS)
+    if any("error" in secao for secao in secoes.values()):
+        # Credencial revogada, aba renomeada...: autentica e abre de novo na próxima
+        limpar_cache_google_sheets()
+
+    resumo = {}
+    for tipo in ABAS:
+        secao = secoes[tipo]
+        resumo[tipo] = secao if "error" in secao else persistir_aba(db, tipo, secao["valores"])
+
+    db.commit()
+    return resumo
+
+
+def _garantir_snapshot(db: Session, tipo: str):
+    """Na primeira leitura (banco nunca sincronizado) busca a planilha uma vez."""
+    if db.query(SheetsSnapshot.id).filter(SheetsSnapshot.tipo == tipo).first() is not None:
+        return
+    resumo = sincronizar_planilha(db, abrir_planilha())
+    if "error" in resumo[tipo]:
+        raise HTTPException(status_code=500, detail=resumo[tipo]["error"])
+
+
+def consultar_dados_diarios(db: Session, tipo: str, mes: Optional[int] = None,
+                            ano: Optional[int] = None) -> List[Dict[str, Any]]:
+    """Linhas diárias gravadas de um tipo, opcionalmente filtradas por mês/ano."""
+    query = db.query(SheetsMetricaDiaria).filter(SheetsMetricaDiaria.tipo == tipo)
+    if mes and ano:
+        query = query.filter(SheetsMetricaDiaria.mes == mes, SheetsMetricaDiaria.ano == ano)
+
+    dados = []
+    for linha in query.order_by(SheetsMetricaDiaria.data).all():
+        dia = {
+            "data": linha.data.strftime("%Y-%m-%d"),
+            "dia": linha.dia,
+            "mes": linha.mes,
+            "ano": linha.ano,
+        }
+        for campo in CAMPOS[tipo]:
+            dia[campo] = getattr(linha, campo) or 0
+        dados.append(dia)
+    return dados
+
+
+def montar_resposta(db: Session, tipo: str, mes: Optional[int] = None,
+                    ano: Optional[int] = None) -> Dict[str, Any]:
+    """Resposta no formato dos dashboards (dados_diarios + totais) a partir do banco."""
+    dados = consultar_dados_diarios(db, tipo, mes, ano)
+    calcular_totais = calcular_totais_captura if tipo == "captura_lead" else calcular_totais_venda
+    snapshot = db.query(SheetsSnapshot).filter(SheetsSnapshot.tipo == tipo).first()
+
+    return {
+        "dados_diarios": dados,
+        "totais": calcular_totais(dados),
+        "tipo": tipo,
+        "sincronizado_em": snapshot.synced_at.isoformat() if snapshot and snapshot.synced_at else None
+    }
 
 
 @router.get("/captura-lead")
-async def get_captura_lead_metrics(mes: Optional[int] = None, ano: Optional[int] = None):
+def get_captura_lead_metrics(
+    mes: Optional[int] = None,
+    ano: Optional[int] = None,
+    db: Session = Depends(get_db)
+):
     """
-    Retorna métricas de Captura de Lead (Quiz/SE) da planilha
+    Retorna métricas de Captura de Lead (Quiz/SE) gravadas pela sincronização
     Pode filtrar por mês e ano
     """
     try:
-        client = get_google_sheets_client()
-        spreadsheet = client.open_by_key(SPREADSHEET_ID)
-        data = sync_quiz_se_metrics(spreadsheet)
-
-        if "error" in data:
-            raise HTTPException(status_code=500, detail=data["error"])
-
-        # Filtrar por mês/ano se fornecido
-        if mes and ano:
-            data["dados_diarios"] = [
-                d for d in data["dados_diarios"]
-                if d["mes"] == mes and d["ano"] == ano
-            ]
-            # Recalcular totais
-            data["totais"] = calcular_totais_captura(data["dados_diarios"])
-
-        return data
+        _garantir_snapshot(db, "captura_lead")
+        return montar_resposta(db, "captura_lead", mes, ano)
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 
 @router.get("/venda-direta")
-async def get_venda_direta_metrics(mes: Optional[int] = None, ano: Optional[int] = None):
+def get_venda_direta_metrics(
+    mes: Optional[int] = None,
+    ano: Optional[int] = None,
+    db: Session = Depends(get_db)
+):
     """
-    Retorna métricas de Venda Direta (Isca/Script) da planilha
+    Retorna métricas de Venda Direta (Isca/Script) gravadas pela sincronização
     Pode filtrar por mês e ano
     """
     try:
-        client = get_google_sheets_client()
-        spreadsheet = client.open_by_key(SPREADSHEET_ID)
-        data = sync_isca_script_metrics(spreadsheet)
-
-        if "error" in data:
-            raise HTTPException(status_code=500, detail=data["error"])
-
-        # Filtrar por mês/ano se fornecido
-        if mes and ano:
-            data["dados_diarios"] = [
-                d for d in data["dados_diarios"]
-                if d["mes"] == mes and d["ano"] == ano
-            ]
-            # Recalcular totais
-            data["totais"] = calcular_totais_venda(data["dados_diarios"])
-
-        return data
+        _garantir_snapshot(db, "venda_direta")
+        return montar_resposta(db, "venda_direta", mes, ano)
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
@@ -6,11 +6,14 @@ Imports financial, sales, and metrics data from CSV files.
 from fastapi import APIRouter, Depends, HTTPException, UploadFile, File
 from sqlalchemy.orm import Session
 import pandas as pd
+import numpy as np
 import io
+import csv
 from datetime import datetime
 from typing import List, Dict, Any
 
 from app.database import get_db
+from app import bulk_insert, cache, rollups
 from app.models.models import (
     Financeiro, Venda, SocialSellingMetrica, SDRMetrica, CloserMetrica
 )
@@ -70,8 +73,168 @@ def parse_int(value):
         return 0
 
 
+# ==================== PARSERS VETORIZADOS ====================
+# Versões por coluna dos parsers acima: operam na Series inteira de uma vez.
+
+FORMATOS_DATA = ['%Y-%m-%d', '%d/%m/%Y', '%d-%m-%Y', '%Y/%m/%d', '%d.%m.%Y']
+LIMITE_DETALHES_ERROS = 10
+
+
+def _texto(serie: pd.Series) -> pd.Series:
+    """Series como texto sem espaços nas pontas, preservando os vazios (NaN)."""
+    if serie.dtype != object:
+        serie = serie.astype(str).where(serie.notna())
+    return serie.str.strip()
+
+
+def _numeros(serie: pd.Series) -> pd.Series:
+    """Conversão direta para float (rápida); se houver valor inválido, cai no to_numeric."""
+    try:
+        return serie.astype(float)
+    except (ValueError, TypeError):
+        return pd.to_numeric(serie, errors='coerce')
+
+
+def parse_float_col(serie: pd.Series) -> pd.Series:
+    """Versão vetorizada de parse_float (R$, 1.234,56, vazios viram 0.0)."""
+    if pd.api.types.is_numeric_dtype(serie):
+        return serie.astype(float).fillna(0.0)
+
+    # Caminho rápido: valores já no formato numérico padrão
+    numeros = _numeros(serie)
+    pendentes = numeros.isna() & serie.notna()
+
+    if pendentes.any():
+        texto = _texto(serie[pendentes]).str.replace(r'R\$|\s', '', regex=True)
+        tem_virgula = texto.str.contains(',', regex=False)
+        formato_br = tem_virgula & texto.str.contains('.', regex=False)
+        texto = texto.mask(formato_br, texto.str.replace('.', '', regex=False))
+        texto = texto.mask(tem_virgula, texto.str.replace(',', '.', regex=False))
+        numeros[pendentes] = pd.to_numeric(texto, errors='coerce')
+
+    return numeros.astype(float).fillna(0.0)
+
+
+def parse_int_col(serie: pd.Series) -> pd.Series:
+    """Versão vetorizada de parse_int (trunca decimais, inválidos viram 0)."""
+    if not pd.api.types.is_numeric_dtype(serie):
+        numeros = _numeros(serie)
+        pendentes = numeros.isna() & serie.notna()
+        if pendentes.any():
+            numeros[pendentes] = pd.to_numeric(_texto(serie[pendentes]), errors='coerce')
+        serie = numeros
+    serie = serie.astype(float)
+    serie = serie.where(np.isfinite(serie), 0.0)
+    return np.trunc(serie).astype('int64')
+
+
+def parse_date_col(serie: pd.Series) -> pd.Series:
+    """Versão vetorizada de parse_date: tenta cada formato nas linhas ainda sem data."""
+    texto = _texto(serie)
+    datas = pd.Series(pd.NaT, index=serie.index, dtype='datetime64[ns]')
+
+    for fmt in FORMATOS_DATA:
+        pendentes = datas.isna() & texto.notna()
+        if not pendentes.any():
+            break
+        datas[pendentes] = pd.to_datetime(texto[pendentes], format=fmt, errors='coerce')
+
+    return datas.dt.date.where(datas.notna(), None)
+
+
+def texto_col(df: pd.DataFrame, coluna: str, padrao=None) -> pd.Series:
+    """Coluna de texto sem espaços nas pontas; vazios/ausentes viram o padrão."""
+    if coluna not in df.columns:
+        return pd.Series(padrao, index=df.index, dtype=object)
+    texto = _texto(df[coluna])
+    return texto.where(texto.notna() & (texto != ''), padrao)
+
+
+def coletar_erros(df: pd.DataFrame, regras):
+    """
+    Aplica as regras de validação como máscaras sobre o DataFrame.
+
+    regras: lista de (mascara_invalida, mensagem). A mensagem pode conter
+    {valor}, preenchido com o valor da linha se a regra trouxer uma Series
+    como terceiro elemento. Cada linha conta uma vez (primeira regra que falhar).
+
+    Retorna (mascara_validos, total_erros, detalhes ordenados por linha).
+    """
+    invalidos = pd.Series(False, index=df.index)
+    detalhes = []
+
+    for regra in regras:
+        mascara, mensagem = regra[0], regra[1]
+        valores = regra[2] if len(regra) > 2 else None
+        novos = mascara & ~invalidos
+        for idx in df.index[novos][:LIMITE_DETALHES_ERROS]:
+            texto = mensagem.format(valor=valores[idx]) if valores is not None else mensagem
+            detalhes.append((idx, f"Linha {idx + 2}: {texto}"))
+        invalidos |= novos
+
+    detalhes.sort(key=lambda item: item[0])
+    return ~invalidos, int(invalidos.sum()), [msg for _, msg in detalhes[:LIMITE_DETALHES_ERROS]]
+
+
+def _ler_csv(file: UploadFile) -> pd.DataFrame:
+    """Lê o CSV enviado (tentando encodings) e normaliza os nomes das colunas."""
+    if not file.filename.endswith('.csv'):
+        raise HTTPException(status_code=400, detail="Arquivo deve ser CSV")
+
+    contents = file.file.read()
+
+    for encoding in ['utf-8', 'latin-1', 'cp1252']:
+        try:
+            texto = contents.decode(encoding)
+            break
+        except UnicodeDecodeError:
+            continue
+    else:
+        raise HTTPException(status_code=400, detail="Não foi possível ler o arquivo CSV")
+
+    # Detecta o separador numa amostra e usa o parser C do pandas
+    # (sep=None força o engine python, bem mais lento em arquivos grandes)
+    try:
+        sep = csv.Sniffer().sniff(texto[:8192], delimiters=',;\t|').delimiter
+        df = pd.read_csv(io.StringIO(texto), sep=sep, dtype=str)
+    except Exception:
+        try:
+            df = pd.read_csv(io.StringIO(texto), sep=None, engine='python', dtype=str)
+        except Exception:
+            raise HTTPException(status_code=400, detail="Não foi possível ler o arquivo CSV")
+
+    df.columns = df.columns.str.lower().str.strip().str.replace(' ', '_')
+    return df.reset_index(drop=True)
+
+
+def _validar_colunas(df: pd.DataFrame, required: List[str]):
+    missing = [col for col in required if col not in df.columns]
+    if missing:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Colunas obrigatórias faltando: {', '.join(missing)}"
+        )
+
+
+def _regras_periodo(mes: pd.Series, ano: pd.Series):
+    return [
+        (~mes.between(1, 12), "mes inválido"),
+        (ano <= 0, "ano inválido"),
+    ]
+
+
+def _taxa(numerador: pd.Series, denominador: pd.Series, fator: float = 100) -> pd.Series:
+    """numerador / denominador * fator, 0 quando denominador <= 0, arredondado em 2 casas."""
+    taxa = np.where(denominador > 0, numerador / denominador.where(denominador > 0, 1) * fator, 0.0)
+    return pd.Series(taxa, index=numerador.index).round(2)
+
+
+def _periodos(df: pd.DataFrame):
+    return set(zip(df['ano'].tolist(), df['mes'].tolist()))
+
+
 @router.post("/financeiro/csv")
-async def import_financeiro_csv(
+def import_financeiro_csv(
     file: UploadFile = File(...),
     db: Session = Depends(get_db)
 ):
@@ -95,77 +258,45 @@ async def import_financeiro_csv(
     - previsto_realizado (opcional): previsto ou realizado
     """
     try:
-        # Verificar extensão
-        if not file.filename.endswith('.csv'):
-            raise HTTPException(status_code=400, detail="Arquivo deve ser CSV")
-
-        # Ler arquivo
-        contents = await file.read()
-
-        # Tentar diferentes encodings
-        for encoding in ['utf-8', 'latin-1', 'cp1252']:
-            try:
-                df = pd.read_csv(io.StringIO(contents.decode(encoding)), sep=None, engine='python')
-                break
-            except:
-                continue
-        else:
-            raise HTTPException(status_code=400, detail="Não foi possível ler o arquivo CSV")
-
-        # Normalizar nomes das colunas
-        df.columns = df.columns.str.lower().str.strip().str.replace(' ', '_')
-
-        # Validar colunas obrigatórias
-        required = ['tipo', 'valor', 'mes', 'ano']
-        missing = [col for col in required if col not in df.columns]
-        if missing:
-            raise HTTPException(
-                status_code=400,
-                detail=f"Colunas obrigatórias faltando: {', '.join(missing)}"
-            )
-
-        # Processar registros
-        count = 0
-        errors = []
-
-        for idx, row in df.iterrows():
-            try:
-                tipo = str(row['tipo']).strip().lower()
-                if tipo not in ['entrada', 'saida', 'saída']:
-                    errors.append(f"Linha {idx + 2}: tipo inválido '{tipo}'")
-                    continue
-
-                tipo = 'saida' if tipo in ['saida', 'saída'] else 'entrada'
-
-                novo = Financeiro(
-                    tipo=tipo,
-                    valor=parse_float(row['valor']),
-                    mes=parse_int(row['mes']),
-                    ano=parse_int(row['ano']),
-                    data=parse_date(row.get('data')),
-                    categoria=str(row.get('categoria', '')).strip() or None,
-                    descricao=str(row.get('descricao', '')).strip() or None,
-                    produto=str(row.get('produto', '')).strip() or None,
-                    plano=str(row.get('plano', '')).strip() or None,
-                    modelo=str(row.get('modelo', '')).strip() or None,
-                    custo=str(row.get('custo', '')).strip() or None,
-                    tipo_custo=str(row.get('tipo_custo', '')).strip() or None,
-                    centro_custo=str(row.get('centro_custo', '')).strip() or None,
-                    previsto_realizado=str(row.get('previsto_realizado', 'realizado')).strip() or 'realizado'
-                )
-                db.add(novo)
-                count += 1
-
-            except Exception as e:
-                errors.append(f"Linha {idx + 2}: {str(e)}")
-
+        df = _ler_csv(file)
+        _validar_colunas(df, ['tipo', 'valor', 'mes', 'ano'])
+
+        # Processar colunas
+        tipo = df['tipo'].astype(str).str.strip().str.lower()
+        mes = parse_int_col(df['mes'])
+        ano = parse_int_col(df['ano'])
+
+        validos, total_erros, errors = coletar_erros(df, [
+            (~tipo.isin(['entrada', 'saida', 'saída']), "tipo inválido '{valor}'", tipo),
+            *_regras_periodo(mes, ano),
+        ])
+
+        registros = pd.DataFrame({
+            'tipo': tipo.replace('saída', 'saida'),
+            'valor': parse_float_col(df['valor']),
+            'mes': mes,
+            'ano': ano,
+            'data': parse_date_col(df['data']) if 'data' in df.columns else None,
+            'categoria': texto_col(df, 'categoria'),
+            'descricao': texto_col(df, 'descricao'),
+            'produto': texto_col(df, 'produto'),
+            'plano': texto_col(df, 'plano'),
+            'modelo': texto_col(df, 'modelo'),
+            'custo': texto_col(df, 'custo'),
+            'tipo_custo': texto_col(df, 'tipo_custo'),
+            'centro_custo': texto_col(df, 'centro_custo'),
+            'previsto_realizado': texto_col(df, 'previsto_realizado', 'realizado'),
+        })[validos]
+
+        count = bulk_insert.inserir_dataframe(db, Financeiro, registros)
         db.commit()
+        cache.invalidar(Financeiro.__tablename__)
 
         return {
             "message": f"{count} registros financeiros importados com sucesso",
             "importados": count,
-            "erros": len(errors),
-            "detalhes_erros": errors[:10] if errors else []  # Limitar a 10 erros
+            "erros": total_erros,
+            "detalhes_erros": errors  # Limitado a 10 erros
         }
 
     except HTTPException:
@@ -176,7 +307,7 @@ async def import_financeiro_csv(
 
 
 @router.post("/vendas/csv")
-async def import_vendas_csv(
+def import_vendas_csv(
     file: UploadFile = File(...),
     db: Session = Depends(get_db)
 ):
@@ -200,75 +331,54 @@ async def import_vendas_csv(
     - valor_pago (opcional)
     """
     try:
-        if not file.filename.endswith('.csv'):
-            raise HTTPException(status_code=400, detail="Arquivo deve ser CSV")
-
-        contents = await file.read()
-
-        for encoding in ['utf-8', 'latin-1', 'cp1252']:
-            try:
-                df = pd.read_csv(io.StringIO(contents.decode(encoding)), sep=None, engine='python')
-                break
-            except:
-                continue
-        else:
-            raise HTTPException(status_code=400, detail="Não foi possível ler o arquivo CSV")
-
-        df.columns = df.columns.str.lower().str.strip().str.replace(' ', '_')
+        df = _ler_csv(file)
 
         # Verificar coluna de valor
         valor_col = 'valor_bruto' if 'valor_bruto' in df.columns else 'valor'
-        required = ['data', valor_col, 'mes', 'ano']
-        missing = [col for col in required if col not in df.columns]
-        if missing:
-            raise HTTPException(
-                status_code=400,
-                detail=f"Colunas obrigatórias faltando: {', '.join(missing)}"
-            )
-
-        count = 0
-        errors = []
-
-        for idx, row in df.iterrows():
-            try:
-                data = parse_date(row['data'])
-                if not data:
-                    errors.append(f"Linha {idx + 2}: data inválida")
-                    continue
-
-                valor_bruto = parse_float(row[valor_col])
-                valor_liquido = parse_float(row.get('valor_liquido', valor_bruto))
-
-                nova = Venda(
-                    data=data,
-                    valor_bruto=valor_bruto,
-                    valor_liquido=valor_liquido,
-                    valor=valor_bruto,  # Campo legado
-                    mes=parse_int(row['mes']),
-                    ano=parse_int(row['ano']),
-                    cliente=str(row.get('cliente', '')).strip() or None,
-                    funil=str(row.get('funil', '')).strip() or None,
-                    vendedor=str(row.get('vendedor', '')).strip() or None,
-                    closer=str(row.get('closer', '')).strip() or None,
-                    tipo_receita=str(row.get('tipo_receita', '')).strip() or None,
-                    produto=str(row.get('produto', '')).strip() or None,
-                    booking=parse_float(row.get('booking')),
-                    previsto=parse_float(row.get('previsto')),
-                    valor_pago=parse_float(row.get('valor_pago'))
-                )
-                db.add(nova)
-                count += 1
-
-            except Exception as e:
-                errors.append(f"Linha {idx + 2}: {str(e)}")
-
+        _validar_colunas(df, ['data', valor_col, 'mes', 'ano'])
+
+        data = parse_date_col(df['data'])
+        mes = parse_int_col(df['mes'])
+        ano = parse_int_col(df['ano'])
+
+        validos, total_erros, errors = coletar_erros(df, [
+            (data.isna(), "data inválida"),
+            *_regras_periodo(mes, ano),
+        ])
+
+        valor_bruto = parse_float_col(df[valor_col])
+        valor_liquido = parse_float_col(df['valor_liquido']) if 'valor_liquido' in df.columns else valor_bruto
+
+        def _float_opcional(coluna):
+            return parse_float_col(df[coluna]) if coluna in df.columns else 0.0
+
+        registros = pd.DataFrame({
+            'data': data,
+            'valor_bruto': valor_bruto,
+            'valor_liquido': valor_liquido,
+            'valor': valor_bruto,  # Campo legado
+            'mes': mes,
+            'ano': ano,
+            'cliente': texto_col(df, 'cliente'),
+            'funil': texto_col(df, 'funil'),
+            'vendedor': texto_col(df, 'vendedor'),
+            'closer': texto_col(df, 'closer'),
+            'tipo_receita': texto_col(df, 'tipo_receita'),
+            'produto': texto_col(df, 'produto'),
+            'booking': _float_opcional('booking'),
+            'previsto': _float_opcional('previsto'),
+            'valor_pago': _float_opcional('valor_pago'),
+        })[validos]
+
+        count = bulk_insert.inserir_dataframe(db, Venda, registros)
         db.commit()
+        cache.invalidar(Venda.__tablename__)
 
         return {
             "message": f"{count} vendas importadas com sucesso",
             "importados": count,
-            "erros": len(errors),
-            "detalhes_erros": errors[:10] if errors else []
+            "erros": total_erros,
+            "detalhes_erros": errors
         }
 
     except HTTPException:
@@ -279,7 +389,7 @@ async def import_vendas_csv(
 
 
 @router.post("/social-selling/csv")
-async def import_social_selling_csv(
+def import_social_selling_csv(
     file: UploadFile = File(...),
     db: Session = Depends(get_db)
 ):
@@ -297,65 +407,43 @@ async def import_social_selling_csv(
     - meta_leads (opcional)
     """
     try:
-        if not file.filename.endswith('.csv'):
-            raise HTTPException(status_code=400, detail="Arquivo deve ser CSV")
-
-        contents = await file.read()
-
-        for encoding in ['utf-8', 'latin-1', 'cp1252']:
-            try:
-                df = pd.read_csv(io.StringIO(contents.decode(encoding)), sep=None, engine='python')
-                break
-            except:
-                continue
-        else:
-            raise HTTPException(status_code=400, detail="Não foi possível ler o arquivo CSV")
-
-        df.columns = df.columns.str.lower().str.strip().str.replace(' ', '_')
-
-        required = ['vendedor', 'mes', 'ano', 'ativacoes', 'conversoes', 'leads_gerados']
-        missing = [col for col in required if col not in df.columns]
-        if missing:
-            raise HTTPException(
-                status_code=400,
-                detail=f"Colunas obrigatórias faltando: {', '.join(missing)}"
-            )
-
-        count = 0
-        errors = []
-
-        for idx, row in df.iterrows():
-            try:
-                ativacoes = parse_int(row['ativacoes'])
-                conversoes = parse_int(row['conversoes'])
-                leads = parse_int(row['leads_gerados'])
-
-                tx_ativ_conv = (conversoes / ativacoes * 100) if ativacoes > 0 else 0
-                tx_conv_lead = (leads / conversoes * 100) if conversoes > 0 else 0
-
-                novo = SocialSellingMetrica(
-                    vendedor=str(row['vendedor']).strip(),
-                    mes=parse_int(row['mes']),
-                    ano=parse_int(row['ano']),
-                    ativacoes=ativacoes,
-                    conversoes=conversoes,
-                    leads_gerados=leads,
-                    tx_ativ_conv=round(tx_ativ_conv, 2),
-                    tx_conv_lead=round(tx_conv_lead, 2)
-                )
-                db.add(novo)
-                count += 1
-
-            except Exception as e:
-                errors.append(f"Linha {idx + 2}: {str(e)}")
-
+        df = _ler_csv(file)
+        _validar_colunas(df, ['vendedor', 'mes', 'ano', 'ativacoes', 'conversoes', 'leads_gerados'])
+
+        vendedor = texto_col(df, 'vendedor')
+        mes = parse_int_col(df['mes'])
+        ano = parse_int_col(df['ano'])
+
+        validos, total_erros, errors = coletar_erros(df, [
+            (vendedor.isna(), "vendedor vazio"),
+            *_regras_periodo(mes, ano),
+        ])
+
+        ativacoes = parse_int_col(df['ativacoes'])
+        conversoes = parse_int_col(df['conversoes'])
+        leads = parse_int_col(df['leads_gerados'])
+
+        registros = pd.DataFrame({
+            'vendedor': vendedor,
+            'mes': mes,
+            'ano': ano,
+            'ativacoes': ativacoes,
+            'conversoes': conversoes,
+            'leads_gerados': leads,
+            'tx_ativ_conv': _taxa(conversoes, ativacoes),
+            'tx_conv_lead': _taxa(leads, conversoes),
+        })[validos]
+
+        count = bulk_insert.inserir_dataframe(db, SocialSellingMetrica, registros)
+        rollups.recalcular_periodos(db, 'social_selling', _periodos(registros))
         db.commit()
+        cache.invalidar(SocialSellingMetrica.__tablename__)
 
         return {
             "message": f"{count} métricas de Social Selling importadas",
             "importados": count,
-            "erros": len(errors),
-            "detalhes_erros": errors[:10] if errors else []
+            "erros": total_erros,
+            "detalhes_erros": errors
         }
 
     except HTTPException:
@@ -366,7 +454,7 @@ async def import_social_selling_csv(
 
 
 @router.post("/sdr/csv")
-async def import_sdr_csv(
+def import_sdr_csv(
     file: UploadFile = File(...),
     db: Session = Depends(get_db)
 ):
@@ -384,66 +472,46 @@ async def import_sdr_csv(
     - meta_reunioes (opcional)
     """
     try:
-        if not file.filename.endswith('.csv'):
-            raise HTTPException(status_code=400, detail="Arquivo deve ser CSV")
-
-        contents = await file.read()
-
-        for encoding in ['utf-8', 'latin-1', 'cp1252']:
-            try:
-                df = pd.read_csv(io.StringIO(contents.decode(encoding)), sep=None, engine='python')
-                break
-            except:
-                continue
-        else:
-            raise HTTPException(status_code=400, detail="Não foi possível ler o arquivo CSV")
-
-        df.columns = df.columns.str.lower().str.strip().str.replace(' ', '_')
-
-        required = ['sdr', 'funil', 'mes', 'ano', 'leads_recebidos', 'reunioes_agendadas', 'reunioes_realizadas']
-        missing = [col for col in required if col not in df.columns]
-        if missing:
-            raise HTTPException(
-                status_code=400,
-                detail=f"Colunas obrigatórias faltando: {', '.join(missing)}"
-            )
-
-        count = 0
-        errors = []
-
-        for idx, row in df.iterrows():
-            try:
-                leads = parse_int(row['leads_recebidos'])
-                agendadas = parse_int(row['reunioes_agendadas'])
-                realizadas = parse_int(row['reunioes_realizadas'])
-
-                tx_agend = (agendadas / leads * 100) if leads > 0 else 0
-                tx_comp = (realizadas / agendadas * 100) if agendadas > 0 else 0
-
-                novo = SDRMetrica(
-                    sdr=str(row['sdr']).strip(),
-                    funil=str(row['funil']).strip(),
-                    mes=parse_int(row['mes']),
-                    ano=parse_int(row['ano']),
-                    leads_recebidos=leads,
-                    reunioes_agendadas=agendadas,
-                    reunioes_realizadas=realizadas,
-                    tx_agendamento=round(tx_agend, 2),
-                    tx_comparecimento=round(tx_comp, 2)
-                )
-                db.add(novo)
-                count += 1
-
-            except Exception as e:
-                errors.append(f"Linha {idx + 2}: {str(e)}")
-
+        df = _ler_csv(file)
+        _validar_colunas(df, ['sdr', 'funil', 'mes', 'ano', 'leads_recebidos', 'reunioes_agendadas', 'reunioes_realizadas'])
+
+        sdr = texto_col(df, 'sdr')
+        funil = texto_col(df, 'funil')
+        mes = parse_int_col(df['mes'])
+        ano = parse_int_col(df['ano'])
+
+        validos, total_erros, errors = coletar_erros(df, [
+            (sdr.isna(), "sdr vazio"),
+            (funil.isna(), "funil vazio"),
+            *_regras_periodo(mes, ano),
+        ])
+
+        leads = parse_int_col(df['leads_recebidos'])
+        agendadas = parse_int_col(df['reunioes_agendadas'])
+        realizadas = parse_int_col(df['reunioes_realizadas'])
+
+        registros = pd.DataFrame({
+            'sdr': sdr,
+            'funil': funil,
+            'mes': mes,
+            'ano': ano,
+            'leads_recebidos': leads,
+            'reunioes_agendadas': agendadas,
+            'reunioes_realizadas': realizadas,
+            'tx_agendamento': _taxa(agendadas, leads),
+            'tx_comparecimento': _taxa(realizadas, agendadas),
+        })[validos]
+
+        count = bulk_insert.inserir_dataframe(db, SDRMetrica, registros)
+        rollups.recalcular_periodos(db, 'sdr', _periodos(registros))
         db.commit()
+        cache.invalidar(SDRMetrica.__tablename__)
 
         return {
             "message": f"{count} métricas de SDR importadas",
             "importados": count,
-            "erros": len(errors),
-            "detalhes_erros": errors[:10] if errors else []
+            "erros": total_erros,
+            "detalhes_erros": errors
         }
 
     except HTTPException:
@@ -454,7 +522,7 @@ async def import_sdr_csv(
 
 
 @router.post("/closer/csv")
-async def import_closer_csv(
+def import_closer_csv(
     file: UploadFile = File(...),
     db: Session = Depends(get_db)
 ):
@@ -474,70 +542,49 @@ async def import_closer_csv(
     - meta_faturamento (opcional)
     """
     try:
-        if not file.filename.endswith('.csv'):
-            raise HTTPException(status_code=400, detail="Arquivo deve ser CSV")
-
-        contents = await file.read()
-
-        for encoding in ['utf-8', 'latin-1', 'cp1252']:
-            try:
-                df = pd.read_csv(io.StringIO(contents.decode(encoding)), sep=None, engine='python')
-                break
-            except:
-                continue
-        else:
-            raise HTTPException(status_code=400, detail="Não foi possível ler o arquivo CSV")
-
-        df.columns = df.columns.str.lower().str.strip().str.replace(' ', '_')
-
-        required = ['closer', 'funil', 'mes', 'ano', 'calls_agendadas', 'calls_realizadas', 'vendas', 'faturamento']
-        missing = [col for col in required if col not in df.columns]
-        if missing:
-            raise HTTPException(
-                status_code=400,
-                detail=f"Colunas obrigatórias faltando: {', '.join(missing)}"
-            )
-
-        count = 0
-        errors = []
-
-        for idx, row in df.iterrows():
-            try:
-                agendadas = parse_int(row['calls_agendadas'])
-                realizadas = parse_int(row['calls_realizadas'])
-                vendas = parse_int(row['vendas'])
-                faturamento = parse_float(row['faturamento'])
-
-                tx_comp = (realizadas / agendadas * 100) if agendadas > 0 else 0
-                tx_conv = (vendas / realizadas * 100) if realizadas > 0 else 0
-                ticket = (faturamento / vendas) if vendas > 0 else 0
-
-                novo = CloserMetrica(
-                    closer=str(row['closer']).strip(),
-                    funil=str(row['funil']).strip(),
-                    mes=parse_int(row['mes']),
-                    ano=parse_int(row['ano']),
-                    calls_agendadas=agendadas,
-                    calls_realizadas=realizadas,
-                    vendas=vendas,
-                    faturamento=faturamento,
-                    tx_comparecimento=round(tx_comp, 2),
-                    tx_conversao=round(tx_conv, 2),
-                    ticket_medio=round(ticket, 2)
-                )
-                db.add(novo)
-                count += 1
-
-            except Exception as e:
-                errors.append(f"Linha {idx + 2}: {str(e)}")
-
+        df = _ler_csv(file)
+        _validar_colunas(df, ['closer', 'funil', 'mes', 'ano', 'calls_agendadas', 'calls_realizadas', 'vendas', 'faturamento'])
+
+        closer = texto_col(df, 'closer')
+        funil = texto_col(df, 'funil')
+        mes = parse_int_col(df['mes'])
+        ano = parse_int_col(df['ano'])
+
+        validos, total_erros, errors = coletar_erros(df, [
+            (closer.isna(), "closer vazio"),
+            (funil.isna(), "funil vazio"),
+            *_regras_periodo(mes, ano),
+        ])
+
+        agendadas = parse_int_col(df['calls_agendadas'])
+        realizadas = parse_int_col(df['calls_realizadas'])
+        vendas = parse_int_col(df['vendas'])
+        faturamento = parse_float_col(df['faturamento'])
+
+        registros = pd.DataFrame({
+            'closer': closer,
+            'funil': funil,
+            'mes': mes,
+            'ano': ano,
+            'calls_agendadas': agendadas,
+            'calls_realizadas': realizadas,
+            'vendas': vendas,
+            'faturamento': faturamento,
+            'tx_comparecimento': _taxa(realizadas, agendadas),
+            'tx_conversao': _taxa(vendas, realizadas),
+            'ticket_medio': _taxa(faturamento, vendas, fator=1),
+        })[validos]
+
+        count = bulk_insert.inserir_dataframe(db, CloserMetrica, registros)
+        rollups.recalcular_periodos(db, 'closer', _periodos(registros))
         db.commit()
+        cache.invalidar(CloserMetrica.__tablename__)
 
         return {
             "message": f"{count} métricas de Closer importadas",
             "importados": count,
-            "erros": len(errors),
-            "detalhes_erros": errors[:10] if errors else []
+            "erros": total_erros,
+            "detalhes_erros": errors
         }
 
     except HTTPException:
@@ -548,7 +595,7 @@ async def import_closer_csv(
 
 
 @router.get("/templates/{tipo}")
-async def get_csv_template(tipo: str):
+def get_csv_template(tipo: str):
     """
     Retorna um template CSV para importação.
     """
@@ -597,7 +644,7 @@ async def get_csv_template(tipo: str):
 
 
 @router.post("/preview")
-async def preview_csv(
+def preview_csv(
     file: UploadFile = File(...),
     linhas: int = 5
 ):
@@ -608,7 +655,7 @@ async def preview_csv(
         if not file.filename.endswith('.csv'):
             raise HTTPException(status_code=400, detail="Arquivo deve ser CSV")
 
-        contents = await file.read()
+        contents = file.file.read()
 
         for encoding in ['utf-8', 'latin-1', 'cp1252']:
             try:
@@ -0,0 +1,22 @@
+from fastapi import APIRouter, HTTPException, Header
+from fastapi.responses import PlainTextResponse
+from typing import Optional
+
+from app import instrumentacao
+
+router = APIRouter(prefix="/internal", tags=["Interno"])
+
+
+@router.get("/metrics", response_class=PlainTextResponse)
+async def metricas(authorization: Optional[str] = Header(None)):
+    """
+    Métricas de latência e consultas SQL por rota, no formato do Prometheus.
+    Se METRICS_TOKEN estiver definido, exige Authorization: Bearer <token>.
+    """
+    if instrumentacao.METRICS_TOKEN and authorization != f"Bearer {instrumentacao.METRICS_TOKEN}":
+        raise HTTPException(status_code=401, detail="Token inválido")
+
+    return PlainTextResponse(
+        instrumentacao.renderizar_metricas(),
+        media_type="text/plain; version=0.0.4; charset=utf-8"
+    )
@@ -4,16 +4,18 @@ Handles campaigns, ad sets, ads, and insights from Facebook/Instagram Ads.
 """
 
 from fastapi import APIRouter, Depends, HTTPException, Query
+from sqlalchemy import func
 from sqlalchemy.orm import Session
 from app.database import get_db
-from app.models.models import MetaAdsConfig
+from app.models.models import (
+    MetaAdsConfig, MetaCampanha, MetaInsightCampanhaDiario, MetaInsightAdDiario
+)
 from pydantic import BaseModel
 from typing import Optional, List, Dict, Any
-from datetime import datetime, timedelta
-from facebook_business.api import FacebookAdsApi
+from datetime import date, datetime, timedelta
 from facebook_business.adobjects.adaccount import AdAccount
-from facebook_business.adobjects.campaign import Campaign
 from facebook_business.adobjects.adsinsights import AdsInsights
+from app import meta_api, meta_insights, meta_sync
 
 router = APIRouter(prefix="/meta", tags=["Meta Ads"])
 
@@ -62,19 +64,99 @@ def get_meta_config(db: Session) -> MetaAdsConfig:
         raise HTTPException(status_code=404, detail="Meta Ads não configurado. Configure em /meta/config")
     return config
 
-def init_facebook_api(access_token: str):
-    """Initialize Facebook Ads API"""
+def garantir_insights(db: Session, config: MetaAdsConfig):
+    """
+    Na primeira leitura (conta nunca sincronizada) busca os insights na hora.
+    Depois disso o job agendado mantém o banco atualizado.
+    """
+    if config.last_sync is not None:
+        return
+
+    from app.scheduler import JOB_SYNC_META, lock_entre_processos
+
+    with lock_entre_processos(JOB_SYNC_META) as obtido:
+        if obtido:
+            meta_sync.sincronizar_insights(db, config)
+
+
+def intervalo_consulta(date_preset: str, since: Optional[date], until: Optional[date]):
+    """(inicio, fim) da consulta: since/until quando informados, senão o date_preset."""
+    if since or until:
+        return since or date(2000, 1, 1), until or date.today()
     try:
-        FacebookAdsApi.init(access_token=access_token)
-        return True
-    except Exception as e:
-        raise HTTPException(status_code=400, detail=f"Erro ao inicializar Meta API: {str(e)}")
+        return meta_sync.intervalo_preset(date_preset)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+
+def lista_ids(campaign_ids: str) -> List[str]:
+    return [cid.strip() for cid in campaign_ids.split(',') if cid.strip()]
+
+
+def somas_metricas(modelo):
+    """
+    Colunas de soma usadas nas agregações dos insights gravados.
+    reach não entra na soma (ver alcance); vão o maior valor e o número de linhas.
+    """
+    return [
+        func.coalesce(func.sum(getattr(modelo, coluna)), 0).label(coluna)
+        for coluna in ['impressions', 'clicks', 'spend',
+                       'leads', 'registros', 'purchases', 'pixel_purchases', 'receita']
+    ] + [
+        func.coalesce(func.max(modelo.reach), 0).label('reach'),
+        func.count(modelo.id).label('linhas'),
+    ]
+
+
+def alcance(totais) -> Optional[int]:
+    """
+    reach conta pessoas únicas e não pode ser somado: quem viu o anúncio em
+    dois dias (ou em duas campanhas) contaria duas vezes. Só é devolvido
+    quando a agregação tem uma linha (um dia de uma campanha); senão None.
+    """
+    return int(totais.reach) if totais.linhas <= 1 else None
+
+
+def metricas_derivadas(totais) -> Dict[str, Any]:
+    """impressions/clicks/spend somados, reach (ver alcance) + cpc, cpm e ctr calculados sobre eles."""
+    impressions = int(totais.impressions)
+    clicks = int(totais.clicks)
+    spend = float(totais.spend)
+    return {
+        "impressions": impressions,
+        "clicks": clicks,
+        "spend": spend,
+        "reach": alcance(totais),
+        "cpc": spend / clicks if clicks > 0 else 0,
+        "cpm": (spend / impressions * 1000) if impressions > 0 else 0,
+        "ctr": (clicks / impressions * 100) if impressions > 0 else 0
+    }
+
+
+def serie_diaria(db: Session, ad_account_id: str, inicio: date, fim: date,
+                 campaign_ids: Optional[List[str]] = None) -> List[Dict[str, Any]]:
+    """Métricas por dia (GROUP BY data), opcionalmente só de algumas campanhas."""
+    modelo = MetaInsightCampanhaDiario
+    query = db.query(modelo.data, *somas_metricas(modelo)).filter(
+        modelo.ad_account_id == ad_account_id,
+        modelo.data >= inicio,
+        modelo.data <= fim
+    )
+    if campaign_ids is not None:
+        query = query.filter(modelo.campaign_id.in_(campaign_ids))
+
+    result = []
+    for linha in query.group_by(modelo.data).order_by(modelo.data).all():
+        dia = {"date": linha.data.isoformat()}
+        dia.update(metricas_derivadas(linha))
+        result.append(dia)
+    return result
 
 
 # ============ CONFIGURATION ENDPOINTS ============
 
 @router.post("/config")
-async def create_meta_config(config: MetaConfigCreate, db: Session = Depends(get_db)):
+def create_meta_config(config: MetaConfigCreate, db: Session = Depends(get_db)):
     """
     Salva configuração do Meta Ads (token + conta de anúncios).
     Valida token ao salvar.
@@ -82,12 +164,8 @@ async def create_meta_config(config: MetaConfigCreate, db: Session = Depends(get
     try:
         print(f"🔵 Tentando configurar Meta Ads com conta: {config.ad_account_id}")
 
-        # Validar token fazendo uma chamada de teste
-        init_facebook_api(config.access_token)
-        print("✅ Token validado com sucesso")
-
-        # Buscar informações da conta de anúncios
-        account = AdAccount(config.ad_account_id)
+        # Validar token buscando a conta (sessão fora do cache até salvar)
+        account = AdAccount(config.ad_account_id, api=meta_api.criar_api(config.access_token))
         print(f"🔍 Buscando informações da conta: {config.ad_account_id}")
         account_info = account.api_get(fields=['name', 'account_status'])
         print(f"✅ Conta encontrada: {account_info.get('name')}")
@@ -106,6 +184,7 @@ async def create_meta_config(config: MetaConfigCreate, db: Session = Depends(get
         db.add(new_config)
         db.commit()
         db.refresh(new_config)
+        meta_api.invalidar()
 
         return {
             "message": "Meta Ads configurado com sucesso",
@@ -125,7 +204,7 @@ async def create_meta_config(config: MetaConfigCreate, db: Session = Depends(get
 
 
 @router.get("/config", response_model=MetaConfigResponse)
-async def get_config(db: Session = Depends(get_db)):
+def get_config(db: Session = Depends(get_db)):
     """Retorna configuração ativa do Meta Ads"""
     config = db.query(MetaAdsConfig).filter(MetaAdsConfig.status == 'active').first()
     if not config:
@@ -134,18 +213,19 @@ async def get_config(db: Session = Depends(get_db)):
 
 
 @router.delete("/config")
-async def delete_config(db: Session = Depends(get_db)):
+def delete_config(db: Session = Depends(get_db)):
     """Desativa configuração do Meta Ads"""
     config = get_meta_config(db)
     config.status = 'inactive'
     db.commit()
+    meta_api.invalidar()
     return {"message": "Configuração desativada com sucesso"}
 
 
 # ============ CAMPAIGNS ENDPOINTS ============
 
 @router.get("/campaigns", response_model=List[CampaignResponse])
-async def list_campaigns(
+def list_campaigns(
     status: Optional[str] = Query(None, description="ACTIVE, PAUSED, ARCHIVED"),
     db: Session = Depends(get_db)
 ):
@@ -155,9 +235,7 @@ async def list_campaigns(
     """
     try:
         config = get_meta_config(db)
-        init_facebook_api(config.access_token)
-
-        account = AdAccount(config.ad_account_id)
+        account = meta_api.conta(config)
 
         # Campos para buscar
         fields = [
@@ -186,10 +264,6 @@ async def list_campaigns(
                 "stop_time": campaign.get('stop_time')
             })
 
-        # Atualizar última sincronização
-        config.last_sync = datetime.now()
-        db.commit()
-
         return result
 
     except HTTPException:
@@ -199,7 +273,7 @@ async def list_campaigns(
 
 
 @router.get("/campaigns/{campaign_id}/insights", response_model=InsightsResponse)
-async def get_campaign_insights(
+def get_campaign_insights(
     campaign_id: str,
     date_preset: str = Query("last_30d", description="today, yesterday, last_7d, last_30d, this_month"),
     db: Session = Depends(get_db)
@@ -209,9 +283,7 @@ async def get_campaign_insights(
     """
     try:
         config = get_meta_config(db)
-        init_facebook_api(config.access_token)
-
-        campaign = Campaign(campaign_id)
+        campaign = meta_api.campanha(config, campaign_id)
 
         # Campos de métricas para buscar
         fields = [
@@ -261,67 +333,35 @@ async def get_campaign_insights(
 
 
 @router.get("/insights/summary")
-async def get_account_insights_summary(
+def get_account_insights_summary(
     date_preset: str = Query("last_30d", description="today, yesterday, last_7d, last_30d, this_month"),
+    since: Optional[date] = Query(None, description="Data inicial (YYYY-MM-DD), substitui date_preset"),
+    until: Optional[date] = Query(None, description="Data final (YYYY-MM-DD), substitui date_preset"),
     db: Session = Depends(get_db)
 ):
     """
     Retorna resumo geral de métricas da conta (todas as campanhas agregadas).
+    Calculado a partir dos insights diários gravados (ver app/meta_sync.py).
+    reach vem null quando o período soma mais de um dia ou campanha (ver alcance).
     """
     try:
         config = get_meta_config(db)
-        init_facebook_api(config.access_token)
-
-        account = AdAccount(config.ad_account_id)
-
-        fields = [
-            'impressions', 'clicks', 'spend', 'reach',
-            'cpc', 'cpm', 'ctr', 'actions', 'cost_per_action_type'
-        ]
-
-        params = {
-            'date_preset': date_preset,
-            'level': 'account'
-        }
-
-        insights = account.get_insights(fields=fields, params=params)
-
-        if not insights:
-            return {
-                "impressions": 0,
-                "clicks": 0,
-                "spend": 0,
-                "reach": 0,
-                "cpc": 0,
-                "cpm": 0,
-                "ctr": 0,
-                "conversions": 0,
-                "roas": 0
-            }
-
-        insight = insights[0]
-
-        # Calcular conversões
-        conversions = 0
-        if 'actions' in insight:
-            for action in insight['actions']:
-                if action['action_type'] in ['purchase', 'lead', 'complete_registration']:
-                    conversions += int(action['value'])
-
-        spend = float(insight.get('spend', 0))
-
-        return {
-            "impressions": int(insight.get('impressions', 0)),
-            "clicks": int(insight.get('clicks', 0)),
-            "spend": spend,
-            "reach": int(insight.get('reach', 0)),
-            "cpc": float(insight.get('cpc', 0)),
-            "cpm": float(insight.get('cpm', 0)),
-            "ctr": float(insight.get('ctr', 0)),
-            "conversions": conversions,
-            "cost_per_conversion": spend / conversions if conversions > 0 else 0,
-            "date_preset": date_preset
-        }
+        garantir_insights(db, config)
+        inicio, fim = intervalo_consulta(date_preset, since, until)
+
+        modelo = MetaInsightCampanhaDiario
+        totais = db.query(*somas_metricas(modelo)).filter(
+            modelo.ad_account_id == config.ad_account_id,
+            modelo.data >= inicio,
+            modelo.data <= fim
+        ).one()
+
+        resultado = metricas_derivadas(totais)
+        conversions = int(totais.leads + totais.registros + totais.purchases)
+        resultado["conversions"] = conversions
+        resultado["cost_per_conversion"] = resultado["spend"] / conversions if conversions > 0 else 0
+        resultado["date_preset"] = date_preset
+        return resultado
 
     except HTTPException:
         raise
@@ -329,8 +369,10 @@ async def get_account_insights_summary(
         raise HTTPException(status_code=500, detail=f"Erro ao buscar resumo de métricas: {str(e)}")
 
 @router.get("/insights/daily")
-async def get_daily_insights(
+def get_daily_insights(
     date_preset: str = Query("last_30d", description="today, yesterday, last_7d, last_30d, this_month"),
+    since: Optional[date] = Query(None, description="Data inicial (YYYY-MM-DD), substitui date_preset"),
+    until: Optional[date] = Query(None, description="Data final (YYYY-MM-DD), substitui date_preset"),
     db: Session = Depends(get_db)
 ):
     """
@@ -338,40 +380,10 @@ async def get_daily_insights(
     """
     try:
         config = get_meta_config(db)
-        init_facebook_api(config.access_token)
-
-        account = AdAccount(config.ad_account_id)
-
-        fields = [
-            'impressions', 'clicks', 'spend', 'reach',
-            'cpc', 'cpm', 'ctr'
-        ]
-
-        params = {
-            'date_preset': date_preset,
-            'level': 'account',
-            'time_increment': 1  # Dados diários
-        }
+        garantir_insights(db, config)
+        inicio, fim = intervalo_consulta(date_preset, since, until)
 
-        insights = account.get_insights(fields=fields, params=params)
-
-        result = []
-        for insight in insights:
-            result.append({
-                "date": insight.get('date_start'),
-                "impressions": int(insight.get('impressions', 0)),
-                "clicks": int(insight.get('clicks', 0)),
-                "spend": float(insight.get('spend', 0)),
-                "reach": int(insight.get('reach', 0)),
-                "cpc": float(insight.get('cpc', 0)),
-                "cpm": float(insight.get('cpm', 0)),
-                "ctr": float(insight.get('ctr', 0))
-            })
-
-        # Ordenar por data
-        result.sort(key=lambda x: x['date'])
-
-        return result
+        return serie_diaria(db, config.ad_account_id, inicio, fim)
 
     except HTTPException:
         raise
@@ -379,7 +391,7 @@ async def get_daily_insights(
         raise HTTPException(status_code=500, detail=f"Erro ao buscar insights diários: {str(e)}")
 
 @router.get("/campaigns/{campaign_id}/ads")
-async def get_campaign_ads(
+def get_campaign_ads(
     campaign_id: str,
     db: Session = Depends(get_db)
 ):
@@ -388,40 +400,36 @@ async def get_campaign_ads(
     """
     try:
         config = get_meta_config(db)
-        init_facebook_api(config.access_token)
-
-        campaign = Campaign(campaign_id)
+        campaign = meta_api.campanha(config, campaign_id)
 
         # Buscar anúncios da campanha
         ads = campaign.get_ads(
             fields=['id', 'name', 'status', 'creative'],
         )
 
+        # Buscar insights dos anúncios em paralelo
+        resultados = meta_insights.buscar_insights(
+            ads,
+            fields=['impressions', 'clicks', 'spend', 'cpc', 'cpm', 'ctr'],
+            params={'date_preset': 'last_30d'},
+            conta=config.ad_account_id
+        )
+
         result = []
-        for ad in ads:
-            # Buscar insights do anúncio
-            try:
-                insights = ad.get_insights(
-                    fields=['impressions', 'clicks', 'spend', 'cpc', 'cpm', 'ctr'],
-                    params={'date_preset': 'last_30d'}
-                )
-
-                if insights:
-                    insight = insights[0]
-                    result.append({
-                        "id": ad.get('id'),
-                        "name": ad.get('name'),
-                        "status": ad.get('status'),
-                        "impressions": int(insight.get('impressions', 0)),
-                        "clicks": int(insight.get('clicks', 0)),
-                        "spend": float(insight.get('spend', 0)),
-                        "cpc": float(insight.get('cpc', 0)),
-                        "cpm": float(insight.get('cpm', 0)),
-                        "ctr": float(insight.get('ctr', 0))
-                    })
-            except Exception as e:
-                print(f"Erro ao buscar insights do anúncio {ad.get('id')}: {str(e)}")
-                continue
+        for ad, insights in resultados:
+            if insights:
+                insight = insights[0]
+                result.append({
+                    "id": ad.get('id'),
+                    "name": ad.get('name'),
+                    "status": ad.get('status'),
+                    "impressions": int(insight.get('impressions', 0)),
+                    "clicks": int(insight.get('clicks', 0)),
+                    "spend": float(insight.get('spend', 0)),
+                    "cpc": float(insight.get('cpc', 0)),
+                    "cpm": float(insight.get('cpm', 0)),
+                    "ctr": float(insight.get('ctr', 0))
+                })
 
         # Ordenar por CTR (melhores primeiro)
         result.sort(key=lambda x: x['ctr'], reverse=True)
@@ -435,53 +443,39 @@ async def get_campaign_ads(
 
 
 @router.get("/insights/campaigns")
-async def get_insights_by_campaigns(
+def get_insights_by_campaigns(
     campaign_ids: str = Query(..., description="IDs de campanhas separados por vírgula"),
     date_preset: str = Query("last_30d"),
+    since: Optional[date] = Query(None, description="Data inicial (YYYY-MM-DD), substitui date_preset"),
+    until: Optional[date] = Query(None, description="Data final (YYYY-MM-DD), substitui date_preset"),
     db: Session = Depends(get_db)
 ):
     """
     Retorna insights agregados de campanhas específicas.
     Usado quando o usuário filtra por campanhas específicas.
+    reach vem null quando o período soma mais de um dia ou campanha (ver alcance).
     """
     try:
         config = get_meta_config(db)
-        init_facebook_api(config.access_token)
+        garantir_insights(db, config)
+        inicio, fim = intervalo_consulta(date_preset, since, until)
+
+        modelo = MetaInsightCampanhaDiario
+        totais = db.query(*somas_metricas(modelo)).filter(
+            modelo.ad_account_id == config.ad_account_id,
+            modelo.data >= inicio,
+            modelo.data <= fim,
+            modelo.campaign_id.in_(lista_ids(campaign_ids))
+        ).one()
 
-        campaign_id_list = campaign_ids.split(',')
-        
         aggregated = {
-            "impressions": 0,
-            "clicks": 0,
-            "spend": 0,
-            "reach": 0,
-            "conversions": 0
+            "impressions": int(totais.impressions),
+            "clicks": int(totais.clicks),
+            "spend": float(totais.spend),
+            "reach": alcance(totais),
+            "conversions": int(totais.leads + totais.registros + totais.purchases)
         }
 
-        for campaign_id in campaign_id_list:
-            campaign = Campaign(campaign_id.strip())
-            
-            try:
-                insights = campaign.get_insights(
-                    fields=['impressions', 'clicks', 'spend', 'reach', 'actions'],
-                    params={'date_preset': date_preset, 'level': 'campaign'}
-                )
-
-                if insights:
-                    insight = insights[0]
-                    aggregated["impressions"] += int(insight.get('impressions', 0))
-                    aggregated["clicks"] += int(insight.get('clicks', 0))
-                    aggregated["spend"] += float(insight.get('spend', 0))
-                    aggregated["reach"] += int(insight.get('reach', 0))
-                    
-                    if 'actions' in insight:
-                        for action in insight['actions']:
-                            if action['action_type'] in ['purchase', 'lead', 'complete_registration']:
-                                aggregated["conversions"] += int(action['value'])
-            except Exception as e:
-                print(f"Erro ao buscar insights da campanha {campaign_id}: {str(e)}")
-                continue
-
         # Calcular médias
         aggregated["cpc"] = aggregated["spend"] / aggregated["clicks"] if aggregated["clicks"] > 0 else 0
         aggregated["cpm"] = (aggregated["spend"] / aggregated["impressions"] * 1000) if aggregated["impressions"] > 0 else 0
@@ -496,9 +490,11 @@ async def get_insights_by_campaigns(
 
 
 @router.get("/insights/campaigns/daily")
-async def get_daily_insights_by_campaigns(
+def get_daily_insights_by_campaigns(
     campaign_ids: str = Query(..., description="IDs de campanhas separados por vírgula"),
     date_preset: str = Query("last_30d"),
+    since: Optional[date] = Query(None, description="Data inicial (YYYY-MM-DD), substitui date_preset"),
+    until: Optional[date] = Query(None, description="Data final (YYYY-MM-DD), substitui date_preset"),
     db: Session = Depends(get_db)
 ):
     """
@@ -506,58 +502,10 @@ async def get_daily_insights_by_campaigns(
     """
     try:
         config = get_meta_config(db)
-        init_facebook_api(config.access_token)
-
-        campaign_id_list = campaign_ids.split(',')
-
-        # Dicionário para agregar por data
-        daily_data = {}
-
-        for campaign_id in campaign_id_list:
-            campaign = Campaign(campaign_id.strip())
-
-            try:
-                insights = campaign.get_insights(
-                    fields=['impressions', 'clicks', 'spend', 'reach', 'cpc', 'cpm', 'ctr'],
-                    params={
-                        'date_preset': date_preset,
-                        'level': 'campaign',
-                        'time_increment': 1
-                    }
-                )
-
-                for insight in insights:
-                    date = insight.get('date_start')
-                    if date not in daily_data:
-                        daily_data[date] = {
-                            "date": date,
-                            "impressions": 0,
-                            "clicks": 0,
-                            "spend": 0,
-                            "reach": 0
-                        }
-
-                    daily_data[date]["impressions"] += int(insight.get('impressions', 0))
-                    daily_data[date]["clicks"] += int(insight.get('clicks', 0))
-                    daily_data[date]["spend"] += float(insight.get('spend', 0))
-                    daily_data[date]["reach"] += int(insight.get('reach', 0))
-
-            except Exception as e:
-                print(f"Erro ao buscar insights diários da campanha {campaign_id}: {str(e)}")
-                continue
-
-        # Converter para lista e calcular métricas
-        result = []
-        for date, data in daily_data.items():
-            data["cpc"] = data["spend"] / data["clicks"] if data["clicks"] > 0 else 0
-            data["cpm"] = (data["spend"] / data["impressions"] * 1000) if data["impressions"] > 0 else 0
-            data["ctr"] = (data["clicks"] / data["impressions"] * 100) if data["impressions"] > 0 else 0
-            result.append(data)
+        garantir_insights(db, config)
+        inicio, fim = intervalo_consulta(date_preset, since, until)
 
-        # Ordenar por data
-        result.sort(key=lambda x: x['date'])
-
-        return result
+        return serie_diaria(db, config.ad_account_id, inicio, fim, lista_ids(campaign_ids))
 
     except HTTPException:
         raise
@@ -568,86 +516,65 @@ async def get_daily_insights_by_campaigns(
 # ============ ANÁLISE DETALHADA (CRIATIVOS E CAMPANHAS) ============
 
 @router.get("/ads/performance")
-async def get_ads_performance(
+def get_ads_performance(
     date_preset: str = Query("last_30d", description="today, yesterday, last_7d, last_30d, this_month"),
     campaign_ids: Optional[str] = Query(None, description="IDs de campanhas separados por vírgula (opcional)"),
     limit: int = Query(10, description="Número máximo de anúncios a retornar"),
+    since: Optional[date] = Query(None, description="Data inicial (YYYY-MM-DD), substitui date_preset"),
+    until: Optional[date] = Query(None, description="Data final (YYYY-MM-DD), substitui date_preset"),
     db: Session = Depends(get_db)
 ):
     """
     Retorna análise detalhada de performance por criativo (anúncio).
     Inclui: nome, status, link, valor gasto, conversões, ROAS, etc.
 
-    OTIMIZADO: Busca insights a nível de conta com breakdown por anúncio (muito mais rápido).
+    Agrega os insights diários por anúncio gravados no banco, ordenados por gasto.
     """
     try:
         config = get_meta_config(db)
-        init_facebook_api(config.access_token)
-
-        account = AdAccount(config.ad_account_id)
-
-        # Buscar insights agregados a nível de conta, com breakdown por ad
-        # Isso é MUITO mais rápido do que buscar individualmente
-        params = {
-            'date_preset': date_preset,
-            'level': 'ad',
-            'limit': limit,
-            'sort': ['spend_descending']  # Ordenar por gasto (maiores primeiro)
-        }
-
-        if campaign_ids:
-            params['filtering'] = [{
-                'field': 'campaign.id',
-                'operator': 'IN',
-                'value': campaign_ids.split(',')
-            }]
-
-        insights = account.get_insights(
-            fields=[
-                'ad_id', 'ad_name', 'campaign_id', 'campaign_name',
-                'impressions', 'clicks', 'spend', 'reach',
-                'cpc', 'cpm', 'ctr', 'actions', 'action_values'
-            ],
-            params=params
+        garantir_insights(db, config)
+        inicio, fim = intervalo_consulta(date_preset, since, until)
+
+        modelo = MetaInsightAdDiario
+        spend = func.coalesce(func.sum(modelo.spend), 0.0)
+        query = db.query(
+            modelo.ad_id,
+            func.max(modelo.ad_name).label('ad_name'),
+            func.max(modelo.campaign_name).label('campaign_name'),
+            *somas_metricas(modelo)
+        ).filter(
+            modelo.ad_account_id == config.ad_account_id,
+            modelo.data >= inicio,
+            modelo.data <= fim
         )
+        if campaign_ids:
+            query = query.filter(modelo.campaign_id.in_(lista_ids(campaign_ids)))
 
-        all_ads = []
-
-        for insight in insights:
-            # Extrair conversões e receita
-            conversions = 0
-            revenue = 0.0
-
-            if 'actions' in insight:
-                for action in insight['actions']:
-                    if action['action_type'] in ['purchase', 'offsite_conversion.fb_pixel_purchase']:
-                        conversions += int(action['value'])
-
-            if 'action_values' in insight:
-                for action_value in insight['action_values']:
-                    if action_value['action_type'] in ['purchase', 'offsite_conversion.fb_pixel_purchase']:
-                        revenue += float(action_value['value'])
+        linhas = query.group_by(modelo.ad_id).order_by(spend.desc()).limit(limit).all()
 
-            spend = float(insight.get('spend', 0))
-            roas = revenue / spend if spend > 0 else 0
-            cpa = spend / conversions if conversions > 0 else 0
+        all_ads = []
+        for linha in linhas:
+            metricas = metricas_derivadas(linha)
+            conversions = int(linha.purchases + linha.pixel_purchases)
+            revenue = float(linha.receita)
+            spend_ad = metricas["spend"]
 
             all_ads.append({
-                "id": insight.get('ad_id'),
-                "name": insight.get('ad_name'),
-                "campaign_name": insight.get('campaign_name'),
+                "id": linha.ad_id,
+                "name": linha.ad_name,
+                "campaign_name": linha.campaign_name,
                 "status": "ACTIVE",  # Status vem do insight, não do ad object
                 "post_link": None,  # Não temos o post_id no insight agregado
-                "valor_gasto": spend,
-                "impressoes": int(insight.get('impressions', 0)),
-                "cliques": int(insight.get('clicks', 0)),
+                "valor_gasto": spend_ad,
+                "impressoes": metricas["impressions"],
+                "cliques": metricas["clicks"],
                 "conversoes": conversions,
                 "receita": revenue,
-                "cpa": cpa,
-                "roas": roas,
-                "cpc": float(insight.get('cpc', 0)),
-                "cpm": float(insight.get('cpm', 0)),
-                "ctr": float(insight.get('ctr', 0))
+                "cpa": spend_ad / conversions if conversions > 0 else 0,
+                "roas": revenue / spend_ad if spend_ad > 0 else 0,
+                "cpc": metricas["cpc"],
+                "cpm": metricas["cpm"],
+                "ctr": metricas["ctr"]
             })
 
         return {
@@ -662,8 +589,10 @@ async def get_ads_performance(
 
 
 @router.get("/campaigns/performance")
-async def get_campaigns_performance(
+def get_campaigns_performance(
     date_preset: str = Query("last_30d", description="today, yesterday, last_7d, last_30d, this_month"),
+    since: Optional[date] = Query(None, description="Data inicial (YYYY-MM-DD), substitui date_preset"),
+    until: Optional[date] = Query(None, description="Data final (YYYY-MM-DD), substitui date_preset"),
     db: Session = Depends(get_db)
 ):
     """
@@ -672,69 +601,49 @@ async def get_campaigns_performance(
     """
     try:
         config = get_meta_config(db)
-        init_facebook_api(config.access_token)
-
-        account = AdAccount(config.ad_account_id)
-
-        # Buscar todas as campanhas
-        campaigns = account.get_campaigns(
-            fields=['id', 'name', 'status', 'effective_status'],
-            params={'effective_status': ['ACTIVE', 'PAUSED', 'ARCHIVED']}
-        )
+        garantir_insights(db, config)
+        inicio, fim = intervalo_consulta(date_preset, since, until)
+
+        modelo = MetaInsightCampanhaDiario
+        linhas = db.query(
+            modelo.campaign_id,
+            func.max(modelo.campaign_name).label('campaign_name'),
+            *somas_metricas(modelo)
+        ).filter(
+            modelo.ad_account_id == config.ad_account_id,
+            modelo.data >= inicio,
+            modelo.data <= fim
+        ).group_by(modelo.campaign_id).all()
+
+        campanhas = {
+            c.campaign_id: c for c in db.query(MetaCampanha).filter(
+                MetaCampanha.ad_account_id == config.ad_account_id
+            ).all()
+        }
 
         campaign_data = []
-
-        for campaign in campaigns:
-            try:
-                # Buscar insights da campanha
-                insights = campaign.get_insights(
-                    fields=[
-                        'impressions', 'clicks', 'spend', 'reach',
-                        'cpc', 'cpm', 'ctr', 'actions', 'action_values'
-                    ],
-                    params={'date_preset': date_preset, 'level': 'campaign'}
-                )
-
-                if insights and len(insights) > 0:
-                    insight = insights[0]
-
-                    # Extrair conversões e receita
-                    conversions = 0
-                    revenue = 0.0
-
-                    if 'actions' in insight:
-                        for action in insight['actions']:
-                            if action['action_type'] in ['purchase', 'offsite_conversion.fb_pixel_purchase', 'lead']:
-                                conversions += int(action['value'])
-
-                    if 'action_values' in insight:
-                        for action_value in insight['action_values']:
-                            if action_value['action_type'] in ['purchase', 'offsite_conversion.fb_pixel_purchase']:
-                                revenue += float(action_value['value'])
-
-                    spend = float(insight.get('spend', 0))
-                    roas = revenue / spend if spend > 0 else 0
-                    cpa = spend / conversions if conversions > 0 else 0
-
-                    campaign_data.append({
-                        "id": campaign.get('id'),
-                        "name": campaign.get('name'),
-                        "status": campaign.get('effective_status'),
-                        "valor_gasto": spend,
-                        "impressoes": int(insight.get('impressions', 0)),
-                        "cliques": int(insight.get('clicks', 0)),
-                        "conversoes": conversions,
-                        "receita": revenue,
-                        "cpa": cpa,
-                        "roas": roas,
-                        "cpc": float(insight.get('cpc', 0)),
-                        "cpm": float(insight.get('cpm', 0)),
-                        "ctr": float(insight.get('ctr', 0))
-                    })
-
-            except Exception as e:
-                print(f"Erro ao processar campanha {campaign.get('id')}: {str(e)}")
-                continue
+        for linha in linhas:
+            metricas = metricas_derivadas(linha)
+            conversions = int(linha.purchases + linha.pixel_purchases + linha.leads)
+            revenue = float(linha.receita)
+            spend = metricas["spend"]
+            campanha = campanhas.get(linha.campaign_id)
+
+            campaign_data.append({
+                "id": linha.campaign_id,
+                "name": campanha.name if campanha else linha.campaign_name,
+                "status": campanha.effective_status if campanha else None,
+                "valor_gasto": spend,
+                "impressoes": metricas["impressions"],
+                "cliques": metricas["clicks"],
+                "conversoes": conversions,
+                "receita": revenue,
+                "cpa": spend / conversions if conversions > 0 else 0,
+                "roas": revenue / spend if spend > 0 else 0,
+                "cpc": metricas["cpc"],
+                "cpm": metricas["cpm"],
+                "ctr": metricas["ctr"]
+            })
 
         # Ordenar por valor gasto (maior primeiro)
         campaign_data.sort(key=lambda x: x['valor_gasto'], reverse=True)
@@ -748,3 +657,35 @@ async def get_campaigns_performance(
         raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Erro ao buscar performance de campanhas: {str(e)}")
+
+
+# ============ SINCRONIZAÇÃO DOS INSIGHTS ============
+
+@router.post("/sync", status_code=202)
+def disparar_sync_insights(db: Session = Depends(get_db)):
+    """
+    Dispara a sincronização dos insights em segundo plano e retorna imediatamente.
+    Acompanhe o resultado em GET /meta/sync/status.
+    """
+    from app.scheduler import JOB_SYNC_META, disparar_job
+
+    get_meta_config(db)
+    iniciado = disparar_job(JOB_SYNC_META)
+    return {
+        "success": True,
+        "iniciado": iniciado,
+        "message": "Sincronização iniciada" if iniciado else "Sincronização já em andamento"
+    }
+
+
+@router.get("/sync/status")
+def status_sync_insights(limite: int = 10, db: Session = Depends(get_db)):
+    """
+    Últimas execuções da sincronização de insights, com duração e linhas gravadas.
+    """
+    from app.scheduler import JOB_SYNC_META, listar_execucoes
+
+    config = db.query(MetaAdsConfig).filter(MetaAdsConfig.status == 'active').first()
+    status = listar_execucoes(db, JOB_SYNC_META, limite)
+    status["last_sync"] = config.last_sync.isoformat() if config and config.last_sync else None
+    return status
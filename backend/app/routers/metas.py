@@ -4,13 +4,12 @@ Sistema de metas mensais por pessoa/empresa com historico e replicacao.
 """
 
 from fastapi import APIRouter, Depends, HTTPException
-from sqlalchemy.orm import Session
-from sqlalchemy import func
+from sqlalchemy.orm import Session, selectinload
+from sqlalchemy import func, insert
+from app import cache, metas_realizado
 from app.database import get_db
-from app.models.models import (
-    Pessoa, SocialSellingMetrica, SDRMetrica, CloserMetrica,
-    Meta, MetaEmpresa
-)
+from app.equipe import carregar_equipe
+from app.models.models import Pessoa, Meta, MetaEmpresa
 from pydantic import BaseModel
 from typing import Optional, List
 from datetime import datetime
@@ -48,10 +47,17 @@ class MetaEmpresaCreate(BaseModel):
     meta_caixa_anual: float = 1000000.0  # 1M
 
 
+# Campos de meta de uma pessoa no mes (/pessoa-mes e replicacao)
+CAMPOS_META = [
+    "meta_ativacoes", "meta_leads", "meta_reunioes_agendadas",
+    "meta_reunioes", "meta_vendas", "meta_faturamento"
+]
+
+
 # ==================== BUSCAR META POR PESSOA/MES ====================
 
 @router.get("/pessoa-mes")
-async def get_meta_pessoa_mes(
+def get_meta_pessoa_mes(
     pessoa_nome: str,
     mes: int,
     ano: int,
@@ -59,41 +65,13 @@ async def get_meta_pessoa_mes(
 ):
     """Busca meta de uma pessoa em um mes especifico"""
     try:
-        pessoa = db.query(Pessoa).filter(Pessoa.nome == pessoa_nome).first()
-        if not pessoa:
-            return {
-                "meta_ativacoes": 0,
-                "meta_leads": 0,
-                "meta_reunioes": 0,
-                "meta_vendas": 0,
-                "meta_faturamento": 0
-            }
-
-        meta = db.query(Meta).filter(
-            Meta.pessoa_id == pessoa.id,
-            Meta.mes == mes,
-            Meta.ano == ano
-        ).first()
-
-        if not meta:
-            # Se não tem meta cadastrada no mês, retorna zeros
-            # Metas devem ser criadas explicitamente via endpoint /metas/pessoa/{pessoa_id}
-            return {
-                "meta_ativacoes": 0,
-                "meta_leads": 0,
-                "meta_reunioes_agendadas": 0,
-                "meta_reunioes": 0,
-                "meta_vendas": 0,
-                "meta_faturamento": 0
-            }
+        # Sem pessoa ou sem meta cadastrada no mês, retorna zeros
+        # Metas devem ser criadas explicitamente via endpoint /metas/pessoa/{pessoa_id}
+        pessoa = carregar_equipe(db, mes, ano).membro(pessoa_nome)
 
         return {
-            "meta_ativacoes": meta.meta_ativacoes or 0,
-            "meta_leads": meta.meta_leads or 0,
-            "meta_reunioes_agendadas": meta.meta_reunioes_agendadas or 0,
-            "meta_reunioes": meta.meta_reunioes or 0,
-            "meta_vendas": meta.meta_vendas or 0,
-            "meta_faturamento": meta.meta_faturamento or 0
+            campo: pessoa.meta_valor(campo) if pessoa else 0
+            for campo in CAMPOS_META
         }
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Erro ao buscar meta: {str(e)}")
@@ -103,7 +81,7 @@ async def get_meta_pessoa_mes(
 
 @router.get("/")
 @router.get("")  # Aceita ambas versões (com/sem trailing slash)
-async def listar_metas(
+def listar_metas(
     mes: Optional[int] = None,
     ano: Optional[int] = None,
     pessoa_id: Optional[int] = None,
@@ -111,7 +89,7 @@ async def listar_metas(
 ):
     """Lista todas as metas com filtros opcionais"""
     try:
-        query = db.query(Meta)
+        query = db.query(Meta).options(selectinload(Meta.pessoa))
 
         if mes:
             query = query.filter(Meta.mes == mes)
@@ -124,9 +102,7 @@ async def listar_metas(
 
         resultado = []
         for m in metas:
-            pessoa = None
-            if m.pessoa_id:
-                pessoa = db.query(Pessoa).filter(Pessoa.id == m.pessoa_id).first()
+            pessoa = m.pessoa
 
             resultado.append({
                 "id": m.id,
@@ -171,7 +147,7 @@ async def listar_metas(
 
 @router.post("/")
 @router.post("")  # Aceita ambas versões (com/sem trailing slash)
-async def criar_meta(item: MetaCreate, db: Session = Depends(get_db)):
+def criar_meta(item: MetaCreate, db: Session = Depends(get_db)):
     """Cria uma nova meta"""
     try:
         # Verificar se ja existe meta para esta pessoa/mes/ano
@@ -190,6 +166,7 @@ async def criar_meta(item: MetaCreate, db: Session = Depends(get_db)):
         nova = Meta(**item.dict())
         db.add(nova)
         db.commit()
+        cache.invalidar_registros(nova)
         db.refresh(nova)
 
         return {
@@ -205,108 +182,31 @@ async def criar_meta(item: MetaCreate, db: Session = Depends(get_db)):
 
 
 @router.put("/calcular-realizado")
-async def calcular_realizado(
-    mes: int,
+def calcular_realizado(
     ano: int,
+    mes: Optional[int] = None,
     db: Session = Depends(get_db)
 ):
     """
-    Calcula automaticamente o realizado vs meta para um mes/ano.
+    Calcula automaticamente o realizado vs meta para um mes/ano
+    (ou para o ano inteiro, sem mes).
     Atualiza as metas com os valores realizados e deltas.
     """
     try:
-        metas = db.query(Meta).filter(
-            Meta.mes == mes,
-            Meta.ano == ano,
-            Meta.tipo == "individual"
-        ).all()
+        periodo = f"{mes}/{ano}" if mes else str(ano)
+        atualizadas = metas_realizado.calcular(db, ano, mes)
 
-        if not metas:
+        if not atualizadas:
             raise HTTPException(
                 status_code=404,
-                detail=f"Nenhuma meta encontrada para {mes}/{ano}"
+                detail=f"Nenhuma meta encontrada para {periodo}"
             )
 
-        atualizadas = 0
-
-        for meta in metas:
-            if not meta.pessoa_id:
-                continue
-
-            pessoa = db.query(Pessoa).filter(Pessoa.id == meta.pessoa_id).first()
-            if not pessoa:
-                continue
-
-            funcao_lower = pessoa.funcao.lower() if pessoa.funcao else ""
-
-            if funcao_lower == "social selling" or funcao_lower == "social_selling":
-                # Buscar metricas de SS
-                ss = db.query(SocialSellingMetrica).filter(
-                    SocialSellingMetrica.mes == mes,
-                    SocialSellingMetrica.ano == ano,
-                    SocialSellingMetrica.vendedor == pessoa.nome
-                ).all()
-
-                meta.realizado_ativacoes = sum(s.ativacoes or 0 for s in ss)
-                meta.realizado_leads = sum(s.leads_gerados or 0 for s in ss)
-                meta.delta_ativacoes = meta.realizado_ativacoes - (meta.meta_ativacoes or 0)
-                meta.delta_leads = meta.realizado_leads - (meta.meta_leads or 0)
-
-                # Calcular % atingimento (baseado em leads para SS)
-                if meta.meta_leads and meta.meta_leads > 0:
-                    meta.perc_atingimento = (meta.realizado_leads / meta.meta_leads) * 100
-                elif meta.meta_ativacoes and meta.meta_ativacoes > 0:
-                    meta.perc_atingimento = (meta.realizado_ativacoes / meta.meta_ativacoes) * 100
-
-            elif funcao_lower == "sdr":
-                # Buscar metricas de SDR
-                sdr = db.query(SDRMetrica).filter(
-                    SDRMetrica.mes == mes,
-                    SDRMetrica.ano == ano,
-                    SDRMetrica.sdr == pessoa.nome
-                ).all()
-
-                # Calcular realizados
-                meta.realizado_reunioes_agendadas = sum(s.reunioes_agendadas or 0 for s in sdr)
-                meta.realizado_reunioes = sum(s.reunioes_realizadas or 0 for s in sdr)
-
-                # Calcular deltas
-                meta.delta_reunioes_agendadas = meta.realizado_reunioes_agendadas - (meta.meta_reunioes_agendadas or 0)
-                meta.delta_reunioes = meta.realizado_reunioes - (meta.meta_reunioes or 0)
-
-                # Calcular % atingimento (priorizar realizadas, mas usar agendadas se não tiver meta de realizadas)
-                if meta.meta_reunioes and meta.meta_reunioes > 0:
-                    meta.perc_atingimento = (meta.realizado_reunioes / meta.meta_reunioes) * 100
-                elif meta.meta_reunioes_agendadas and meta.meta_reunioes_agendadas > 0:
-                    meta.perc_atingimento = (meta.realizado_reunioes_agendadas / meta.meta_reunioes_agendadas) * 100
-
-            elif funcao_lower == "closer":
-                # Buscar vendas (não closer_metricas, pois tem dados mais completos)
-                from app.models.models import Venda
-
-                vendas = db.query(Venda).filter(
-                    Venda.mes == mes,
-                    Venda.ano == ano,
-                    Venda.closer == pessoa.nome
-                ).all()
-
-                meta.realizado_vendas = len(vendas)
-                meta.realizado_faturamento = sum(v.valor_bruto or 0 for v in vendas)
-                meta.delta_vendas = meta.realizado_vendas - (meta.meta_vendas or 0)
-                meta.delta_faturamento = meta.realizado_faturamento - (meta.meta_faturamento or 0)
-
-                # Calcular % atingimento (baseado em faturamento para closer)
-                if meta.meta_faturamento and meta.meta_faturamento > 0:
-                    meta.perc_atingimento = (meta.realizado_faturamento / meta.meta_faturamento) * 100
-                elif meta.meta_vendas and meta.meta_vendas > 0:
-                    meta.perc_atingimento = (meta.realizado_vendas / meta.meta_vendas) * 100
-
-            atualizadas += 1
-
         db.commit()
+        cache.invalidar(Meta.__tablename__, mes, ano)
 
         return {
-            "message": f"Realizado calculado para {mes}/{ano}",
+            "message": f"Realizado calculado para {periodo}",
             "metas_atualizadas": atualizadas
         }
 
@@ -318,7 +218,7 @@ async def calcular_realizado(
 
 
 @router.put("/{id}")
-async def atualizar_meta(id: int, item: MetaUpdate, db: Session = Depends(get_db)):
+def atualizar_meta(id: int, item: MetaUpdate, db: Session = Depends(get_db)):
     """Atualiza uma meta existente"""
     try:
         meta = db.query(Meta).filter(Meta.id == id).first()
@@ -330,6 +230,7 @@ async def atualizar_meta(id: int, item: MetaUpdate, db: Session = Depends(get_db
             setattr(meta, key, value)
 
         db.commit()
+        cache.invalidar_registros(meta)
         db.refresh(meta)
 
         return {"message": "Meta atualizada com sucesso"}
@@ -342,15 +243,17 @@ async def atualizar_meta(id: int, item: MetaUpdate, db: Session = Depends(get_db
 
 
 @router.delete("/{id}")
-async def deletar_meta(id: int, db: Session = Depends(get_db)):
+def deletar_meta(id: int, db: Session = Depends(get_db)):
     """Deleta uma meta"""
     try:
         meta = db.query(Meta).filter(Meta.id == id).first()
         if not meta:
             raise HTTPException(status_code=404, detail="Meta nao encontrada")
 
+        periodo = (meta.mes, meta.ano)
         db.delete(meta)
         db.commit()
+        cache.invalidar(Meta.__tablename__, *periodo)
 
         return {"message": "Meta deletada com sucesso"}
 
@@ -364,7 +267,7 @@ async def deletar_meta(id: int, db: Session = Depends(get_db)):
 # ==================== REPLICACAO DE METAS ====================
 
 @router.post("/replicar-mes")
-async def replicar_metas_mes(
+def replicar_metas_mes(
     mes_destino: int,
     ano_destino: int,
     mes_origem: Optional[int] = None,
@@ -374,6 +277,7 @@ async def replicar_metas_mes(
     """
     Replica metas do mes anterior (ou mes especificado) para o mes destino.
     Se nao especificar origem, usa o mes anterior ao destino.
+    Le origem e destino uma vez e insere as metas novas em lote.
     """
     try:
         # Calcular mes origem se nao especificado
@@ -385,16 +289,25 @@ async def replicar_metas_mes(
                 mes_origem = 12
                 ano_origem = ano_destino - 1
 
-        # Buscar metas do mes origem
+        # Pessoas que ja tem meta no destino (nao sao sobrescritas)
+        com_meta = {
+            pessoa_id for (pessoa_id,) in db.query(Meta.pessoa_id).filter(
+                Meta.mes == mes_destino,
+                Meta.ano == ano_destino
+            )
+        }
+
+        # Buscar metas do mes origem (sem as de pessoas apagadas, que ficam só no histórico)
         metas_anteriores = db.query(Meta).filter(
             Meta.mes == mes_origem,
             Meta.ano == ano_origem,
-            Meta.tipo == "pessoa"
+            Meta.tipo == "pessoa",
+            Meta.pessoa_id.isnot(None)
         ).all()
 
         if not metas_anteriores:
             # Se nao tem metas, criar com base nas pessoas cadastradas
-            pessoas = db.query(Pessoa).filter(Pessoa.ativo == True).all()
+            pessoas = [pessoa_id for (pessoa_id,) in db.query(Pessoa.id).filter(Pessoa.ativo == True)]
 
             if not pessoas:
                 raise HTTPException(
@@ -402,75 +315,47 @@ async def replicar_metas_mes(
                     detail="Nenhuma pessoa cadastrada para criar metas"
                 )
 
-            criadas = 0
-            for pessoa in pessoas:
-                # Verificar se ja existe
-                existente = db.query(Meta).filter(
-                    Meta.mes == mes_destino,
-                    Meta.ano == ano_destino,
-                    Meta.pessoa_id == pessoa.id
-                ).first()
-
-                if not existente:
-                    # Criar nova meta zerada ou copiando do mês anterior
-                    meta_anterior = db.query(Meta).filter(
-                        Meta.pessoa_id == pessoa.id,
-                        Meta.mes == (mes_destino - 1) if mes_destino > 1 else 12,
-                        Meta.ano == ano_destino if mes_destino > 1 else ano_destino - 1
-                    ).first()
-
-                    nova = Meta(
-                        mes=mes_destino,
-                        ano=ano_destino,
-                        tipo="pessoa",
-                        pessoa_id=pessoa.id,
-                        meta_ativacoes=meta_anterior.meta_ativacoes if meta_anterior else 0,
-                        meta_leads=meta_anterior.meta_leads if meta_anterior else 0,
-                        meta_reunioes=meta_anterior.meta_reunioes if meta_anterior else 0,
-                        meta_vendas=meta_anterior.meta_vendas if meta_anterior else 0,
-                        meta_faturamento=meta_anterior.meta_faturamento if meta_anterior else 0
-                    )
-                    db.add(nova)
-                    criadas += 1
+            # Copia do mês anterior ao destino quando existir, senão zerada
+            mes_anterior, ano_anterior = (mes_destino - 1, ano_destino) if mes_destino > 1 else (12, ano_destino - 1)
+            anteriores = {
+                m.pessoa_id: m for m in db.query(Meta).filter(
+                    Meta.mes == mes_anterior,
+                    Meta.ano == ano_anterior,
+                    Meta.pessoa_id.in_(pessoas)
+                )
+            }
+            origens = [(pessoa_id, anteriores.get(pessoa_id)) for pessoa_id in pessoas]
+        else:
+            origens = [(meta_ant.pessoa_id, meta_ant) for meta_ant in metas_anteriores]
 
-            db.commit()
+        novas = []
+        for pessoa_id, meta_ant in origens:
+            if pessoa_id in com_meta:
+                continue
+            com_meta.add(pessoa_id)
+            novas.append({
+                "mes": mes_destino,
+                "ano": ano_destino,
+                "tipo": "pessoa",
+                "pessoa_id": pessoa_id,
+                **{campo: (getattr(meta_ant, campo) or 0) if meta_ant else 0 for campo in CAMPOS_META}
+            })
+
+        if novas:
+            db.execute(insert(Meta), novas)
+        db.commit()
+        cache.invalidar(Meta.__tablename__, mes_destino, ano_destino)
+
+        if not metas_anteriores:
             return {
                 "message": f"Metas criadas com base no cadastro de pessoas",
-                "metas_criadas": criadas,
+                "metas_criadas": len(novas),
                 "origem": "cadastro_pessoas"
             }
 
-        # Replicar metas existentes
-        criadas = 0
-        for meta_ant in metas_anteriores:
-            # Verificar se ja existe
-            existente = db.query(Meta).filter(
-                Meta.mes == mes_destino,
-                Meta.ano == ano_destino,
-                Meta.pessoa_id == meta_ant.pessoa_id
-            ).first()
-
-            if not existente:
-                # Copia valores do mês anterior
-                nova = Meta(
-                    mes=mes_destino,
-                    ano=ano_destino,
-                    tipo=meta_ant.tipo,
-                    pessoa_id=meta_ant.pessoa_id,
-                    meta_ativacoes=meta_ant.meta_ativacoes or 0,
-                    meta_leads=meta_ant.meta_leads or 0,
-                    meta_reunioes=meta_ant.meta_reunioes or 0,
-                    meta_vendas=meta_ant.meta_vendas or 0,
-                    meta_faturamento=meta_ant.meta_faturamento or 0
-                )
-                db.add(nova)
-                criadas += 1
-
-        db.commit()
-
         return {
             "message": f"Metas replicadas para {mes_destino}/{ano_destino}",
-            "metas_criadas": criadas,
+            "metas_criadas": len(novas),
             "origem": f"{mes_origem}/{ano_origem}"
         }
 
@@ -483,7 +368,7 @@ async def replicar_metas_mes(
 # ==================== HISTORICO ====================
 
 @router.get("/historico/{pessoa_id}")
-async def historico_pessoa(
+def historico_pessoa(
     pessoa_id: int,
     db: Session = Depends(get_db)
 ):
@@ -543,7 +428,7 @@ async def historico_pessoa(
 # ==================== META EMPRESA ====================
 
 @router.get("/empresa/{ano}")
-async def get_meta_empresa(ano: int, db: Session = Depends(get_db)):
+def get_meta_empresa(ano: int, db: Session = Depends(get_db)):
     """Retorna a meta anual da empresa"""
     try:
         meta = db.query(MetaEmpresa).filter(MetaEmpresa.ano == ano).first()
@@ -575,7 +460,7 @@ async def get_meta_empresa(ano: int, db: Session = Depends(get_db)):
 
 
 @router.put("/empresa/{ano}")
-async def atualizar_meta_empresa(
+def atualizar_meta_empresa(
     ano: int,
     item: MetaEmpresaCreate,
     db: Session = Depends(get_db)
@@ -606,7 +491,7 @@ async def atualizar_meta_empresa(
 
 
 @router.put("/empresa/{ano}/calcular-acumulado")
-async def calcular_acumulado_empresa(ano: int, db: Session = Depends(get_db)):
+def calcular_acumulado_empresa(ano: int, db: Session = Depends(get_db)):
     """Calcula o faturamento acumulado e caixa atual da empresa"""
     try:
         from app.models.models import Financeiro, Venda
@@ -9,13 +9,15 @@ from typing import Dict, Any, Optional
 from datetime import datetime
 
 from app.database import get_db
+from app.cache import cache_resposta, periodos_ate
 from app.models.models import Venda, Financeiro, KPI, SocialSellingMetrica, SDRMetrica, CloserMetrica
+from app.periodo import filtro_periodo, periodo
 
 router = APIRouter(prefix="/metrics", tags=["metrics"])
 
 
 @router.get("/vendas")
-async def get_vendas(
+def get_vendas(
     mes: Optional[int] = Query(None, ge=1, le=12, description="Mês (1-12) - opcional"),
     ano: Optional[int] = Query(None, ge=2020, le=2030, description="Ano - opcional"),
     db: Session = Depends(get_db)
@@ -51,7 +53,7 @@ async def get_vendas(
 
 
 @router.get("/all")
-async def get_all_data(db: Session = Depends(get_db)) -> Dict[str, Any]:
+def get_all_data(db: Session = Depends(get_db)) -> Dict[str, Any]:
     """
     Retorna resumo de todos os meses disponíveis no banco.
     """
@@ -121,7 +123,7 @@ async def get_all_data(db: Session = Depends(get_db)) -> Dict[str, Any]:
 
 
 @router.get("/financeiro")
-async def get_metrics_financeiro(
+def get_metrics_financeiro(
     mes: int = Query(..., ge=1, le=12, description="Mês (1-12)"),
     ano: int = Query(..., ge=2020, le=2030, description="Ano"),
     db: Session = Depends(get_db)
@@ -183,7 +185,7 @@ async def get_metrics_financeiro(
 
 
 @router.get("/comercial")
-async def get_metrics_comercial(
+def get_metrics_comercial(
     mes: int = Query(..., ge=1, le=12, description="Mês (1-12)"),
     ano: int = Query(..., ge=2020, le=2030, description="Ano"),
     db: Session = Depends(get_db)
@@ -258,7 +260,7 @@ async def get_metrics_comercial(
 
 
 @router.get("/inteligencia")
-async def get_metrics_inteligencia(
+def get_metrics_inteligencia(
     mes: int = Query(..., ge=1, le=12, description="Mês (1-12)"),
     ano: int = Query(..., ge=2020, le=2030, description="Ano"),
     db: Session = Depends(get_db)
@@ -340,7 +342,8 @@ async def get_metrics_inteligencia(
 
 
 @router.get("/financeiro/detalhado")
-async def get_financeiro_detalhado(
+@cache_resposta("metrics.financeiro_detalhado", ['financeiro', 'kpis'], meses_anteriores=1)
+def get_financeiro_detalhado(
     mes: int = Query(..., ge=1, le=12, description="Mês (1-12)"),
     ano: int = Query(..., ge=2020, le=2030, description="Ano"),
     db: Session = Depends(get_db)
@@ -540,7 +543,8 @@ async def get_financeiro_detalhado(
 
 
 @router.get("/comercial/detalhado")
-async def get_comercial_detalhado(
+@cache_resposta("metrics.comercial_detalhado", ['vendas'], meses_anteriores=1)
+def get_comercial_detalhado(
     mes: int = Query(..., ge=1, le=12, description="Mês (1-12)"),
     ano: int = Query(..., ge=2020, le=2030, description="Ano"),
     db: Session = Depends(get_db)
@@ -737,7 +741,7 @@ async def get_comercial_detalhado(
 
 
 @router.get("/financeiro/fluxo-caixa")
-async def get_fluxo_caixa(
+def get_fluxo_caixa(
     meses: int = Query(6, ge=1, le=12, description="Quantidade de meses anteriores"),
     mes_ref: int = Query(..., ge=1, le=12, description="Mês de referência"),
     ano_ref: int = Query(..., ge=2020, le=2030, description="Ano de referência"),
@@ -798,10 +802,17 @@ async def get_fluxo_caixa(
     }
 
 
+# Janelas aceitas para as tendências de inteligencia/detalhado (meses)
+JANELAS_TENDENCIA = (6, 12, 24)
+
+
 @router.get("/inteligencia/detalhado")
-async def get_inteligencia_detalhado(
+@cache_resposta("metrics.inteligencia_detalhado", ['vendas', 'financeiro'],
+                meses_anteriores=max(JANELAS_TENDENCIA) - 1)
+def get_inteligencia_detalhado(
     mes: int = Query(..., ge=1, le=12, description="Mês (1-12)"),
     ano: int = Query(..., ge=2020, le=2030, description="Ano"),
+    janela: int = Query(6, description="Meses das tendências: 6, 12 ou 24"),
     db: Session = Depends(get_db)
 ) -> Dict[str, Any]:
     """
@@ -810,50 +821,43 @@ async def get_inteligencia_detalhado(
     Inclui:
     - CAC por canal
     - Análise de margem por produto/serviço
-    - Tendências (últimos 6 meses)
+    - Tendências (últimos `janela` meses)
     - Alertas acionáveis
+
+    Número fixo de consultas: vendas agrupadas por funil, custo de marketing,
+    vendas agrupadas por mês na janela e vendedores dos dois últimos meses.
     """
+    if janela not in JANELAS_TENDENCIA:
+        raise HTTPException(status_code=400, detail="Janela inválida. Use: 6, 12 ou 24")
 
     # 1. CAC POR CANAL
-    # Buscar investimento em marketing por canal (se houver descrição identificando)
-    canais = db.query(Venda.funil).filter(
+    # Vendas e receita por canal (funil) numa consulta agrupada
+    por_canal = db.query(
+        Venda.funil,
+        func.count(Venda.id),
+        func.sum(Venda.valor)
+    ).filter(
         Venda.mes == mes,
         Venda.ano == ano
-    ).distinct().all()
-
-    cac_por_canal = []
-    for (canal,) in canais:
-        # Buscar custos de marketing relacionados ao canal
-        # Por simplicidade, distribuir custo total de marketing proporcionalmente
-        qtd_vendas = db.query(func.count(Venda.id)).filter(
-            Venda.mes == mes,
-            Venda.ano == ano,
-            Venda.funil == canal
-        ).scalar() or 0
+    ).group_by(Venda.funil).all()
 
-        # Custo total de marketing
-        custo_mkt_total = db.query(func.sum(Financeiro.valor)).filter(
-            Financeiro.mes == mes,
-            Financeiro.ano == ano,
-            Financeiro.tipo == 'saida',
-            Financeiro.categoria.like('%Marketing%')
-        ).scalar() or 0
+    # Custo total de marketing do mês, distribuído proporcionalmente às vendas de cada canal
+    custo_mkt_total = db.query(func.sum(Financeiro.valor)).filter(
+        Financeiro.mes == mes,
+        Financeiro.ano == ano,
+        Financeiro.tipo == 'saida',
+        Financeiro.categoria.like('%Marketing%')
+    ).scalar() or 0
 
-        # Total de vendas do mês
-        total_vendas_mes = db.query(func.count(Venda.id)).filter(
-            Venda.mes == mes,
-            Venda.ano == ano
-        ).scalar() or 1
+    # Total de vendas do mês
+    total_vendas_mes = sum(qtd for _, qtd, _ in por_canal) or 1
 
+    cac_por_canal = []
+    for canal, qtd_vendas, receita_canal in por_canal:
         # Proporção do custo
         custo_canal = float(custo_mkt_total) * (qtd_vendas / total_vendas_mes)
         cac = (custo_canal / qtd_vendas) if qtd_vendas > 0 else 0
-
-        receita_canal = db.query(func.sum(Venda.valor)).filter(
-            Venda.mes == mes,
-            Venda.ano == ano,
-            Venda.funil == canal
-        ).scalar() or 0
+        receita_canal = receita_canal or 0
 
         cac_por_canal.append({
             "canal": canal,
@@ -866,28 +870,30 @@ async def get_inteligencia_detalhado(
 
     cac_por_canal.sort(key=lambda x: x['cac'])
 
-    # 2. TENDÊNCIAS - Últimos 6 meses
-    tendencias = []
-    for i in range(5, -1, -1):
-        mes_calc = mes - i
-        ano_calc = ano
-        while mes_calc <= 0:
-            mes_calc += 12
-            ano_calc -= 1
+    # 2. TENDÊNCIAS - Últimos `janela` meses, numa consulta agrupada por mês
+    meses_janela = list(reversed(periodos_ate(mes, ano, janela - 1)))
+    mes_ini, ano_ini = meses_janela[0]
 
-        vendas_query = db.query(
-            func.count(Venda.id).label('qtd'),
-            func.sum(Venda.valor).label('faturamento')
+    vendas_por_mes = {
+        (m, a): (qtd, faturamento)
+        for a, m, qtd, faturamento in db.query(
+            Venda.ano,
+            Venda.mes,
+            func.count(Venda.id),
+            func.sum(Venda.valor)
         ).filter(
-            Venda.mes == mes_calc,
-            Venda.ano == ano_calc
-        ).first()
+            *filtro_periodo(Venda, periodo(ano_ini, mes_ini), periodo(ano, mes))
+        ).group_by(Venda.ano, Venda.mes)
+    }
 
-        qtd = vendas_query.qtd or 0
-        faturamento = float(vendas_query.faturamento or 0)
-        ticket = (faturamento / qtd) if qtd > 0 else 0
+    meses_nomes = ['', 'Jan', 'Fev', 'Mar', 'Abr', 'Mai', 'Jun', 'Jul', 'Ago', 'Set', 'Out', 'Nov', 'Dez']
 
-        meses_nomes = ['', 'Jan', 'Fev', 'Mar', 'Abr', 'Mai', 'Jun', 'Jul', 'Ago', 'Set', 'Out', 'Nov', 'Dez']
+    tendencias = []
+    for mes_calc, ano_calc in meses_janela:
+        qtd, faturamento = vendas_por_mes.get((mes_calc, ano_calc), (0, 0))
+        qtd = qtd or 0
+        faturamento = float(faturamento or 0)
+        ticket = (faturamento / qtd) if qtd > 0 else 0
 
         tendencias.append({
             "mes": mes_calc,
@@ -922,27 +928,18 @@ async def get_inteligencia_detalhado(
                     "mensagem": f"Vendas cresceram {variacao:.1f}% vs mês anterior. Identificar o que funcionou e escalar."
                 })
 
-    # Alerta: Vendedor sem vendas
-    vendedores_ativos = db.query(Venda.vendedor).filter(
-        Venda.mes == mes,
-        Venda.ano == ano
-    ).distinct().all()
-
-    vendedores_ativos_set = {v[0] for v in vendedores_ativos}
+    # Alerta: Vendedor sem vendas (vendeu no mês anterior e não neste)
+    mes_ant, ano_ant = periodos_ate(mes, ano, 1)[1]
+    atual, anterior = periodo(ano, mes), periodo(ano_ant, mes_ant)
 
-    # Buscar vendedores do mês anterior
-    mes_ant = mes - 1
-    ano_ant = ano
-    if mes_ant <= 0:
-        mes_ant = 12
-        ano_ant -= 1
-
-    vendedores_mes_anterior = db.query(Venda.vendedor).filter(
-        Venda.mes == mes_ant,
-        Venda.ano == ano_ant
-    ).distinct().all()
+    vendedores = {atual: set(), anterior: set()}
+    for periodo_venda, vendedor in db.query(Venda.periodo, Venda.vendedor).filter(
+        Venda.periodo.in_([atual, anterior]),
+        Venda.vendedor.isnot(None)
+    ).distinct():
+        vendedores[periodo_venda].add(vendedor)
 
-    vendedores_inativos = [v[0] for v in vendedores_mes_anterior if v[0] not in vendedores_ativos_set]
+    vendedores_inativos = sorted(vendedores[anterior] - vendedores[atual])
 
     if vendedores_inativos:
         alertas.append({
@@ -4,9 +4,10 @@ Router para projeções financeiras automáticas.
 
 from fastapi import APIRouter, Depends, Query
 from sqlalchemy.orm import Session
-from sqlalchemy import func, extract
+from sqlalchemy import func
 from app.database import get_db
 from app.models.models import Financeiro, Venda
+from app.periodo import filtro_periodo, periodo
 from datetime import datetime, timedelta
 from typing import List, Dict
 from dateutil.relativedelta import relativedelta
@@ -66,7 +67,7 @@ def calcular_custos_variaveis_mensais(db: Session, mes: int, ano: int) -> float:
 
 
 @router.get("/caixa")
-async def projetar_fluxo_caixa(
+def projetar_fluxo_caixa(
     meses_futuro: int = Query(3, ge=1, le=12, description="Número de meses para projetar"),
     mes_ref: int = Query(None, ge=1, le=12),
     ano_ref: int = Query(None, ge=2020, le=2030),
@@ -84,19 +85,19 @@ async def projetar_fluxo_caixa(
     mes_atual = mes_ref or hoje.month
     ano_atual = ano_ref or hoje.year
 
-    # Calcular saldo atual (até o mês de referência)
+    # Calcular saldo atual (até o mês de referência, inclusive anos anteriores)
+    ate_referencia = filtro_periodo(Financeiro, fim=periodo(ano_atual, mes_atual))
+
     entradas = db.query(func.sum(Financeiro.valor)).filter(
         Financeiro.tipo == 'entrada',
         Financeiro.previsto_realizado == 'realizado',
-        extract('year', Financeiro.data) <= ano_atual,
-        extract('month', Financeiro.data) <= mes_atual
+        *ate_referencia
     ).scalar() or 0
 
     saidas = db.query(func.sum(Financeiro.valor)).filter(
         Financeiro.tipo == 'saida',
         Financeiro.previsto_realizado == 'realizado',
-        extract('year', Financeiro.data) <= ano_atual,
-        extract('month', Financeiro.data) <= mes_atual
+        *ate_referencia
     ).scalar() or 0
 
     saldo_atual = entradas - saidas
@@ -176,7 +177,7 @@ async def projetar_fluxo_caixa(
 
 
 @router.get("/ponto-equilibrio")
-async def calcular_ponto_equilibrio(
+def calcular_ponto_equilibrio(
     mes: int,
     ano: int,
     db: Session = Depends(get_db)
@@ -279,7 +280,7 @@ async def calcular_ponto_equilibrio(
 
 
 @router.get("/runway")
-async def calcular_runway(
+def calcular_runway(
     mes: int,
     ano: int,
     db: Session = Depends(get_db)
@@ -3,6 +3,7 @@ from fastapi.responses import StreamingResponse
 from sqlalchemy.orm import Session
 from fastapi import Depends
 from app.database import get_db
+from app import cache, rollups
 from app.models.models import SocialSellingMetrica, SDRMetrica, CloserMetrica, Venda, Financeiro
 from datetime import datetime
 import pandas as pd
@@ -14,7 +15,7 @@ router = APIRouter(prefix="/comercial", tags=["Upload"])
 
 
 @router.get("/template/{tipo}")
-async def download_template(tipo: str):
+def download_template(tipo: str):
     """
     Gera e retorna uma planilha modelo Excel para importação em massa
     tipo: 'social-selling', 'sdr', ou 'closer'
@@ -105,7 +106,7 @@ async def download_template(tipo: str):
 
 
 @router.post("/upload/{tipo}")
-async def upload_metrics(
+def upload_metrics(
     tipo: str,
     file: UploadFile = File(...),
     db: Session = Depends(get_db)
@@ -116,11 +117,19 @@ async def upload_metrics(
     """
     try:
         # Ler arquivo Excel
-        contents = await file.read()
+        contents = file.file.read()
         df = pd.read_excel(io.BytesIO(contents))
 
         importados = 0
         erros = []
+        metricas = []
+        modelo = {
+            "social-selling": SocialSellingMetrica,
+            "sdr": SDRMetrica,
+            "closer": CloserMetrica,
+            "vendas": Venda,
+            "financeiro": Financeiro,
+        }.get(tipo)
 
         if tipo == "social-selling":
             # Validar colunas
@@ -141,6 +150,7 @@ async def upload_metrics(
                         leads_gerados=int(row["Leads Gerados"])
                     )
                     db.add(metrica)
+                    metricas.append(metrica)
                     importados += 1
                 except Exception as e:
                     erros.append(f"Linha {idx + 2}: {str(e)}")
@@ -164,6 +174,7 @@ async def upload_metrics(
                         reunioes_realizadas=int(row["Reuniões Realizadas"])
                     )
                     db.add(metrica)
+                    metricas.append(metrica)
                     importados += 1
                 except Exception as e:
                     erros.append(f"Linha {idx + 2}: {str(e)}")
@@ -207,6 +218,7 @@ async def upload_metrics(
                         ticket_medio=ticket_medio
                     )
                     db.add(metrica)
+                    metricas.append(metrica)
                     importados += 1
                 except Exception as e:
                     erros.append(f"Linha {idx + 2}: {str(e)}")
@@ -272,7 +284,10 @@ async def upload_metrics(
         else:
             raise HTTPException(status_code=400, detail="Tipo inválido")
 
+        rollups.recalcular_registros(db, metricas)
         db.commit()
+        # Uploads costumam cobrir vários meses: invalida a tabela inteira
+        cache.invalidar(modelo.__tablename__)
 
         return {
             "message": "Upload processado com sucesso",
@@ -1,6 +1,7 @@
 from fastapi import APIRouter, HTTPException, Depends, Query
 from sqlalchemy.orm import Session
 from app.database import get_db
+from app import cache, paginacao
 from app.models.models import Venda, Financeiro
 from pydantic import BaseModel, field_validator
 from typing import Optional
@@ -8,6 +9,13 @@ from datetime import date, datetime
 
 router = APIRouter(prefix="/vendas", tags=["Vendas"])
 
+# Colunas da listagem (GET /vendas) e as que vêm como 0.0 quando nulas
+CAMPOS_LISTAGEM = [
+    "id", "data", "cliente", "closer", "funil", "tipo_receita", "produto",
+    "booking", "previsto", "valor_bruto", "valor_liquido", "mes", "ano"
+]
+CAMPOS_VALOR = ["booking", "previsto", "valor_bruto", "valor_liquido"]
+
 # Schemas
 class VendaCreate(BaseModel):
     data: date
@@ -57,7 +65,7 @@ class VendaUpdate(BaseModel):
 # ============ CRUD ENDPOINTS ============
 
 @router.post("")
-async def create_venda(item: VendaCreate, db: Session = Depends(get_db)):
+def create_venda(item: VendaCreate, db: Session = Depends(get_db)):
     """Cria uma nova venda e registra automaticamente no Financeiro"""
     try:
         # Extrair mes e ano da data
@@ -97,6 +105,7 @@ async def create_venda(item: VendaCreate, db: Session = Depends(get_db)):
 
         db.add(entrada_financeiro)
         db.commit()
+        cache.invalidar_registros(nova_venda, entrada_financeiro)
 
         return {
             "id": nova_venda.id,
@@ -114,15 +123,24 @@ async def create_venda(item: VendaCreate, db: Session = Depends(get_db)):
 
 
 @router.get("")
-async def list_vendas(
+def list_vendas(
     mes: Optional[int] = Query(None, ge=1, le=12),
     ano: Optional[int] = Query(None, ge=2020),
     closer: Optional[str] = Query(None),
     funil: Optional[str] = Query(None),
+    limit: int = Query(paginacao.LIMITE_PADRAO, ge=1, le=paginacao.LIMITE_MAXIMO),
+    cursor: Optional[str] = Query(None, description="next_cursor da página anterior"),
+    fields: Optional[str] = Query(None, description="Colunas separadas por vírgula (ex: id,data,valor_bruto)"),
     db: Session = Depends(get_db)
 ):
-    """Lista vendas com filtros opcionais"""
+    """
+    Lista vendas com filtros opcionais, da mais recente para a mais antiga.
+    Paginado por cursor em (data, id): passe o next_cursor da resposta em
+    cursor para buscar a próxima página (None na última).
+    """
     try:
+        campos = paginacao.campos_selecionados(fields, CAMPOS_LISTAGEM)
+
         query = db.query(Venda)
 
         if mes:
@@ -134,30 +152,23 @@ async def list_vendas(
         if funil:
             query = query.filter(Venda.funil == funil)
 
-        vendas = query.order_by(Venda.data.desc()).all()
-
-        return [{
-            "id": v.id,
-            "data": v.data.isoformat() if v.data else None,
-            "cliente": v.cliente,
-            "closer": v.closer,
-            "funil": v.funil,
-            "tipo_receita": v.tipo_receita,
-            "produto": v.produto,
-            "booking": v.booking or 0.0,
-            "previsto": v.previsto or 0.0,
-            "valor_bruto": v.valor_bruto or 0.0,
-            "valor_liquido": v.valor_liquido or 0.0,
-            "mes": v.mes,
-            "ano": v.ano
-        } for v in vendas]
+        pagina = paginacao.paginar(query, Venda, [Venda.data, Venda.id], campos, limit, cursor)
+
+        for item in pagina["items"]:
+            for campo in CAMPOS_VALOR:
+                if campo in item:
+                    item[campo] = item[campo] or 0.0
+
+        return pagina
 
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Erro ao listar vendas: {str(e)}")
 
 
 @router.get("/{id}")
-async def get_venda(id: int, db: Session = Depends(get_db)):
+def get_venda(id: int, db: Session = Depends(get_db)):
     """Busca uma venda por ID"""
     venda = db.query(Venda).filter(Venda.id == id).first()
     if not venda:
@@ -181,13 +192,15 @@ async def get_venda(id: int, db: Session = Depends(get_db)):
 
 
 @router.put("/{id}")
-async def update_venda(id: int, item: VendaUpdate, db: Session = Depends(get_db)):
+def update_venda(id: int, item: VendaUpdate, db: Session = Depends(get_db)):
     """Atualiza uma venda existente e sincroniza com o Financeiro"""
     try:
         venda = db.query(Venda).filter(Venda.id == id).first()
         if not venda:
             raise HTTPException(status_code=404, detail="Venda não encontrada")
 
+        periodo_anterior = (venda.mes, venda.ano)
+
         # Atualizar campos fornecidos
         if item.data is not None:
             venda.data = item.data
@@ -234,6 +247,10 @@ async def update_venda(id: int, item: VendaUpdate, db: Session = Depends(get_db)
             entrada_financeiro.descricao = f"VENDA-{venda.id} - {venda.cliente or 'Cliente'}"
             db.commit()
 
+        for tabela in (Venda.__tablename__, Financeiro.__tablename__):
+            cache.invalidar(tabela, *periodo_anterior)
+            cache.invalidar(tabela, venda.mes, venda.ano)
+
         return {
             "message": "Venda atualizada com sucesso e sincronizada com o Financeiro",
             "data": {
@@ -250,7 +267,7 @@ async def update_venda(id: int, item: VendaUpdate, db: Session = Depends(get_db)
 
 
 @router.delete("/{id}")
-async def delete_venda(id: int, db: Session = Depends(get_db)):
+def delete_venda(id: int, db: Session = Depends(get_db)):
     """Deleta uma venda e remove do Financeiro"""
     try:
         venda = db.query(Venda).filter(Venda.id == id).first()
@@ -262,6 +279,7 @@ async def delete_venda(id: int, db: Session = Depends(get_db)):
             "cliente": venda.cliente,
             "valor_liquido": venda.valor_liquido
         }
+        periodo = (venda.mes, venda.ano)
 
         # 🔄 INTEGRAÇÃO: Deletar entrada correspondente no Financeiro
         entrada_financeiro = db.query(Financeiro).filter(
@@ -273,6 +291,8 @@ async def delete_venda(id: int, db: Session = Depends(get_db)):
 
         db.delete(venda)
         db.commit()
+        cache.invalidar(Venda.__tablename__, *periodo)
+        cache.invalidar(Financeiro.__tablename__, *periodo)
 
         return {
             "message": "Venda deletada com sucesso e removida do Financeiro",
@@ -1,40 +1,314 @@
 """
 Agendador de tarefas automáticas.
-Sincroniza dados do Google Sheets automaticamente a cada hora.
+Sincroniza dados do Google Sheets e os insights do Meta Ads a cada hora.
+
+As sincronizações rodam dentro do processo (sem request HTTP para o próprio
+servidor). Com vários workers do uvicorn cada um tem seu agendador, então
+cada job segura um lock entre processos (advisory lock no PostgreSQL, arquivo
+com flock no SQLite) e só um worker executa por vez; os outros pulam a rodada.
+Cada execução é registrada em job_execucoes (duração, linhas, status);
+as que ficaram "executando" porque o worker morreu no meio do job são
+marcadas como "interrompido" no startup.
 """
 
 from apscheduler.schedulers.background import BackgroundScheduler
 from apscheduler.triggers.interval import IntervalTrigger
+from contextlib import contextmanager
 from datetime import datetime
+import json
 import logging
+import os
+import tempfile
+import threading
+import time
+
+from sqlalchemy import text
+
+from app.database import SessionLocal, engine
+from app.models.models import JobExecucao, MetaAdsConfig
 
 logger = logging.getLogger(__name__)
 
 # Instância global do scheduler
 scheduler = BackgroundScheduler()
 
+JOB_SYNC_SHEETS = "sync_google_sheets"
+JOB_SYNC_META = "sync_meta_ads"
+
+# Chave do pg_advisory_lock de cada job (qualquer inteiro fixo e único)
+ADVISORY_LOCKS = {
+    JOB_SYNC_SHEETS: 80410001,
+    JOB_SYNC_META: 80410002,
+}
+LOCK_DIR = os.getenv("SCHEDULER_LOCK_DIR", tempfile.gettempdir())
+
+# Impede duas execuções do mesmo job no mesmo processo (agendada + manual)
+_locks_locais = {job: threading.Lock() for job in ADVISORY_LOCKS}
+
+
+# ==================== LOCK ENTRE PROCESSOS ====================
+
+@contextmanager
+def _lock_postgres(chave: int):
+    conn = engine.connect()
+    try:
+        obtido = conn.execute(text("SELECT pg_try_advisory_lock(:chave)"), {"chave": chave}).scalar()
+        try:
+            yield bool(obtido)
+        finally:
+            if obtido:
+                conn.execute(text("SELECT pg_advisory_unlock(:chave)"), {"chave": chave})
+    finally:
+        conn.close()
+
 
-def sync_google_sheets_task():
+@contextmanager
+def _lock_arquivo(caminho: str):
+    try:
+        import fcntl
+    except ImportError:  # Windows: sem flock, vale só o lock local
+        yield True
+        return
+
+    with open(caminho, "a") as f:
+        try:
+            fcntl.flock(f.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except OSError:
+            yield False
+            return
+        try:
+            yield True
+        finally:
+            fcntl.flock(f.fileno(), fcntl.LOCK_UN)
+
+
+@contextmanager
+def lock_entre_processos(job: str = JOB_SYNC_SHEETS):
     """
-    Tarefa agendada para sincronizar dados do Google Sheets.
-    Roda a cada hora.
+    Tenta obter o lock do job sem esperar.
+    Retorna True se obteve (este processo deve executar), False caso contrário.
     """
+    lock_local = _locks_locais[job]
+    if not lock_local.acquire(blocking=False):
+        yield False
+        return
     try:
-        logger.info(f"[{datetime.now()}] Iniciando sincronização automática do Google Sheets...")
+        with _lock_processos(job) as obtido:
+            yield obtido
+    finally:
+        lock_local.release()
 
-        # Fazer request interno para o endpoint de sync
-        import requests
-        response = requests.get("http://localhost:8000/google-sheets/sync-metrics")
 
-        if response.status_code == 200:
-            data = response.json()
-            logger.info(f"[{datetime.now()}] ✅ Sincronização concluída com sucesso!")
-            logger.info(f"  - Status: {data.get('message')}")
-        else:
-            logger.error(f"[{datetime.now()}] ❌ Erro na sincronização: Status {response.status_code}")
+def _lock_processos(job: str):
+    if engine.dialect.name == "postgresql":
+        return _lock_postgres(ADVISORY_LOCKS[job])
+    return _lock_arquivo(os.path.join(LOCK_DIR, f"medgm_{job}.lock"))
 
-    except Exception as e:
-        logger.error(f"[{datetime.now()}] ❌ Erro na sincronização automática: {str(e)}")
+
+def sync_em_andamento(job: str = JOB_SYNC_SHEETS) -> bool:
+    """
+    Se o job está rodando neste processo ou em outro worker.
+    O lock é a fonte da verdade: um worker morto no meio do job libera o lock
+    (fim da conexão / do processo), mesmo deixando a execução "executando".
+    """
+    if _locks_locais[job].locked():
+        return True
+    # Só testa o lock entre processos (e solta na hora), sem o lock local,
+    # para não fazer um disparo deste processo pular a rodada
+    with _lock_processos(job) as obtido:
+        return not obtido
+
+
+def marcar_execucoes_interrompidas() -> int:
+    """
+    Marca como "interrompido" as execuções que ficaram "executando" porque o
+    worker morreu no meio do job. Roda no startup; só mexe nos jobs cujo lock
+    está livre (ninguém os executando agora). Retorna quantas foram marcadas.
+    """
+    marcadas = 0
+    for job in ADVISORY_LOCKS:
+        with lock_entre_processos(job) as obtido:
+            if not obtido:
+                continue
+            db = SessionLocal()
+            try:
+                marcadas += db.query(JobExecucao).filter(
+                    JobExecucao.job == job,
+                    JobExecucao.status == "executando"
+                ).update({
+                    JobExecucao.status: "interrompido",
+                    JobExecucao.erro: "Execução interrompida (worker encerrado antes do fim do job)"
+                }, synchronize_session=False)
+                db.commit()
+            except Exception as e:
+                db.rollback()
+                logger.error(f"Erro ao marcar execuções interrompidas de {job}: {str(e)}")
+            finally:
+                db.close()
+
+    if marcadas:
+        logger.info(f"{marcadas} execução(ões) interrompida(s) marcada(s) em job_execucoes")
+    return marcadas
+
+
+# ==================== JOB ====================
+
+def _registrar_inicio(db, job: str, origem: str) -> JobExecucao:
+    execucao = JobExecucao(
+        job=job,
+        origem=origem,
+        status="executando",
+        iniciado_em=datetime.now()
+    )
+    db.add(execucao)
+    db.commit()
+    return execucao
+
+
+def executar_job(job: str, funcao, origem: str = "agendado"):
+    """
+    Executa funcao(db) com o lock do job e registra a execução em job_execucoes.
+    funcao retorna (resumo, linhas, erros). Retorna o resumo, ou None se o job
+    já estava rodando em outro worker ou falhou.
+    """
+    with lock_entre_processos(job) as obtido:
+        if not obtido:
+            logger.info(f"[{datetime.now()}] {job} já em andamento em outro worker, pulando")
+            return None
+
+        logger.info(f"[{datetime.now()}] Iniciando {job} ({origem})...")
+        db = SessionLocal()
+        inicio = time.perf_counter()
+        execucao = None
+        try:
+            execucao = _registrar_inicio(db, job, origem)
+
+            resumo, linhas, erros = funcao(db)
+
+            execucao.status = "erro" if erros else "sucesso"
+            execucao.erro = "; ".join(erros) or None
+            execucao.linhas = linhas
+            execucao.detalhes = json.dumps(resumo, ensure_ascii=False, default=str)
+            logger.info(f"[{datetime.now()}] ✅ {job} concluído: {resumo}")
+            return resumo
+
+        except Exception as e:
+            db.rollback()
+            logger.error(f"[{datetime.now()}] ❌ Erro em {job}: {str(e)}")
+            if execucao is not None:
+                execucao.status = "erro"
+                execucao.erro = str(e)
+            return None
+
+        finally:
+            if execucao is not None:
+                execucao.finalizado_em = datetime.now()
+                execucao.duracao_ms = int((time.perf_counter() - inicio) * 1000)
+                try:
+                    db.commit()
+                except Exception as e:
+                    db.rollback()
+                    logger.error(f"Erro ao registrar execução do job: {str(e)}")
+            db.close()
+
+
+def _sync_google_sheets(db):
+    from app.routers.google_sheets import abrir_planilha, sincronizar_planilha
+
+    resumo = sincronizar_planilha(db, abrir_planilha())
+
+    erros = [r["error"] for r in resumo.values() if "error" in r]
+    linhas = sum(r.get("linhas", 0) for r in resumo.values())
+    return resumo, linhas, erros
+
+
+def _sync_meta_ads(db):
+    from app import meta_sync
+
+    config = db.query(MetaAdsConfig).filter(MetaAdsConfig.status == 'active').first()
+    if not config:
+        return {"ignorado": "Meta Ads não configurado"}, 0, []
+
+    resumo = meta_sync.sincronizar_insights(db, config)
+    linhas = sum(resumo[nivel] for nivel in meta_sync.NIVEIS)
+    return resumo, linhas, []
+
+
+def sync_google_sheets_task(origem: str = "agendado"):
+    """
+    Tarefa agendada para sincronizar dados do Google Sheets.
+    Roda a cada hora e também pelo disparo manual (POST /google-sheets/sync-metrics/executar).
+    """
+    return executar_job(JOB_SYNC_SHEETS, _sync_google_sheets, origem)
+
+
+def sync_meta_ads_task(origem: str = "agendado"):
+    """
+    Tarefa agendada para sincronizar os insights do Meta Ads (ver app/meta_sync.py).
+    Roda a cada hora e também pelo disparo manual (POST /meta/sync).
+    """
+    return executar_job(JOB_SYNC_META, _sync_meta_ads, origem)
+
+
+TAREFAS = {
+    JOB_SYNC_SHEETS: sync_google_sheets_task,
+    JOB_SYNC_META: sync_meta_ads_task,
+}
+
+
+def disparar_job(job: str) -> bool:
+    """
+    Dispara o job em segundo plano, sem bloquear quem chamou.
+    Retorna False se ele já está rodando (neste processo ou em outro worker).
+    """
+    if sync_em_andamento(job):
+        return False
+
+    if scheduler.running:
+        scheduler.add_job(
+            func=TAREFAS[job],
+            kwargs={"origem": "manual"},
+            id=f"{job}_manual",
+            name=f"{job} (manual)",
+            replace_existing=True
+        )
+    else:
+        threading.Thread(
+            target=TAREFAS[job],
+            kwargs={"origem": "manual"},
+            daemon=True
+        ).start()
+    return True
+
+
+def disparar_sync_google_sheets() -> bool:
+    """Dispara a sincronização do Google Sheets em segundo plano."""
+    return disparar_job(JOB_SYNC_SHEETS)
+
+
+def listar_execucoes(db, job: str, limite: int = 10):
+    """Últimas execuções do job, no formato dos endpoints de status."""
+    execucoes = db.query(JobExecucao).filter(
+        JobExecucao.job == job
+    ).order_by(JobExecucao.iniciado_em.desc()).limit(limite).all()
+
+    return {
+        "em_andamento": sync_em_andamento(job),
+        "execucoes": [
+            {
+                "id": e.id,
+                "origem": e.origem,
+                "status": e.status,
+                "iniciado_em": e.iniciado_em.isoformat() if e.iniciado_em else None,
+                "finalizado_em": e.finalizado_em.isoformat() if e.finalizado_em else None,
+                "duracao_ms": e.duracao_ms,
+                "linhas": e.linhas,
+                "detalhes": json.loads(e.detalhes) if e.detalhes else None,
+                "erro": e.erro
+            }
+            for e in execucoes
+        ]
+    }
 
 
 def start_scheduler():
@@ -42,13 +316,28 @@ def start_scheduler():
     Inicia o agendador de tarefas.
     """
     try:
+        marcar_execucoes_interrompidas()
+
         # Agendar sincronização do Google Sheets a cada 1 hora
         scheduler.add_job(
             func=sync_google_sheets_task,
             trigger=IntervalTrigger(hours=1),
-            id='sync_google_sheets',
+            id=JOB_SYNC_SHEETS,
             name='Sincronizar Google Sheets',
-            replace_existing=True
+            replace_existing=True,
+            max_instances=1,
+            coalesce=True
+        )
+
+        # Agendar sincronização dos insights do Meta Ads a cada 1 hora
+        scheduler.add_job(
+            func=sync_meta_ads_task,
+            trigger=IntervalTrigger(hours=1),
+            id=JOB_SYNC_META,
+            name='Sincronizar insights do Meta Ads',
+            replace_existing=True,
+            max_instances=1,
+            coalesce=True
         )
 
         scheduler.start()
@@ -0,0 +1,223 @@
+"""
+Leitura da seção "Análise Diária" das abas de tráfego do Google Sheets.
+
+A sincronização baixava cada aba inteira (get_all_values), procurava a linha
+"Análise Diária" e descartava os blocos de resumo acima dela. Aqui:
+
+- A linha da âncora ("Análise Diária" na coluna A) de cada aba fica em
+  cache no processo. Ela é localizada lendo só a coluna A.
+- As abas são lidas numa única chamada (values_batch_get), cada uma só no
+  intervalo A{âncora}:R. A primeira linha devolvida tem que ser a âncora;
+  se não for (linhas inseridas acima), a âncora é localizada de novo e a
+  aba relida.
+- As linhas diárias são convertidas por coluna (pandas), em vez de uma
+  chamada de parse_currency/parse_percentage por célula.
+"""
+
+import hashlib
+import json
+import threading
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+import pandas as pd
+from gspread.utils import absolute_range_name
+
+ANCORA = "Análise Diária"
+
+# Colunas lidas da seção (A = data, B em diante = campos na ordem de CAMPOS)
+ULTIMA_COLUNA = "R"
+LARGURA = ord(ULTIMA_COLUNA) - ord("A") + 1
+
+CAMPOS_MOEDA = {"valor_gasto", "cpl", "cpa", "cpc", "cpm"}
+CAMPOS_PERCENTUAL = {"ctr", "connect_rate", "conv_pg", "opt_in", "hook_rate", "view_75"}
+# Os demais campos são inteiros
+
+# (id da planilha, aba) -> linha da âncora (1 = primeira linha)
+_ancoras: Dict[tuple, int] = {}
+_lock = threading.Lock()
+
+
+def hash_valores(valores) -> str:
+    """sha256 de uma lista de valores (aba, bloco ou linha)."""
+    return hashlib.sha256(json.dumps(valores, ensure_ascii=False).encode("utf-8")).hexdigest()
+
+
+def limpar_ancoras():
+    with _lock:
+        _ancoras.clear()
+
+
+def _normalizar(linhas) -> List[List[str]]:
+    """Linhas com LARGURA colunas (a API omite células vazias no fim da linha)."""
+    return [(list(linha) + [""] * LARGURA)[:LARGURA] for linha in linhas]
+
+
+def _batch_get(spreadsheet, ranges: Dict[str, str]) -> Dict[str, Any]:
+    """
+    Lê vários intervalos numa chamada. Se a chamada falhar (ex.: aba
+    renomeada), relê aba por aba para saber qual falhou.
+    Retorna chave -> valores, ou chave -> Exception.
+    """
+    chaves = list(ranges)
+    try:
+        resposta = spreadsheet.values_batch_get([ranges[chave] for chave in chaves])
+        return {
+            chave: intervalo.get("values", [])
+            for chave, intervalo in zip(chaves, resposta.get("valueRanges", []))
+        }
+    except Exception as e:
+        if len(chaves) == 1:
+            return {chaves[0]: e}
+
+    resultado = {}
+    for chave in chaves:
+        resultado.update(_batch_get(spreadsheet, {chave: ranges[chave]}))
+    return resultado
+
+
+def _localizar(spreadsheet, abas: Dict[str, str]) -> Dict[str, Any]:
+    """Linha da âncora de cada aba (lendo só a coluna A), None se não encontrada."""
+    colunas = _batch_get(spreadsheet, {
+        tipo: absolute_range_name(aba, "A:A") for tipo, aba in abas.items()
+    })
+
+    ancoras = {}
+    for tipo, valores in colunas.items():
+        if isinstance(valores, Exception):
+            ancoras[tipo] = valores
+            continue
+        ancoras[tipo] = next(
+            (idx + 1 for idx, linha in enumerate(valores) if linha and ANCORA in str(linha[0])),
+            None
+        )
+        if ancoras[tipo] is not None:
+            with _lock:
+                _ancoras[(spreadsheet.id, abas[tipo])] = ancoras[tipo]
+    return ancoras
+
+
+def ler_secoes(spreadsheet, abas: Dict[str, str]) -> Dict[str, Dict[str, Any]]:
+    """
+    Seção "Análise Diária" de cada aba (tipo -> nome da aba).
+
+    Retorna tipo -> {"valores": linhas a partir da âncora (âncora, header,
+    dias...), com LARGURA colunas} ou tipo -> {"error": mensagem}.
+    Com as âncoras em cache é uma chamada à API para todas as abas.
+    """
+    with _lock:
+        ancoras = {tipo: _ancoras.get((spreadsheet.id, aba)) for tipo, aba in abas.items()}
+
+    resultado: Dict[str, Dict[str, Any]] = {}
+    for tentativa in range(2):
+        sem_ancora = {tipo: abas[tipo] for tipo, linha in ancoras.items() if linha is None}
+        if sem_ancora:
+            ancoras.update(_localizar(spreadsheet, sem_ancora))
+
+        pendentes = {}
+        for tipo, linha in ancoras.items():
+            if isinstance(linha, Exception):
+                resultado[tipo] = {"error": f"Erro ao ler aba {abas[tipo]}: {str(linha)}"}
+            elif linha is None:
+                resultado[tipo] = {"error": "Seção de Análise Diária não encontrada"}
+            else:
+                pendentes[tipo] = absolute_range_name(abas[tipo], f"A{linha}:{ULTIMA_COLUNA}")
+
+        blocos = _batch_get(spreadsheet, pendentes) if pendentes else {}
+        ancoras = {}
+        for tipo, valores in blocos.items():
+            if isinstance(valores, Exception):
+                resultado[tipo] = {"error": f"Erro ao ler aba {abas[tipo]}: {str(valores)}"}
+            elif valores and valores[0] and ANCORA in str(valores[0][0]):
+                resultado[tipo] = {"valores": _normalizar(valores)}
+            elif tentativa == 0:
+                # A âncora mudou de linha: localiza de novo e relê só essa aba
+                with _lock:
+                    _ancoras.pop((spreadsheet.id, abas[tipo]), None)
+                ancoras[tipo] = None
+            else:
+                resultado[tipo] = {"error": "Seção de Análise Diária não encontrada"}
+
+        if not ancoras:
+            break
+
+    return resultado
+
+
+def ler_secao(spreadsheet, aba: str) -> Dict[str, Any]:
+    """ler_secoes para uma aba só."""
+    return ler_secoes(spreadsheet, {aba: aba})[aba]
+
+
+# ==================== CONVERSÃO POR COLUNA ====================
+
+def _moeda_col(serie: pd.Series) -> pd.Series:
+    """Versão vetorizada de parse_currency (R$ 1.234,56; vazios e inválidos viram 0.0)."""
+    texto = serie.str.replace(r"R\$|\s|\.", "", regex=True).str.replace(",", ".", regex=False)
+    return pd.to_numeric(texto, errors="coerce").fillna(0.0)
+
+
+def _percentual_col(serie: pd.Series) -> pd.Series:
+    """Versão vetorizada de parse_percentage (1,5%; vazios e inválidos viram 0.0)."""
+    texto = serie.str.replace("%", "", regex=False).str.replace(",", ".", regex=False).str.strip()
+    return pd.to_numeric(texto, errors="coerce").fillna(0.0)
+
+
+def _inteiro_col(serie: pd.Series) -> pd.Series:
+    """Inteiros, com ou sem separador de milhar (1.234); vazios e inválidos viram 0."""
+    texto = serie.str.replace(r"\s|\.", "", regex=True).str.replace(",", ".", regex=False)
+    numeros = pd.to_numeric(texto, errors="coerce").astype(float)
+    return np.trunc(numeros.where(np.isfinite(numeros), 0.0)).astype("int64")
+
+
+def _data_col(serie: pd.Series, ano: int) -> pd.Series:
+    """Datas DD/M (ano informado); vazias e inválidas viram NaT."""
+    partes = serie.str.strip().str.split("/", expand=True)
+    if partes.shape[1] < 2:
+        return pd.Series(pd.NaT, index=serie.index, dtype="datetime64[ns]")
+    return pd.to_datetime(pd.DataFrame({
+        "year": ano,
+        "month": pd.to_numeric(partes[1], errors="coerce"),
+        "day": pd.to_numeric(partes[0], errors="coerce"),
+    }), errors="coerce")
+
+
+def converter(valores: List[List[str]], campos: List[str], ano: Optional[int] = None) -> Optional[pd.DataFrame]:
+    """
+    Linhas diárias da seção "Análise Diária" num DataFrame: data (date), dia,
+    mes, ano, os campos (colunas B em diante, na ordem de campos) e row_hash
+    (sha256 das células da linha). Linhas sem data válida são ignoradas.
+
+    valores pode ser a aba inteira ou o bloco de ler_secoes. Retorna None se
+    a seção não existe.
+    """
+    inicio = next(
+        (idx + 2 for idx, linha in enumerate(valores) if linha and ANCORA in str(linha[0])),
+        None
+    )
+    if inicio is None:
+        return None
+
+    linhas = _normalizar(valores[inicio:])
+    bruto = pd.DataFrame(linhas, columns=range(LARGURA), dtype=object).fillna("").astype(str)
+    datas = _data_col(bruto[0], ano or datetime.now().year)
+    validas = datas.notna()
+
+    bruto, datas = bruto[validas], datas[validas]
+    df = pd.DataFrame({
+        "data": datas.dt.date,
+        "dia": datas.dt.day,
+        "mes": datas.dt.month,
+        "ano": datas.dt.year,
+    })
+    for posicao, campo in enumerate(campos, start=1):
+        if campo in CAMPOS_MOEDA:
+            df[campo] = _moeda_col(bruto[posicao])
+        elif campo in CAMPOS_PERCENTUAL:
+            df[campo] = _percentual_col(bruto[posicao])
+        else:
+            df[campo] = _inteiro_col(bruto[posicao])
+
+    df["row_hash"] = [hash_valores(linha) for linha in (linhas[i] for i in np.flatnonzero(validas))]
+    return df.reset_index(drop=True)
@@ -0,0 +1,190 @@
+"""
+Substituto local do facebook_business para os testes offline
+(test_meta_insights.py, test_meta_sync.py).
+
+Implementa o mínimo usado pelos endpoints: objetos com get('id') e
+get_insights(fields=, params=) que devolvem dicts no formato da Graph API.
+Os números são determinísticos (derivados do ID e da data), com latência
+configurável para simular a rede e erros de rate limit opcionais.
+"""
+
+import threading
+import time
+from datetime import date, timedelta
+from typing import Any, Dict, List, Optional
+
+
+class FakeRequestError(Exception):
+    """Imita facebook_business.exceptions.FacebookRequestError."""
+
+    def __init__(self, message: str, codigo: int, http_status: int = 400):
+        super().__init__(message)
+        self._codigo = codigo
+        self._http_status = http_status
+
+    def api_error_code(self) -> int:
+        return self._codigo
+
+    def http_status(self) -> int:
+        return self._http_status
+
+
+def _dias(params: Dict[str, Any], hoje: date) -> List[date]:
+    time_range = params.get('time_range')
+    if time_range:
+        inicio = date.fromisoformat(time_range['since'])
+        fim = date.fromisoformat(time_range['until'])
+    else:
+        n = {'today': 1, 'yesterday': 1, 'last_7d': 7, 'last_14d': 14, 'last_30d': 30, 'last_90d': 90}
+        fim = hoje if params.get('date_preset') == 'today' else hoje - timedelta(days=1)
+        inicio = fim - timedelta(days=n.get(params.get('date_preset', 'last_30d'), 30) - 1)
+    return [inicio + timedelta(days=i) for i in range((fim - inicio).days + 1)]
+
+
+def gerar_insight(objeto_id: str, dia: Optional[date] = None) -> Dict[str, Any]:
+    """Insight determinístico para (objeto, dia)."""
+    semente = sum(ord(c) for c in objeto_id) + (dia.toordinal() if dia else 0)
+    impressions = 1000 + semente % 500
+    clicks = 20 + semente % 30
+    spend = round(50 + (semente % 100) / 4, 2)
+    leads = 1 + semente % 5
+    return {
+        'impressions': str(impressions),
+        'clicks': str(clicks),
+        'spend': str(spend),
+        'reach': str(impressions - 100),
+        'cpc': str(round(spend / clicks, 4)),
+        'cpm': str(round(spend / impressions * 1000, 4)),
+        'ctr': str(round(clicks / impressions * 100, 4)),
+        'actions': [{'action_type': 'lead', 'value': str(leads)}],
+        'action_values': [{'action_type': 'purchase', 'value': str(round(spend * 1.5, 2))}],
+    }
+
+
+class FakeObjeto(dict):
+    """Campanha/anúncio falso. latencia em segundos por chamada de get_insights."""
+
+    def __init__(self, objeto_id: str, latencia: float = 0.0, falhas_rate_limit: int = 0,
+                 hoje: Optional[date] = None, **campos):
+        super().__init__(id=objeto_id, **campos)
+        self.latencia = latencia
+        self.hoje = hoje or date.today()
+        self.chamadas = 0
+        self._falhas = falhas_rate_limit
+        self._lock = threading.Lock()
+
+    def get_insights(self, fields=None, params=None) -> List[Dict[str, Any]]:
+        params = params or {}
+        with self._lock:
+            self.chamadas += 1
+            if self._falhas > 0:
+                self._falhas -= 1
+                raise FakeRequestError("User request limit reached", codigo=17)
+        if self.latencia:
+            time.sleep(self.latencia)
+
+        dias = _dias(params, self.hoje)
+        if params.get('time_increment') == 1:
+            linhas = []
+            for dia in dias:
+                insight = gerar_insight(self['id'], dia)
+                insight['date_start'] = insight['date_stop'] = dia.isoformat()
+                linhas.append(insight)
+            return linhas
+
+        # Sem time_increment: uma linha com o período somado
+        total = {'impressions': 0, 'clicks': 0, 'spend': 0.0, 'reach': 0, 'leads': 0}
+        for dia in dias:
+            insight = gerar_insight(self['id'], dia)
+            total['impressions'] += int(insight['impressions'])
+            total['clicks'] += int(insight['clicks'])
+            total['spend'] += float(insight['spend'])
+            total['reach'] += int(insight['reach'])
+            total['leads'] += int(insight['actions'][0]['value'])
+        return [{
+            'impressions': str(total['impressions']),
+            'clicks': str(total['clicks']),
+            'spend': str(round(total['spend'], 2)),
+            'reach': str(total['reach']),
+            'actions': [{'action_type': 'lead', 'value': str(total['leads'])}],
+            'date_start': dias[0].isoformat(),
+            'date_stop': dias[-1].isoformat(),
+        }]
+
+
+FakeCampaign = FakeObjeto
+FakeAd = FakeObjeto
+
+
+class FakeAdAccount(dict):
+    """
+    Conta de anúncios falsa. anuncios: lista de dicts com campaign_id,
+    campaign_name, adset_id, adset_name, ad_id, ad_name e (opcional)
+    effective_status. get_insights(level=..., time_increment=1) soma os
+    insights dos anúncios por campanha/conjunto, como a API faz.
+    """
+
+    NIVEIS = {
+        'campaign': ['campaign_id', 'campaign_name'],
+        'adset': ['campaign_id', 'campaign_name', 'adset_id', 'adset_name'],
+        'ad': ['campaign_id', 'campaign_name', 'adset_id', 'adset_name', 'ad_id', 'ad_name'],
+    }
+
+    def __init__(self, conta_id: str, anuncios: List[Dict[str, str]], hoje: Optional[date] = None):
+        super().__init__(id=conta_id)
+        self.anuncios = anuncios
+        self.hoje = hoje or date.today()
+        self.chamadas: List[Dict[str, Any]] = []
+        self._lock = threading.Lock()
+
+    def get_campaigns(self, fields=None, params=None) -> List[Dict[str, Any]]:
+        campanhas = {}
+        for anuncio in self.anuncios:
+            campanhas[anuncio['campaign_id']] = {
+                'id': anuncio['campaign_id'],
+                'name': anuncio['campaign_name'],
+                'status': anuncio.get('effective_status', 'ACTIVE'),
+                'effective_status': anuncio.get('effective_status', 'ACTIVE'),
+                'objective': 'OUTCOME_LEADS',
+            }
+        return list(campanhas.values())
+
+    def get_insights(self, fields=None, params=None) -> List[Dict[str, Any]]:
+        params = params or {}
+        with self._lock:
+            self.chamadas.append(params)
+
+        chaves = self.NIVEIS[params.get('level', 'campaign')]
+        linhas = {}
+        for dia in _dias(params, self.hoje):
+            for anuncio in self.anuncios:
+                insight = gerar_insight(anuncio['ad_id'], dia)
+                chave = (dia, anuncio[chaves[-2]])  # id do nível (campaign_id, adset_id, ad_id)
+                linha = linhas.get(chave)
+                if linha is None:
+                    linha = {c: anuncio[c] for c in chaves}
+                    linha.update({'date_start': dia.isoformat(), 'date_stop': dia.isoformat(),
+                                  'impressions': 0, 'clicks': 0, 'spend': 0.0, 'reach': 0,
+                                  'leads': 0, 'receita': 0.0})
+                    linhas[chave] = linha
+                linha['impressions'] += int(insight['impressions'])
+                linha['clicks'] += int(insight['clicks'])
+                linha['spend'] += float(insight['spend'])
+                linha['reach'] += int(insight['reach'])
+                linha['leads'] += int(insight['actions'][0]['value'])
+                linha['receita'] += float(insight['action_values'][0]['value'])
+
+        resultado = []
+        for linha in linhas.values():
+            leads = linha.pop('leads')
+            receita = linha.pop('receita')
+            linha.update({
+                'impressions': str(linha['impressions']),
+                'clicks': str(linha['clicks']),
+                'spend': str(round(linha['spend'], 2)),
+                'reach': str(linha['reach']),
+                'actions': [{'action_type': 'lead', 'value': str(leads)}],
+                'action_values': [{'action_type': 'purchase', 'value': str(round(receita, 2))}],
+            })
+            resultado.append(linha)
+        return resultado
@@ -0,0 +1,116 @@
+"""
+Substituto local do gspread para os testes offline (test_google_sheets_sync.py).
+
+Implementa apenas o que a integração usa: client.open_by_key(),
+spreadsheet.worksheet(nome), worksheet.get_all_values() e
+spreadsheet.values_batch_get(intervalos) com intervalos A1 ('aba'!A5:R,
+'aba'!A:A). Os intervalos pedidos ficam em spreadsheet.requisicoes.
+
+O teste troca google_sheets.criar_google_sheets_client por uma função que
+devolve FakeClient(caminho=...), com o caminho de um JSON no formato
+{"nome da aba": [["célula", ...], ...]}. O arquivo é relido a cada leitura
+(como a API faria com a planilha aberta), então editar o JSON simula
+mudanças na planilha mesmo com o handle em cache.
+"""
+
+import json
+import re
+from typing import Any, Dict, List, Tuple
+
+
+class WorksheetNotFound(Exception):
+    """Equivalente a gspread.exceptions.WorksheetNotFound."""
+
+
+class FakeWorksheet:
+    def __init__(self, title: str, values: List[List[str]]):
+        self.title = title
+        self._values = values
+
+    def get_all_values(self) -> List[List[str]]:
+        return [list(row) for row in self._values]
+
+
+def _coluna(letras: str) -> int:
+    """A -> 0, B -> 1, ..., AA -> 26"""
+    indice = 0
+    for letra in letras:
+        indice = indice * 26 + ord(letra) - ord("A") + 1
+    return indice - 1
+
+
+def _intervalo(a1: str) -> Tuple[str, int, int, int, int]:
+    """'aba'!A5:R10 -> (aba, linha inicial, linha final, coluna inicial, coluna final); 0-based, fim exclusivo."""
+    aba, celulas = a1.rsplit("!", 1)
+    if aba.startswith("'"):
+        aba = aba[1:-1].replace("''", "'")
+
+    inicio, fim = celulas.split(":")
+    col_ini, lin_ini = re.match(r"([A-Z]+)(\d*)", inicio).groups()
+    col_fim, lin_fim = re.match(r"([A-Z]+)(\d*)", fim).groups()
+    return (
+        aba,
+        int(lin_ini) - 1 if lin_ini else 0,
+        int(lin_fim) if lin_fim else None,
+        _coluna(col_ini),
+        _coluna(col_fim) + 1,
+    )
+
+
+class FakeSpreadsheet:
+    def __init__(self, abas: Dict[str, List[List[str]]] = None, id: str = "fake", caminho: str = None):
+        self.id = id
+        self.caminho = caminho
+        self._abas = abas if abas is not None else {}
+        self.requisicoes: List[List[str]] = []
+
+    def _ler(self) -> Dict[str, List[List[str]]]:
+        if self.caminho:
+            with open(self.caminho, encoding="utf-8") as f:
+                return json.load(f)
+        return self._abas
+
+    def values_batch_get(self, ranges: List[str], params=None) -> Dict[str, Any]:
+        """Como a API: células vazias no fim da linha e linhas vazias no fim são omitidas."""
+        self.requisicoes.append(list(ranges))
+        abas = self._ler()
+        intervalos = []
+        for a1 in ranges:
+            aba, lin_ini, lin_fim, col_ini, col_fim = _intervalo(a1)
+            if aba not in abas:
+                raise WorksheetNotFound(aba)
+
+            valores = []
+            for linha in abas[aba][lin_ini:lin_fim]:
+                celulas = list(linha[col_ini:col_fim])
+                while celulas and celulas[-1] == "":
+                    celulas.pop()
+                valores.append(celulas)
+            while valores and not valores[-1]:
+                valores.pop()
+
+            intervalo = {"range": a1, "majorDimension": "ROWS"}
+            if valores:
+                intervalo["values"] = valores
+            intervalos.append(intervalo)
+        return {"spreadsheetId": self.id, "valueRanges": intervalos}
+
+    def worksheet(self, title: str) -> FakeWorksheet:
+        abas = self._ler()
+        if title not in abas:
+            raise WorksheetNotFound(title)
+        return FakeWorksheet(title, abas[title])
+
+    def worksheets(self) -> List[FakeWorksheet]:
+        return [FakeWorksheet(title, values) for title, values in self._ler().items()]
+
+
+class FakeClient:
+    """Cliente que devolve sempre a mesma planilha, lida de um arquivo JSON ou de um dict."""
+
+    def __init__(self, caminho: str = None, abas: Dict[str, List[List[str]]] = None):
+        self.caminho = caminho
+        self.abas = abas
+
+    def open_by_key(self, key: str) -> FakeSpreadsheet:
+        return FakeSpreadsheet(self.abas, id=key, caminho=self.caminho)
@@ -0,0 +1,177 @@
+"""
+Benchmark dos importadores de CSV: caminho antigo (iterrows + ORM por linha)
+vs. caminho vetorizado (parsing por coluna + inserção em lote).
+
+Gera um CSV sintético (100 mil linhas por padrão) e importa nos dois modos
+num banco SQLite temporário.
+
+Medido no SQLite local: ~8x em 20 mil e em 100 mil linhas (closer e
+financeiro; 100 mil: ~32s -> ~4s). Cerca de 70% do tempo do caminho
+vetorizado é o executemany com a escrita nos índices, custo que o caminho
+antigo também paga; no PostgreSQL a gravação usa COPY.
+
+A equivalência dos valores e dos erros por linha com o caminho antigo é
+conferida em test_import_csv.py.
+
+Uso:
+    cd backend
+    python scripts/benchmark_import_csv.py [linhas]
+"""
+
+import io
+import os
+import random
+import sys
+import tempfile
+import time
+
+# Banco temporário: precisa ser definido antes de importar o app
+_tmp_dir = tempfile.mkdtemp(prefix="medgm_bench_")
+os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(_tmp_dir, 'bench.db')}"
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import pandas as pd
+from fastapi.testclient import TestClient
+
+from app.database import SessionLocal, init_db
+from app.main import app
+from app import rollups
+from app.models.models import CloserMetrica, Financeiro
+from app.routers.import_csv import parse_date, parse_float, parse_int
+
+
+def gerar_csv_closer(linhas: int) -> bytes:
+    random.seed(42)
+    closers = ["Ana", "Bruno", "Carla", "Diego", "Elisa"]
+    funis = ["SS", "Quiz", "Indicacao", "Webinario"]
+    buffer = io.StringIO()
+    buffer.write("closer,funil,mes,ano,calls_agendadas,calls_realizadas,vendas,faturamento\n")
+    for _ in range(linhas):
+        agendadas = random.randint(0, 20)
+        realizadas = random.randint(0, agendadas)
+        vendas = random.randint(0, realizadas)
+        buffer.write(
+            f"{random.choice(closers)},{random.choice(funis)},{random.randint(1, 12)},2025,"
+            f"{agendadas},{realizadas},{vendas},\"{random.randint(0, 90000)},{random.randint(0, 99):02d}\"\n"
+        )
+    return buffer.getvalue().encode()
+
+
+def gerar_csv_financeiro(linhas: int) -> bytes:
+    random.seed(7)
+    buffer = io.StringIO()
+    buffer.write("tipo,valor,mes,ano,data,categoria,descricao,previsto_realizado\n")
+    for i in range(linhas):
+        mes = random.randint(1, 12)
+        buffer.write(
+            f"{random.choice(['entrada', 'saida'])},\"R$ {random.randint(1, 9999)}.{random.randint(0, 999):03d},{random.randint(0, 99):02d}\","
+            f"{mes},2025,{random.randint(1, 28):02d}/{mes:02d}/2025,Categoria {i % 15},Lançamento {i},realizado\n"
+        )
+    return buffer.getvalue().encode()
+
+
+def importar_closer_legado(conteudo: bytes) -> int:
+    """Reproduz o importador antigo: uma linha por vez com objetos ORM."""
+    db = SessionLocal()
+    try:
+        df = pd.read_csv(io.StringIO(conteudo.decode("utf-8")), sep=None, engine="python")
+        novos = []
+        for _, row in df.iterrows():
+            agendadas = parse_int(row["calls_agendadas"])
+            realizadas = parse_int(row["calls_realizadas"])
+            vendas = parse_int(row["vendas"])
+            faturamento = parse_float(row["faturamento"])
+            novo = CloserMetrica(
+                closer=str(row["closer"]).strip(),
+                funil=str(row["funil"]).strip(),
+                mes=parse_int(row["mes"]),
+                ano=parse_int(row["ano"]),
+                calls_agendadas=agendadas,
+                calls_realizadas=realizadas,
+                vendas=vendas,
+                faturamento=faturamento,
+                tx_comparecimento=round((realizadas / agendadas * 100) if agendadas > 0 else 0, 2),
+                tx_conversao=round((vendas / realizadas * 100) if realizadas > 0 else 0, 2),
+                ticket_medio=round((faturamento / vendas) if vendas > 0 else 0, 2)
+            )
+            db.add(novo)
+            novos.append(novo)
+        rollups.recalcular_registros(db, novos)
+        db.commit()
+        return len(novos)
+    finally:
+        db.close()
+
+
+def importar_financeiro_legado(conteudo: bytes) -> int:
+    db = SessionLocal()
+    try:
+        df = pd.read_csv(io.StringIO(conteudo.decode("utf-8")), sep=None, engine="python")
+        count = 0
+        for _, row in df.iterrows():
+            tipo = str(row["tipo"]).strip().lower()
+            db.add(Financeiro(
+                tipo=tipo,
+                valor=parse_float(row["valor"]),
+                mes=parse_int(row["mes"]),
+                ano=parse_int(row["ano"]),
+                data=parse_date(row.get("data")),
+                categoria=str(row.get("categoria", "")).strip() or None,
+                descricao=str(row.get("descricao", "")).strip() or None,
+                previsto_realizado=str(row.get("previsto_realizado", "realizado")).strip() or "realizado"
+            ))
+            count += 1
+        db.commit()
+        return count
+    finally:
+        db.close()
+
+
+def limpar(modelo):
+    db = SessionLocal()
+    try:
+        db.query(modelo).delete()
+        rollups.reconstruir_rollups(db)
+        db.commit()
+    finally:
+        db.close()
+
+
+def medir(nome, funcao):
+    inicio = time.perf_counter()
+    resultado = funcao()
+    duracao = time.perf_counter() - inicio
+    print(f"  {nome:<12} {duracao:8.2f}s  ({resultado} linhas)")
+    return duracao
+
+
+def comparar(titulo, modelo, conteudo, legado, rota, client):
+    print(f"\n{titulo}")
+    t_legado = medir("legado", lambda: legado(conteudo))
+    limpar(modelo)
+
+    def vetorizado():
+        resposta = client.post(rota, files={"file": ("bench.csv", conteudo, "text/csv")})
+        assert resposta.status_code == 200, resposta.text
+        return resposta.json()["importados"]
+
+    t_novo = medir("vetorizado", vetorizado)
+    limpar(modelo)
+    print(f"  speedup      {t_legado / t_novo:8.1f}x")
+
+
+def main():
+    linhas = int(sys.argv[1]) if len(sys.argv) > 1 else 100_000
+    init_db()
+    client = TestClient(app)
+
+    print(f"Benchmark de importação CSV ({linhas} linhas, {os.environ['DATABASE_URL']})")
+    comparar("Closer", CloserMetrica, gerar_csv_closer(linhas),
+             importar_closer_legado, "/import/closer/csv", client)
+    comparar("Financeiro", Financeiro, gerar_csv_financeiro(linhas),
+             importar_financeiro_legado, "/import/financeiro/csv", client)
+
+
+if __name__ == "__main__":
+    main()
@@ -22,9 +22,8 @@ def test_metrics_financeiro():
     db = SessionLocal()
 
     from app.routers.metrics import get_metrics_financeiro
-    import asyncio
 
-    result = asyncio.run(get_metrics_financeiro(mes=1, ano=2026, db=db))
+    result = get_metrics_financeiro(mes=1, ano=2026, db=db)
 
     print(f"   Entradas: R$ {result['entradas']:,.2f}")
     print(f"   Saídas: R$ {result['saidas']:,.2f}")
@@ -38,9 +37,8 @@ def test_metrics_comercial():
     db = SessionLocal()
 
     from app.routers.metrics import get_metrics_comercial
-    import asyncio
 
-    result = asyncio.run(get_metrics_comercial(mes=1, ano=2026, db=db))
+    result = get_metrics_comercial(mes=1, ano=2026, db=db)
 
     print(f"   Faturamento: R$ {result['faturamento_total']:,.2f}")
     print(f"   Vendas: {result['vendas_total']}")
@@ -55,9 +53,8 @@ def test_metrics_inteligencia():
     db = SessionLocal()
 
     from app.routers.metrics import get_metrics_inteligencia
-    import asyncio
 
-    result = asyncio.run(get_metrics_inteligencia(mes=1, ano=2026, db=db))
+    result = get_metrics_inteligencia(mes=1, ano=2026, db=db)
 
     print(f"   CAC: R$ {result['cac']:,.2f}")
     print(f"   LTV: R$ {result['ltv']:,.2f}")
@@ -72,9 +69,8 @@ def test_vendas():
     db = SessionLocal()
 
     from app.routers.metrics import get_vendas
-    import asyncio
 
-    result = asyncio.run(get_vendas(mes=1, ano=2026, db=db))
+    result = get_vendas(mes=1, ano=2026, db=db)
 
     print(f"   Total de vendas: {result['total']}")
     if result['vendas']:
@@ -89,9 +85,8 @@ def test_all_data():
     db = SessionLocal()
 
     from app.routers.metrics import get_all_data
-    import asyncio
 
-    result = asyncio.run(get_all_data(db=db))
+    result = get_all_data(db=db)
 
     print(f"   Total de meses: {result['total_meses']}")
     for mes_data in result['meses']:
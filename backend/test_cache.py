@@ -0,0 +1,207 @@
+"""
+Script para testar a invalidação do cache de respostas (app/cache.py):
+com o cache em memória ligado, uma leitura repetida vem do cache e cada
+escrita (crud, vendas, comercial, metas, config, import_csv e upload) faz a
+próxima leitura dos endpoints que dependem da tabela refletir a mudança.
+Usa um banco SQLite temporário.
+"""
+
+import io
+import os
+import sys
+import tempfile
+
+_tmp_dir = tempfile.mkdtemp(prefix="medgm_cache_")
+os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(_tmp_dir, 'cache.db')}"
+os.environ["CACHE_BACKEND"] = "memoria"
+
+# Add app to path
+sys.path.insert(0, os.path.dirname(__file__))
+
+import pandas as pd
+from fastapi.testclient import TestClient
+
+from app import cache
+from app.database import SessionLocal, init_db
+from app.main import app
+from app.models.models import Financeiro
+
+MES = {"mes": 2, "ano": 2025}
+
+
+def dre(client, mes=2):
+    r = client.get("/demonstrativos/dre", params={"mes": mes, "ano": 2025})
+    assert r.status_code == 200, r.text
+    return r.json()
+
+
+def closers(client):
+    r = client.get("/comercial/dashboard/closer", params=MES)
+    assert r.status_code == 200, r.text
+    return r.json()["metricas_por_closer"]
+
+
+def funil(client):
+    r = client.get("/funil/completo", params=MES)
+    assert r.status_code == 200, r.text
+    return r.json()
+
+
+def test_leitura_em_cache(client):
+    assert isinstance(cache.backend, cache.MemoriaBackend)
+    antes = dre(client)
+
+    # Gravação direta no banco, sem passar pelos endpoints: a resposta em cache não muda
+    db = SessionLocal()
+    try:
+        db.add(Financeiro(tipo="entrada", categoria="Venda", valor=100, mes=2, ano=2025,
+                          previsto_realizado="realizado"))
+        db.commit()
+    finally:
+        db.close()
+    assert dre(client) == antes
+
+    cache.invalidar(Financeiro.__tablename__, 2, 2025)
+    assert dre(client)["receita_bruta"] == antes["receita_bruta"] + 100
+    return True
+
+
+def test_crud(client):
+    antes = dre(client)["receita_bruta"]
+    r = client.post("/crud/financeiro", json={
+        "tipo": "entrada", "categoria": "Venda", "valor": 500, "data": "2025-02-10",
+        "mes": 2, "ano": 2025, "previsto_realizado": "realizado"
+    })
+    assert r.status_code == 200, r.text
+    id_ = r.json()["id"]
+    assert dre(client)["receita_bruta"] == antes + 500
+
+    r = client.put(f"/crud/financeiro/{id_}", json={"valor": 800})
+    assert r.status_code == 200, r.text
+    assert dre(client)["receita_bruta"] == antes + 800
+
+    r = client.delete(f"/crud/financeiro/{id_}")
+    assert r.status_code == 200, r.text
+    assert dre(client)["receita_bruta"] == antes
+
+    # Outro período não é invalidado por escritas em fevereiro, mas continua correto
+    assert dre(client, mes=3)["receita_bruta"] == 0
+    return True
+
+
+def test_vendas(client):
+    funil_antes = funil(client)
+    receita_antes = dre(client)["receita_bruta"]
+
+    r = client.post("/vendas", json={
+        "data": "2025-02-12", "cliente": "Cliente A", "closer": "Eva", "funil": "Quiz",
+        "valor_bruto": 1200, "valor_liquido": 1000
+    })
+    assert r.status_code == 200, r.text
+    id_ = r.json()["id"]
+    assert funil(client) != funil_antes
+    # A venda também cria a entrada no Financeiro
+    assert dre(client)["receita_bruta"] == receita_antes + 1000
+
+    r = client.delete(f"/vendas/{id_}")
+    assert r.status_code == 200, r.text
+    assert funil(client) == funil_antes
+    return True
+
+
+def test_comercial(client):
+    assert closers(client) == {}
+    r = client.post("/comercial/closer", json={
+        "mes": 2, "ano": 2025, "data": "2025-02-03", "closer": "Eva", "funil": "Quiz",
+        "calls_agendadas": 5, "calls_realizadas": 4, "vendas": 2, "faturamento": 2000,
+        "faturamento_bruto": 2000
+    })
+    assert r.status_code == 200, r.text
+    id_ = r.json()["id"]
+    assert closers(client)["Eva"]["total_vendas"] == 2
+
+    dados = {"mes": 2, "ano": 2025, "data": "2025-02-03", "closer": "Eva", "funil": "Quiz",
+             "calls_agendadas": 5, "calls_realizadas": 4, "vendas": 3, "faturamento": 3000,
+             "faturamento_bruto": 3000}
+    r = client.put(f"/comercial/closer/{id_}", json=dados)
+    assert r.status_code == 200, r.text
+    assert closers(client)["Eva"]["total_vendas"] == 3
+    return True
+
+
+def test_metas_e_config(client):
+    r = client.post("/config/pessoas", json={"nome": "Eva", "funcao": "closer"})
+    assert r.status_code == 200, r.text
+    pessoa_id = r.json()["id"]
+    assert closers(client)["Eva"]["meta_vendas"] == 0
+
+    r = client.post("/metas", json={"mes": 2, "ano": 2025, "pessoa_id": pessoa_id, "meta_vendas": 10})
+    assert r.status_code == 200, r.text
+    meta_id = r.json()["id"]
+    assert closers(client)["Eva"]["meta_vendas"] == 10
+
+    r = client.put(f"/metas/{meta_id}", json={"meta_vendas": 12})
+    assert r.status_code == 200, r.text
+    assert closers(client)["Eva"]["meta_vendas"] == 12
+
+    # Renomear a pessoa desfaz o vínculo com as métricas de "Eva"
+    r = client.put(f"/config/pessoas/{pessoa_id}", json={"nome": "Eva Lima"})
+    assert r.status_code == 200, r.text
+    assert closers(client)["Eva"]["meta_vendas"] == 0
+    return True
+
+
+def test_import_csv(client):
+    conteudo = (
+        "closer,funil,mes,ano,calls_agendadas,calls_realizadas,vendas,faturamento\n"
+        "Hugo,Isca,2,2025,3,2,1,1500\n"
+    )
+    r = client.post("/import/closer/csv", files={"file": ("closer.csv", io.BytesIO(conteudo.encode("utf-8")), "text/csv")})
+    assert r.status_code == 200, r.text
+    assert closers(client)["Hugo"]["total_vendas"] == 1
+    return True
+
+
+def test_upload(client):
+    planilha = io.BytesIO()
+    pd.DataFrame([{
+        "Data": "2025-02-20", "Closer": "Iris", "Funil": "Quiz", "Calls Agendadas": 4,
+        "Calls Realizadas": 3, "Vendas": 2, "Booking": 0, "Faturamento Bruto": 2500,
+        "Faturamento Líquido": 2000,
+    }]).to_excel(planilha, index=False)
+    planilha.seek(0)
+
+    r = client.post("/comercial/upload/closer", files={"file": ("closer.xlsx", planilha, "application/octet-stream")})
+    assert r.status_code == 200, r.text
+    assert closers(client)["Iris"]["total_vendas"] == 2
+    return True
+
+
+if __name__ == "__main__":
+    print("Testing invalidação do cache de respostas")
+    print("=" * 60)
+
+    init_db()
+    client = TestClient(app)
+
+    tests = [
+        ("Leitura repetida vem do cache", test_leitura_em_cache),
+        ("crud", test_crud),
+        ("vendas", test_vendas),
+        ("comercial", test_comercial),
+        ("metas e config", test_metas_e_config),
+        ("import_csv", test_import_csv),
+        ("upload", test_upload),
+    ]
+
+    for name, test_func in tests:
+        print(f"\nTesting {name}...")
+        try:
+            test_func(client)
+            print(f"✓ {name} OK")
+        except Exception as e:
+            print(f"✗ {name} FAILED: {e}")
+
+    print("\n" + "=" * 60)
+    print("All tests completed!")
+    print("=" * 60)
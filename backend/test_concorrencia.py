@@ -0,0 +1,129 @@
+"""
+Benchmark de concorrência: endpoints leves continuam rápidos durante um export.
+
+Os endpoints são síncronos e rodam no threadpool, então uma exportação
+pesada (consulta + Excel com pandas) não trava o event loop. O script mede a
+latência de /health e /config/pessoas sozinhos e com /export/completo rodando
+em paralelo, e falha se o p99 durante o export subir para perto da duração
+do próprio export (sinal de que algo voltou a bloquear o loop).
+
+Usa um banco SQLite temporário com NUM_LINHAS vendas e movimentações.
+"""
+
+import os
+import sys
+import tempfile
+import threading
+import time
+from datetime import date
+
+_tmp_dir = tempfile.mkdtemp(prefix="medgm_concorrencia_")
+os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(_tmp_dir, 'concorrencia.db')}"
+os.environ["CACHE_BACKEND"] = "off"
+
+# Add app to path
+sys.path.insert(0, os.path.dirname(__file__))
+
+from fastapi.testclient import TestClient
+from sqlalchemy import insert
+
+from app.database import SessionLocal, init_db
+from app.main import app
+from app.models.models import Financeiro, Venda
+
+NUM_LINHAS = 5000
+ROTAS_LEVES = ["/health", "/config/pessoas"]
+EXPORT = "/export/completo?mes=1&ano=2025"
+
+
+def popular():
+    db = SessionLocal()
+    try:
+        db.execute(insert(Venda), [
+            {"data": date(2025, 1, 1 + i % 28), "cliente": f"Cliente {i}", "closer": "Carla",
+             "funil": "SS", "valor": 1000 + i % 500, "mes": 1, "ano": 2025}
+            for i in range(NUM_LINHAS)
+        ])
+        db.execute(insert(Financeiro), [
+            {"tipo": "saida" if i % 3 else "entrada", "categoria": "Ferramenta",
+             "valor": 100 + i % 50, "mes": 1, "ano": 2025}
+            for i in range(NUM_LINHAS)
+        ])
+        db.commit()
+    finally:
+        db.close()
+
+
+def percentil(valores, p):
+    ordenados = sorted(valores)
+    return ordenados[min(len(ordenados) - 1, int(len(ordenados) * p / 100))]
+
+
+def medir_leves(client, parar=None, minimo=40):
+    """Chama as rotas leves em sequência; até parar.is_set() (ou minimo vezes)."""
+    latencias = []
+    while len(latencias) < minimo or (parar is not None and not parar.is_set()):
+        for rota in ROTAS_LEVES:
+            inicio = time.perf_counter()
+            r = client.get(rota)
+            latencias.append(time.perf_counter() - inicio)
+            assert r.status_code == 200, r.text
+        if parar is None and len(latencias) >= minimo:
+            break
+    return latencias
+
+
+def test_latencia_durante_export(client):
+    base = medir_leves(client)
+
+    parar = threading.Event()
+    duracao_export = {}
+
+    def exportar():
+        inicio = time.perf_counter()
+        r = client.get(EXPORT)
+        duracao_export["s"] = time.perf_counter() - inicio
+        duracao_export["status"] = r.status_code
+        parar.set()
+
+    thread = threading.Thread(target=exportar)
+    thread.start()
+    durante = medir_leves(client, parar, minimo=10)
+    thread.join()
+
+    assert duracao_export["status"] == 200
+    export_s = duracao_export["s"]
+    print(f"  export: {export_s * 1000:.0f} ms")
+    print(f"  leves sozinhas:     p50 {percentil(base, 50) * 1000:.1f} ms, p99 {percentil(base, 99) * 1000:.1f} ms")
+    print(f"  leves durante export: p50 {percentil(durante, 50) * 1000:.1f} ms, "
+          f"p99 {percentil(durante, 99) * 1000:.1f} ms ({len(durante)} chamadas)")
+
+    assert len(durante) >= 10
+    assert percentil(durante, 99) < export_s / 4, "Rotas leves ficaram presas atrás do export"
+    return True
+
+
+if __name__ == "__main__":
+    print("Testing concorrência")
+    print("=" * 60)
+
+    init_db()
+    popular()
+
+    tests = [
+        ("Latência durante export", test_latencia_durante_export),
+    ]
+
+    # Um único event loop para todas as requisições, como num worker do uvicorn
+    with TestClient(app) as client:
+        for name, test_func in tests:
+            print(f"\nTesting {name}...")
+            try:
+                test_func(client)
+                print(f"✓ {name} OK")
+            except Exception as e:
+                print(f"✗ {name} FAILED: {e}")
+
+    print("\n" + "=" * 60)
+    print("All tests completed!")
+    print("=" * 60)
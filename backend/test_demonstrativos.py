@@ -0,0 +1,335 @@
+"""
+Script para testar a classificação das movimentações no DFC e no DRE
+(app/classificacao_financeira.py): bucket de cada movimentação, totais de
+cada linha dos demonstrativos, fallbacks (todas as entradas como recebimento
+de clientes, equipe como despesa operacional) e comparação com o cálculo
+antigo em Python, igual sem termos sobrepostos e diferente onde a mesma saída
+era contada em mais de uma linha.
+Usa um banco SQLite temporário com dados de exemplo.
+"""
+
+import os
+import sys
+import tempfile
+
+_tmp_dir = tempfile.mkdtemp(prefix="medgm_demonstrativos_")
+os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(_tmp_dir, 'demonstrativos.db')}"
+os.environ["CACHE_BACKEND"] = "off"
+
+# Add app to path
+sys.path.insert(0, os.path.dirname(__file__))
+
+from fastapi.testclient import TestClient
+
+from app.classificacao_financeira import bucket_dfc, bucket_dre
+from app.database import SessionLocal, init_db
+from app.main import app
+from app.models.models import Financeiro
+
+ANO = 2025
+
+# descricao = "bucket DFC|bucket DRE" esperado da movimentação
+MOVIMENTACOES = [
+    # Janeiro: só saldo inicial
+    dict(mes=1, tipo="entrada", categoria="Venda", valor=1000, descricao="recebimento_clientes|receita"),
+    dict(mes=1, tipo="saida", categoria="Ferramenta", valor=400, descricao="fornecedores|nao_classificado"),
+
+    # Fevereiro: uma linha por movimentação, sem termos sobrepostos
+    dict(mes=2, tipo="entrada", produto="Assessoria", categoria="Venda", valor=10000,
+         descricao="recebimento_clientes|receita"),
+    dict(mes=2, tipo="entrada", categoria="Rendimento", valor=500, descricao="outras_entradas|receita"),
+    dict(mes=2, tipo="entrada", categoria="Venda", valor=99999, previsto_realizado="previsto",
+         descricao="recebimento_clientes|receita"),
+    dict(mes=2, tipo="saida", categoria="Ferramenta", custo="Software", centro_custo="Administrativo",
+         tipo_custo="Fixo", valor=300, descricao="fornecedores|administrativas"),
+    dict(mes=2, tipo="saida", categoria="Salario", custo="Equipe", centro_custo="Comercial",
+         tipo_custo="Fixo", valor=2000, descricao="salarios|comerciais"),
+    dict(mes=2, tipo="saida", categoria="Imposto", custo="DAS", tipo_custo="Fixo", valor=800,
+         descricao="impostos|deducoes"),
+    dict(mes=2, tipo="saida", categoria="Equipamento", custo="Notebook", tipo_custo="Investimento",
+         valor=1500, descricao="investimento|nao_classificado"),
+    dict(mes=2, tipo="saida", categoria="Distribuicao", custo="Socio A", centro_custo="Societario",
+         tipo_custo="Pontual", valor=1000, descricao="distribuicao_lucros|nao_classificado"),
+    dict(mes=2, tipo="saida", categoria="Emprestimo", custo="Parcela", centro_custo="Financeiro",
+         tipo_custo="Fixo", valor=700, descricao="emprestimos|financeiras"),
+    dict(mes=2, tipo="saida", categoria="Entrega", custo="Frete", centro_custo="Operacao",
+         tipo_custo="Variavel", valor=400, descricao="fornecedores|cmv"),
+
+    # Abril: termos sobrepostos
+    dict(mes=4, tipo="entrada", produto="Consultoria", valor=5000, descricao="recebimento_clientes|receita"),
+    # "IRPJ" contém "PJ" (salários)
+    dict(mes=4, tipo="saida", categoria="IRPJ", custo="IRPJ trimestral", tipo_custo="Pontual", valor=600,
+         descricao="impostos|nao_classificado"),
+    # "Taxa" (financeiras), variável (CMV) e centro Comercial
+    dict(mes=4, tipo="saida", categoria="Taxa de cartao", centro_custo="Comercial", tipo_custo="Variavel",
+         valor=200, descricao="nao_classificado|financeiras"),
+    # Operação fixa é despesa operacional, não CMV
+    dict(mes=4, tipo="saida", categoria="Manutencao", centro_custo="Operacao", tipo_custo="Fixo", valor=900,
+         descricao="fornecedores|operacionais"),
+    dict(mes=4, tipo="saida", categoria="Insumos", centro_custo="Operacao", valor=100,
+         descricao="fornecedores|cmv"),
+    # "Operacional" não casa com "Operacao" (fornecedores), só com "operac"
+    dict(mes=4, tipo="saida", categoria="Limpeza", centro_custo="Operacional", tipo_custo="Fixo", valor=250,
+         descricao="outras_operacionais|nao_classificado"),
+
+    # Junho: sem categorias de receita nem centros de custo
+    dict(mes=6, tipo="entrada", categoria="Aporte", valor=3000, descricao="outras_entradas|receita"),
+    dict(mes=6, tipo="entrada", categoria="Reembolso", valor=200, descricao="outras_entradas|receita"),
+    dict(mes=6, tipo="saida", categoria="Folha", custo="Salario", tipo_custo="Fixo", valor=1200,
+         descricao="salarios|equipe"),
+    dict(mes=6, tipo="saida", categoria="Juros", valor=100, descricao="emprestimos|financeiras"),
+]
+
+
+def popular():
+    db = SessionLocal()
+    try:
+        for dados in MOVIMENTACOES:
+            dados = {"previsto_realizado": "realizado", **dados}
+            db.add(Financeiro(ano=ANO, **dados))
+        db.commit()
+    finally:
+        db.close()
+
+
+def _contem(valor, termos):
+    return any(termo.lower() in (valor or '').lower() for termo in termos)
+
+
+def dfc_antigo(entradas, saidas):
+    """Cálculo de demonstracao_fluxo_caixa antes das regras em SQL (uma soma por linha)."""
+    categorias_receita = ['Venda', 'Recorrencia', 'Mensalidade', 'MRR', 'TCV', 'Assessoria', 'Consultoria']
+    recebimento = sum(e.valor for e in entradas
+                      if _contem(e.categoria, categorias_receita) or _contem(e.produto, categorias_receita))
+    if recebimento == 0:
+        recebimento = sum(e.valor for e in entradas)
+
+    def soma(condicao):
+        return sum(s.valor for s in saidas if condicao(s))
+
+    fornecedores = soma(lambda s: any(_contem(v, ['Ferramenta', 'Software', 'Fornecedor', 'Servico', 'Operacao'])
+                                      for v in (s.categoria, s.custo, s.centro_custo)))
+    salarios = soma(lambda s: any(_contem(v, ['Equipe', 'Salario', 'Folha', 'Funcionario', 'CLT', 'PJ'])
+                                  for v in (s.categoria, s.custo)))
+    impostos = soma(lambda s: any(_contem(v, ['Imposto', 'IRPF', 'IRPJ', 'PIS', 'COFINS', 'ISS', 'Tributo'])
+                                  for v in (s.categoria, s.custo)))
+    outras = max(soma(lambda s: _contem(s.centro_custo, ['operac'])) - fornecedores - salarios - impostos, 0)
+    investimento = soma(lambda s: s.tipo_custo == 'Investimento' or any(
+        _contem(v, ['Investimento', 'Ativo', 'Equipamento', 'Expansao']) for v in (s.categoria, s.custo)))
+    distribuicao = soma(lambda s: s.centro_custo == 'Societario' or any(
+        _contem(v, ['Pro-labore', 'Distribuicao', 'Dividendo', 'Lucro', 'Societario', 'Socio']) for v in (s.categoria, s.custo)))
+    emprestimos = soma(lambda s: _contem(s.categoria, ['Emprestimo', 'Financiamento', 'Juros']))
+
+    subtotal = recebimento - fornecedores - salarios - impostos - outras
+    return {
+        "atividades_operacionais": {
+            "recebimento_clientes": recebimento,
+            "pagamento_fornecedores": fornecedores,
+            "pagamento_salarios": salarios,
+            "impostos_pagos": impostos,
+            "outras_despesas": outras,
+            "subtotal": subtotal
+        },
+        "atividades_investimento": {"compra_ativos": investimento, "subtotal": -investimento},
+        "atividades_financiamento": {
+            "distribuicao_lucros": distribuicao,
+            "emprestimos": emprestimos,
+            "subtotal": -distribuicao - emprestimos
+        },
+        "variacao_caixa": subtotal - investimento - distribuicao - emprestimos,
+    }
+
+
+def dre_antigo(receitas, custos):
+    """Cálculo de demonstracao_resultado antes das regras em SQL (uma soma por linha)."""
+    def soma(condicao):
+        return sum(c.valor for c in custos if condicao(c))
+
+    receita_bruta = sum(r.valor for r in receitas)
+    deducoes = min(soma(lambda c: _contem(c.categoria, ['Imposto', 'Devolucao', 'Cancelamento', 'Estorno'])),
+                   receita_bruta * 0.2)
+    cmv = soma(lambda c: c.tipo_custo == 'Variavel' or c.centro_custo == 'Operacao' and c.tipo_custo != 'Fixo')
+    comerciais = soma(lambda c: c.centro_custo == 'Comercial')
+    administrativas = soma(lambda c: c.centro_custo == 'Administrativo')
+    operacionais = soma(lambda c: c.centro_custo == 'Operacao' and c.tipo_custo == 'Fixo')
+    if comerciais + administrativas + operacionais == 0:
+        operacionais = soma(lambda c: _contem(c.categoria, ['Equipe', 'Salario', 'Folha'])
+                            or _contem(c.custo, ['Equipe', 'Salario', 'Folha']))
+    despesas_operacionais = comerciais + administrativas + operacionais
+    financeiras = soma(lambda c: c.centro_custo == 'Financeiro'
+                       or _contem(c.categoria, ['Juros', 'Taxa', 'Multa', 'IOF', 'Financeiro']))
+    outras = max(sum(c.valor for c in custos) - cmv - despesas_operacionais - financeiras - deducoes, 0)
+
+    return {
+        "receita_bruta": receita_bruta,
+        "deducoes": deducoes,
+        "cmv": cmv,
+        "despesas": {
+            "comerciais": comerciais,
+            "administrativas": administrativas,
+            "operacionais": operacionais,
+            "outras": outras,
+            "total": despesas_operacionais + outras
+        },
+        "despesas_financeiras": financeiras,
+        "lucro_liquido": receita_bruta - deducoes - cmv - despesas_operacionais - financeiras,
+    }
+
+
+def antigos(mes):
+    db = SessionLocal()
+    try:
+        movimentacoes = db.query(Financeiro).filter(
+            Financeiro.mes == mes, Financeiro.ano == ANO, Financeiro.previsto_realizado == "realizado"
+        ).all()
+    finally:
+        db.close()
+    entradas = [m for m in movimentacoes if m.tipo == "entrada"]
+    saidas = [m for m in movimentacoes if m.tipo == "saida"]
+    return dfc_antigo(entradas, saidas), dre_antigo(entradas, saidas)
+
+
+def _subconjunto(esperado, obtido, caminho=""):
+    """Campos de esperado com o mesmo valor em obtido. Retorna os caminhos diferentes."""
+    diferencas = []
+    for chave, valor in esperado.items():
+        if isinstance(valor, dict):
+            diferencas += _subconjunto(valor, obtido[chave], f"{caminho}{chave}.")
+        elif abs(valor - obtido[chave]) > 1e-6:
+            diferencas.append(f"{caminho}{chave}")
+    return diferencas
+
+
+def test_bucket_por_movimentacao(client):
+    db = SessionLocal()
+    try:
+        linhas = db.query(Financeiro.id, Financeiro.descricao, bucket_dfc()).all()
+        for id_, descricao, bucket in linhas:
+            assert bucket == descricao.split("|")[0], (id_, descricao, bucket)
+
+        linhas = db.query(Financeiro.id, Financeiro.descricao, bucket_dre()).all()
+        for id_, descricao, bucket in linhas:
+            assert bucket == descricao.split("|")[1], (id_, descricao, bucket)
+    finally:
+        db.close()
+    return True
+
+
+def test_totais_sem_sobreposicao(client):
+    dfc = client.get("/demonstrativos/dfc", params={"mes": 2, "ano": ANO}).json()
+    assert dfc["atividades_operacionais"] == {
+        "recebimento_clientes": 10000, "pagamento_fornecedores": 700, "pagamento_salarios": 2000,
+        "impostos_pagos": 800, "outras_despesas": 0, "subtotal": 6500
+    }, dfc["atividades_operacionais"]
+    assert dfc["atividades_investimento"] == {"compra_ativos": 1500, "subtotal": -1500}
+    assert dfc["atividades_financiamento"] == {"distribuicao_lucros": 1000, "emprestimos": 700, "subtotal": -1700}
+    assert dfc["variacao_caixa"] == 3300
+    assert dfc["saldo_inicial"] == 600 and dfc["saldo_final"] == 3900
+
+    dre = client.get("/demonstrativos/dre", params={"mes": 2, "ano": ANO}).json()
+    assert dre["receita_bruta"] == 10500 and dre["deducoes"] == 800 and dre["receita_liquida"] == 9700
+    assert dre["cmv"] == 400
+    assert dre["despesas"] == {"comerciais": 2000, "administrativas": 300, "operacionais": 0,
+                               "outras": 2500, "total": 4800}, dre["despesas"]
+    assert dre["despesas_financeiras"] == 700
+    assert dre["lucro_liquido"] == 9700 - 400 - 2300 - 700
+
+    # Sem termos sobrepostos os valores são os do cálculo antigo
+    dfc_velho, dre_velho = antigos(2)
+    assert _subconjunto(dfc_velho, dfc) == [], _subconjunto(dfc_velho, dfc)
+    assert _subconjunto(dre_velho, dre) == [], _subconjunto(dre_velho, dre)
+    return True
+
+
+def test_termos_sobrepostos(client):
+    dfc = client.get("/demonstrativos/dfc", params={"mes": 4, "ano": ANO}).json()
+    assert dfc["atividades_operacionais"] == {
+        "recebimento_clientes": 5000, "pagamento_fornecedores": 1000, "pagamento_salarios": 0,
+        "impostos_pagos": 600, "outras_despesas": 250, "subtotal": 3150
+    }, dfc["atividades_operacionais"]
+    assert dfc["variacao_caixa"] == 3150
+
+    dre = client.get("/demonstrativos/dre", params={"mes": 4, "ano": ANO}).json()
+    assert dre["cmv"] == 100
+    assert dre["despesas"] == {"comerciais": 0, "administrativas": 0, "operacionais": 900,
+                               "outras": 850, "total": 1750}, dre["despesas"]
+    assert dre["despesas_financeiras"] == 200
+    assert dre["lucro_liquido"] == 3800
+
+    # Onde o cálculo antigo contava a mesma saída em mais de uma linha
+    dfc_velho, dre_velho = antigos(4)
+    diferencas = _subconjunto(dfc_velho, dfc)
+    print("DFC diferente do antigo em:", diferencas)
+    assert diferencas == [
+        "atividades_operacionais.pagamento_salarios",  # IRPJ também contava como PJ
+        "atividades_operacionais.outras_despesas",  # Antigo: centro "operac" menos as outras linhas, sem chegar a 250
+        "atividades_operacionais.subtotal",
+        "variacao_caixa",
+    ], diferencas
+    assert dfc_velho["atividades_operacionais"]["pagamento_salarios"] == 600
+
+    diferencas = _subconjunto(dre_velho, dre)
+    print("DRE diferente do antigo em:", diferencas)
+    assert diferencas == [
+        "cmv",  # Taxa variável também contava como CMV
+        "despesas.comerciais",  # e como despesa comercial
+        "despesas.outras",
+        "despesas.total",
+        "lucro_liquido",
+    ], diferencas
+    assert dre_velho["cmv"] == 300 and dre_velho["despesas"]["comerciais"] == 200
+    assert dre_velho["lucro_liquido"] == 3400
+    return True
+
+
+def test_fallbacks(client):
+    # Nenhuma entrada com categoria de receita: todas contam como recebimento de clientes
+    dfc = client.get("/demonstrativos/dfc", params={"mes": 6, "ano": ANO}).json()
+    assert dfc["atividades_operacionais"]["recebimento_clientes"] == 3200
+    assert dfc["atividades_operacionais"]["pagamento_salarios"] == 1200
+    assert dfc["atividades_financiamento"]["emprestimos"] == 100
+    assert dfc["variacao_caixa"] == 1900
+    assert dfc["saldo_inicial"] == 600 + 3800 + 2950
+
+    # Sem centro de custo: salários e equipe viram despesa operacional
+    dre = client.get("/demonstrativos/dre", params={"mes": 6, "ano": ANO}).json()
+    assert dre["despesas"]["operacionais"] == 1200
+    assert dre["despesas_financeiras"] == 100
+    assert dre["lucro_liquido"] == 1900
+
+    dfc_velho, dre_velho = antigos(6)
+    assert _subconjunto(dfc_velho, dfc) == []
+    assert _subconjunto(dre_velho, dre) == []
+
+    vazio = client.get("/demonstrativos/dfc", params={"mes": 8, "ano": ANO}).json()
+    assert vazio["atividades_operacionais"]["recebimento_clientes"] == 0
+    assert vazio["variacao_caixa"] == 0
+    return True
+
+
+if __name__ == "__main__":
+    print("Testing classificação do DFC e do DRE")
+    print("=" * 60)
+
+    init_db()
+    popular()
+    client = TestClient(app)
+
+    tests = [
+        ("Bucket de cada movimentação", test_bucket_por_movimentacao),
+        ("Totais sem termos sobrepostos", test_totais_sem_sobreposicao),
+        ("Termos sobrepostos", test_termos_sobrepostos),
+        ("Fallbacks", test_fallbacks),
+    ]
+
+    for name, test_func in tests:
+        print(f"\nTesting {name}...")
+        try:
+            test_func(client)
+            print(f"✓ {name} OK")
+        except Exception as e:
+            print(f"✗ {name} FAILED: {e}")
+
+    print("\n" + "=" * 60)
+    print("All tests completed!")
+    print("=" * 60)
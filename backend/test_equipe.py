@@ -0,0 +1,245 @@
+"""
+Script para verificar que os endpoints por pessoa (resumo de pessoas,
+dashboards comerciais, consolidação e scorecard) fazem o mesmo número de
+consultas com qualquer tamanho de equipe, usando a equipe do período
+(app/equipe.py), e que escritas em metas/pessoas invalidam o cache da equipe.
+Confere também a relação Meta -> Pessoa (exportações do mês e listagem de
+metas com número fixo de consultas, metas apagadas junto com a pessoa).
+Usa um banco SQLite temporário com dados de exemplo.
+"""
+
+import os
+import sys
+import tempfile
+from datetime import date
+
+_tmp_dir = tempfile.mkdtemp(prefix="medgm_equipe_")
+os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(_tmp_dir, 'equipe.db')}"
+os.environ["CACHE_BACKEND"] = "off"
+
+# Add app to path
+sys.path.insert(0, os.path.dirname(__file__))
+
+from fastapi.testclient import TestClient
+from sqlalchemy import event
+
+from app import cache, rollups
+from app.database import SessionLocal, engine, init_db
+from app.main import app
+from app.models.models import CloserMetrica, Meta, Pessoa, SDRMetrica, SocialSellingMetrica, Venda
+
+ROTAS = [
+    ("GET", "/config/pessoas/resumo"),
+    ("GET", "/metas/pessoa-mes?pessoa_nome=Closer 0"),
+    ("GET", "/comercial/dashboard/social-selling"),
+    ("GET", "/comercial/dashboard/social-selling-diario"),
+    ("GET", "/comercial/dashboard/social-selling-comparativo"),
+    ("GET", "/comercial/dashboard/sdr-diario"),
+    ("GET", "/comercial/dashboard/sdr"),
+    ("GET", "/comercial/dashboard/closer-diario"),
+    ("GET", "/comercial/dashboard/closer"),
+    ("GET", "/comercial/dashboard/geral"),
+    ("GET", "/comercial/scorecard-individual"),
+    ("PUT", "/comercial/consolidar-mes"),
+]
+
+_consultas = []
+
+
+@event.listens_for(engine, "before_cursor_execute")
+def _contar(conn, cursor, statement, parameters, context, executemany):
+    _consultas.append(statement)
+
+
+def adicionar_equipe(inicio, quantidade):
+    """Cria `quantidade` pessoas de cada função, com metas e métricas em 2025."""
+    db = SessionLocal()
+    try:
+        for i in range(inicio, inicio + quantidade):
+            pessoas = [
+                Pessoa(nome=f"SS {i}", funcao="social_selling"),
+                Pessoa(nome=f"SDR {i}", funcao="sdr"),
+                Pessoa(nome=f"Closer {i}", funcao="closer"),
+            ]
+            db.add_all(pessoas)
+            db.flush()
+            for mes in (1, 2, 3):
+                db.add(Meta(pessoa_id=pessoas[0].id, mes=mes, ano=2025, meta_ativacoes=100, meta_leads=20))
+                db.add(Meta(pessoa_id=pessoas[1].id, mes=mes, ano=2025, meta_reunioes=10))
+                db.add(Meta(pessoa_id=pessoas[2].id, mes=mes, ano=2025, meta_vendas=2, meta_faturamento=5000))
+            db.add(SocialSellingMetrica(data=date(2025, 3, 5), vendedor=f"SS {i}", mes=3, ano=2025,
+                                        ativacoes=50, conversoes=20, leads_gerados=10))
+            db.add(SDRMetrica(data=date(2025, 3, 5), sdr=f"SDR {i}", funil="SS", mes=3, ano=2025,
+                              leads_recebidos=10, reunioes_agendadas=6, reunioes_realizadas=4))
+            db.add(CloserMetrica(data=date(2025, 3, 5), closer=f"Closer {i}", funil="SS", mes=3, ano=2025,
+                                 calls_agendadas=4, calls_realizadas=3, vendas=1, faturamento_bruto=3000))
+            for mes in (2, 3):
+                db.add(Venda(data=date(2025, mes, 5), cliente="Cliente", closer=f"Closer {i}",
+                             valor=3000, valor_liquido=2500, mes=mes, ano=2025))
+        rollups.reconstruir_rollups(db)
+        db.commit()
+    finally:
+        db.close()
+
+
+def contar(client):
+    totais = {}
+    for metodo, rota in ROTAS:
+        separador = "&" if "?" in rota else "?"
+        _consultas.clear()
+        r = client.request(metodo, f"{rota}{separador}mes=3&ano=2025")
+        assert r.status_code == 200, (rota, r.text)
+        totais[rota] = len(_consultas)
+    return totais
+
+
+def test_consultas_constantes(client):
+    adicionar_equipe(0, 2)
+    pequena = contar(client)
+    adicionar_equipe(2, 20)
+    grande = contar(client)
+
+    for rota, total in grande.items():
+        print(f"  {rota:<52} {total} consulta(s)")
+        assert total == pequena[rota], f"{rota}: {pequena[rota]} consultas com 6 pessoas, {total} com 66"
+    return True
+
+
+def test_valores(client):
+    resumo = client.get("/config/pessoas/resumo", params={"mes": 3, "ano": 2025, "funcao": "closer"}).json()
+    assert resumo["total"] == 22
+    assert resumo["pessoas"][0]["meta_mes"]["faturamento"] == 5000
+
+    meta = client.get("/metas/pessoa-mes", params={"pessoa_nome": "SDR 1", "mes": 3, "ano": 2025}).json()
+    assert meta["meta_reunioes"] == 10 and meta["meta_leads"] == 0
+    assert client.get("/metas/pessoa-mes", params={"pessoa_nome": "Ninguém", "mes": 3, "ano": 2025}).json()["meta_vendas"] == 0
+
+    ss = client.get("/comercial/dashboard/social-selling", params={"mes": 3, "ano": 2025}).json()
+    assert ss["totais"]["meta_leads"] == 22 * 20
+
+    scorecard = client.get("/comercial/scorecard-individual", params={"mes": 3, "ano": 2025}).json()
+    assert scorecard["total_pessoas"] == 66
+    closer = next(s for s in scorecard["scorecards"] if s["pessoa"] == "Closer 0")
+    assert closer["realizado_mes"] == 2500 and closer["perc_meta"] == 50.0
+    assert [h["realizado"] for h in closer["historico"]] == [2500, 0]
+
+    geral = client.get("/comercial/dashboard/geral", params={"mes": 3, "ano": 2025}).json()
+    assert geral is not None
+    return True
+
+
+def test_invalidacao(client):
+    cache.backend = cache.MemoriaBackend()
+    try:
+        params = {"mes": 3, "ano": 2025, "funcao": "sdr"}
+        antes = client.get("/config/pessoas/resumo", params=params).json()
+        assert antes["pessoas"][0]["meta_mes"]["reunioes"] == 10
+
+        db = SessionLocal()
+        meta = db.query(Meta).join(Pessoa, Pessoa.id == Meta.pessoa_id).filter(
+            Pessoa.nome == antes["pessoas"][0]["nome"], Meta.mes == 3, Meta.ano == 2025
+        ).one()
+        db.close()
+
+        r = client.put(f"/metas/{meta.id}", json={"meta_reunioes": 15})
+        assert r.status_code == 200
+        depois = client.get("/config/pessoas/resumo", params=params).json()
+        assert depois["pessoas"][0]["meta_mes"]["reunioes"] == 15
+
+        r = client.post("/config/pessoas", json={"nome": "Nova SDR", "funcao": "sdr"})
+        assert r.status_code == 200, r.text
+        assert client.get("/config/pessoas/resumo", params=params).json()["total"] == depois["total"] + 1
+    finally:
+        cache.backend = None
+    return True
+
+
+# Fevereiro: o nome do arquivo com "Março" não passa pelo TestClient (cabeçalho latin-1)
+ROTAS_META = [
+    "/export/social-selling?mes=2&ano=2025",
+    "/export/sdr?mes=2&ano=2025",
+    "/export/closer?mes=2&ano=2025",
+    "/metas/?ano=2025",
+]
+
+
+def test_relacao_meta_pessoa(client):
+    db = SessionLocal()
+    try:
+        for i in range(22):
+            db.add(SocialSellingMetrica(data=date(2025, 2, 5), vendedor=f"SS {i}", mes=2, ano=2025,
+                                        ativacoes=50, conversoes=20, leads_gerados=10))
+            db.add(SDRMetrica(data=date(2025, 2, 5), sdr=f"SDR {i}", funil="SS", mes=2, ano=2025,
+                              leads_recebidos=10, reunioes_agendadas=6, reunioes_realizadas=4))
+            db.add(CloserMetrica(data=date(2025, 2, 5), closer=f"Closer {i}", funil="SS", mes=2, ano=2025,
+                                 calls_agendadas=4, calls_realizadas=3, vendas=1, faturamento_bruto=3000))
+        db.commit()
+    finally:
+        db.close()
+
+    # Uma métrica por pessoa, 66 pessoas: antes eram duas consultas por linha
+    for rota in ROTAS_META:
+        _consultas.clear()
+        r = client.get(rota)
+        assert r.status_code == 200, (rota, r.text)
+        print(f"  {rota:<52} {len(_consultas)} consulta(s)")
+        assert len(_consultas) <= 2, (rota, len(_consultas))
+
+    metas = client.get("/metas/", params={"mes": 3, "ano": 2025}).json()["metas"]
+    assert len(metas) == 66 and all(m["pessoa"]["id"] == m["pessoa_id"] for m in metas)
+
+    db = SessionLocal()
+    try:
+        pessoa = db.query(Pessoa).filter(Pessoa.nome == "Closer 5").one()
+        assert len(pessoa.metas) == 3 and pessoa.metas[0].pessoa is pessoa
+        pessoa_id = pessoa.id
+    finally:
+        db.close()
+
+    # Apagar a pessoa mantém o histórico de metas, só sem o vínculo
+    total_metas = len(client.get("/metas/").json()["metas"])
+    r = client.delete(f"/config/pessoas/{pessoa_id}")
+    assert r.status_code == 200, r.text
+    db = SessionLocal()
+    try:
+        assert db.query(Meta).filter(Meta.pessoa_id == pessoa_id).count() == 0
+        assert db.query(Meta).count() == total_metas
+        assert db.query(Meta).filter(Meta.pessoa_id.is_(None), Meta.tipo == "pessoa").count() == 3
+    finally:
+        db.close()
+
+    # Listagem e replicação continuam funcionando com as metas sem pessoa
+    metas = client.get("/metas/", params={"mes": 3, "ano": 2025}).json()["metas"]
+    assert len(metas) == 66 and sum(m["pessoa"] is None for m in metas) == 1
+    r = client.post("/metas/replicar-mes", params={"mes_destino": 4, "ano_destino": 2025})
+    assert r.status_code == 200, r.text
+    replicadas = client.get("/metas/", params={"mes": 4, "ano": 2025}).json()["metas"]
+    assert len(replicadas) == 65 and all(m["pessoa_id"] is not None for m in replicadas)
+    return True
+
+
+if __name__ == "__main__":
+    print("Testing equipe do período")
+    print("=" * 60)
+
+    init_db()
+    client = TestClient(app)
+
+    tests = [
+        ("Consultas constantes no tamanho da equipe", test_consultas_constantes),
+        ("Valores", test_valores),
+        ("Invalidação do cache da equipe", test_invalidacao),
+        ("Relação Meta -> Pessoa", test_relacao_meta_pessoa),
+    ]
+
+    for name, test_func in tests:
+        print(f"\nTesting {name}...")
+        try:
+            test_func(client)
+            print(f"✓ {name} OK")
+        except Exception as e:
+            print(f"✗ {name} FAILED: {e}")
+
+    print("\n" + "=" * 60)
+    print("All tests completed!")
+    print("=" * 60)
@@ -0,0 +1,337 @@
+"""
+Script para testar as exportações em streaming (/export/completo e
+/export/periodo) em Excel, CSV e CSV gzip, e as exportações em segundo
+plano (/export/jobs) com cache dos arquivos e a marcação, no startup, dos
+jobs que ficaram pendentes/em execução porque o worker morreu.
+
+Confere o conteúdo das abas, que o CSV é gerado em blocos e que nenhum
+arquivo fica no diretório temporário depois das exportações.
+Usa um banco SQLite temporário com dados de exemplo.
+"""
+
+import csv
+import gzip
+import io
+import os
+import sys
+import tempfile
+import time
+from datetime import date
+
+_tmp_dir = tempfile.mkdtemp(prefix="medgm_exportacao_")
+os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(_tmp_dir, 'exportacao.db')}"
+os.environ["CACHE_BACKEND"] = "off"
+os.environ["EXPORT_DIR"] = os.path.join(_tmp_dir, "exports")
+
+# Add app to path
+sys.path.insert(0, os.path.dirname(__file__))
+
+from fastapi.testclient import TestClient
+from openpyxl import load_workbook
+from sqlalchemy import insert
+
+from app import export_jobs, exportacao
+from app.database import SessionLocal, init_db
+from app.main import app
+from app.models.models import ExportJob, Financeiro, Meta, Pessoa, SDRMetrica, SocialSellingMetrica, Venda
+from app.periodo import filtro_periodo
+from app.routers.export import COLUNAS_VENDAS, _aba_vendas
+
+NUM_VENDAS = 2500  # Mais de um lote (exportacao.TAMANHO_LOTE)
+
+
+def popular():
+    db = SessionLocal()
+    try:
+        db.execute(insert(Venda), [
+            {"data": date(2025, 1 + i % 3, 1 + i % 28), "cliente": f"Cliente {i}", "closer": "Carla",
+             "valor": 100, "valor_bruto": 150 if i % 2 else 0, "mes": 1 + i % 3, "ano": 2025}
+            for i in range(NUM_VENDAS)
+        ])
+        db.execute(insert(Financeiro), [
+            {"tipo": "entrada" if i % 2 else "saida", "categoria": "Venda", "valor": 10,
+             "data": date(2025, 1, 1 + i % 28), "mes": 1, "ano": 2025}
+            for i in range(100)
+        ])
+        ana = Pessoa(nome="Ana", funcao="social_selling")
+        bruno = Pessoa(nome="Bruno", funcao="sdr")
+        db.add_all([ana, bruno])
+        db.flush()
+        db.add(Meta(pessoa_id=ana.id, mes=1, ano=2025, meta_ativacoes=200, meta_leads=30))
+        db.add(Meta(pessoa_id=bruno.id, mes=1, ano=2025, meta_reunioes=12))
+        db.add(SocialSellingMetrica(vendedor="Ana", mes=1, ano=2025, ativacoes=150, conversoes=40,
+                                    leads_gerados=20, tx_ativ_conv=26.7, tx_conv_lead=50.0))
+        db.add(SDRMetrica(sdr="Bruno", funil="SS", mes=1, ano=2025, leads_recebidos=20,
+                          reunioes_agendadas=10, reunioes_realizadas=8))
+        db.commit()
+    finally:
+        db.close()
+
+
+def abrir_xlsx(conteudo):
+    return load_workbook(io.BytesIO(conteudo), read_only=True)
+
+
+def ler_csv(conteudo):
+    return list(csv.reader(io.StringIO(conteudo.decode("utf-8-sig"))))
+
+
+def test_completo_xlsx(client):
+    r = client.get("/export/completo", params={"mes": 1, "ano": 2025})
+    assert r.status_code == 200, r.text
+    assert "medgm_completo_Janeiro_2025.xlsx" in r.headers["content-disposition"]
+
+    wb = abrir_xlsx(r.content)
+    assert wb.sheetnames == ["Financeiro", "Vendas", "Social Selling", "SDR", "Closer", "Resumo"]
+
+    vendas = list(wb["Vendas"].values)
+    assert len(vendas) == 1 + len([i for i in range(NUM_VENDAS) if i % 3 == 0])
+
+    ss = list(wb["Social Selling"].values)
+    assert ss[1][3] == "Ana" and ss[1][5] == 200 and ss[1][9] == 30, ss[1]
+    assert list(wb["SDR"].values)[1][10] == 12
+
+    # Aba sem dados traz a mensagem
+    assert list(wb["Closer"].values)[1][0] == "Sem métricas de Closer neste período"
+
+    resumo = dict(list(wb["Resumo"].values)[1:])
+    assert resumo["Total Vendas"] == len(vendas) - 1
+    return True
+
+
+def test_csv_e_gzip(client):
+    r = client.get("/export/periodo", params={
+        "mes_inicio": 1, "ano_inicio": 2025, "mes_fim": 3, "ano_fim": 2025, "tipo": "vendas", "formato": "csv"
+    })
+    assert r.status_code == 200
+    conteudo = r.content
+
+    linhas = ler_csv(conteudo)
+    assert linhas[0] == COLUNAS_VENDAS
+    assert len(linhas) == 1 + NUM_VENDAS
+
+    # O TestClient junta o corpo; o gerador em si entrega um bloco por lote
+    aba = _aba_vendas(filtro_periodo(Venda, 202501, 202503), [Venda.periodo, Venda.data])
+    blocos = list(exportacao.gerar_csv(aba, compactar=False))
+    assert len(blocos) == NUM_VENDAS // exportacao.TAMANHO_LOTE + 1, len(blocos)
+    assert b"".join(blocos) == conteudo
+
+    r = client.get("/export/periodo", params={
+        "mes_inicio": 1, "ano_inicio": 2025, "mes_fim": 3, "ano_fim": 2025, "tipo": "vendas", "formato": "csv.gz"
+    })
+    assert r.status_code == 200
+    assert r.headers["content-type"] == "application/gzip"
+    assert gzip.decompress(r.content) == conteudo
+    return True
+
+
+def test_validacoes(client):
+    # completo tem várias abas: CSV exige aba=
+    r = client.get("/export/completo", params={"mes": 1, "ano": 2025, "formato": "csv"})
+    assert r.status_code == 400
+
+    r = client.get("/export/completo", params={"mes": 1, "ano": 2025, "formato": "csv", "aba": "social_selling"})
+    assert r.status_code == 200
+    assert ler_csv(r.content)[1][3] == "Ana"
+
+    r = client.get("/export/completo", params={"mes": 1, "ano": 2025, "formato": "pdf"})
+    assert r.status_code == 400
+
+    r = client.get("/export/periodo", params={
+        "mes_inicio": 1, "ano_inicio": 2025, "mes_fim": 3, "ano_fim": 2025, "tipo": "outro"
+    })
+    assert r.status_code == 400
+    return True
+
+
+def test_sem_arquivos_temporarios(client):
+    antes = set(os.listdir(tempfile.gettempdir()))
+    client.get("/export/completo", params={"mes": 1, "ano": 2025})
+    client.get("/export/periodo", params={
+        "mes_inicio": 1, "ano_inicio": 2025, "mes_fim": 3, "ano_fim": 2025, "tipo": "completo"
+    })
+    r = client.get("/export/vendas", params={"mes": 2, "ano": 2025})
+    assert r.status_code == 200
+    assert abrir_xlsx(r.content).sheetnames == ["Vendas"]
+
+    novos = set(os.listdir(tempfile.gettempdir())) - antes
+    assert not novos, f"Arquivos deixados no disco: {novos}"
+    return True
+
+
+PERIODO = {"mes_inicio": 1, "ano_inicio": 2025, "mes_fim": 3, "ano_fim": 2025}
+
+
+def aguardar_job(client, job_id, timeout=30):
+    limite = time.time() + timeout
+    while time.time() < limite:
+        job = client.get(f"/export/jobs/{job_id}").json()
+        if job["status"] in ("concluido", "erro"):
+            return job
+        time.sleep(0.05)
+    raise AssertionError(f"Exportação {job_id} não terminou")
+
+
+def test_jobs(client):
+    r = client.post("/export/jobs", json={**PERIODO, "tipo": "vendas", "formato": "csv"})
+    assert r.status_code == 202, r.text
+    assert r.json()["status"] == "pendente"
+
+    job = aguardar_job(client, r.json()["id"])
+    assert job["status"] == "concluido", job
+    assert job["progresso"] == 100 and job["total_linhas"] == NUM_VENDAS
+    assert not job["cache_hit"]
+
+    r = client.get(job["download_url"])
+    assert r.status_code == 200
+    direto = client.get("/export/periodo", params={**PERIODO, "tipo": "vendas", "formato": "csv"})
+    assert r.content == direto.content
+
+    # Mesmo período sem alterações: reaproveita o arquivo
+    repetido = aguardar_job(client, client.post("/export/jobs", json={**PERIODO, "tipo": "vendas", "formato": "csv"}).json()["id"])
+    assert repetido["cache_hit"], repetido
+
+    # Dados alterados: gera um arquivo novo
+    db = SessionLocal()
+    venda = db.query(Venda).filter(Venda.mes == 2).first()
+    venda.cliente = "Cliente alterado"
+    db.commit()
+    db.close()
+    alterado = aguardar_job(client, client.post("/export/jobs", json={**PERIODO, "tipo": "vendas", "formato": "csv"}).json()["id"])
+    assert not alterado["cache_hit"]
+    assert b"Cliente alterado" in client.get(alterado["download_url"]).content
+
+    # Excel completo
+    xlsx = aguardar_job(client, client.post("/export/jobs", json={**PERIODO, "tipo": "completo"}).json()["id"])
+    assert xlsx["status"] == "concluido", xlsx
+    wb = abrir_xlsx(client.get(xlsx["download_url"]).content)
+    assert wb.sheetnames == ["Financeiro", "Vendas"]
+    assert len(list(wb["Vendas"].values)) == 1 + NUM_VENDAS
+    return True
+
+
+def test_jobs_cache_hit_sem_ler_linhas(client):
+    pedido = {**PERIODO, "tipo": "completo", "formato": "csv", "aba": "vendas"}
+    primeiro = aguardar_job(client, client.post("/export/jobs", json=pedido).json()["id"])
+    assert primeiro["status"] == "concluido", primeiro
+
+    # No cache hit a chave vem só de metadados: nenhuma linha é lida
+    linhas_query = exportacao.linhas_query
+    lidas = []
+
+    def contar(query, converter):
+        for linha in linhas_query(query, converter):
+            lidas.append(linha)
+            yield linha
+
+    exportacao.linhas_query = contar
+    try:
+        repetido = aguardar_job(client, client.post("/export/jobs", json=pedido).json()["id"])
+        assert repetido["cache_hit"] and repetido["total_linhas"] == primeiro["total_linhas"], repetido
+        assert lidas == []
+
+        # Remoção e inserção no período mudam a chave e o arquivo é gerado de novo
+        db = SessionLocal()
+        try:
+            venda = db.query(Venda).filter(Venda.mes == 3).order_by(Venda.id.desc()).first()
+            dados = {c.name: getattr(venda, c.name) for c in Venda.__table__.columns if c.name not in ("id", "periodo")}
+            db.delete(venda)
+            db.commit()
+            removida = aguardar_job(client, client.post("/export/jobs", json=pedido).json()["id"])
+            assert not removida["cache_hit"] and removida["total_linhas"] == primeiro["total_linhas"] - 1
+            assert len(lidas) == removida["total_linhas"]
+
+            db.add(Venda(**dados))
+            db.commit()
+        finally:
+            db.close()
+        inserida = aguardar_job(client, client.post("/export/jobs", json=pedido).json()["id"])
+        assert not inserida["cache_hit"] and inserida["total_linhas"] == primeiro["total_linhas"]
+    finally:
+        exportacao.linhas_query = linhas_query
+    return True
+
+
+def test_jobs_limpeza_e_erros(client):
+    antigo = aguardar_job(client, client.post("/export/jobs", json={**PERIODO, "tipo": "financeiro"}).json()["id"])
+    assert client.get(antigo["download_url"]).status_code == 200
+
+    # Limite zero: sobra só o arquivo preservado (o da exportação mais nova)
+    novo = aguardar_job(client, client.post("/export/jobs", json={**PERIODO, "tipo": "vendas"}).json()["id"])
+    db = SessionLocal()
+    preservar = export_jobs.caminho_download(db.query(ExportJob).filter(ExportJob.id == novo["id"]).one())
+    db.close()
+    assert export_jobs.limpar_cache(preservar=preservar, limite_bytes=0) >= 1
+    assert client.get(antigo["download_url"]).status_code == 410
+    assert client.get(novo["download_url"]).status_code == 200
+
+    assert client.post("/export/jobs", json={**PERIODO, "tipo": "outro"}).status_code == 400
+    assert client.post("/export/jobs", json={**PERIODO, "tipo": "completo", "formato": "csv"}).status_code == 400
+    assert client.get("/export/jobs/naoexiste").status_code == 404
+    return True
+
+
+def test_jobs_interrompidos(client):
+    import fcntl
+
+    # Jobs terminados não deixam lock para trás
+    assert not [nome for nome in os.listdir(export_jobs.EXPORT_DIR) if nome.endswith(export_jobs.SUFIXO_LOCK)]
+
+    # Um job órfão (worker morto) e um de outro worker vivo, que segura o lock
+    db = SessionLocal()
+    try:
+        for job_id, status in (("orfao", "executando"), ("outroworker", "pendente")):
+            db.add(ExportJob(id=job_id, tipo="vendas", formato="csv", status=status))
+        db.commit()
+    finally:
+        db.close()
+
+    with open(export_jobs._caminho_lock("outroworker"), "a") as lock:
+        fcntl.flock(lock.fileno(), fcntl.LOCK_EX)
+        assert export_jobs.marcar_interrompidos() == 1
+        assert client.get("/export/jobs/outroworker").json()["status"] == "pendente"
+
+    job = client.get("/export/jobs/orfao").json()
+    assert job["status"] == "erro" and "interrompida" in job["erro"], job
+    assert job["finalizado_em"] and job["download_url"] is None
+
+    # Lock solto (o outro worker também morreu)
+    assert export_jobs.marcar_interrompidos() == 1
+    assert client.get("/export/jobs/outroworker").json()["status"] == "erro"
+    assert export_jobs.marcar_interrompidos() == 0
+    return True
+
+
+if __name__ == "__main__":
+    print("Testing exportação")
+    print("=" * 60)
+
+    init_db()
+    popular()
+    client = TestClient(app)
+
+    # Força o xlsx a passar do limite em memória e ir para o disco temporário
+    exportacao.LIMITE_MEMORIA_XLSX = 1024
+
+    tests = [
+        ("Completo em Excel", test_completo_xlsx),
+        ("CSV e CSV gzip", test_csv_e_gzip),
+        ("Validações", test_validacoes),
+        ("Sem arquivos temporários", test_sem_arquivos_temporarios),
+        ("Exportação em segundo plano", test_jobs),
+        ("Cache hit sem ler as linhas", test_jobs_cache_hit_sem_ler_linhas),
+        ("Limpeza do cache de exportações", test_jobs_limpeza_e_erros),
+        ("Exportações interrompidas", test_jobs_interrompidos),
+    ]
+
+    for name, test_func in tests:
+        print(f"\nTesting {name}...")
+        try:
+            test_func(client)
+            print(f"✓ {name} OK")
+        except Exception as e:
+            print(f"✗ {name} FAILED: {e}")
+
+    print("\n" + "=" * 60)
+    print("All tests completed!")
+    print("=" * 60)
@@ -0,0 +1,185 @@
+"""
+Script para testar os KPIs dos funis calculados por coluna (app/funil_kpis.py):
+listagens iguais ao cálculo linha a linha de antes, divisão segura,
+visão por dia e totais do período ponderados pelo volume e o formato colunar.
+Usa um banco SQLite temporário com dados de exemplo.
+"""
+
+import os
+import sys
+import tempfile
+from datetime import date
+
+_tmp_dir = tempfile.mkdtemp(prefix="medgm_funil_kpis_")
+os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(_tmp_dir, 'funil_kpis.db')}"
+os.environ["CACHE_BACKEND"] = "off"
+
+# Add app to path
+sys.path.insert(0, os.path.dirname(__file__))
+
+from fastapi.testclient import TestClient
+from sqlalchemy import event
+
+from app.database import SessionLocal, engine, init_db
+from app.main import app
+from app.models.models import QuizMetrics, VendaDiretaMetrics
+
+_consultas = []
+
+
+@event.listens_for(engine, "before_cursor_execute")
+def _contar(conn, cursor, statement, parameters, context, executemany):
+    _consultas.append(statement)
+
+
+def quiz_antigo(m):
+    """Cálculo linha a linha como era em calculate_quiz_kpis."""
+    return {
+        "hook_rate": (m["cliques"] / m["impressoes"] * 100) if m["impressoes"] > 0 else 0,
+        "body_rate": (m["pageviews"] / m["cliques"] * 100) if m["cliques"] > 0 else 0,
+        "ctr": (m["cliques"] / m["impressoes"] * 100) if m["impressoes"] > 0 else 0,
+        "cpc": (m["verba"] / m["cliques"]) if m["cliques"] > 0 else 0,
+        "taxa_conclusao_quiz": (m["quiz_end"] / m["quiz_inicio"] * 100) if m["quiz_inicio"] > 0 else 0,
+        "taxa_conversao": (m["leads"] / m["pageviews"] * 100) if m["pageviews"] > 0 else 0,
+        "cpl": (m["verba"] / m["leads"]) if m["leads"] > 0 else 0,
+    }
+
+
+def venda_direta_antigo(m):
+    """Cálculo linha a linha como era em calculate_venda_direta_kpis."""
+    return {
+        "cvr_checkout": (m["vendas"] / m["checkout_inicio"] * 100) if m["checkout_inicio"] > 0 else 0,
+        "cvr_geral_funil": (m["vendas"] / m["pageviews"] * 100) if m["pageviews"] > 0 else 0,
+        "aov": (m["receita"] / m["vendas"]) if m["vendas"] > 0 else 0,
+        "cpa": (m["verba"] / m["vendas"]) if m["vendas"] > 0 else 0,
+        "roas": (m["receita"] / m["verba"]) if m["verba"] > 0 else 0,
+    }
+
+
+def popular():
+    db = SessionLocal()
+    try:
+        for dia in range(1, 4):
+            db.add(QuizMetrics(data=date(2025, 3, dia), campanha_nome="Quiz A", mes=3, ano=2025,
+                               verba=100, impressoes=1000, cliques=10, pageviews=8,
+                               quiz_inicio=6, quiz_end=3, leads=2))
+            db.add(QuizMetrics(data=date(2025, 3, dia), campanha_nome="Quiz B", mes=3, ano=2025,
+                               verba=50, impressoes=100, cliques=20, pageviews=15,
+                               quiz_inicio=10, quiz_end=9, leads=5))
+        # Denominadores zerados
+        db.add(QuizMetrics(data=date(2025, 3, 4), campanha_nome="Quiz A", mes=3, ano=2025, verba=30))
+
+        db.add(VendaDiretaMetrics(data=date(2025, 3, 1), campanha_nome="VD", mes=3, ano=2025,
+                                  verba=200, impressoes=5000, cliques=100, pageviews=80, leads=10,
+                                  checkout_inicio=20, vendas=4, receita=1000))
+        db.add(VendaDiretaMetrics(data=date(2025, 3, 2), campanha_nome="VD", mes=3, ano=2025,
+                                  verba=0, impressoes=0, cliques=0, pageviews=0, leads=0,
+                                  checkout_inicio=0, vendas=0, receita=0))
+        db.commit()
+    finally:
+        db.close()
+
+
+def test_listagem_igual(client):
+    _consultas.clear()
+    r = client.get("/funil/quiz", params={"mes": 3, "ano": 2025})
+    assert r.status_code == 200, r.text
+    assert len(_consultas) == 1, _consultas
+
+    linhas = r.json()
+    assert len(linhas) == 7
+    assert linhas[0]["data"] == "2025-03-04"  # Mais recentes primeiro
+    assert list(linhas[0])[:4] == ["id", "data", "campanha_nome", "campanha_id"]
+    for linha in linhas:
+        for nome, valor in quiz_antigo(linha).items():
+            assert abs(linha[nome] - valor) < 1e-9, (nome, linha[nome], valor)
+
+    r = client.get("/funil/venda-direta", params={"mes": 3, "ano": 2025})
+    assert r.status_code == 200, r.text
+    for linha in r.json():
+        for nome, valor in venda_direta_antigo(linha).items():
+            assert abs(linha[nome] - valor) < 1e-9, (nome, linha[nome], valor)
+
+    r = client.get("/funil/quiz", params={"campanha": "quiz b"})
+    assert {linha["campanha_nome"] for linha in r.json()} == {"Quiz B"}
+    return True
+
+
+def test_detalhe_igual(client):
+    linha = client.get("/funil/quiz", params={"campanha": "Quiz A"}).json()[-1]
+    r = client.get(f"/funil/quiz/{linha['id']}")
+    assert r.status_code == 200, r.text
+    assert r.json() == linha, (r.json(), linha)
+    return True
+
+
+def test_totais_ponderados(client):
+    r = client.get("/funil/quiz/kpis", params={"data_inicio": "2025-03-01", "data_fim": "2025-03-04"})
+    assert r.status_code == 200, r.text
+    corpo = r.json()
+
+    totais = corpo["totais"]
+    assert totais["cliques"] == 90 and totais["impressoes"] == 3300
+    assert abs(totais["ctr"] - 90 / 3300 * 100) < 1e-9, totais["ctr"]
+    assert abs(totais["cpl"] - 480 / 21) < 1e-9, totais["cpl"]
+
+    # Média dos CTRs por linha seria outra coisa
+    linhas = client.get("/funil/quiz", params={"mes": 3, "ano": 2025}).json()
+    media = sum(linha["ctr"] for linha in linhas) / len(linhas)
+    assert abs(media - totais["ctr"]) > 1
+
+    dias = corpo["dias"]
+    assert [dia["data"] for dia in dias] == ["2025-03-01", "2025-03-02", "2025-03-03", "2025-03-04"]
+    assert dias[0]["cliques"] == 30
+    assert abs(dias[0]["ctr"] - 30 / 1100 * 100) < 1e-9
+    assert dias[3]["ctr"] == 0 and dias[3]["cpc"] == 0  # Dia sem impressões nem cliques
+    return True
+
+
+def test_formato_colunar(client):
+    params = {"data_inicio": "2025-03-01", "data_fim": "2025-03-02"}
+    linhas = client.get("/funil/venda-direta/kpis", params=params).json()
+    colunas = client.get("/funil/venda-direta/kpis", params={**params, "formato": "colunas"}).json()
+
+    assert colunas["dias"]["data"] == ["2025-03-01", "2025-03-02"]
+    assert colunas["dias"]["roas"] == [5.0, 0.0]
+    assert colunas["totais"] == linhas["totais"]
+    for i, dia in enumerate(linhas["dias"]):
+        assert {nome: valores[i] for nome, valores in colunas["dias"].items()} == dia
+
+    r = client.get("/funil/venda-direta/kpis", params={**params, "formato": "xml"})
+    assert r.status_code == 400, r.text
+    r = client.get("/funil/quiz/kpis", params={"data_inicio": "2025-03-05", "data_fim": "2025-03-01"})
+    assert r.status_code == 400, r.text
+
+    vazio = client.get("/funil/quiz/kpis", params={"data_inicio": "2024-01-01", "data_fim": "2024-01-31"}).json()
+    assert vazio["dias"] == [] and vazio["totais"]["verba"] == 0 and vazio["totais"]["ctr"] == 0
+    return True
+
+
+if __name__ == "__main__":
+    print("Testing KPIs dos funis")
+    print("=" * 60)
+
+    init_db()
+    popular()
+    client = TestClient(app)
+
+    tests = [
+        ("Listagens iguais ao cálculo por linha", test_listagem_igual),
+        ("Detalhe igual à listagem", test_detalhe_igual),
+        ("Por dia e totais ponderados", test_totais_ponderados),
+        ("Formato colunar", test_formato_colunar),
+    ]
+
+    for name, test_func in tests:
+        print(f"\nTesting {name}...")
+        try:
+            test_func(client)
+            print(f"✓ {name} OK")
+        except Exception as e:
+            print(f"✗ {name} FAILED: {e}")
+
+    print("\n" + "=" * 60)
+    print("All tests completed!")
+    print("=" * 60)
@@ -0,0 +1,339 @@
+"""
+Script para testar a sincronização do Google Sheets sem acesso à API.
+
+Usa fake_gspread.py no lugar do gspread (trocando criar_google_sheets_client)
+e um banco SQLite temporário:
+verifica a gravação das linhas diárias, o pulo por hash quando a planilha
+não muda, a gravação só das linhas alteradas, a leitura só do intervalo da
+"Análise Diária", os endpoints de leitura filtrando no banco, a coluna
+row_hash criada no startup em bancos antigos e as execuções que ficaram
+"executando" depois de um worker morto.
+"""
+
+import json
+import os
+import sys
+import tempfile
+
+_tmp_dir = tempfile.mkdtemp(prefix="medgm_sheets_")
+os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(_tmp_dir, 'sheets.db')}"
+os.environ["SCHEDULER_LOCK_DIR"] = _tmp_dir
+PLANILHA = os.path.join(_tmp_dir, "planilha.json")
+
+# Add app to path
+sys.path.insert(0, os.path.dirname(__file__))
+
+from fastapi.testclient import TestClient
+from sqlalchemy import event, inspect, text
+
+from app import scheduler, sheets_diario
+from app.database import SessionLocal, engine, init_db
+from app.database_colunas import garantir_colunas
+from app.main import app
+from app.models.models import JobExecucao, SheetsMetricaDiaria
+from app.routers import google_sheets
+from app.routers.google_sheets import ABAS, CAMPOS, parse_currency, parse_percentage
+from fake_gspread import FakeClient, FakeSpreadsheet
+
+# Planilha local no lugar da API
+google_sheets.criar_google_sheets_client = lambda: FakeClient(caminho=PLANILHA)
+
+_escritas = []
+
+
+@event.listens_for(engine, "before_cursor_execute")
+def _registrar(conn, cursor, statement, parameters, context, executemany):
+    if "sheets_metricas_diarias" in statement and statement.lstrip().upper().startswith(("INSERT", "UPDATE", "DELETE")):
+        _escritas.append((statement, len(parameters) if executemany else 1))
+
+
+HEADER = ["Data", "Gasto", "Resultado", "Custo", "Cliques", "CPC", "CTR", "CPM"]
+
+
+def aba(linhas):
+    return [["Resumo"], [], ["Análise Diária"], HEADER] + linhas
+
+
+def gravar_planilha(captura, venda):
+    with open(PLANILHA, "w", encoding="utf-8") as f:
+        json.dump({ABAS["captura_lead"]: aba(captura), ABAS["venda_direta"]: aba(venda)}, f)
+
+
+def test_sync_e_leitura(client):
+    gravar_planilha(
+        captura=[
+            ["01/1", "R$ 100,00", "10", "R$ 10,00", "50", "R$ 2,00", "1,5%", "R$ 20,00"],
+            ["02/1", "R$ 50,00", "5", "R$ 10,00", "20", "R$ 2,50", "1,0%", "R$ 15,00"],
+            ["01/2", "R$ 30,00", "3", "R$ 10,00", "10", "R$ 3,00", "2,0%", "R$ 10,00"],
+        ],
+        venda=[["01/1", "R$ 200,00", "2", "R$ 100,00", "80", "R$ 2,50", "2,0%", "R$ 25,00"]],
+    )
+
+    r = client.get("/google-sheets/sync-metrics")
+    assert r.status_code == 200, r.text
+    body = r.json()
+    assert body["sincronizacao"]["captura_lead"] == {
+        "alterado": True, "linhas": 3, "inseridas": 3, "atualizadas": 0, "inalteradas": 0, "removidas": 0
+    }
+    assert body["data"]["captura_lead"]["totais"]["leads"] == 18
+    print("Primeira sincronização:", body["sincronizacao"])
+
+    db = SessionLocal()
+    try:
+        assert db.query(SheetsMetricaDiaria).count() == 4
+    finally:
+        db.close()
+
+    # Sem mudança na planilha: nada é regravado
+    r = client.get("/google-sheets/sync-metrics")
+    assert r.json()["sincronizacao"]["captura_lead"]["alterado"] is False
+    print("Segunda sincronização (sem mudança):", r.json()["sincronizacao"])
+
+    ano = body["data"]["captura_lead"]["dados_diarios"][0]["ano"]
+    r = client.get("/google-sheets/captura-lead", params={"mes": 1, "ano": ano})
+    assert r.status_code == 200, r.text
+    dados = r.json()
+    assert [d["dia"] for d in dados["dados_diarios"]] == [1, 2]
+    assert dados["totais"]["valor_gasto"] == 150
+    assert dados["totais"]["cpl"] == 10
+
+    r = client.get("/google-sheets/venda-direta")
+    assert r.json()["totais"]["vendas"] == 2
+    return True
+
+
+def test_planilha_alterada(client):
+    gravar_planilha(
+        captura=[["01/1", "R$ 10,00", "1", "R$ 10,00", "5", "R$ 2,00", "1,0%", "R$ 5,00"]],
+        venda=[["01/1", "R$ 200,00", "2", "R$ 100,00", "80", "R$ 2,50", "2,0%", "R$ 25,00"]],
+    )
+    r = client.get("/google-sheets/sync-metrics")
+    resumo = r.json()["sincronizacao"]
+    assert resumo["captura_lead"] == {
+        "alterado": True, "linhas": 1, "inseridas": 0, "atualizadas": 1, "inalteradas": 0, "removidas": 2
+    }
+    assert resumo["venda_direta"]["alterado"] is False
+    print("Sincronização após alteração:", resumo)
+
+    r = client.get("/google-sheets/captura-lead")
+    assert len(r.json()["dados_diarios"]) == 1
+    return True
+
+
+def test_sync_incremental(client):
+    captura = [[f"{dia:02d}/3", "R$ 10,00", "1", "R$ 10,00", "5", "R$ 2,00", "1,0%", "R$ 5,00"] for dia in range(1, 21)]
+    venda = [["01/1", "R$ 200,00", "2", "R$ 100,00", "80", "R$ 2,50", "2,0%", "R$ 25,00"]]
+    gravar_planilha(captura=captura, venda=venda)
+    r = client.get("/google-sheets/sync-metrics")
+    assert r.json()["sincronizacao"]["captura_lead"]["inseridas"] == 20
+
+    # Um dia corrigido e um dia novo: só essas duas linhas são gravadas
+    captura[4][2] = "7"
+    captura.append(["21/3", "R$ 10,00", "1", "R$ 10,00", "5", "R$ 2,00", "1,0%", "R$ 5,00"])
+    gravar_planilha(captura=captura, venda=venda)
+
+    _escritas.clear()
+    r = client.get("/google-sheets/sync-metrics")
+    resumo = r.json()["sincronizacao"]["captura_lead"]
+    assert resumo == {
+        "alterado": True, "linhas": 21, "inseridas": 1, "atualizadas": 1, "inalteradas": 19, "removidas": 0
+    }, resumo
+    print("Sincronização incremental:", resumo)
+    assert sum(n for _, n in _escritas) == 2, _escritas
+
+    dados = client.get("/google-sheets/captura-lead", params={"mes": 3}).json()["dados_diarios"]
+    assert len(dados) == 21
+    assert next(d for d in dados if d["dia"] == 5)["leads"] == 7
+
+    # Sem mudança: nenhuma escrita nas linhas
+    _escritas.clear()
+    r = client.get("/google-sheets/sync-metrics")
+    assert r.json()["sincronizacao"]["captura_lead"]["inalteradas"] == 21
+    assert _escritas == [], _escritas
+    return True
+
+
+def test_leitura_por_intervalo(client):
+    sheets_diario.limpar_ancoras()
+    resumo = [["Resumo", "R$ 1,00"]] * 30
+    linha = ["01/1", "R$ 1.234,56", "10", "R$ 123,45", "50", "R$ 2,00", "1,5%", "R$ 20,00",
+             "45%", "", "12,3%", "1000", "40", "300", "100", "8", "25,5%", "7,25%"]
+    abas = {
+        ABAS["captura_lead"]: resumo + [["Análise Diária"], HEADER, linha, ["Total", "R$ 9"]],
+        ABAS["venda_direta"]: [["Análise Diária"], HEADER, linha],
+    }
+    planilha = FakeSpreadsheet(abas)
+
+    secoes = sheets_diario.ler_secoes(planilha, ABAS)
+    assert len(planilha.requisicoes) == 2  # Coluna A das duas abas + seções das duas abas
+    assert planilha.requisicoes[1][0].endswith("!A31:R"), planilha.requisicoes
+    assert secoes["captura_lead"]["valores"][0][0] == "Análise Diária"
+    assert len(secoes["captura_lead"]["valores"]) == 4  # Resumo acima não é baixado
+
+    # Âncoras em cache: uma chamada para as duas abas
+    planilha.requisicoes.clear()
+    sheets_diario.ler_secoes(planilha, ABAS)
+    assert len(planilha.requisicoes) == 1 and len(planilha.requisicoes[0]) == 2, planilha.requisicoes
+
+    # Linhas inseridas acima da seção: a âncora é localizada de novo
+    abas[ABAS["captura_lead"]] = [["Nova linha"]] * 5 + abas[ABAS["captura_lead"]]
+    planilha.requisicoes.clear()
+    secoes = sheets_diario.ler_secoes(planilha, ABAS)
+    assert secoes["captura_lead"]["valores"][2] == linha
+    assert len(planilha.requisicoes) == 3, planilha.requisicoes
+
+    # Aba inexistente não derruba a outra
+    secoes = sheets_diario.ler_secoes(planilha, {**ABAS, "outra": "Aba que não existe"})
+    assert "error" in secoes["outra"] and "valores" in secoes["venda_direta"]
+
+    # Conversão por coluna igual à conversão célula a célula
+    dia = sheets_diario.converter(secoes["venda_direta"]["valores"], CAMPOS["venda_direta"]).iloc[0]
+    for posicao, campo in enumerate(CAMPOS["venda_direta"], start=1):
+        if campo in sheets_diario.CAMPOS_MOEDA:
+            esperado = parse_currency(linha[posicao])
+        elif campo in sheets_diario.CAMPOS_PERCENTUAL:
+            esperado = parse_percentage(linha[posicao])
+        else:
+            esperado = int(linha[posicao]) if linha[posicao].strip() else 0
+        assert dia[campo] == esperado, (campo, dia[campo], esperado)
+    return True
+
+
+def test_cliente_em_cache(client):
+    aberturas = []
+    open_by_key = FakeClient.open_by_key
+
+    def contar(self, key):
+        aberturas.append(key)
+        return open_by_key(self, key)
+
+    FakeClient.open_by_key = contar
+    try:
+        google_sheets.limpar_cache_google_sheets()
+        cliente = google_sheets.get_google_sheets_client()
+
+        # Com TTL 0 a planilha é reaberta a cada sincronização, com o mesmo cliente
+        ttl, google_sheets.PLANILHA_TTL = google_sheets.PLANILHA_TTL, 0
+        try:
+            client.get("/google-sheets/sync-metrics")
+            client.get("/google-sheets/sync-metrics")
+        finally:
+            google_sheets.PLANILHA_TTL = ttl
+        assert len(aberturas) == 2, aberturas
+
+        # Dentro do TTL: uma abertura para várias sincronizações
+        for _ in range(3):
+            assert client.get("/google-sheets/sync-metrics").status_code == 200
+        assert len(aberturas) == 3, aberturas
+        assert google_sheets.get_google_sheets_client() is cliente
+
+        # Erro de leitura descarta o cache
+        db = SessionLocal()
+        try:
+            google_sheets.sincronizar_planilha(db, FakeSpreadsheet({}))
+        finally:
+            db.close()
+        assert google_sheets.get_google_sheets_client() is not cliente
+    finally:
+        FakeClient.open_by_key = open_by_key
+    return True
+
+
+def test_disparo_manual(client):
+    import time
+
+    r = client.post("/google-sheets/sync-metrics/executar")
+    assert r.status_code == 202, r.text
+
+    # A sincronização roda em segundo plano; aguarda o registro da execução
+    for _ in range(50):
+        status = client.get("/google-sheets/sync-metrics/status").json()
+        if status["execucoes"] and status["execucoes"][0]["status"] != "executando":
+            break
+        time.sleep(0.1)
+
+    ultima = status["execucoes"][0]
+    assert ultima["origem"] == "manual"
+    assert ultima["status"] == "sucesso", ultima
+    assert ultima["linhas"] == 22
+    print(f"Execução manual: {ultima['duracao_ms']} ms, {ultima['linhas']} linhas")
+    return True
+
+
+def test_execucao_interrompida(client):
+    from datetime import datetime
+
+    # Worker morto no meio do job: a linha fica "executando", mas o lock foi liberado
+    db = SessionLocal()
+    try:
+        db.add(JobExecucao(job=scheduler.JOB_SYNC_SHEETS, origem="agendado",
+                           status="executando", iniciado_em=datetime.now()))
+        db.commit()
+    finally:
+        db.close()
+
+    status = client.get("/google-sheets/sync-metrics/status").json()
+    assert status["execucoes"][0]["status"] == "executando"
+    assert status["em_andamento"] is False
+
+    # Outro worker com o lock: está em andamento e a execução dele não é tocada
+    with scheduler._lock_processos(scheduler.JOB_SYNC_SHEETS) as obtido:
+        assert obtido
+        assert client.get("/google-sheets/sync-metrics/status").json()["em_andamento"] is True
+        assert scheduler.marcar_execucoes_interrompidas() == 0
+        r = client.post("/google-sheets/sync-metrics/executar")
+        assert r.json()["iniciado"] is False, r.text
+
+    # Startup com o lock livre
+    assert scheduler.marcar_execucoes_interrompidas() == 1
+    status = client.get("/google-sheets/sync-metrics/status").json()
+    assert status["execucoes"][0]["status"] == "interrompido"
+    assert status["execucoes"][1]["status"] == "sucesso"  # Execução manual anterior
+    assert scheduler.marcar_execucoes_interrompidas() == 0
+    return True
+
+
+def test_banco_sem_row_hash(client):
+    # Banco criado antes da sincronização incremental
+    with engine.begin() as conn:
+        conn.execute(text("ALTER TABLE sheets_metricas_diarias DROP COLUMN row_hash"))
+
+    assert garantir_colunas(engine) == ["sheets_metricas_diarias.row_hash"]
+    assert "row_hash" in {c["name"] for c in inspect(engine).get_columns("sheets_metricas_diarias")}
+    assert garantir_colunas(engine) == []
+
+    r = client.get("/google-sheets/captura-lead", params={"mes": 3})
+    assert r.status_code == 200, r.text
+    assert len(r.json()["dados_diarios"]) == 21
+    return True
+
+
+if __name__ == "__main__":
+    print("Testing Google Sheets sync (offline)")
+    print("=" * 60)
+
+    init_db()
+    client = TestClient(app)
+
+    tests = [
+        ("Sync e leitura", test_sync_e_leitura),
+        ("Planilha alterada", test_planilha_alterada),
+        ("Sincronização incremental", test_sync_incremental),
+        ("Leitura por intervalo", test_leitura_por_intervalo),
+        ("Cliente e planilha em cache", test_cliente_em_cache),
+        ("Disparo manual", test_disparo_manual),
+        ("Execução interrompida", test_execucao_interrompida),
+        ("Banco sem row_hash", test_banco_sem_row_hash),
+    ]
+
+    for name, test_func in tests:
+        print(f"\nTesting {name}...")
+        try:
+            test_func(client)
+            print(f"✓ {name} OK")
+        except Exception as e:
+            print(f"✗ {name} FAILED: {e}")
+
+    print("\n" + "=" * 60)
+    print("All tests completed!")
+    print("=" * 60)
@@ -0,0 +1,260 @@
+"""
+Script para testar a equivalência dos importadores de CSV vetorizados
+(app/routers/import_csv.py) com o caminho antigo, linha a linha:
+parse_float_col / parse_int_col / parse_date_col / texto_col têm que dar os
+mesmos valores que parse_float / parse_int / parse_date aplicados em cada
+célula, e coletar_erros os mesmos erros por linha (mensagem, ordem, limite de
+10 detalhes e total) que o loop com iterrows.
+Usa um banco SQLite temporário.
+"""
+
+import io
+import os
+import sys
+import tempfile
+
+_tmp_dir = tempfile.mkdtemp(prefix="medgm_import_csv_")
+os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(_tmp_dir, 'import_csv.db')}"
+os.environ["CACHE_BACKEND"] = "off"
+
+# Add app to path
+sys.path.insert(0, os.path.dirname(__file__))
+
+import math
+
+import pandas as pd
+from fastapi.testclient import TestClient
+
+from app.database import SessionLocal, init_db
+from app.main import app
+from app.models.models import Financeiro, Venda
+from app.routers.import_csv import (
+    parse_date, parse_float, parse_int,
+    parse_date_col, parse_float_col, parse_int_col, texto_col, coletar_erros,
+)
+
+VALORES = [
+    "1.234,56", "R$ 1.234,56", "R$1.234.567,89", "12,5", "12.5", " 42 ", "-3,75",
+    "1e3", "abc", "", "0", "1.234", "R$ 99", "- 5", "+7", "2.9", "-2.9", "1,5",
+]
+DATAS = [
+    "2025-02-10", "10/02/2025", "10-02-2025", "2025/02/10", "10.02.2025",
+    " 2025-02-10 ", "31/02/2025", "2025-2-1", "1/2/2025", "2025-02-10 10:00", "abc", "",
+]
+
+
+def _csv(cabecalho, linhas):
+    """CSV com ';' e aspas em todas as células (valores com vírgula e espaços)."""
+    texto = ";".join(cabecalho) + "\n"
+    for linha in linhas:
+        texto += ";".join(f'"{valor}"' for valor in linha) + "\n"
+    return texto
+
+
+def ler_legado(texto):
+    """Leitura do importador antigo (tipos inferidos pelo pandas)."""
+    return pd.read_csv(io.StringIO(texto), sep=None, engine="python")
+
+
+def ler_vetorizado(texto):
+    """Leitura do importador novo (_ler_csv): tudo como texto."""
+    return pd.read_csv(io.StringIO(texto), sep=";", dtype=str)
+
+
+def _iguais(a, b):
+    if isinstance(a, float) and isinstance(b, float):
+        return math.isclose(a, b) or (math.isnan(a) and math.isnan(b))
+    return a == b
+
+
+def comparar(nome, novos, antigos, entradas):
+    diferencas = [(e, n, a) for e, n, a in zip(entradas, novos, antigos) if not _iguais(n, a)]
+    assert not diferencas, f"{nome}: (entrada, vetorizado, legado) {diferencas}"
+
+
+def test_parsers_por_celula(client):
+    # Mesmas células como texto puro (inclui NaN), sem passar pelo read_csv
+    serie = pd.Series(VALORES + [None], dtype=object)
+    comparar("parse_float", parse_float_col(serie).tolist(), [parse_float(v) for v in serie], serie)
+    comparar("parse_int", parse_int_col(serie).tolist(), [parse_int(v) for v in serie], serie)
+
+    serie = pd.Series(DATAS + [None], dtype=object)
+    comparar("parse_date", parse_date_col(serie).tolist(), [parse_date(v) for v in serie], serie)
+
+    # Colunas já numéricas (planilha sem texto) seguem o caminho rápido
+    serie = pd.Series([1.5, -2.75, None, 0.0])
+    comparar("parse_float numérico", parse_float_col(serie).tolist(), [parse_float(v) for v in serie], serie)
+    comparar("parse_int numérico", parse_int_col(serie).tolist(), [parse_int(v) for v in serie], serie)
+    return True
+
+
+def test_parsers_pelo_csv(client):
+    # Cada caminho com a sua leitura: o legado infere tipos (ex.: "2.9" vira float),
+    # o vetorizado lê tudo como texto
+    linhas = [[v, v, d] for v, d in zip(VALORES, DATAS + DATAS)]
+    texto = _csv(["valor", "quantidade", "data"], linhas + [["", "", ""]])
+    legado, novo = ler_legado(texto), ler_vetorizado(texto)
+
+    entradas = novo["valor"].tolist()
+    comparar("valor", parse_float_col(novo["valor"]).tolist(), [parse_float(v) for v in legado["valor"]], entradas)
+    comparar("quantidade", parse_int_col(novo["quantidade"]).tolist(),
+             [parse_int(v) for v in legado["quantidade"]], entradas)
+    comparar("data", parse_date_col(novo["data"]).tolist(), [parse_date(v) for v in legado["data"]], novo["data"])
+
+    # Texto: igual ao str(...).strip() or None antigo, exceto célula vazia, que
+    # antes virava 'nan' e agora é NULL
+    esperado = [None if pd.isna(v) else (str(v).strip() or None) for v in legado["data"]]
+    comparar("texto", texto_col(novo, "data").tolist(), esperado, novo["data"])
+    assert texto_col(novo, "inexistente", "padrao").tolist() == ["padrao"] * len(novo)
+    return True
+
+
+def erros_legado(df, validar):
+    """Loop do importador antigo: primeira regra que falhar por linha, 10 detalhes."""
+    validos, errors = [], []
+    for idx, row in df.iterrows():
+        erro = validar(row)
+        if erro:
+            errors.append(f"Linha {idx + 2}: {erro}")
+            continue
+        validos.append(idx)
+    return validos, len(errors), errors[:10]
+
+
+def _erro_periodo(row):
+    # Regras de mes/ano acrescentadas junto com a vetorização
+    if not 1 <= parse_int(row["mes"]) <= 12:
+        return "mes inválido"
+    if parse_int(row["ano"]) <= 0:
+        return "ano inválido"
+    return None
+
+
+def _linhas_financeiro():
+    linhas = []
+    for i in range(30):
+        tipo = ["entrada", "Saída", " SAIDA ", "transferencia", ""][i % 5]
+        mes = ["2", "13", "0", "abc", "12", "2,0"][i % 6]
+        ano = "2025" if i % 7 else "0"
+        linhas.append([tipo, VALORES[i % len(VALORES)], mes, ano, DATAS[i % len(DATAS)], f" Cat {i % 3} "])
+    return linhas
+
+
+def test_erros_financeiro(client):
+    texto = _csv(["tipo", "valor", "mes", "ano", "data", "categoria"], _linhas_financeiro())
+    novo = ler_vetorizado(texto)
+
+    def validar(row):
+        tipo = str(row["tipo"]).strip().lower()
+        if tipo not in ["entrada", "saida", "saída"]:
+            return f"tipo inválido '{tipo}'"
+        return _erro_periodo(row)
+
+    esperados = erros_legado(ler_legado(texto), validar)
+
+    tipo = novo["tipo"].astype(str).str.strip().str.lower()
+    mes, ano = parse_int_col(novo["mes"]), parse_int_col(novo["ano"])
+    validos, total, detalhes = coletar_erros(novo, [
+        (~tipo.isin(["entrada", "saida", "saída"]), "tipo inválido '{valor}'", tipo),
+        (~mes.between(1, 12), "mes inválido"),
+        (ano <= 0, "ano inválido"),
+    ])
+    assert (novo.index[validos].tolist(), total, detalhes) == esperados, \
+        f"\n  vetorizado={(novo.index[validos].tolist(), total, detalhes)}\n  legado={esperados}"
+    assert total > 10 and len(detalhes) == 10
+    return True
+
+
+def _enviar(client, rota, texto):
+    r = client.post(f"/import/{rota}/csv", files={"file": ("dados.csv", io.BytesIO(texto.encode("utf-8")), "text/csv")})
+    assert r.status_code == 200, r.text
+    return r.json()
+
+
+def test_endpoint_financeiro(client):
+    linhas = _linhas_financeiro()
+    texto = _csv(["tipo", "valor", "mes", "ano", "data", "categoria"], linhas)
+    resposta = _enviar(client, "financeiro", texto)
+
+    # Linhas e valores que o importador antigo gravaria
+    esperados = []
+    for _, row in ler_legado(texto).iterrows():
+        tipo = str(row["tipo"]).strip().lower()
+        if tipo not in ["entrada", "saida", "saída"] or _erro_periodo(row):
+            continue
+        esperados.append((
+            "saida" if tipo in ["saida", "saída"] else "entrada", parse_float(row["valor"]),
+            parse_int(row["mes"]), parse_int(row["ano"]), parse_date(row["data"]),
+            str(row["categoria"]).strip() or None,
+        ))
+
+    db = SessionLocal()
+    try:
+        gravados = [
+            (f.tipo, f.valor, f.mes, f.ano, f.data, f.categoria)
+            for f in db.query(Financeiro).order_by(Financeiro.id).all()
+        ]
+    finally:
+        db.close()
+
+    assert resposta["importados"] == len(esperados)
+    assert resposta["erros"] == len(linhas) - len(esperados)
+    assert len(gravados) == len(esperados)
+    for gravado, esperado in zip(gravados, esperados):
+        assert all(_iguais(g, e) for g, e in zip(gravado, esperado)), f"{gravado} != {esperado}"
+    return True
+
+
+def test_endpoint_vendas(client):
+    linhas = [[DATAS[i % len(DATAS)], VALORES[i % len(VALORES)], "2", "2025", f"Cliente {i}"] for i in range(24)]
+    texto = _csv(["data", "valor", "mes", "ano", "cliente"], linhas)
+    resposta = _enviar(client, "vendas", texto)
+
+    esperados, errors = [], []
+    for idx, row in ler_legado(texto).iterrows():
+        data = parse_date(row["data"])
+        if not data:
+            errors.append(f"Linha {idx + 2}: data inválida")
+            continue
+        esperados.append((data, parse_float(row["valor"]), str(row["cliente"]).strip()))
+
+    db = SessionLocal()
+    try:
+        gravados = [(v.data, v.valor_bruto, v.cliente) for v in db.query(Venda).order_by(Venda.id).all()]
+    finally:
+        db.close()
+
+    assert resposta["erros"] == len(errors)
+    assert resposta["detalhes_erros"] == errors[:10]
+    assert len(gravados) == len(esperados)
+    for gravado, esperado in zip(gravados, esperados):
+        assert all(_iguais(g, e) for g, e in zip(gravado, esperado)), f"{gravado} != {esperado}"
+    return True
+
+
+if __name__ == "__main__":
+    print("Testing equivalência dos importadores de CSV vetorizados")
+    print("=" * 60)
+
+    init_db()
+    client = TestClient(app)
+
+    tests = [
+        ("Parsers por célula", test_parsers_por_celula),
+        ("Parsers pela leitura do CSV", test_parsers_pelo_csv),
+        ("Erros por linha (financeiro)", test_erros_financeiro),
+        ("Endpoint financeiro", test_endpoint_financeiro),
+        ("Endpoint vendas", test_endpoint_vendas),
+    ]
+
+    for name, test_func in tests:
+        print(f"\nTesting {name}...")
+        try:
+            test_func(client)
+            print(f"✓ {name} OK")
+        except Exception as e:
+            print(f"✗ {name} FAILED: {e}")
+
+    print("\n" + "=" * 60)
+    print("All tests completed!")
+    print("=" * 60)
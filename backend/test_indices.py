@@ -0,0 +1,165 @@
+"""
+Script para verificar os índices declarados nos modelos (__table_args__):
+init_db cria os que faltam em bancos existentes (app/database_indexes.py)
+e os dashboards usam esses índices, conferido com EXPLAIN QUERY PLAN nas
+consultas que cada endpoint realmente faz.
+Usa um banco SQLite temporário com dados de exemplo.
+"""
+
+import os
+import sys
+import tempfile
+from datetime import date
+
+_tmp_dir = tempfile.mkdtemp(prefix="medgm_indices_")
+os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(_tmp_dir, 'indices.db')}"
+os.environ["CACHE_BACKEND"] = "off"
+
+# Add app to path
+sys.path.insert(0, os.path.dirname(__file__))
+
+from fastapi.testclient import TestClient
+from sqlalchemy import event, inspect, text
+
+from app.database import Base, SessionLocal, engine, init_db
+from app.database_indexes import garantir_indices
+from app.main import app
+from app.models.models import Financeiro, Meta, Pessoa, QuizMetrics, VendaDiretaMetrics
+
+FINANCEIRO_COMPOSTOS = ("idx_financeiro_realizado_cobertura", "idx_financeiro_mes_ano_tipo_previsto")
+
+# endpoint -> (tabela, índices aceitos nas consultas da tabela)
+PLANOS = {
+    "/metrics/financeiro/detalhado?mes=3&ano=2025": ("financeiro", ("idx_financeiro_realizado_cobertura",)),
+    "/demonstrativos/dre?mes=3&ano=2025": ("financeiro", FINANCEIRO_COMPOSTOS),
+    "/demonstrativos/dfc?mes=3&ano=2025": ("financeiro", FINANCEIRO_COMPOSTOS),
+    "/funil/quiz?mes=3&ano=2025": ("quiz_metrics", ("idx_quiz_ano_mes_data",)),
+    "/funil/venda-direta?mes=3&ano=2025": ("venda_direta_metrics", ("idx_venda_direta_ano_mes_data",)),
+    "/metas/?mes=3&ano=2025": ("metas", ("idx_meta_mes_ano_pessoa",)),
+}
+
+_consultas = []
+
+
+@event.listens_for(engine, "before_cursor_execute")
+def _registrar(conn, cursor, statement, parameters, context, executemany):
+    if not executemany:
+        _consultas.append((statement, parameters))
+
+
+def popular():
+    db = SessionLocal()
+    try:
+        pessoas = [Pessoa(nome=f"Pessoa {i}", funcao="closer") for i in range(5)]
+        db.add_all(pessoas)
+        db.flush()
+        for mes in range(1, 13):
+            for i in range(5):
+                for previsto_realizado in ("realizado", "previsto"):
+                    db.add(Financeiro(tipo="entrada", categoria="Venda", valor=1000, mes=mes, ano=2025,
+                                      data=date(2025, mes, i + 1), previsto_realizado=previsto_realizado))
+                    db.add(Financeiro(tipo="saida", categoria="Ferramenta", valor=300, mes=mes, ano=2025,
+                                      data=date(2025, mes, i + 1), previsto_realizado=previsto_realizado))
+                db.add(QuizMetrics(data=date(2025, mes, i + 1), campanha_nome="Quiz", mes=mes, ano=2025))
+                db.add(VendaDiretaMetrics(data=date(2025, mes, i + 1), campanha_nome="VD", mes=mes, ano=2025))
+                db.add(Meta(pessoa_id=pessoas[i].id, mes=mes, ano=2025, meta_vendas=2))
+        db.commit()
+    finally:
+        db.close()
+
+
+def plano(statement, parameters):
+    with engine.connect() as conn:
+        linhas = conn.exec_driver_sql(f"EXPLAIN QUERY PLAN {statement}", parameters).fetchall()
+    return " | ".join(linha[-1] for linha in linhas)
+
+
+def test_indices_criados(client):
+    existentes = set()
+    for tabela in inspect(engine).get_table_names():
+        existentes |= {indice["name"] for indice in inspect(engine).get_indexes(tabela)}
+
+    faltando = [
+        indice.name for tabela in Base.metadata.sorted_tables
+        for indice in tabela.indexes if indice.name not in existentes
+    ]
+    assert not faltando, faltando
+    return True
+
+
+def test_banco_existente(client):
+    # Banco criado antes dos índices: init_db só roda create_all nas tabelas que faltam
+    with engine.begin() as conn:
+        conn.execute(text("DROP INDEX idx_financeiro_realizado_cobertura"))
+        conn.execute(text("DROP INDEX idx_meta_mes_ano_pessoa"))
+
+    criados = garantir_indices(engine)
+    assert criados == ["idx_financeiro_realizado_cobertura", "idx_meta_mes_ano_pessoa"], criados
+
+    # Idempotente
+    assert garantir_indices(engine) == []
+    init_db()
+    return True
+
+
+def test_explain(client):
+    for rota, (tabela, indices) in PLANOS.items():
+        _consultas.clear()
+        r = client.get(rota)
+        assert r.status_code == 200, (rota, r.text)
+
+        consultas = [
+            (statement, parameters) for statement, parameters in _consultas
+            if statement.lstrip().upper().startswith("SELECT") and f"FROM {tabela}" in statement
+        ]
+        assert consultas, f"{rota}: nenhuma consulta em {tabela}"
+        for statement, parameters in consultas:
+            detalhe = plano(statement, parameters)
+            print(f"  {rota:<46} {detalhe}")
+            assert any(indice in detalhe for indice in indices), (rota, detalhe)
+            assert "TEMP B-TREE FOR ORDER BY" not in detalhe, (rota, detalhe)
+    return True
+
+
+def test_cobertura(client):
+    # Soma por categoria do realizado sai só do índice parcial
+    statement = (
+        "SELECT categoria, sum(valor) FROM financeiro "
+        "WHERE mes = ? AND ano = ? AND tipo = ? AND previsto_realizado = ? GROUP BY categoria"
+    )
+    detalhe = plano(statement, (3, 2025, "entrada", "realizado"))
+    assert "COVERING INDEX idx_financeiro_realizado_cobertura" in detalhe, detalhe
+
+    # Previsto não pode usar o índice parcial
+    detalhe = plano(statement, (3, 2025, "entrada", "previsto"))
+    assert "idx_financeiro_realizado_cobertura" not in detalhe, detalhe
+    assert "idx_financeiro_mes_ano_tipo_previsto" in detalhe, detalhe
+    return True
+
+
+if __name__ == "__main__":
+    print("Testing índices")
+    print("=" * 60)
+
+    init_db()
+    popular()
+    client = TestClient(app)
+
+    tests = [
+        ("Índices criados no init_db", test_indices_criados),
+        ("Banco existente", test_banco_existente),
+        ("EXPLAIN dos dashboards", test_explain),
+        ("Índice parcial de cobertura", test_cobertura),
+    ]
+
+    for name, test_func in tests:
+        print(f"\nTesting {name}...")
+        try:
+            test_func(client)
+            print(f"✓ {name} OK")
+        except Exception as e:
+            print(f"✗ {name} FAILED: {e}")
+
+    print("\n" + "=" * 60)
+    print("All tests completed!")
+    print("=" * 60)
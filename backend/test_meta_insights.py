@@ -0,0 +1,89 @@
+"""
+Script para testar a busca paralela de insights do Meta Ads (app/meta_insights.py)
+sem acessar a API, usando os objetos falsos de fake_facebook.py.
+"""
+
+import os
+import sys
+import time
+
+# Backoff curto para o teste de rate limit
+os.environ.setdefault("META_BACKOFF_BASE", "0.05")
+
+# Add app to path
+sys.path.insert(0, os.path.dirname(__file__))
+
+from app import meta_insights
+from fake_facebook import FakeCampaign
+
+FIELDS = ['impressions', 'clicks', 'spend', 'reach', 'cpc', 'cpm', 'ctr']
+PARAMS = {'date_preset': 'last_30d', 'level': 'campaign', 'time_increment': 1}
+
+
+def test_paralelo_igual_serial():
+    ids = [f"2385{i:04d}" for i in range(12)]
+
+    # Como os endpoints faziam antes: uma campanha por vez
+    campanhas = [FakeCampaign(cid, latencia=0.1) for cid in ids]
+    inicio = time.perf_counter()
+    serial = [list(c.get_insights(fields=FIELDS, params=PARAMS)) for c in campanhas]
+    t_serial = time.perf_counter() - inicio
+
+    campanhas = [FakeCampaign(cid, latencia=0.1) for cid in ids]
+    inicio = time.perf_counter()
+    resultados = meta_insights.buscar_insights(campanhas, FIELDS, PARAMS, conta="act_teste")
+    t_paralelo = time.perf_counter() - inicio
+
+    # Mesma ordem da entrada, mesmos insights
+    assert [c for c, _ in resultados] == campanhas
+    assert [insights for _, insights in resultados] == serial
+    assert all(len(insights) == 30 for insights in serial)
+    print(f"12 campanhas: serial {t_serial:.2f}s, paralelo {t_paralelo:.2f}s")
+    assert t_paralelo < t_serial / 3
+    return True
+
+
+def test_rate_limit_backoff():
+    campanhas = [FakeCampaign("111", falhas_rate_limit=2), FakeCampaign("222")]
+    resultados = meta_insights.buscar_insights(campanhas, FIELDS, PARAMS, conta="act_teste")
+
+    assert all(insights for _, insights in resultados)
+    assert campanhas[0].chamadas == 3
+    print(f"Campanha com rate limit: {campanhas[0].chamadas} chamadas até sucesso")
+    return True
+
+
+def test_erro_nao_derruba_as_demais():
+    class CampanhaQuebrada(FakeCampaign):
+        def get_insights(self, fields=None, params=None):
+            raise ValueError("campanha removida")
+
+    campanhas = [CampanhaQuebrada("999"), FakeCampaign("222")]
+    resultados = meta_insights.buscar_insights(campanhas, FIELDS, PARAMS)
+
+    assert resultados[0][1] is None
+    assert resultados[1][1]
+    return True
+
+
+if __name__ == "__main__":
+    print("Testing Meta Ads insights (offline)")
+    print("=" * 60)
+
+    tests = [
+        ("Paralelo igual ao serial", test_paralelo_igual_serial),
+        ("Rate limit com backoff", test_rate_limit_backoff),
+        ("Erro em uma campanha", test_erro_nao_derruba_as_demais),
+    ]
+
+    for name, test_func in tests:
+        print(f"\nTesting {name}...")
+        try:
+            test_func()
+            print(f"✓ {name} OK")
+        except Exception as e:
+            print(f"✗ {name} FAILED: {e}")
+
+    print("\n" + "=" * 60)
+    print("All tests completed!")
+    print("=" * 60)
@@ -0,0 +1,172 @@
+"""
+Script para testar o armazém local de insights do Meta Ads (app/meta_sync.py)
+sem acessar a API: backfill inicial, sincronização incremental pela janela
+de atribuição, endpoints /meta/* respondendo a partir do banco e sessões da
+API reaproveitadas por token (app/meta_api.py).
+"""
+
+import os
+import sys
+import tempfile
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date, timedelta
+
+_tmp_dir = tempfile.mkdtemp(prefix="medgm_meta_")
+os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(_tmp_dir, 'meta.db')}"
+
+# Add app to path
+sys.path.insert(0, os.path.dirname(__file__))
+
+from facebook_business.api import FacebookAdsApi
+from fastapi.testclient import TestClient
+
+from app import meta_api, meta_sync
+from app.database import SessionLocal, init_db
+from app.main import app
+from app.models.models import MetaAdsConfig, MetaInsightCampanhaDiario, MetaInsightAdDiario
+from fake_facebook import FakeAdAccount, gerar_insight
+
+ANUNCIOS = [
+    {"campaign_id": "c1", "campaign_name": "Quiz SE", "adset_id": "s1", "adset_name": "Aberto", "ad_id": "a1", "ad_name": "Vídeo 1"},
+    {"campaign_id": "c1", "campaign_name": "Quiz SE", "adset_id": "s1", "adset_name": "Aberto", "ad_id": "a2", "ad_name": "Vídeo 2"},
+    {"campaign_id": "c2", "campaign_name": "Isca", "adset_id": "s2", "adset_name": "LAL", "ad_id": "a3", "ad_name": "Carrossel", "effective_status": "PAUSED"},
+]
+
+
+def criar_config():
+    db = SessionLocal()
+    try:
+        config = MetaAdsConfig(access_token="token-teste", ad_account_id="act_123", status="active")
+        db.add(config)
+        db.commit()
+    finally:
+        db.close()
+
+
+def test_backfill_e_incremental():
+    db = SessionLocal()
+    try:
+        config = db.query(MetaAdsConfig).first()
+
+        conta = FakeAdAccount("act_123", ANUNCIOS)
+        resumo = meta_sync.sincronizar_insights(db, config, conta=conta)
+        dias = meta_sync.BACKFILL_DIAS + 1
+        print("Backfill:", resumo, f"({len(conta.chamadas)} chamadas)")
+        assert resumo["backfill"] is True
+        assert resumo["campaign"] == dias * 2
+        assert resumo["ad"] == dias * 3
+        assert config.last_sync is not None
+
+        conta = FakeAdAccount("act_123", ANUNCIOS)
+        resumo = meta_sync.sincronizar_insights(db, config, conta=conta)
+        print("Incremental:", resumo, f"({len(conta.chamadas)} chamadas)")
+        assert resumo["backfill"] is False
+        assert resumo["inicio"] == (date.today() - timedelta(days=meta_sync.JANELA_ATRIBUICAO_DIAS)).isoformat()
+        assert resumo["campaign"] == (meta_sync.JANELA_ATRIBUICAO_DIAS + 1) * 2
+
+        # Dias antigos continuam gravados
+        assert db.query(MetaInsightCampanhaDiario).count() == dias * 2
+        assert db.query(MetaInsightAdDiario).count() == dias * 3
+    finally:
+        db.close()
+    return True
+
+
+def test_endpoints_do_banco(client):
+    ontem = date.today() - timedelta(days=1)
+    dias = [ontem - timedelta(days=i) for i in range(7)]
+    spend_esperado = sum(float(gerar_insight(a["ad_id"], d)["spend"]) for a in ANUNCIOS for d in dias)
+
+    r = client.get("/meta/insights/summary", params={"date_preset": "last_7d"})
+    assert r.status_code == 200, r.text
+    assert abs(r.json()["spend"] - spend_esperado) < 0.01
+    assert r.json()["reach"] is None  # Pessoas únicas não somam entre dias
+    print(f"Resumo last_7d: spend {r.json()['spend']:.2f}")
+
+    r = client.get("/meta/insights/daily", params={"date_preset": "last_7d"})
+    assert len(r.json()) == 7
+    assert r.json()[-1]["date"] == ontem.isoformat()
+    assert r.json()[-1]["reach"] is None  # Duas campanhas no mesmo dia
+
+    r = client.get("/meta/insights/campaigns/daily", params={"campaign_ids": "c2", "since": ontem.isoformat(), "until": ontem.isoformat()})
+    assert len(r.json()) == 1
+    assert abs(r.json()[0]["spend"] - float(gerar_insight("a3", ontem)["spend"])) < 0.01
+    assert r.json()[0]["reach"] == int(gerar_insight("a3", ontem)["reach"])
+
+    params = {"campaign_ids": "c2", "since": ontem.isoformat(), "until": ontem.isoformat()}
+    assert client.get("/meta/insights/campaigns", params=params).json()["reach"] == int(gerar_insight("a3", ontem)["reach"])
+    params["since"] = dias[-1].isoformat()
+    assert client.get("/meta/insights/campaigns", params=params).json()["reach"] is None
+
+    r = client.get("/meta/campaigns/performance", params={"date_preset": "last_30d"})
+    campanhas = r.json()["campaigns"]
+    assert {c["id"] for c in campanhas} == {"c1", "c2"}
+    assert next(c for c in campanhas if c["id"] == "c2")["status"] == "PAUSED"
+
+    r = client.get("/meta/ads/performance", params={"limit": 2, "campaign_ids": "c1"})
+    assert len(r.json()["ads"]) == 2
+
+    r = client.get("/meta/insights/summary", params={"date_preset": "ontem"})
+    assert r.status_code == 400
+    return True
+
+
+def test_sessao_por_token(client):
+    meta_api.invalidar()
+
+    # Requisições simultâneas com o mesmo token recebem a mesma sessão
+    with ThreadPoolExecutor(max_workers=8) as pool:
+        apis = list(pool.map(lambda _: meta_api.api_para("token-teste"), range(16)))
+    assert all(api is apis[0] for api in apis)
+    assert meta_api.api_para("outro-token") is not apis[0]
+
+    db = SessionLocal()
+    try:
+        config = db.query(MetaAdsConfig).filter(MetaAdsConfig.status == "active").first()
+        assert meta_api.conta(config).get_api() is apis[0]
+        assert meta_api.campanha(config, "c1").get_api() is apis[0]
+    finally:
+        db.close()
+
+    # A API padrão global do SDK não é usada
+    assert FacebookAdsApi.get_default_api() is None
+
+    # Desativar a configuração descarta as sessões
+    r = client.delete("/meta/config")
+    assert r.status_code == 200, r.text
+    assert meta_api._apis == {}
+
+    db = SessionLocal()
+    try:
+        db.query(MetaAdsConfig).update({"status": "active"})
+        db.commit()
+    finally:
+        db.close()
+    return True
+
+
+if __name__ == "__main__":
+    print("Testing Meta Ads insights warehouse (offline)")
+    print("=" * 60)
+
+    init_db()
+    criar_config()
+    client = TestClient(app)
+
+    tests = [
+        ("Backfill e incremental", lambda: test_backfill_e_incremental()),
+        ("Endpoints a partir do banco", lambda: test_endpoints_do_banco(client)),
+        ("Sessão da API por token", lambda: test_sessao_por_token(client)),
+    ]
+
+    for name, test_func in tests:
+        print(f"\nTesting {name}...")
+        try:
+            test_func()
+            print(f"✓ {name} OK")
+        except Exception as e:
+            print(f"✗ {name} FAILED: {e}")
+
+    print("\n" + "=" * 60)
+    print("All tests completed!")
+    print("=" * 60)
@@ -0,0 +1,168 @@
+"""
+Script para testar o cálculo em lote do realizado das metas
+(PUT /metas/calcular-realizado) e a replicação (POST /metas/replicar-mes).
+
+Confere os valores de realizado, delta e % de atingimento por função e que
+o número de consultas não cresce com o número de metas.
+Usa um banco SQLite temporário com dados de exemplo.
+"""
+
+import os
+import sys
+import tempfile
+from datetime import date
+
+_tmp_dir = tempfile.mkdtemp(prefix="medgm_metas_")
+os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(_tmp_dir, 'metas.db')}"
+os.environ["CACHE_BACKEND"] = "off"
+
+# Add app to path
+sys.path.insert(0, os.path.dirname(__file__))
+
+from fastapi.testclient import TestClient
+from sqlalchemy import event
+
+from app.database import SessionLocal, engine, init_db
+from app.main import app
+from app.models.models import Meta, Pessoa, SDRMetrica, SocialSellingMetrica, Venda
+
+NUM_CLOSERS = 20
+LIMITE_CONSULTAS = 5  # metas + uma por tabela de origem + UPDATE em lote
+
+_consultas = []
+
+
+@event.listens_for(engine, "before_cursor_execute")
+def _contar(conn, cursor, statement, parameters, context, executemany):
+    _consultas.append(statement)
+
+
+def popular():
+    db = SessionLocal()
+    try:
+        ana = Pessoa(nome="Ana", funcao="social_selling")
+        bruno = Pessoa(nome="Bruno", funcao="sdr")
+        closers = [Pessoa(nome=f"Closer {i}", funcao="closer") for i in range(NUM_CLOSERS)]
+        inativo = Pessoa(nome="Inativo", funcao="closer", ativo=False)
+        db.add_all([ana, bruno, inativo, *closers])
+        db.flush()
+
+        for mes in range(1, 4):
+            db.add(Meta(pessoa_id=ana.id, mes=mes, ano=2025, meta_ativacoes=100, meta_leads=20))
+            db.add(Meta(pessoa_id=bruno.id, mes=mes, ano=2025, meta_reunioes_agendadas=10))
+            for closer in closers:
+                db.add(Meta(pessoa_id=closer.id, mes=mes, ano=2025, meta_faturamento=1000, meta_vendas=4))
+
+            for dia in (5, 20):
+                db.add(SocialSellingMetrica(data=date(2025, mes, dia), vendedor="Ana", mes=mes, ano=2025,
+                                            ativacoes=30 * mes, leads_gerados=5))
+                db.add(SDRMetrica(data=date(2025, mes, dia), sdr="Bruno", funil="SS", mes=mes, ano=2025,
+                                  reunioes_agendadas=3, reunioes_realizadas=None))
+            for i, closer in enumerate(closers[:5]):
+                db.add(Venda(data=date(2025, mes, 10), cliente="Cliente", closer=closer.nome,
+                             valor=100, valor_bruto=200 * (i + 1), mes=mes, ano=2025))
+        db.commit()
+    finally:
+        db.close()
+
+
+def metas_por_nome(mes):
+    db = SessionLocal()
+    try:
+        return {
+            nome: meta for meta, nome in db.query(Meta, Pessoa.nome).join(
+                Pessoa, Pessoa.id == Meta.pessoa_id
+            ).filter(Meta.mes == mes, Meta.ano == 2025)
+        }
+    finally:
+        db.close()
+
+
+def test_calcular_mes(client):
+    _consultas.clear()
+    r = client.put("/metas/calcular-realizado", params={"mes": 2, "ano": 2025})
+    assert r.status_code == 200, r.text
+    assert r.json()["metas_atualizadas"] == NUM_CLOSERS + 2
+    print(f"  {len(_consultas)} consulta(s) para {NUM_CLOSERS + 2} metas")
+    assert len(_consultas) <= LIMITE_CONSULTAS, _consultas
+
+    metas = metas_por_nome(2)
+    ana = metas["Ana"]
+    assert (ana.realizado_ativacoes, ana.realizado_leads) == (120, 10)
+    assert (ana.delta_ativacoes, ana.delta_leads) == (20, -10)
+    assert ana.perc_atingimento == 50.0
+
+    bruno = metas["Bruno"]
+    assert (bruno.realizado_reunioes_agendadas, bruno.realizado_reunioes) == (6, 0)
+    assert bruno.perc_atingimento == 60.0
+
+    assert (metas["Closer 1"].realizado_vendas, metas["Closer 1"].realizado_faturamento) == (1, 400)
+    assert metas["Closer 1"].perc_atingimento == 40.0
+    assert (metas["Closer 9"].realizado_vendas, metas["Closer 9"].delta_vendas) == (0, -4)
+
+    # Outros meses não são tocados
+    assert metas_por_nome(1)["Ana"].realizado_ativacoes is None
+    return True
+
+
+def test_calcular_ano(client):
+    _consultas.clear()
+    r = client.put("/metas/calcular-realizado", params={"ano": 2025})
+    assert r.status_code == 200, r.text
+    assert r.json()["metas_atualizadas"] == 3 * (NUM_CLOSERS + 2)
+    assert len(_consultas) <= LIMITE_CONSULTAS, len(_consultas)
+
+    for mes in range(1, 4):
+        assert metas_por_nome(mes)["Ana"].realizado_ativacoes == 60 * mes
+
+    r = client.put("/metas/calcular-realizado", params={"mes": 1, "ano": 2030})
+    assert r.status_code == 404
+    return True
+
+
+def test_replicar(client):
+    # Origem com metas: copia para o destino
+    r = client.post("/metas/replicar-mes", params={"mes_destino": 4, "ano_destino": 2025})
+    assert r.status_code == 200, r.text
+    assert r.json()["metas_criadas"] == NUM_CLOSERS + 2
+    assert metas_por_nome(4)["Bruno"].meta_reunioes_agendadas == 10
+
+    # Repetir não duplica
+    r = client.post("/metas/replicar-mes", params={"mes_destino": 4, "ano_destino": 2025})
+    assert r.json()["metas_criadas"] == 0
+
+    # Origem vazia: metas zeradas para as pessoas ativas
+    _consultas.clear()
+    r = client.post("/metas/replicar-mes", params={"mes_destino": 1, "ano_destino": 2026})
+    assert r.status_code == 200, r.text
+    assert r.json()["origem"] == "cadastro_pessoas"
+    assert r.json()["metas_criadas"] == NUM_CLOSERS + 2
+    assert len(_consultas) <= 5, len(_consultas)
+    return True
+
+
+if __name__ == "__main__":
+    print("Testing metas")
+    print("=" * 60)
+
+    init_db()
+    popular()
+    client = TestClient(app)
+
+    tests = [
+        ("Calcular realizado do mês", test_calcular_mes),
+        ("Calcular realizado do ano", test_calcular_ano),
+        ("Replicar metas", test_replicar),
+    ]
+
+    for name, test_func in tests:
+        print(f"\nTesting {name}...")
+        try:
+            test_func(client)
+            print(f"✓ {name} OK")
+        except Exception as e:
+            print(f"✗ {name} FAILED: {e}")
+
+    print("\n" + "=" * 60)
+    print("All tests completed!")
+    print("=" * 60)
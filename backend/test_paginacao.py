@@ -0,0 +1,147 @@
+"""
+Script para testar a paginação por cursor das listagens
+(GET /vendas, /crud/financeiro e /comercial/*/all).
+
+Percorre todas as páginas seguindo next_cursor e confere que cada registro
+aparece uma vez, na ordem da chave, e que fields= limita as colunas.
+Usa um banco SQLite temporário com dados de exemplo.
+"""
+
+import os
+import sys
+import tempfile
+from datetime import date
+
+_tmp_dir = tempfile.mkdtemp(prefix="medgm_paginacao_")
+os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(_tmp_dir, 'paginacao.db')}"
+os.environ["CACHE_BACKEND"] = "off"
+
+# Add app to path
+sys.path.insert(0, os.path.dirname(__file__))
+
+from fastapi.testclient import TestClient
+from sqlalchemy import insert
+
+from app.database import SessionLocal, init_db
+from app.main import app
+from app.models.models import CloserMetrica, Financeiro, SDRMetrica, SocialSellingMetrica, Venda
+
+NUM_VENDAS = 250
+
+
+def popular():
+    db = SessionLocal()
+    try:
+        # Várias vendas no mesmo dia: o id desempata a chave (data, id)
+        db.execute(insert(Venda), [
+            {"data": date(2025, 1 + i % 6, 1 + i % 5), "cliente": f"Cliente {i}",
+             "closer": "Carla" if i % 2 else "Diego", "valor": 100 + i, "mes": 1 + i % 6, "ano": 2025}
+            for i in range(NUM_VENDAS)
+        ])
+        db.execute(insert(Financeiro), [
+            {"tipo": "entrada" if i % 2 else "saida", "categoria": "Venda", "valor": 10 + i,
+             "mes": 1 + i % 12, "ano": 2024 + i % 2}
+            for i in range(120)
+        ])
+        for mes in range(1, 13):
+            db.add(SocialSellingMetrica(vendedor="Ana", mes=mes, ano=2025, ativacoes=10, conversoes=5, leads_gerados=2))
+            db.add(SDRMetrica(sdr="Bruno", funil="SS", mes=mes, ano=2025, leads_recebidos=5))
+            db.add(CloserMetrica(closer="Carla", funil="SS", mes=mes, ano=2025, vendas=1))
+        db.commit()
+    finally:
+        db.close()
+
+
+def percorrer(client, rota, **params):
+    """Segue next_cursor até o fim; retorna (itens, número de páginas)."""
+    itens, paginas, cursor = [], 0, None
+    while True:
+        r = client.get(rota, params={**params, **({"cursor": cursor} if cursor else {})})
+        assert r.status_code == 200, r.text
+        corpo = r.json()
+        assert len(corpo["items"]) <= corpo["limit"]
+        itens.extend(corpo["items"])
+        paginas += 1
+        cursor = corpo["next_cursor"]
+        if cursor is None:
+            return itens, paginas
+
+
+def test_vendas(client):
+    itens, paginas = percorrer(client, "/vendas", limit=40)
+    assert paginas == 7, paginas
+    assert len(itens) == NUM_VENDAS
+    assert len({v["id"] for v in itens}) == NUM_VENDAS
+
+    chaves = [(v["data"], v["id"]) for v in itens]
+    assert chaves == sorted(chaves, reverse=True)
+
+    filtradas, _ = percorrer(client, "/vendas", mes=2, ano=2025, closer="Carla", limit=7)
+    assert filtradas and all(v["mes"] == 2 and v["closer"] == "Carla" for v in filtradas)
+    assert all(v["booking"] == 0.0 for v in filtradas)
+    return True
+
+
+def test_fields(client):
+    r = client.get("/vendas", params={"fields": "id,valor_bruto", "limit": 5})
+    assert r.status_code == 200, r.text
+    assert all(set(v) == {"id", "valor_bruto"} for v in r.json()["items"])
+
+    # Projeção sem as colunas da chave continua paginando
+    itens, _ = percorrer(client, "/vendas", fields="cliente", limit=100)
+    assert len(itens) == NUM_VENDAS
+
+    r = client.get("/vendas", params={"fields": "id,senha"})
+    assert r.status_code == 400
+    return True
+
+
+def test_financeiro_e_comercial(client):
+    itens, _ = percorrer(client, "/crud/financeiro", limit=50)
+    assert len(itens) == 120
+    chaves = [(f["ano"], f["mes"], f["id"]) for f in itens]
+    assert chaves == sorted(chaves, reverse=True)
+
+    saidas, _ = percorrer(client, "/crud/financeiro", tipo="saida", ano=2024, limit=50)
+    assert len(saidas) == 60 and all(f["tipo"] == "saida" for f in saidas)
+
+    for rota in ["/comercial/social-selling/all", "/comercial/sdr/all", "/comercial/closer/all"]:
+        itens, paginas = percorrer(client, rota, limit=5)
+        assert len(itens) == 12 and paginas == 3, (rota, len(itens), paginas)
+        assert [m["mes"] for m in itens] == list(range(12, 0, -1))
+    return True
+
+
+def test_cursor_invalido(client):
+    for cursor in ["nao-e-um-cursor", "WzFd"]:  # WzFd = [1], chave com tamanho errado
+        r = client.get("/vendas", params={"cursor": cursor})
+        assert r.status_code == 400, (cursor, r.status_code)
+    return True
+
+
+if __name__ == "__main__":
+    print("Testing paginação")
+    print("=" * 60)
+
+    init_db()
+    popular()
+    client = TestClient(app)
+
+    tests = [
+        ("Vendas", test_vendas),
+        ("fields=", test_fields),
+        ("Financeiro e comercial", test_financeiro_e_comercial),
+        ("Cursor inválido", test_cursor_invalido),
+    ]
+
+    for name, test_func in tests:
+        print(f"\nTesting {name}...")
+        try:
+            test_func(client)
+            print(f"✓ {name} OK")
+        except Exception as e:
+            print(f"✗ {name} FAILED: {e}")
+
+    print("\n" + "=" * 60)
+    print("All tests completed!")
+    print("=" * 60)
@@ -0,0 +1,187 @@
+"""
+Script para testar a coluna periodo (ano * 100 + mes) e os filtros por
+intervalo (app/periodo.py): valor calculado pelo banco em inserts e updates,
+coluna criada no startup em bancos existentes (app/database_colunas.py), saldo da projeção de caixa na virada
+do ano e exportação por período usando o índice.
+Usa um banco SQLite temporário com dados de exemplo.
+"""
+
+import csv
+import io
+import os
+import sys
+import tempfile
+from datetime import date
+
+_tmp_dir = tempfile.mkdtemp(prefix="medgm_periodo_")
+os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(_tmp_dir, 'periodo.db')}"
+os.environ["CACHE_BACKEND"] = "off"
+
+# Add app to path
+sys.path.insert(0, os.path.dirname(__file__))
+
+from fastapi.testclient import TestClient
+from sqlalchemy import event, insert, inspect, text
+
+from app.database import SessionLocal, engine, init_db
+from app.database_colunas import garantir_colunas
+from app.main import app
+from app.migrations.run_migrations_sqlite import migrate_periodo
+from app.models.models import Financeiro, Venda
+from app.periodo import filtro_periodo, periodo
+
+_consultas = []
+
+
+@event.listens_for(engine, "before_cursor_execute")
+def _registrar(conn, cursor, statement, parameters, context, executemany):
+    if not executemany:
+        _consultas.append((statement, parameters))
+
+
+def criar_vendas_antiga():
+    """Tabela vendas como era antes da coluna periodo, com dados."""
+    with engine.begin() as conn:
+        conn.execute(text("""
+            CREATE TABLE vendas (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                data DATE NOT NULL, cliente VARCHAR(255),
+                valor_bruto FLOAT NOT NULL, valor_liquido FLOAT NOT NULL, valor FLOAT,
+                funil VARCHAR(100), vendedor VARCHAR(100),
+                mes INTEGER NOT NULL, ano INTEGER NOT NULL,
+                closer VARCHAR(100), tipo_receita VARCHAR(50), produto VARCHAR(200),
+                booking FLOAT, previsto FLOAT, valor_pago FLOAT,
+                created_at DATETIME DEFAULT CURRENT_TIMESTAMP
+            )
+        """))
+        conn.execute(text("""
+            INSERT INTO vendas (data, valor_bruto, valor_liquido, mes, ano)
+            VALUES ('2024-12-10', 100, 90, 12, 2024), ('2025-01-10', 200, 180, 1, 2025)
+        """))
+
+
+def test_banco_existente(client):
+    # init_db (no __main__) rodou sobre a tabela antiga: a coluna e o índice já existem
+    colunas = {c["name"] for c in inspect(engine).get_columns("vendas")}
+    assert "periodo" in colunas
+
+    db = SessionLocal()
+    try:
+        assert db.query(Venda).count() == 2
+        assert db.query(Venda).filter(*filtro_periodo(Venda, inicio=202501)).count() == 1
+    finally:
+        db.close()
+
+    # Idempotente, inclusive com o script de migração do SQLite
+    assert garantir_colunas(engine) == []
+    migrate_periodo()
+
+    with engine.connect() as conn:
+        valores = [p for (p,) in conn.execute(text("SELECT periodo FROM vendas ORDER BY id"))]
+    assert valores == [202412, 202501], valores
+
+    indices = {i["name"] for i in inspect(engine).get_indexes("vendas")}
+    assert "ix_vendas_periodo" in indices, indices
+    return True
+
+
+def test_valor_calculado(client):
+    db = SessionLocal()
+    try:
+        f = Financeiro(tipo="entrada", categoria="Venda", valor=10, mes=3, ano=2025)
+        db.add(f)
+        db.commit()
+        assert f.periodo == 202503
+
+        f.mes, f.ano = 1, 2026
+        db.commit()
+        assert f.periodo == 202601
+
+        db.execute(insert(Financeiro), [
+            {"tipo": "saida", "valor": 1, "mes": 12, "ano": 2024},
+            {"tipo": "saida", "valor": 1, "mes": 2, "ano": 2025},
+        ])
+        periodos = {p for (p,) in db.query(Financeiro.periodo).filter(Financeiro.tipo == "saida")}
+        assert periodos == {202412, 202502}, periodos
+        db.rollback()
+
+        db.delete(f)
+        db.commit()
+    finally:
+        db.close()
+
+    assert periodo(2025, 3) == 202503
+    assert len(filtro_periodo(Venda)) == 0
+    assert len(filtro_periodo(Venda, inicio=202501)) == 1
+    return True
+
+
+def test_projecao_virada_do_ano(client):
+    db = SessionLocal()
+    try:
+        for ano, mes, valor in [(2024, 11, 1000), (2024, 12, 2000), (2025, 1, 300), (2025, 2, 40), (2025, 4, 5)]:
+            db.add(Financeiro(tipo="entrada", categoria="Venda", valor=valor, mes=mes, ano=ano,
+                              data=date(ano, mes, 15), previsto_realizado="realizado"))
+        db.add(Financeiro(tipo="saida", categoria="Ferramenta", valor=500, mes=12, ano=2024,
+                          data=date(2024, 12, 20), previsto_realizado="realizado"))
+        db.commit()
+    finally:
+        db.close()
+
+    r = client.get("/projecao/caixa", params={"mes_ref": 2, "ano_ref": 2025})
+    assert r.status_code == 200, r.text
+    # Antes: só meses <= 2 de cada ano entravam (nov e dez/2024 ficavam de fora)
+    assert r.json()["saldo_atual"] == 1000 + 2000 + 300 + 40 - 500, r.json()["saldo_atual"]
+    return True
+
+
+def test_export_periodo(client):
+    _consultas.clear()
+    r = client.get("/export/periodo", params={
+        "mes_inicio": 12, "ano_inicio": 2024, "mes_fim": 2, "ano_fim": 2025,
+        "tipo": "financeiro", "formato": "csv"
+    })
+    assert r.status_code == 200, r.text
+
+    linhas = list(csv.reader(io.StringIO(r.content.decode("utf-8-sig"))))[1:]
+    meses = [(int(linha[1]), linha[0]) for linha in linhas if linha]
+    assert sorted(set(meses)) == [(2024, "Dezembro"), (2025, "Fevereiro"), (2025, "Janeiro")], meses
+    assert meses[0] == (2024, "Dezembro") and meses[-1] == (2025, "Fevereiro")  # Ordem do período
+
+    consulta = next(
+        (statement, parameters) for statement, parameters in _consultas
+        if statement.lstrip().upper().startswith("SELECT") and "financeiro.periodo >=" in statement
+    )
+    with engine.connect() as conn:
+        plano = " | ".join(l[-1] for l in conn.exec_driver_sql(f"EXPLAIN QUERY PLAN {consulta[0]}", consulta[1]))
+    print(f"  {plano}")
+    assert "ix_financeiro_periodo" in plano, plano
+    return True
+
+
+if __name__ == "__main__":
+    print("Testing periodo")
+    print("=" * 60)
+
+    criar_vendas_antiga()
+    init_db()
+    client = TestClient(app)
+
+    tests = [
+        ("Banco existente", test_banco_existente),
+        ("Valor calculado pelo banco", test_valor_calculado),
+        ("Projeção de caixa na virada do ano", test_projecao_virada_do_ano),
+        ("Exportação por período", test_export_periodo),
+    ]
+
+    for name, test_func in tests:
+        print(f"\nTesting {name}...")
+        try:
+            test_func(client)
+            print(f"✓ {name} OK")
+        except Exception as e:
+            print(f"✗ {name} FAILED: {e}")
+
+    print("\n" + "=" * 60)
+    print("All tests completed!")
+    print("=" * 60)
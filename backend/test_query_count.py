@@ -0,0 +1,152 @@
+"""
+Script para verificar quantas consultas SQL os endpoints anuais fazem
+e a instrumentação por requisição (Server-Timing e /internal/metrics).
+
+dfc_anual, dre_anual, funil_historico e as tendências de
+inteligencia/detalhado montam os meses a partir de consultas agrupadas por
+mes; este script falha se algum deles voltar a consultar o banco mes a mes. Usa um banco SQLite temporario com dados de exemplo.
+"""
+
+import os
+import sys
+import tempfile
+from datetime import date
+
+_tmp_dir = tempfile.mkdtemp(prefix="medgm_queries_")
+os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(_tmp_dir, 'queries.db')}"
+os.environ["CACHE_BACKEND"] = "off"
+
+# Add app to path
+sys.path.insert(0, os.path.dirname(__file__))
+
+from fastapi.testclient import TestClient
+from sqlalchemy import event
+
+from app import instrumentacao
+from app.database import SessionLocal, engine, init_db
+from app.main import app
+from app.models.models import Financeiro, SocialSellingMetrica, SDRMetrica, CloserMetrica, Venda
+
+# Maximo de consultas por endpoint
+LIMITES = {
+    "/demonstrativos/dfc/anual": 1,
+    "/demonstrativos/dre/anual": 1,
+    "/funil/historico": 4,
+    "/demonstrativos/dfc?mes=6": 2,
+    "/demonstrativos/dre?mes=6": 1,
+    "/metrics/inteligencia/detalhado?mes=6": 4,
+    "/metrics/inteligencia/detalhado?mes=6&janela=24": 4,
+}
+
+_consultas = []
+
+
+@event.listens_for(engine, "before_cursor_execute")
+def _contar(conn, cursor, statement, parameters, context, executemany):
+    _consultas.append(statement)
+
+
+def popular():
+    db = SessionLocal()
+    try:
+        for mes in range(1, 13):
+            db.add(Financeiro(tipo="entrada", categoria="Venda", valor=1000 * mes, mes=mes, ano=2025))
+            db.add(Financeiro(tipo="saida", categoria="Ferramenta", valor=300, mes=mes, ano=2025))
+            db.add(Financeiro(tipo="saida", custo="Salario", centro_custo="Administrativo", valor=200, mes=mes, ano=2025))
+            db.add(SocialSellingMetrica(vendedor="Ana", mes=mes, ano=2025, ativacoes=100, conversoes=40, leads_gerados=20))
+            db.add(SDRMetrica(sdr="Bruno", funil="SS", mes=mes, ano=2025, leads_recebidos=20,
+                              reunioes_agendadas=10, reunioes_realizadas=8))
+            db.add(CloserMetrica(closer="Carla", funil="SS", mes=mes, ano=2025, calls_agendadas=8,
+                                 calls_realizadas=6, vendas=2, faturamento=6000))
+            db.add(Venda(data=date(2025, mes, 10), cliente="Cliente", valor=3000, mes=mes, ano=2025))
+        db.commit()
+    finally:
+        db.close()
+
+
+def contar_consultas(client, rota):
+    separador = "&" if "?" in rota else "?"
+    _consultas.clear()
+    r = client.get(f"{rota}{separador}ano=2025")
+    assert r.status_code == 200, r.text
+    return len(_consultas), r.json()
+
+
+def test_limites(client):
+    for rota, limite in LIMITES.items():
+        total, _ = contar_consultas(client, rota)
+        print(f"  {rota:<48} {total} consulta(s) (limite {limite})")
+        assert total <= limite, f"{rota} fez {total} consultas, limite {limite}"
+    return True
+
+
+def test_valores(client):
+    _, dfc = contar_consultas(client, "/demonstrativos/dfc/anual")
+    assert len(dfc["historico"]) == 12
+    assert dfc["saldo_final"] == sum(1000 * m - 500 for m in range(1, 13))
+
+    _, dre = contar_consultas(client, "/demonstrativos/dre/anual")
+    assert dre["historico"][2]["lucro_acumulado"] == (1000 + 2000 + 3000) - 3 * 500
+
+    _, funil = contar_consultas(client, "/funil/historico")
+    assert funil["total_meses"] == 12
+    assert funil["historico"][0]["vendas"] == 2
+    assert funil["historico"][0]["reunioes_realizadas"] == 8
+
+    # Tendência atravessando o ano: meses de 2024 sem vendas entram zerados
+    _, inteligencia = contar_consultas(client, "/metrics/inteligencia/detalhado?mes=6&janela=12")
+    tendencias = inteligencia["tendencias"]
+    assert len(tendencias) == 12 and tendencias[0]["mes_nome"] == "Jul/2024"
+    assert [t["qtd_vendas"] for t in tendencias] == [0] * 6 + [1] * 6
+    assert tendencias[-1]["faturamento"] == 3000
+    assert client.get("/metrics/inteligencia/detalhado?mes=6&ano=2025&janela=7").status_code == 400
+    return True
+
+
+def test_instrumentacao(client):
+    instrumentacao.limpar_metricas()
+    total, _ = contar_consultas(client, "/funil/historico")
+    r = client.get("/funil/historico?ano=2025")
+    timing = r.headers["Server-Timing"]
+    print(f"  Server-Timing: {timing}")
+    assert f'desc="{total} consultas"' in timing
+
+    r = client.get("/internal/metrics")
+    assert r.status_code == 200
+    assert 'medgm_db_queries_per_request_count{metodo="GET",rota="/funil/historico"}' in r.text
+    assert f'medgm_db_queries_per_request_sum{{metodo="GET",rota="/funil/historico"}} {2 * total}' in r.text
+
+    # Rotas com parâmetro usam o template; URLs inexistentes não criam séries
+    client.get("/config/pessoas/999")
+    client.get("/nao-existe")
+    texto = client.get("/internal/metrics").text
+    assert 'rota="/config/pessoas/{id}"' in texto
+    assert 'rota="/nao-existe"' not in texto
+    return True
+
+
+if __name__ == "__main__":
+    print("Testing query counts")
+    print("=" * 60)
+
+    init_db()
+    popular()
+    client = TestClient(app)
+
+    tests = [
+        ("Limite de consultas", test_limites),
+        ("Valores", test_valores),
+        ("Server-Timing e /internal/metrics", test_instrumentacao),
+    ]
+
+    for name, test_func in tests:
+        print(f"\nTesting {name}...")
+        try:
+            test_func(client)
+            print(f"✓ {name} OK")
+        except Exception as e:
+            print(f"✗ {name} FAILED: {e}")
+
+    print("\n" + "=" * 60)
+    print("All tests completed!")
+    print("=" * 60)
@@ -0,0 +1,307 @@
+"""
+Script para testar a consistência dos rollups comerciais (app/rollups.py):
+depois de cada tipo de escrita (create, update mudando mês, pessoa e funil,
+delete, delete por mês, importação de CSV e escritas simultâneas em duas
+sessões), ComercialRollupMensal e ComercialRollupDiario têm que ser iguais a
+um GROUP BY direto nas tabelas brutas de Social Selling, SDR e Closer.
+Usa um banco SQLite temporário.
+"""
+
+import io
+import os
+import sys
+import tempfile
+
+_tmp_dir = tempfile.mkdtemp(prefix="medgm_rollups_")
+os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(_tmp_dir, 'rollups.db')}"
+os.environ["CACHE_BACKEND"] = "off"
+
+# Add app to path
+sys.path.insert(0, os.path.dirname(__file__))
+
+from fastapi.testclient import TestClient
+from sqlalchemy import func
+
+from app.database import SessionLocal, init_db
+from app.main import app
+from app.models.models import CloserMetrica, ComercialRollupMensal, ComercialRollupDiario
+from app.rollups import ORIGENS, aplicar_registros
+
+ROTAS = {'social_selling': 'social-selling', 'sdr': 'sdr', 'closer': 'closer'}
+
+
+def _valores(linha, campos):
+    return tuple([int(linha.registros)] + [round(float(getattr(linha, campo) or 0), 2) for campo in campos])
+
+
+def agrupado_bruto(db, origem, com_data):
+    """GROUP BY direto na tabela bruta, sem passar por app.rollups."""
+    modelo, col_pessoa, col_funil, campos = ORIGENS[origem]
+    grupo = [modelo.ano, modelo.mes]
+    if com_data:
+        grupo.append(modelo.data)
+    grupo.append(func.coalesce(getattr(modelo, col_pessoa), ''))
+    if col_funil:
+        grupo.append(func.coalesce(getattr(modelo, col_funil), ''))
+
+    query = db.query(*grupo, func.count(modelo.id).label('registros'), *[
+        func.coalesce(func.sum(getattr(modelo, campo)), 0).label(campo) for campo in campos
+    ])
+    if com_data:
+        query = query.filter(modelo.data.isnot(None))
+
+    resultado = {}
+    for linha in query.group_by(*grupo).all():
+        chave = tuple(linha[:len(grupo)]) + (() if col_funil else ('',))
+        resultado[chave] = _valores(linha, campos)
+    return resultado
+
+
+def agrupado_rollup(db, origem, com_data):
+    rollup = ComercialRollupDiario if com_data else ComercialRollupMensal
+    campos = ORIGENS[origem][3]
+    resultado = {}
+    for linha in db.query(rollup).filter(rollup.origem == origem).all():
+        chave = (linha.ano, linha.mes) + ((linha.data,) if com_data else ()) + (linha.pessoa, linha.funil)
+        resultado[chave] = _valores(linha, campos)
+    return resultado
+
+
+def conferir(etapa):
+    """Rollups iguais ao GROUP BY das tabelas brutas, para todas as origens."""
+    db = SessionLocal()
+    try:
+        for origem in ORIGENS:
+            for com_data in (False, True):
+                bruto = agrupado_bruto(db, origem, com_data)
+                rollup = agrupado_rollup(db, origem, com_data)
+                nome = f"{etapa}: {origem} {'diário' if com_data else 'mensal'}"
+                assert rollup == bruto, f"{nome}\n  rollup={rollup}\n  bruto={bruto}"
+    finally:
+        db.close()
+
+
+def criar(client, origem, **dados):
+    r = client.post(f"/comercial/{ROTAS[origem]}", json=dados)
+    assert r.status_code == 200, r.text
+    return r.json()["id"]
+
+
+def social_selling(mes, dia, vendedor, ativacoes=10, conversoes=4, leads_gerados=2):
+    return dict(mes=mes, ano=2025, data=f"2025-{mes:02d}-{dia:02d}", vendedor=vendedor,
+                ativacoes=ativacoes, conversoes=conversoes, leads_gerados=leads_gerados)
+
+
+def sdr(mes, dia, pessoa, funil, leads=20, agendadas=8, realizadas=5):
+    return dict(mes=mes, ano=2025, data=f"2025-{mes:02d}-{dia:02d}", sdr=pessoa, funil=funil,
+                leads_recebidos=leads, reunioes_agendadas=agendadas, reunioes_realizadas=realizadas)
+
+
+def closer(mes, dia, pessoa, funil, vendas=2, faturamento=3000.5):
+    return dict(mes=mes, ano=2025, data=f"2025-{mes:02d}-{dia:02d}", closer=pessoa, funil=funil,
+                calls_agendadas=6, calls_realizadas=4, vendas=vendas, faturamento=faturamento,
+                booking=faturamento, faturamento_bruto=faturamento, faturamento_liquido=faturamento * 0.9)
+
+
+_ids = {}
+
+
+def test_create(client):
+    _ids["ss"] = [
+        criar(client, 'social_selling', **social_selling(3, 1, "Ana")),
+        criar(client, 'social_selling', **social_selling(3, 1, "Ana", ativacoes=7)),  # Mesmo dia e pessoa
+        criar(client, 'social_selling', **social_selling(3, 2, "Bruno")),
+    ]
+    _ids["sdr"] = [
+        criar(client, 'sdr', **sdr(3, 1, "Carla", "Quiz")),
+        criar(client, 'sdr', **sdr(3, 1, "Carla", "Isca")),
+        criar(client, 'sdr', **sdr(3, 5, "Davi", "Quiz")),
+    ]
+    _ids["closer"] = [
+        criar(client, 'closer', **closer(3, 1, "Eva", "Quiz")),
+        criar(client, 'closer', **closer(3, 2, "Eva", "Quiz", vendas=1, faturamento=999.99)),
+        criar(client, 'closer', **closer(3, 3, "Fabio", "Isca")),
+    ]
+    # Sem data: só entra no rollup mensal
+    semdata = sdr(3, 1, "Davi", "Quiz")
+    semdata["data"] = None
+    _ids["sdr"].append(criar(client, 'sdr', **semdata))
+    conferir("create")
+    return True
+
+
+def test_update(client):
+    # Mesmo período, valores novos
+    r = client.put(f"/comercial/social-selling/{_ids['ss'][0]}", json=social_selling(3, 1, "Ana", ativacoes=50))
+    assert r.status_code == 200, r.text
+    conferir("update de valores")
+
+    # Troca de mês e de pessoa: a chave antiga tem que sumir se ficou vazia
+    r = client.put(f"/comercial/closer/{_ids['closer'][2]}", json=closer(4, 10, "Gabi", "Isca"))
+    assert r.status_code == 200, r.text
+    conferir("update de mês e pessoa")
+
+    # Troca de funil e de dia
+    r = client.put(f"/comercial/sdr/{_ids['sdr'][1]}", json=sdr(3, 7, "Carla", "Quiz"))
+    assert r.status_code == 200, r.text
+    conferir("update de funil e dia")
+
+    # Troca só de pessoa num grupo que continua com outros registros
+    r = client.put(f"/comercial/closer/{_ids['closer'][1]}", json=closer(3, 2, "Fabio", "Quiz"))
+    assert r.status_code == 200, r.text
+    conferir("update de pessoa")
+
+    db = SessionLocal()
+    try:
+        assert db.query(ComercialRollupMensal).filter_by(origem='closer', mes=3, pessoa="Fabio").count() == 1
+        assert db.query(ComercialRollupMensal).filter_by(origem='closer', mes=4, pessoa="Gabi").count() == 1
+    finally:
+        db.close()
+    return True
+
+
+def test_delete(client):
+    r = client.delete(f"/comercial/social-selling/{_ids['ss'][2]}")
+    assert r.status_code == 200, r.text
+    conferir("delete")
+
+    r = client.delete(f"/comercial/sdr/{_ids['sdr'][3]}")
+    assert r.status_code == 200, r.text
+    conferir("delete sem data")
+
+    r = client.delete("/comercial/metricas/closer", params={"mes": 4, "ano": 2025})
+    assert r.status_code == 200, r.text
+    conferir("delete por mês")
+
+    db = SessionLocal()
+    try:
+        assert db.query(ComercialRollupMensal).filter_by(origem='social_selling', pessoa="Bruno").count() == 0
+        assert db.query(ComercialRollupMensal).filter_by(origem='closer', mes=4).count() == 0
+    finally:
+        db.close()
+    return True
+
+
+def _enviar_csv(client, rota, conteudo):
+    r = client.post(f"/import/{rota}/csv", files={"file": ("dados.csv", io.BytesIO(conteudo.encode("utf-8")), "text/csv")})
+    assert r.status_code == 200, r.text
+    return r.json()
+
+
+def test_import_csv(client):
+    # Mesmo período dos registros criados pela API (soma com eles) e um período novo
+    resposta = _enviar_csv(client, "social-selling", (
+        "vendedor;mes;ano;ativacoes;conversoes;leads_gerados\n"
+        "Ana;3;2025;5;2;1\n"
+        "Helena;5;2025;8;3;2\n"
+        ";5;2025;1;1;1\n"  # Inválida: não entra na tabela nem nos rollups
+    ))
+    assert resposta["importados"] == 2 and resposta["erros"] == 1
+    conferir("CSV de Social Selling")
+
+    _enviar_csv(client, "sdr", (
+        "sdr,funil,mes,ano,leads_recebidos,reunioes_agendadas,reunioes_realizadas\n"
+        "Carla,Quiz,3,2025,10,4,2\n"
+        "Davi,,3,2025,10,4,2\n"
+        "Igor,Isca,5,2025,12,6,3\n"
+    ))
+    conferir("CSV de SDR")
+
+    _enviar_csv(client, "closer", (
+        "closer,funil,mes,ano,calls_agendadas,calls_realizadas,vendas,faturamento\n"
+        "Eva,Quiz,3,2025,3,2,1,\"1.500,25\"\n"
+        "Joana,Isca,4,2025,5,3,2,2000\n"
+    ))
+    conferir("CSV de Closer")
+
+    # Escrita pela API depois da importação continua consistente
+    criar(client, 'closer', **closer(4, 2, "Joana", "Isca"))
+    conferir("create após CSV")
+    return True
+
+
+def _gravar_closer(db, **dados):
+    from datetime import date
+
+    dados["data"] = date.fromisoformat(dados["data"])
+    registro = CloserMetrica(**dados)
+    db.add(registro)
+    db.flush()
+    aplicar_registros(db, [registro])
+    db.commit()
+
+
+def test_sessoes_concorrentes(client):
+    # Duas escritas na mesma chave (existente e nova) cujas transações se
+    # sobrepõem: a segunda sessão já leu os rollups antes da primeira gravar
+    s1, s2 = SessionLocal(), SessionLocal()
+    try:
+        # (mantém as linhas lidas: o identity map só guarda referências fracas)
+        lidas = [sessao.query(rollup).all() for sessao in (s1, s2)
+                 for rollup in (ComercialRollupMensal, ComercialRollupDiario)]
+
+        _gravar_closer(s1, **closer(3, 1, "Eva", "Quiz", vendas=5))      # Chave existente
+        _gravar_closer(s1, **closer(6, 1, "Lia", "Quiz", vendas=1))      # Chave nova
+        _gravar_closer(s2, **closer(3, 1, "Eva", "Quiz", vendas=7))
+        _gravar_closer(s2, **closer(6, 1, "Lia", "Quiz", vendas=2))      # Mesma chave nova
+    finally:
+        s1.close()
+        s2.close()
+
+    conferir("escritas em duas sessões")
+    db = SessionLocal()
+    try:
+        linha = db.query(ComercialRollupMensal).filter_by(origem='closer', mes=6, pessoa="Lia").one()
+        assert (linha.registros, linha.vendas) == (2, 3)
+    finally:
+        db.close()
+
+    # Cada sessão remove um dos dois registros da chave nova: a linha tem que sumir
+    s1, s2 = SessionLocal(), SessionLocal()
+    try:
+        ids = [r.id for r in s1.query(CloserMetrica).filter_by(mes=6, closer="Lia").all()]
+        lidas = [sessao.query(ComercialRollupMensal).all() for sessao in (s1, s2)]
+        for sessao, id_ in zip((s1, s2), ids):
+            registro = sessao.get(CloserMetrica, id_)
+            aplicar_registros(sessao, [registro], sinal=-1)
+            sessao.delete(registro)
+            sessao.commit()
+    finally:
+        s1.close()
+        s2.close()
+
+    db = SessionLocal()
+    try:
+        assert db.query(ComercialRollupMensal).filter_by(origem='closer', mes=6).count() == 0
+    finally:
+        db.close()
+    conferir("delete após escritas em duas sessões")
+    return True
+
+
+if __name__ == "__main__":
+    print("Testing consistência dos rollups comerciais")
+    print("=" * 60)
+
+    init_db()
+    client = TestClient(app)
+
+    tests = [
+        ("Create", test_create),
+        ("Update", test_update),
+        ("Delete", test_delete),
+        ("Importação de CSV", test_import_csv),
+        ("Escritas em duas sessões", test_sessoes_concorrentes),
+    ]
+
+    for name, test_func in tests:
+        print(f"\nTesting {name}...")
+        try:
+            test_func(client)
+            print(f"✓ {name} OK")
+        except Exception as e:
+            print(f"✗ {name} FAILED: {e}")
+
+    print("\n" + "=" * 60)
+    print("All tests completed!")
+    print("=" * 60)
@@ -409,13 +409,21 @@ export const getDashboardGeral = async (mes, ano, funil = 'todos') => {
 // ==================== VENDAS ====================
 
 export const getVendas = async (mes = null, ano = null, closer = null, funil = null) => {
-  const params = {};
+  const params = { limit: 1000 };
   if (mes) params.mes = mes;
   if (ano) params.ano = ano;
   if (closer) params.closer = closer;
   if (funil) params.funil = funil;
-  const response = await api.get('/vendas', { params });
-  return response.data || []; // API retorna array direto
+
+  // API paginada por cursor: busca as páginas até next_cursor vir nulo
+  const vendas = [];
+  let cursor = null;
+  do {
+    const response = await api.get('/vendas', { params: cursor ? { ...params, cursor } : params });
+    vendas.push(...(response.data?.items || []));
+    cursor = response.data?.next_cursor;
+  } while (cursor);
+  return vendas;
 };
 
 export const getVenda = async (id) => {